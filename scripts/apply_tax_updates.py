@@ -1,11 +1,15 @@
 #!/usr/bin/env python3
 
 import json
-import re
 
-# Load the updates
-with open('tax_data_updates.json', 'r') as f:
-    updates = json.load(f)
+from js_literal import parse_export, DEFAULT_TAX_DATA_FILE
+
+UPDATES_FILE = 'tax_data_updates.json'
+
+def load_updates(path=UPDATES_FILE):
+    """Load the updates produced by update_tax_data.py"""
+    with open(path, 'r') as f:
+        return json.load(f)
 
 # Default coordinates for countries (lat, lng)
 DEFAULT_COORDINATES = {
@@ -124,18 +128,43 @@ DEFAULT_COORDINATES = {
     'zimbabwe': [-19.0154, 29.1549]
 }
 
+def _vat_object(vat_info, indent):
+    """JS source of a vat object for the updates of one country"""
+    if 'type' in vat_info and vat_info['type'] == 'GST':
+        return f'''vat: {{
+{indent}  hasVAT: true,
+{indent}  standard: {vat_info['standard']},
+{indent}  notes: "Goods and Services Tax (GST)",
+{indent}  description: "GST {vat_info['standard']}%"
+{indent}}}'''
+
+    reduced_info = ""
+    if 'reduced' in vat_info:
+        reduced_info = f",\n{indent}  reduced: {vat_info['reduced']}"
+    return f'''vat: {{
+{indent}  hasVAT: true,
+{indent}  standard: {vat_info['standard']}{reduced_info},
+{indent}  description: "Standard {vat_info['standard']}%"
+{indent}}}'''
+
+
 def update_tax_data():
     """Update taxData.js with new data from Excel files"""
 
-    # Read the current taxData.js file
-    with open('js/taxData.js', 'r', encoding='utf-8') as f:
+    updates = load_updates()
+
+    # Read and parse the current taxData.js file once; edits are applied by offset afterwards
+    with open(DEFAULT_TAX_DATA_FILE, 'r', encoding='utf-8') as f:
         content = f.read()
+    parsed = parse_export(content)
 
-    print(f"Loaded taxData.js file ({len(content)} characters)")
+    print(f"Loaded taxData.js file ({len(content)} characters, {len(parsed.value)} countries)")
 
     # Track changes
     updated_countries = []
     new_countries = []
+    edits = []  # (start, end, replacement) in the original content
+    new_entries = []
 
     # For each country in our updates
     for country_key, country_data in updates.items():
@@ -143,100 +172,34 @@ def update_tax_data():
         headline_rate = country_data.get('headline_pit_rate')
         vat_info = country_data.get('vat_info', {})
 
-        print(f"\\nProcessing {country_key} ({country_name})...")
+        print(f"\nProcessing {country_key} ({country_name})...")
 
         # Check if this country already exists in taxData.js
-        pattern = rf'"{country_key}"\\s*:\\s*\{{'
-        match = re.search(pattern, content)
+        country_span = parsed.spans.get((country_key,))
 
-        if match:
+        if country_span:
             print(f"  Found existing entry for {country_key}")
-
-            # Find the start and end of this country's data
-            start_pos = match.start()
-            brace_count = 0
-            end_pos = start_pos
-            in_country_block = False
-
-            for i, char in enumerate(content[start_pos:], start_pos):
-                if char == '{':
-                    brace_count += 1
-                    in_country_block = True
-                elif char == '}':
-                    brace_count -= 1
-                    if brace_count == 0 and in_country_block:
-                        end_pos = i + 1
-                        break
-
-            # Extract current country data
-            country_block = content[start_pos:end_pos]
-
-            # Update VAT information if available
+            vat_span = parsed.spans.get((country_key, 'vat'))
             if vat_info:
                 print(f"    Updating VAT: {vat_info}")
-
-                # Check if VAT block already exists
-                vat_pattern = r'vat\\s*:\\s*\{[^}]*\}'
-                vat_match = re.search(vat_pattern, country_block, re.DOTALL)
-
-                # Build new VAT object
-                if 'type' in vat_info and vat_info['type'] == 'GST':
-                    new_vat = f'''vat: {{
-      hasVAT: true,
-      standard: {vat_info['standard']},
-      notes: "Goods and Services Tax (GST)",
-      description: "GST {vat_info['standard']}%"
-    }}'''
-                else:
-                    reduced_info = ""
-                    if 'reduced' in vat_info:
-                        reduced_rates = vat_info['reduced']
-                        reduced_info = f",\\n      reduced: {reduced_rates}"
-
-                    new_vat = f'''vat: {{
-      hasVAT: true,
-      standard: {vat_info['standard']}{reduced_info},
-      description: "Standard {vat_info['standard']}%"
-    }}'''
-
-                if vat_match:
+                if vat_span:
                     # Replace existing VAT block
-                    country_block = country_block[:vat_match.start()] + new_vat + country_block[vat_match.end():]
+                    edits.append((vat_span.key_start, vat_span.value_end, _vat_object(vat_info, "    ")))
                 else:
-                    # Add VAT block before the closing brace
-                    insertion_point = country_block.rfind('}')
-                    if insertion_point > 0:
-                        # Find the last property to add comma if needed
-                        before_closing = country_block[:insertion_point].rstrip()
-                        if not before_closing.endswith(','):
-                            new_vat = ',' + new_vat
-                        country_block = country_block[:insertion_point] + ',' + new_vat + '\\n  ' + country_block[insertion_point:]
-
-            # Add coordinates if missing
-            if country_key in DEFAULT_COORDINATES:
-                coords_pattern = r'coordinates\\s*:\\s*\\[[^\\]]*\\]'
-                if not re.search(coords_pattern, country_block):
-                    print(f"    Adding coordinates: {DEFAULT_COORDINATES[country_key]}")
+                    # Add VAT block after the last property
+                    last_end = max(span.value_end for path, span in parsed.spans.items()
+                                   if len(path) == 2 and path[0] == country_key)
+                    edits.append((last_end, last_end, ",\n    " + _vat_object(vat_info, "    ")))
+
+            # Add coordinates if missing, after countryCode if it exists, otherwise after system
+            if country_key in DEFAULT_COORDINATES and (country_key, 'coordinates') not in parsed.spans:
+                anchor = parsed.spans.get((country_key, 'countryCode')) or parsed.spans.get((country_key, 'system'))
+                if anchor:
                     coords = DEFAULT_COORDINATES[country_key]
-                    new_coords = f'coordinates: [{coords[0]}, {coords[1]}]'
-
-                    # Add after countryCode if it exists, otherwise after system
-                    country_code_pattern = r'(countryCode\\s*:\\s*"[^"]*",?)\\s*'
-                    country_code_match = re.search(country_code_pattern, country_block)
-
-                    if country_code_match:
-                        insert_pos = country_code_match.end()
-                        country_block = country_block[:insert_pos] + f'\\n    {new_coords},' + country_block[insert_pos:]
-                    else:
-                        # Look for system property
-                        system_pattern = r'(system\\s*:\\s*"[^"]*",?)\\s*'
-                        system_match = re.search(system_pattern, country_block)
-                        if system_match:
-                            insert_pos = system_match.end()
-                            country_block = country_block[:insert_pos] + f'\\n    {new_coords},' + country_block[insert_pos:]
+                    print(f"    Adding coordinates: {coords}")
+                    edits.append((anchor.value_end, anchor.value_end,
+                                  f",\n    coordinates: [{coords[0]}, {coords[1]}]"))
 
-            # Replace the country block in the main content
-            content = content[:start_pos] + country_block + content[end_pos:]
             updated_countries.append(country_key)
 
         else:
@@ -249,56 +212,39 @@ def update_tax_data():
             tax_system = "flat"  # Default assumption based on headline rate
 
             # Build VAT info
-            vat_block = ""
-            if vat_info:
-                if 'type' in vat_info and vat_info['type'] == 'GST':
-                    vat_block = f''',
-    vat: {{
-      hasVAT: true,
-      standard: {vat_info['standard']},
-      notes: "Goods and Services Tax (GST)",
-      description: "GST {vat_info['standard']}%"
-    }}'''
-                else:
-                    reduced_info = ""
-                    if 'reduced' in vat_info:
-                        reduced_rates = vat_info['reduced']
-                        reduced_info = f",\\n      reduced: {reduced_rates}"
-
-                    vat_block = f''',
-    vat: {{
-      hasVAT: true,
-      standard: {vat_info['standard']}{reduced_info},
-      description: "Standard {vat_info['standard']}%"
-    }}'''
+            vat_block = ",\n    " + _vat_object(vat_info, "    ") if vat_info else ""
 
             # Build country entry
-            new_entry = f'''  "{country_key}": {{
+            new_entries.append(f'''  "{country_key}": {{
     name: "{country_name}",
     currency: "USD", // TODO: Update with correct currency
     system: "{tax_system}",
     countryCode: "{country_key[:2].upper()}",
     coordinates: [{coords[0]}, {coords[1]}],
     brackets: [{{min: 0, max: null, rate: {headline_rate or 0}}}]{vat_block}
-  }},'''
-
-            # Find a good place to insert (before the closing brace of taxData)
-            # Look for the last country entry
-            last_country_pattern = r'(.*"},)(\s*};?\s*$)'
-            match = re.search(last_country_pattern, content, re.DOTALL)
+  }},''')
+            new_countries.append(country_key)
+
+    # New countries go after the last entry of taxData
+    if new_entries:
+        insert_pos = max(span.value_end for path, span in parsed.spans.items() if len(path) == 1)
+        separator = content[insert_pos:parsed.end - 1].lstrip()
+        if separator.startswith(','):
+            insert_pos = content.index(',', insert_pos) + 1
+            prefix = ''
+        else:
+            prefix = ','
+        edits.append((insert_pos, insert_pos, prefix + '\n' + '\n'.join(new_entries)))
 
-            if match:
-                insert_pos = match.end(1)
-                content = content[:insert_pos] + '\\n' + new_entry + content[insert_pos:]
-                new_countries.append(country_key)
-            else:
-                print(f"    Could not find insertion point for {country_key}")
+    # Apply the edits back to front, so the offsets of the earlier ones stay valid
+    for start, end, replacement in sorted(edits, reverse=True):
+        content = content[:start] + replacement + content[end:]
 
     # Write the updated content back
-    with open('js/taxData.js', 'w', encoding='utf-8') as f:
+    with open(DEFAULT_TAX_DATA_FILE, 'w', encoding='utf-8') as f:
         f.write(content)
 
-    print(f"\\n✅ Updated taxData.js successfully!")
+    print(f"\n✅ Updated taxData.js successfully!")
     print(f"   Updated existing countries: {len(updated_countries)}")
     print(f"   Added new countries: {len(new_countries)}")
 
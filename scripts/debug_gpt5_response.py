@@ -27,7 +27,8 @@ def debug_gpt5_response():
         request = LLMRequest(
             prompt="Return the JSON: {\"test\": \"hello world\", \"number\": 42}",
             model="gpt-5-nano",
-            temperature=0.7
+            temperature=0.7,
+            keep_raw_response=True  # Printed below
         )
 
         print(f"[REQUEST] Sending test request to {request.model}")
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Extraction Manifest for Incremental Runs
+
+Records, per country, what the last validated extraction was made from so
+an unchanged country can be reused instead of being sent to the LLM again:
+
+- input_hash: sha256 of the taxation file content
+- prompt_version: version of the analysis prompt (template and instructions)
+- model: the model the extraction was requested from
+- data: the validated country data
+
+A lookup only matches when all three inputs are the same. The manifest is
+one JSON file, written atomically (temporary file + rename) by save(); a
+missing or unreadable file simply starts an empty manifest.
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+from typing import Any, Dict, Optional
+
+DEFAULT_MANIFEST_FILE = "manifest.json"
+MANIFEST_FORMAT = 1
+
+
+def content_hash(text: str) -> str:
+    """sha256 hex digest of a text"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class ExtractionManifest:
+    """Thread-safe map of country key to its last validated extraction"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.reused = 0
+        self.recorded = 0
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._entries: Dict[str, Dict[str, Any]] = self._load()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[WARNING] Ignoring unreadable manifest {self.path}: {e}")
+            return {}
+        if manifest.get("format") != MANIFEST_FORMAT:
+            print(f"[WARNING] Ignoring manifest {self.path} with unknown format {manifest.get('format')}")
+            return {}
+        return manifest.get("countries", {})
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def lookup(self, country_key: str, input_hash: str, prompt_version: str, model: str) -> Optional[Dict]:
+        """Validated data of an extraction made from the same inputs, or None"""
+        with self._lock:
+            entry = self._entries.get(country_key)
+            if (entry is None or entry["input_hash"] != input_hash
+                    or entry["prompt_version"] != prompt_version or entry["model"] != model):
+                return None
+            self.reused += 1
+            return entry["data"]
+
+    def record(self, country_key: str, input_hash: str, prompt_version: str, model: str, data: Dict):
+        """Remember a validated extraction"""
+        with self._lock:
+            self._entries[country_key] = {
+                "input_hash": input_hash,
+                "prompt_version": prompt_version,
+                "model": model,
+                "updated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "data": data,
+            }
+            self.recorded += 1
+            self._dirty = True
+
+    def save(self) -> bool:
+        """Write the manifest if anything was recorded; False when nothing needed writing"""
+        with self._lock:
+            if not self._dirty:
+                return False
+            manifest = {"format": MANIFEST_FORMAT, "countries": self._entries}
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(manifest, f, indent=2, ensure_ascii=False, sort_keys=True)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+            return True
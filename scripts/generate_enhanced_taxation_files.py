@@ -4,13 +4,30 @@ Enhanced taxation file generator that creates well-formatted content
 using LLM to restructure Wikipedia content
 """
 
-import requests
 import time
 import os
 import concurrent.futures
 import threading
 from urllib.parse import quote
 
+import http_client
+from llm_providers import (
+    LLMProviderManager,
+    LLMRequest,
+    LLMResponse,
+    OllamaProvider,
+    OpenAIProvider,
+    create_ollama_provider,
+    create_default_manager,
+    DEFAULT_KEEP_ALIVE
+)
+from llm_cache import LLMResponseCache, DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES
+from llm_limits import OVERLOAD_STATUS_CODES
+from llm_tokens import PromptBudget, PromptTooLargeError, CONTENT_PLACEHOLDER, DEFAULT_OUTPUT_TOKENS
+from llm_metrics import summary_lines
+from metrics import REGISTRY
+
+
 # ANSI Color codes for terminal output
 class Colors:
     RED = '\033[91m'
@@ -23,20 +40,6 @@ class Colors:
     RESET = '\033[0m'
     BOLD = '\033[1m'
 
-# Import LLM provider system
-try:
-    from llm_providers import (
-        LLMProviderManager,
-        LLMRequest,
-        LLMResponse,
-        OllamaProvider,
-        OpenAIProvider,
-        create_default_manager
-    )
-    LLM_PROVIDERS_AVAILABLE = True
-except ImportError:
-    print(f"{Colors.YELLOW}[WARNING] LLM providers module not found. Using legacy direct requests.{Colors.RESET}")
-    LLM_PROVIDERS_AVAILABLE = False
 
 # List of all countries
 COUNTRIES = [
@@ -64,6 +67,74 @@ URL_MAPPING = {
     "united_states": "United_States"
 }
 
+# Providers for the Ollama proxy, shared by all worker threads.
+# main() enables adaptive concurrency and the on-disk response cache on this manager.
+llm_manager = LLMProviderManager()
+_llm_manager_lock = threading.Lock()
+
+# Context size override from --context-window; None looks it up from the model name
+context_window_override = None
+
+# Tokens kept free for one chunk summary
+CHUNK_SUMMARY_TOKENS = 1024
+
+
+def get_prompt_budget(model, output_tokens=DEFAULT_OUTPUT_TOKENS):
+    """Prompt budget for model, honouring --context-window"""
+    return PromptBudget(model, context_window_override, output_tokens=output_tokens)
+
+
+def get_chat_provider(ollama_url):
+    """Return the (cache-wrapped) Ollama provider for ollama_url"""
+    name = f"ollama@{ollama_url}"
+    with _llm_manager_lock:
+        if name not in llm_manager.providers:
+            llm_manager.add_provider(create_ollama_provider(ollama_url, keep_alive=DEFAULT_KEEP_ALIVE), name)
+        return llm_manager.get_provider(name)
+
+
+def chat_with_retries(prompt, ollama_url, model, thread_id, label, max_retries=3, context_tokens=None):
+    """Send a chat prompt, retrying 5xx/429 responses and connection errors with exponential backoff.
+
+    context_tokens sizes the server's context (num_ctx) to the prompt and reply.
+    Returns the response content, or None once the retries are exhausted.
+    """
+    provider = get_chat_provider(ollama_url)
+    request = LLMRequest(prompt=prompt, model=model, context_tokens=context_tokens)
+
+    for attempt in range(max_retries):
+        response = provider.generate(request)
+
+        if response.success:
+            if response.cached:
+                print(f"[LLM-CACHE-HIT] Thread-{thread_id} {label} served from response cache")
+            return response.content
+
+        if response.status_code is None:
+            # Connection error, timeout or undecodable reply
+            if attempt < max_retries - 1:
+                wait_time = 2 ** attempt
+                print(f"[RETRY] Thread-{thread_id} {label} failed: {response.error}, retrying in {wait_time}s (attempt {attempt + 1}/{max_retries})")
+                time.sleep(wait_time)
+                continue
+            print(f"{Colors.RED}[ERROR] Thread-{thread_id} {label} failed after {max_retries} attempts: {response.error}{Colors.RESET}")
+            return None
+
+        if response.status_code in OVERLOAD_STATUS_CODES:
+            if attempt < max_retries - 1:
+                wait_time = 2 ** attempt  # Exponential backoff: 1s, 2s, 4s
+                print(f"[RETRY] Thread-{thread_id} {label} failed with HTTP {response.status_code}, retrying in {wait_time}s (attempt {attempt + 1}/{max_retries})")
+                time.sleep(wait_time)
+                continue
+            print(f"{Colors.RED}[ERROR] Thread-{thread_id} {label} failed with HTTP {response.status_code} after {max_retries} attempts{Colors.RESET}")
+            return None
+
+        print(f"{Colors.RED}[ERROR] Thread-{thread_id} {label} failed with HTTP {response.status_code}{Colors.RESET}")
+        return None
+
+    return None
+
+
 def get_wikipedia_url(country):
     """Generate Wikipedia taxation URL for a country"""
     if country in URL_MAPPING:
@@ -84,9 +155,9 @@ def fetch_raw_content(country, web_extractor_url="http://localhost:5000"):
         print(f"[API-PAYLOAD] {request_payload}")
         print(f"[API-TIMEOUT] Request timeout: 30 seconds")
 
-        response = requests.post(
+        response = http_client.post_json(
             f"{web_extractor_url}/extract",
-            json=request_payload,
+            request_payload,
             timeout=30
         )
 
@@ -118,7 +189,7 @@ def list_txt_files(web_extractor_url="http://localhost:5000"):
     try:
         print(f"[API-TIMEOUT] Request timeout: 30 seconds")
 
-        response = requests.get(
+        response = http_client.get(
             f"{web_extractor_url}/txt-files",
             timeout=30
         )
@@ -178,7 +249,7 @@ def fetch_txt_file_content(filename, web_extractor_url="http://localhost:5000"):
     try:
         print(f"[API-TIMEOUT] Request timeout: 30 seconds")
 
-        response = requests.get(
+        response = http_client.get(
             f"{web_extractor_url}/files/{filename}",
             timeout=30
         )
@@ -198,18 +269,14 @@ def fetch_txt_file_content(filename, web_extractor_url="http://localhost:5000"):
         print(f"{Colors.RED}[ERROR] Failed to fetch {filename}: {e}{Colors.RESET}")
         return None
 
-def chunk_content(content, chunk_size=6000):
-    """Split content into chunks of specified size"""
-    chunks = []
-    for i in range(0, len(content), chunk_size):
-        chunk = content[i:i + chunk_size]
-        chunks.append(chunk)
-    return chunks
-
-def process_chunk_with_llm(country, chunk, chunk_number, total_chunks, ollama_url="http://localhost:5001", model="gemma3:12b", thread_id=0, provider="ollama", max_retries=3):
-    """Process individual chunk with LLM with retry logic for 500 errors"""
+def chunk_content(country, content, model="gemma3:12b"):
+    """Split content into the largest chunks whose summary prompt fits the model's context"""
+    budget = get_prompt_budget(model, CHUNK_SUMMARY_TOKENS)
+    return budget.split(content, build_chunk_prompt(country, CONTENT_PLACEHOLDER, 99, 99))
 
-    prompt = f"""
+def build_chunk_prompt(country, chunk, chunk_number, total_chunks):
+    """Prompt that summarizes the taxation information of one content chunk"""
+    return f"""
     You are processing chunk {chunk_number} of {total_chunks} from Wikipedia content about taxation in {country.replace('_', ' ').title()}.
 
     Extract and summarize ONLY the taxation-related information from this content chunk:
@@ -229,57 +296,24 @@ def process_chunk_with_llm(country, chunk, chunk_number, total_chunks, ollama_ur
     If no taxation information is found, respond with "No taxation information in this chunk."
     """
 
-    print(f"[LLM-CHUNK] Thread-{thread_id} Processing chunk {chunk_number}/{total_chunks} ({len(chunk)} chars)")
+def process_chunk_with_llm(country, chunk, chunk_number, total_chunks, ollama_url="http://localhost:5001", model="gemma3:12b", thread_id=0, max_retries=3):
+    """Summarize one chunk with the LLM (retries are handled by chat_with_retries)"""
 
-    request_payload = {
-        "model": model,
-        "messages": [{"role": "user", "content": prompt}],
-        "stream": False
-    }
+    prompt = build_chunk_prompt(country, chunk, chunk_number, total_chunks)
+    budget = get_prompt_budget(model, CHUNK_SUMMARY_TOKENS)
+    context_tokens = budget.context_for(budget.prompt_tokens(prompt))
 
-    for attempt in range(max_retries):
-        try:
-            response = requests.post(
-                f"{ollama_url}/chat",
-                json=request_payload,
-                timeout=300
-            )
-
-            if response.status_code == 200:
-                llm_response = response.json()
-                content = llm_response.get('message', {}).get('content', '')
-                print(f"[LLM-CHUNK-SUCCESS] Thread-{thread_id} Chunk {chunk_number} processed ({len(content)} chars)")
-                return content
-            elif response.status_code == 500:
-                if attempt < max_retries - 1:
-                    wait_time = 2 ** attempt  # Exponential backoff: 1s, 2s, 4s
-                    print(f"[RETRY] Thread-{thread_id} Chunk {chunk_number} failed with HTTP 500, retrying in {wait_time}s (attempt {attempt + 1}/{max_retries})")
-                    time.sleep(wait_time)
-                    continue
-                else:
-                    print(f"{Colors.RED}[ERROR] Thread-{thread_id} Chunk {chunk_number} failed with HTTP 500 after {max_retries} attempts{Colors.RESET}")
-                    return None
-            else:
-                print(f"{Colors.RED}[ERROR] Thread-{thread_id} Chunk {chunk_number} failed with HTTP {response.status_code}{Colors.RESET}")
-                return None
-        except Exception as e:
-            if attempt < max_retries - 1:
-                wait_time = 2 ** attempt
-                print(f"[RETRY] Thread-{thread_id} Chunk {chunk_number} processing failed: {e}, retrying in {wait_time}s (attempt {attempt + 1}/{max_retries})")
-                time.sleep(wait_time)
-                continue
-            else:
-                print(f"{Colors.RED}[ERROR] Thread-{thread_id} Chunk {chunk_number} processing failed after {max_retries} attempts: {e}{Colors.RESET}")
-                return None
+    print(f"[LLM-CHUNK] Thread-{thread_id} Processing chunk {chunk_number}/{total_chunks} ({len(chunk)} chars, {context_tokens} token context)")
 
-    return None
-
-def aggregate_chunks_with_llm(country, chunk_summaries, ollama_url="http://localhost:5001", model="gemma3:12b", thread_id=0, max_retries=3):
-    """Aggregate processed chunks into final structured format with retry logic for 500 errors"""
-
-    combined_summaries = "\n\n".join([f"Summary {i+1}:\n{summary}" for i, summary in enumerate(chunk_summaries) if summary and summary.strip() != "No taxation information in this chunk."])
+    content = chat_with_retries(prompt, ollama_url, model, thread_id, f"Chunk {chunk_number}", max_retries,
+                                context_tokens)
+    if content is not None:
+        print(f"[LLM-CHUNK-SUCCESS] Thread-{thread_id} Chunk {chunk_number} processed ({len(content)} chars)")
+    return content
 
-    prompt = f"""
+def build_aggregate_prompt(country, combined_summaries):
+    """Prompt that merges chunk summaries into the final taxation summary"""
+    return f"""
     Please create a comprehensive, well-formatted taxation summary for {country.replace('_', ' ').title()} by combining the following extracted taxation information:
 
     {combined_summaries}
@@ -324,66 +358,43 @@ def aggregate_chunks_with_llm(country, chunk_summaries, ollama_url="http://local
     Make it comprehensive but concise, focusing on information needed for tax calculations.
     """
 
-    print(f"[LLM-AGGREGATE] Thread-{thread_id} Aggregating {len(chunk_summaries)} chunk summaries")
-
-    request_payload = {
-        "model": model,
-        "messages": [{"role": "user", "content": prompt}],
-        "stream": False
-    }
-
-    for attempt in range(max_retries):
-        try:
-            response = requests.post(
-                f"{ollama_url}/chat",
-                json=request_payload,
-                timeout=300
-            )
-
-            if response.status_code == 200:
-                llm_response = response.json()
-                content = llm_response.get('message', {}).get('content', '')
-                print(f"[LLM-AGGREGATE-SUCCESS] Thread-{thread_id} Final aggregation completed ({len(content)} chars)")
-                return content
-            elif response.status_code == 500:
-                if attempt < max_retries - 1:
-                    wait_time = 2 ** attempt  # Exponential backoff: 1s, 2s, 4s
-                    print(f"[RETRY] Thread-{thread_id} Aggregation failed with HTTP 500, retrying in {wait_time}s (attempt {attempt + 1}/{max_retries})")
-                    time.sleep(wait_time)
-                    continue
-                else:
-                    print(f"{Colors.RED}[ERROR] Thread-{thread_id} Aggregation failed with HTTP 500 after {max_retries} attempts{Colors.RESET}")
-                    return None
-            else:
-                print(f"{Colors.RED}[ERROR] Thread-{thread_id} Aggregation failed with HTTP {response.status_code}{Colors.RESET}")
-                return None
-        except Exception as e:
-            if attempt < max_retries - 1:
-                wait_time = 2 ** attempt
-                print(f"[RETRY] Thread-{thread_id} Aggregation failed: {e}, retrying in {wait_time}s (attempt {attempt + 1}/{max_retries})")
-                time.sleep(wait_time)
-                continue
-            else:
-                print(f"{Colors.RED}[ERROR] Thread-{thread_id} Aggregation failed after {max_retries} attempts: {e}{Colors.RESET}")
-                return None
-
-    return None
+def aggregate_chunks_with_llm(country, chunk_summaries, ollama_url="http://localhost:5001", model="gemma3:12b", thread_id=0, max_retries=3):
+    """Aggregate chunk summaries into the final summary (retries are handled by chat_with_retries)"""
+
+    summaries = [summary for summary in chunk_summaries if summary and summary.strip() != "No taxation information in this chunk."]
+
+    # Summaries that do not fit one prompt are aggregated in groups, then the group results are aggregated
+    budget = get_prompt_budget(model)
+    groups = budget.pack(summaries, build_aggregate_prompt(country, CONTENT_PLACEHOLDER), separator="\n\nSummary 00:\n")
+    if 1 < len(groups) < len(summaries):
+        print(f"[LLM-AGGREGATE] Thread-{thread_id} {len(summaries)} summaries exceed the context window, aggregating in {len(groups)} groups")
+        partials = []
+        for group in groups:
+            partial = aggregate_chunks_with_llm(country, group, ollama_url, model, thread_id, max_retries)
+            if partial:
+                partials.append(partial)
+        if not partials:
+            return None
+        return aggregate_chunks_with_llm(country, partials, ollama_url, model, thread_id, max_retries)
 
-def format_with_llm(country, raw_content, ollama_url="http://localhost:5001", model="gemma3:12b", thread_id=0):
-    """Use LLM to format raw Wikipedia content into structured taxation info with chunked processing"""
+    combined_summaries = "\n\n".join([f"Summary {i+1}:\n{summary}" for i, summary in enumerate(summaries)])
+    prompt = build_aggregate_prompt(country, combined_summaries)
+    try:
+        context_tokens = budget.context_for(budget.check(prompt))
+    except PromptTooLargeError as e:
+        print(f"{Colors.RED}[ERROR] Thread-{thread_id} Aggregation prompt too large: {e}{Colors.RESET}")
+        return None
 
-    print(f"[LLM-REQUEST] Thread-{thread_id} Starting chunked processing")
-    print(f"[LLM-MODEL] Thread-{thread_id} Using model: {model}")
-    print(f"[LLM-CONTENT] Thread-{thread_id} Processing {len(raw_content)} characters of Wikipedia content")
-    print(f"[LLM-TIMEOUT] Thread-{thread_id} Request timeout: 300 seconds per chunk")
+    print(f"[LLM-AGGREGATE] Thread-{thread_id} Aggregating {len(summaries)} chunk summaries")
 
-    # Check if content needs chunking
-    chunk_size = 6000
-    if len(raw_content) <= chunk_size:
-        print(f"[LLM-SINGLE] Thread-{thread_id} Content fits in single request, processing normally")
+    content = chat_with_retries(prompt, ollama_url, model, thread_id, "Aggregation", max_retries, context_tokens)
+    if content is not None:
+        print(f"[LLM-AGGREGATE-SUCCESS] Thread-{thread_id} Final aggregation completed ({len(content)} chars)")
+    return content
 
-        # Use original single-request approach for smaller content
-        prompt = f"""
+def build_format_prompt(country, raw_content):
+    """Prompt that reformats content small enough for a single request"""
+    return f"""
         Please reformat the following Wikipedia content about taxation in {country.replace('_', ' ').title()} into a clear, structured format suitable for tax calculation analysis.
 
         Original Wikipedia content:
@@ -427,56 +438,33 @@ def format_with_llm(country, raw_content, ollama_url="http://localhost:5001", mo
         Make it comprehensive but concise, focusing on information needed for tax calculations.
         """
 
-        request_payload = {
-            "model": model,
-            "messages": [{"role": "user", "content": prompt}],
-            "stream": False
-        }
+def format_with_llm(country, raw_content, ollama_url="http://localhost:5001", model="gemma3:12b", thread_id=0):
+    """Use LLM to format raw Wikipedia content into structured taxation info with chunked processing"""
 
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                response = requests.post(
-                    f"{ollama_url}/chat",
-                    json=request_payload,
-                    timeout=300
-                )
-
-                if response.status_code == 200:
-                    llm_response = response.json()
-                    content = llm_response.get('message', {}).get('content', '')
-                    print(f"[LLM-SUCCESS] Thread-{thread_id} Single-request processing completed ({len(content)} chars)")
-                    return content
-                elif response.status_code == 500:
-                    if attempt < max_retries - 1:
-                        wait_time = 2 ** attempt  # Exponential backoff: 1s, 2s, 4s
-                        print(f"[RETRY] Thread-{thread_id} Single request failed with HTTP 500, retrying in {wait_time}s (attempt {attempt + 1}/{max_retries})")
-                        time.sleep(wait_time)
-                        continue
-                    else:
-                        print(f"{Colors.RED}[ERROR] Thread-{thread_id} Single request failed with HTTP 500 after {max_retries} attempts{Colors.RESET}")
-                        return None
-                else:
-                    print(f"{Colors.RED}[ERROR] Thread-{thread_id} Single request failed with HTTP {response.status_code}{Colors.RESET}")
-                    return None
-            except Exception as e:
-                if attempt < max_retries - 1:
-                    wait_time = 2 ** attempt
-                    print(f"[RETRY] Thread-{thread_id} Single request failed: {e}, retrying in {wait_time}s (attempt {attempt + 1}/{max_retries})")
-                    time.sleep(wait_time)
-                    continue
-                else:
-                    print(f"{Colors.RED}[ERROR] Thread-{thread_id} Single request failed after {max_retries} attempts: {e}{Colors.RESET}")
-                    return None
+    print(f"[LLM-REQUEST] Thread-{thread_id} Starting chunked processing")
+    print(f"[LLM-MODEL] Thread-{thread_id} Using model: {model}")
+    print(f"[LLM-CONTENT] Thread-{thread_id} Processing {len(raw_content)} characters of Wikipedia content")
+    print(f"[LLM-TIMEOUT] Thread-{thread_id} Request timeout: 300 seconds per chunk")
 
-        return None
+    # Chunk only when the single-request prompt does not fit the model's context window
+    budget = get_prompt_budget(model)
+    prompt = build_format_prompt(country, raw_content)
+    prompt_tokens = budget.prompt_tokens(prompt)
+    if prompt_tokens <= budget.input_limit:
+        print(f"[LLM-SINGLE] Thread-{thread_id} Content fits in single request (~{prompt_tokens}/{budget.input_limit} tokens), processing normally")
+
+        content = chat_with_retries(prompt, ollama_url, model, thread_id, "Single request",
+                                    context_tokens=budget.context_for(prompt_tokens))
+        if content is not None:
+            print(f"[LLM-SUCCESS] Thread-{thread_id} Single-request processing completed ({len(content)} chars)")
+        return content
 
     else:
         # Use chunked processing for large content
-        print(f"[LLM-CHUNKED] Thread-{thread_id} Content requires chunking (>{chunk_size} chars)")
+        print(f"[LLM-CHUNKED] Thread-{thread_id} Content requires chunking (~{prompt_tokens} tokens > {budget.input_limit})")
 
-        # Step 1: Split content into chunks
-        chunks = chunk_content(raw_content, chunk_size)
+        # Step 1: Split content into the largest chunks that fit
+        chunks = chunk_content(country, raw_content, model)
         print(f"[LLM-CHUNKS] Thread-{thread_id} Split into {len(chunks)} chunks")
 
         # Step 2: Process each chunk
@@ -690,6 +678,14 @@ def process_existing_txt_files(web_extractor_url="http://localhost:5000", ollama
 
     return failed_count == 0
 
+def report_metrics(metrics_dir: str):
+    """Print per-model call metrics and save them as Prometheus text and JSON"""
+    print(f"\n[METRICS] Outbound calls:")
+    for line in summary_lines():
+        print(f"   {line}")
+    prom_path, json_path = REGISTRY.write(metrics_dir)
+    print(f"[METRICS] Saved {prom_path} and {json_path}")
+
 def main():
     """Generate enhanced taxation files for all countries"""
     import argparse
@@ -707,6 +703,12 @@ Examples:
 
   # Process existing taxation files from web extractor
   python scripts/generate_enhanced_taxation_files.py --process-existing
+
+  # More workers (and pooled connections) with gzip-compressed prompts
+  python scripts/generate_enhanced_taxation_files.py --workers 8 --compress-requests
+
+  # Re-query the LLM instead of reusing cached chunk summaries
+  python scripts/generate_enhanced_taxation_files.py --no-cache
         """
     )
 
@@ -722,8 +724,74 @@ Examples:
         help="Process existing taxation txt files from web extractor and save to scripts/data"
     )
 
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of worker threads (default: 3, or 1 with --process-existing); also sizes the HTTP connection pool"
+    )
+
+    parser.add_argument(
+        "--compress-requests",
+        action="store_true",
+        help="Gzip-compress large request bodies sent to the Ollama proxy (proxy must accept Content-Encoding: gzip)"
+    )
+
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Disable the on-disk LLM response cache"
+    )
+
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        default=DEFAULT_CACHE_DIR,
+        help=f"Directory of the LLM response cache (default: {DEFAULT_CACHE_DIR})"
+    )
+
+    parser.add_argument(
+        "--cache-max-mb",
+        type=int,
+        default=DEFAULT_MAX_BYTES // (1024 * 1024),
+        help=f"Evict least recently used cache entries above this size (default: {DEFAULT_MAX_BYTES // (1024 * 1024)})"
+    )
+
+    parser.add_argument(
+        "--no-adaptive-concurrency",
+        action="store_true",
+        help="Always keep --workers requests in flight instead of backing off when the proxy slows down or returns 5xx/429"
+    )
+
+    parser.add_argument(
+        "--context-window",
+        type=int,
+        help="Context size of the model in tokens (default: looked up from the model name); sets the chunk size"
+    )
+
+    parser.add_argument(
+        "--metrics-dir",
+        default="logs",
+        help="Directory for the end-of-run metrics (Prometheus text and JSON snapshot; default: logs)"
+    )
+
     args = parser.parse_args()
 
+    global context_window_override
+    context_window_override = args.context_window
+
+    default_workers = 1 if args.process_existing else 3  # Conservative number for stability
+    max_workers = args.workers or default_workers
+    http_client.configure_http_pool(pool_size=max_workers, compress_requests=args.compress_requests)
+    llm_manager.enable_metrics()
+    if not args.no_adaptive_concurrency:
+        # Workers above the adaptive limit wait for a slot instead of overloading the proxy
+        llm_manager.enable_adaptive_concurrency(initial_limit=max_workers, max_limit=max_workers)
+    if not args.no_cache:
+        llm_manager.enable_cache(LLMResponseCache(args.cache_dir, args.cache_max_mb * 1024 * 1024))
+    # Workers that build the same chunk prompt (e.g. near-empty files) share one call
+    llm_manager.enable_single_flight()
+
     print("Enhanced Taxation File Generator")
     print("=" * 50)
 
@@ -732,7 +800,7 @@ Examples:
         print("[MODE] List txt files only")
         try:
             print("[API-CHECK] Testing Web Content Extractor")
-            web_response = requests.get("http://localhost:5000/health", timeout=5)
+            web_response = http_client.get("http://localhost:5000/health", timeout=5)
             print(f"[API-RESPONSE] HTTP {web_response.status_code} from Web Content Extractor")
 
             if web_response.status_code == 200:
@@ -757,16 +825,17 @@ Examples:
         print("[MODE] Process existing taxation files from web extractor")
         try:
             print("[API-CHECK] Testing required services")
-            web_response = requests.get("http://localhost:5000/health", timeout=5)
+            web_response = http_client.get("http://localhost:5000/health", timeout=5)
             print(f"[API-RESPONSE] HTTP {web_response.status_code} from Web Content Extractor")
 
-            ollama_response = requests.get("http://localhost:5001/health", timeout=5)
+            ollama_response = http_client.get("http://localhost:5001/health", timeout=5)
             print(f"[API-RESPONSE] HTTP {ollama_response.status_code} from Ollama Proxy")
 
             if web_response.status_code == 200 and ollama_response.status_code == 200:
                 print(f"\n{Colors.GREEN}[API-OK] Both services are running{Colors.RESET}")
                 print("\n[PROCESS-START] Starting existing file processing")
-                success = process_existing_txt_files("http://localhost:5000", "http://localhost:5001")
+                success = process_existing_txt_files("http://localhost:5000", "http://localhost:5001", max_workers)
+                report_metrics(args.metrics_dir)
                 return 0 if success else 1
             else:
                 print(f"{Colors.RED}[ERROR] Required services not available{Colors.RESET}")
@@ -783,16 +852,16 @@ Examples:
     print("[API-CHECK] Testing required services")
     try:
         print("[API-CALL] GET http://localhost:5000/health - Web Content Extractor")
-        web_response = requests.get("http://localhost:5000/health", timeout=5)
+        web_response = http_client.get("http://localhost:5000/health", timeout=5)
         print(f"[API-RESPONSE] HTTP {web_response.status_code} from Web Content Extractor")
 
         print("[API-CALL] GET http://localhost:5001/health - Ollama Proxy")
-        ollama_response = requests.get("http://localhost:5001/health", timeout=5)
+        ollama_response = http_client.get("http://localhost:5001/health", timeout=5)
         print(f"[API-RESPONSE] HTTP {ollama_response.status_code} from Ollama Proxy")
 
         # Check available models
         print("[API-CALL] GET http://localhost:5001/models - Fetching available models")
-        models_response = requests.get("http://localhost:5001/models", timeout=10)
+        models_response = http_client.get("http://localhost:5001/models", timeout=10)
         if models_response.status_code == 200:
             models = models_response.json().get('models', [])
             available_models = [model['name'] for model in models]
@@ -825,7 +894,6 @@ Examples:
         print(f"{Colors.RED}[ERROR] Please ensure both web extractor and Ollama proxy are running{Colors.RESET}")
         return 1
 
-    max_workers = 3  # Conservative number for stability
     print(f"[PARALLEL] Using {max_workers} worker threads for enhanced generation")
 
     success_count = 0
@@ -872,6 +940,7 @@ Examples:
         print(f"\n[NEXT] Run the tax data updater:")
         print(f"python scripts/tax_data_updater.py")
 
+    report_metrics(args.metrics_dir)
     return 0 if failed_count == 0 else 1
 
 if __name__ == "__main__":
@@ -8,6 +8,8 @@ import time
 import os
 from urllib.parse import quote
 
+import http_client
+
 # List of all countries you mentioned
 COUNTRIES = [
     "albania", "andorra", "argentina", "australia", "austria", "belgium",
@@ -65,9 +67,9 @@ def fetch_taxation_content(country, web_extractor_url="http://localhost:5000"):
         print(f"[API-PAYLOAD] {request_payload}")
         print(f"[API-TIMEOUT] Request timeout: 30 seconds")
 
-        response = requests.post(
+        response = http_client.post_json(
             f"{web_extractor_url}/extract",
-            json=request_payload,
+            request_payload,
             timeout=30
         )
 
@@ -116,7 +118,7 @@ def main():
     print("[API-CHECK] Testing Web Content Extractor service")
     try:
         print("[API-CALL] GET http://localhost:5000/health")
-        response = requests.get("http://localhost:5000/health", timeout=5)
+        response = http_client.get("http://localhost:5000/health", timeout=5)
         print(f"[API-RESPONSE] HTTP {response.status_code} from Web Content Extractor")
         if response.status_code != 200:
             print("[ERROR] Web extractor service not available at http://localhost:5000")
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP Session Layer
+
+Every call to the Web Content Extractor and the Ollama proxy goes through one
+pooled, keep-alive requests.Session instead of module-level requests.get/post,
+so TCP connections are reused across calls and threads.
+
+- configure_http_pool() sizes the connection pool (scripts tie it to --workers)
+- post_json() optionally gzip-compresses large request bodies (LLM prompts)
+- get() and post_json() record latency, status and in-flight count per host
+  and endpoint in metrics.REGISTRY (streamed responses: until the headers)
+
+requests is imported with the first session, so scripts that never make a
+request (--help, cached runs) do not pay for it.
+"""
+
+import gzip
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+from metrics import REGISTRY
+
+DEFAULT_POOL_SIZE = 10
+
+# Number of distinct hosts kept in the adapter's pool cache
+DEFAULT_POOL_HOSTS = 8
+
+# Bodies smaller than this are sent uncompressed even when compression is on
+COMPRESSION_MIN_BYTES = 1024
+
+_session: Optional["requests.Session"] = None
+_session_lock = threading.Lock()
+_pool_size = DEFAULT_POOL_SIZE
+_compress_requests = False
+
+
+def __getattr__(name: str):
+    # http_client.RequestException imports requests only when an except clause needs it
+    if name == "RequestException":
+        import requests
+        return requests.exceptions.RequestException
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _build_session(pool_size: int) -> "requests.Session":
+    """Create a session whose adapters keep up to pool_size connections per host"""
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=DEFAULT_POOL_HOSTS, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def configure_http_pool(pool_size: Optional[int] = None, compress_requests: Optional[bool] = None):
+    """Configure the shared session.
+
+    pool_size should match the number of worker threads so no worker waits
+    for (or discards) a connection; compress_requests enables gzip bodies.
+    """
+    global _session, _pool_size, _compress_requests
+
+    with _session_lock:
+        if compress_requests is not None:
+            _compress_requests = compress_requests
+
+        if pool_size is not None:
+            pool_size = max(1, pool_size)
+            if pool_size != _pool_size:
+                _pool_size = pool_size
+                if _session is not None:
+                    _session.close()
+                    _session = None
+
+
+def get_session() -> "requests.Session":
+    """Return the shared session, creating it on first use"""
+    global _session
+
+    with _session_lock:
+        if _session is None:
+            _session = _build_session(_pool_size)
+        return _session
+
+
+def _endpoint(url: str) -> Tuple[str, str]:
+    """Host and first path segment of url (/files/taxation_x.txt -> /files)"""
+    parts = urlsplit(url)
+    segment = parts.path.strip("/").split("/", 1)[0]
+    return parts.netloc, f"/{segment}"
+
+
+def _measured(method: str, url: str, send: Callable[[], "requests.Response"]) -> "requests.Response":
+    """Send a request, recording its latency and outcome in the metrics registry"""
+    host, endpoint = _endpoint(url)
+    labels = {"host": host, "endpoint": endpoint, "method": method}
+    status = "error"  # No HTTP response (connection refused, timeout)
+    REGISTRY.add("http_requests_in_flight", 1, "HTTP requests waiting for a response", host=host)
+    start = time.monotonic()
+    try:
+        response = send()
+        status = str(response.status_code)
+        return response
+    finally:
+        REGISTRY.add("http_requests_in_flight", -1, host=host)
+        REGISTRY.observe("http_request_duration_seconds", time.monotonic() - start,
+                         help_text="HTTP request latency until the response headers", **labels)
+        REGISTRY.inc("http_requests_total", help_text="HTTP requests by status code", status=status, **labels)
+
+
+def get(url: str, timeout: float = 30, **kwargs) -> "requests.Response":
+    """GET through the shared session"""
+    return _measured("GET", url, lambda: get_session().get(url, timeout=timeout, **kwargs))
+
+
+def encode_json_body(payload: Dict[str, Any], compress: Optional[bool] = None) -> Tuple[bytes, Dict[str, str]]:
+    """Serialize a JSON payload, returning the body and its request headers.
+
+    With compression enabled, bodies of at least COMPRESSION_MIN_BYTES are
+    gzip-encoded and sent with Content-Encoding: gzip.
+    """
+    body = json.dumps(payload).encode("utf-8")
+    headers = {"Content-Type": "application/json"}
+
+    if compress is None:
+        compress = _compress_requests
+    if compress and len(body) >= COMPRESSION_MIN_BYTES:
+        body = gzip.compress(body, compresslevel=5)
+        headers["Content-Encoding"] = "gzip"
+
+    return body, headers
+
+
+def post_json(url: str, payload: Dict[str, Any], timeout: float = 30,
+              compress: Optional[bool] = None, **kwargs) -> "requests.Response":
+    """POST a JSON body through the shared session"""
+    body, headers = encode_json_body(payload, compress)
+    return _measured("POST", url,
+                     lambda: get_session().post(url, data=body, headers=headers, timeout=timeout, **kwargs))
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+JavaScript Object-Literal Parser for taxData.js
+
+Single-pass parser for the `export const taxData = {...}` literal, shared
+by the scripts that read or edit js/taxData.js instead of each converting
+the JS to Python with regexes or scanning it for braces:
+
+- understands unquoted and quoted keys, single/double-quoted strings with
+  escapes (colons and braces inside strings are just text), numbers,
+  true/false/null, trailing commas and // and /* */ comments
+- records the character offsets of every object property (key start,
+  value start, value end) by key path, e.g. ("germany", "vat"), so a
+  country block can be located and replaced without rescanning the file
+- keeps the comments found inside the literal with their offsets
+- load_export() caches parsed files by mtime/size, and compares the
+  content when only the timestamp changed
+
+Parsed values are shared between callers of load_export(); copy before
+modifying them.
+"""
+
+import os
+import re
+import hashlib
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_TAX_DATA_FILE = "js/taxData.js"
+
+_NUMBER = re.compile(r"-?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?")
+_IDENTIFIER = re.compile(r"[A-Za-z_$][\w$]*")
+_WHITESPACE = re.compile(r"\s+")
+_KEYWORDS = {"true": True, "false": False, "null": None, "undefined": None}
+_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f", "v": "\v", "0": "\0"}
+
+
+class JSParseError(ValueError):
+    """Syntax error in a JS literal, with the position it was found at"""
+
+    def __init__(self, message: str, source: str, offset: int):
+        self.offset = offset
+        self.line = source.count("\n", 0, offset) + 1
+        self.column = offset - (source.rfind("\n", 0, offset) + 1) + 1
+        super().__init__(f"{message} at line {self.line}, column {self.column}")
+
+
+@dataclass
+class PropertySpan:
+    """Offsets of one object property in the source: key, value and the end of the value"""
+    key_start: int
+    value_start: int
+    value_end: int
+
+
+@dataclass
+class ParsedExport:
+    """An exported object literal, its location in the source and the spans of its properties"""
+    name: str
+    value: Dict[str, Any]
+    source: str
+    start: int  # Offset of the opening brace
+    end: int  # Offset just past the closing brace
+    spans: Dict[Tuple[str, ...], PropertySpan] = field(default_factory=dict)
+    comments: List[Tuple[int, str]] = field(default_factory=list)
+    sha256: str = ""
+
+    def block(self, *path: str) -> str:
+        """Source text of a property, from its key to the end of its value"""
+        span = self.spans[path]
+        return self.source[span.key_start:span.value_end]
+
+
+class _Parser:
+    def __init__(self, source: str, pos: int = 0):
+        self.source = source
+        self.pos = pos
+        self.spans: Dict[Tuple[str, ...], PropertySpan] = {}
+        self.comments: List[Tuple[int, str]] = []
+
+    def error(self, message: str) -> JSParseError:
+        return JSParseError(message, self.source, self.pos)
+
+    def skip(self):
+        """Skip whitespace and comments, keeping the comments"""
+        source = self.source
+        while True:
+            match = _WHITESPACE.match(source, self.pos)
+            if match:
+                self.pos = match.end()
+            if source.startswith("//", self.pos):
+                end = source.find("\n", self.pos)
+                end = len(source) if end == -1 else end
+            elif source.startswith("/*", self.pos):
+                end = source.find("*/", self.pos + 2)
+                if end == -1:
+                    raise self.error("Unterminated comment")
+                end += 2
+            else:
+                return
+            self.comments.append((self.pos, source[self.pos:end]))
+            self.pos = end
+
+    def peek(self) -> str:
+        self.skip()
+        return self.source[self.pos:self.pos + 1]
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            found = self.source[self.pos:self.pos + 1] or "end of input"
+            raise self.error(f"Expected '{char}' but found '{found}'")
+        self.pos += 1
+
+    def value(self, path: Optional[Tuple[str, ...]] = ()) -> Any:
+        char = self.peek()
+        if char == "{":
+            return self.object(path)
+        if char == "[":
+            return self.array()
+        if char in ("'", '"'):
+            return self.string()
+        number = _NUMBER.match(self.source, self.pos)
+        if number:
+            self.pos = number.end()
+            text = number.group(0)
+            return float(text) if any(c in text for c in ".eE") else int(text)
+        identifier = _IDENTIFIER.match(self.source, self.pos)
+        if identifier and identifier.group(0) in _KEYWORDS:
+            self.pos = identifier.end()
+            return _KEYWORDS[identifier.group(0)]
+        raise self.error("Unexpected value" if char else "Unexpected end of input")
+
+    def string(self) -> str:
+        source = self.source
+        quote = source[self.pos]
+        self.pos += 1
+        parts = []
+        chunk_start = self.pos
+        while True:
+            if self.pos >= len(source):
+                raise self.error("Unterminated string")
+            char = source[self.pos]
+            if char == quote:
+                parts.append(source[chunk_start:self.pos])
+                self.pos += 1
+                return "".join(parts)
+            if char == "\n":
+                raise self.error("Line break in string")
+            if char == "\\":
+                parts.append(source[chunk_start:self.pos])
+                escaped = source[self.pos + 1:self.pos + 2]
+                if escaped == "u":
+                    digits = source[self.pos + 2:self.pos + 6]
+                    try:
+                        parts.append(chr(int(digits, 16)))
+                    except ValueError:
+                        raise self.error("Invalid \\u escape")
+                    self.pos += 6
+                elif escaped == "\n":  # Line continuation
+                    self.pos += 2
+                else:
+                    parts.append(_ESCAPES.get(escaped, escaped))
+                    self.pos += 2
+                chunk_start = self.pos
+                continue
+            self.pos += 1
+
+    def key(self) -> str:
+        char = self.peek()
+        if char in ("'", '"'):
+            return self.string()
+        match = _IDENTIFIER.match(self.source, self.pos) or _NUMBER.match(self.source, self.pos)
+        if not match:
+            raise self.error("Expected a property name")
+        self.pos = match.end()
+        return match.group(0)
+
+    def object(self, path: Optional[Tuple[str, ...]]) -> Dict[str, Any]:
+        """Parse an object; properties are recorded in spans unless path is None (inside arrays)"""
+        self.expect("{")
+        result: Dict[str, Any] = {}
+        while self.peek() != "}":
+            key_start = self.pos
+            key = self.key()
+            self.expect(":")
+            self.skip()
+            value_start = self.pos
+            key_path = path + (key,) if path is not None else None
+            result[key] = self.value(key_path)
+            if key_path is not None:
+                self.spans[key_path] = PropertySpan(key_start, value_start, self.pos)
+            if self.peek() != ",":
+                break
+            self.pos += 1
+        self.expect("}")
+        return result
+
+    def array(self) -> List[Any]:
+        self.expect("[")
+        result = []
+        while self.peek() != "]":
+            result.append(self.value(None))
+            if self.peek() != ",":
+                break
+            self.pos += 1
+        self.expect("]")
+        return result
+
+
+def parse_literal(source: str, pos: int = 0) -> Tuple[Any, int]:
+    """Parse the JS literal starting at pos; returns the value and the offset just past it"""
+    parser = _Parser(source, pos)
+    value = parser.value()
+    return value, parser.pos
+
+
+def parse_export(source: str, name: str = "taxData") -> ParsedExport:
+    """Parse the object literal of `export const <name> = {...}` in source"""
+    match = re.search(rf"\bexport\s+(?:const|let|var)\s+{re.escape(name)}\s*=\s*", source)
+    if not match:
+        raise ValueError(f"Could not find the {name} export")
+    parser = _Parser(source, match.end())
+    if parser.peek() != "{":
+        raise parser.error(f"{name} is not an object literal")
+    start = parser.pos
+    value = parser.object(())
+    return ParsedExport(name=name, value=value, source=source, start=start, end=parser.pos,
+                        spans=parser.spans, comments=parser.comments,
+                        sha256=hashlib.sha256(source.encode("utf-8")).hexdigest())
+
+
+_cache: Dict[Tuple[str, str], Tuple[Tuple[int, int], ParsedExport]] = {}
+_cache_lock = threading.Lock()
+
+
+def load_export(path: str = DEFAULT_TAX_DATA_FILE, name: str = "taxData") -> ParsedExport:
+    """Parse the export of a file, reusing the last parse while the file is unchanged"""
+    cache_key = (os.path.abspath(path), name)
+    stat = os.stat(path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    with _cache_lock:
+        cached = _cache.get(cache_key)
+    if cached and cached[0] == signature:
+        return cached[1]
+
+    with open(path, "r", encoding="utf-8") as f:
+        source = f.read()
+    if cached and cached[1].source == source:
+        parsed = cached[1]  # Touched but not changed
+    else:
+        parsed = parse_export(source, name)
+    with _cache_lock:
+        _cache[cache_key] = (signature, parsed)
+    return parsed
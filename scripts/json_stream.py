@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+Incremental JSON Checks and Extraction for LLM Output
+
+IncrementalJSONChecker consumes a model's output chunk by chunk and follows
+the JSON grammar of the first top-level object it finds, so a streamed
+generation can be cancelled as soon as it can no longer produce valid JSON.
+
+- Text before the object (prose, ```json fences, <think> blocks) is skipped
+- A "{" only starts the object if it is followed by a key or "}", so braces
+  in leading prose do not trigger an abort
+- Trailing commas and smart quotes are tolerated, as they are repaired after
+  generation
+- Text after the closing brace is ignored
+
+JSONObjectLocator finds the answer object in a complete reply or in
+streamed chunks with one linear, string-aware scan for balanced braces
+(extract_json_object() for whole texts):
+
+- Objects start the same way as for the checker; <think> blocks are
+  skipped entirely, so drafts inside the reasoning are never picked
+- A balanced object that does not parse, even after repair_json(), is
+  skipped and the scan continues after it
+- repair_json() drops trailing commas and turns smart-quoted strings into
+  JSON strings; fences and prose around the object never reach the parser
+"""
+
+import re
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+_NUMBER_RE = re.compile(r'-?(0|[1-9]\d*)(\.\d+)?([eE][+-]?\d+)?$')
+_NUMBER_CHARS = set("0123456789+-.eE")
+_LITERALS = ("true", "false", "null")
+_SMART_QUOTES = "\u201c\u201d"
+_OPENING_QUOTES = '"' + _SMART_QUOTES
+
+# Parser states: what may come next
+_VALUE = "value"
+_VALUE_OR_END = "value_or_end"
+_KEY = "key"
+_KEY_OR_END = "key_or_end"
+_COLON = "colon"
+_COMMA_OR_END = "comma_or_end"
+
+
+class IncrementalJSONChecker:
+    """Streaming JSON grammar check for the first top-level object in a text"""
+
+    def __init__(self):
+        self.started = False     # Inside the top-level object
+        self.complete = False    # Top-level object closed
+        self.error: Optional[str] = None
+        self.offset = 0          # Characters consumed so far
+        self._pending_start = False  # Saw "{" but not yet a key or "}"
+        self._stack: List[str] = []
+        self._state = _KEY_OR_END
+        self._in_string = False
+        self._string_is_key = False
+        self._smart_string = False  # Opened with a smart quote: closed by one too
+        self._escape = False
+        self._unicode_left = 0
+        self._literal = ""
+
+    @property
+    def valid(self) -> bool:
+        return self.error is None
+
+    def feed(self, text: str) -> bool:
+        """Consume the next chunk; returns False once the output cannot become valid JSON"""
+        for char in text:
+            if self.error is not None or self.complete:
+                break
+            self._feed_char(char)
+            self.offset += 1
+        return self.error is None
+
+    def _fail(self, message: str):
+        self.error = f"{message} at offset {self.offset}"
+
+    def _feed_char(self, char: str):
+        if not self.started:
+            self._seek_object(char)
+            return
+
+        if self._in_string:
+            self._string_char(char)
+            return
+
+        if self._literal:
+            if char in _NUMBER_CHARS or char.isalpha():
+                self._literal += char
+                if not self._literal_prefix_ok():
+                    self._fail(f"Invalid literal '{self._literal}'")
+                return
+            if not self._finish_literal():
+                return
+
+        if char.isspace():
+            return
+
+        state = self._state
+
+        if state in (_KEY, _KEY_OR_END):
+            if char in _OPENING_QUOTES:
+                self._start_string(is_key=True, smart=char != '"')
+            elif char == '}' and (state == _KEY_OR_END or self._stack[-1] == "object"):
+                # _KEY + "}" is a trailing comma, repaired later
+                self._close("object")
+            else:
+                self._fail(f"Expected object key, got '{char}'")
+        elif state == _COLON:
+            if char == ':':
+                self._state = _VALUE
+            else:
+                self._fail(f"Expected ':', got '{char}'")
+        elif state in (_VALUE, _VALUE_OR_END):
+            if char == ']' and (state == _VALUE_OR_END or self._stack[-1] == "array"):
+                self._close("array")
+            else:
+                self._start_value(char)
+        elif state == _COMMA_OR_END:
+            container = self._stack[-1]
+            if char == ',':
+                self._state = _KEY if container == "object" else _VALUE
+            elif char == '}':
+                self._close("object")
+            elif char == ']':
+                self._close("array")
+            else:
+                self._fail(f"Expected ',' or end of {container}, got '{char}'")
+
+    def _seek_object(self, char: str):
+        """Skip leading text until a '{' that is followed by a key or '}'"""
+        if self._pending_start:
+            if char.isspace():
+                return
+            self._pending_start = False
+            if char in _OPENING_QUOTES or char == '}':
+                self.started = True
+                self._stack = ["object"]
+                self._state = _KEY_OR_END
+                self._feed_char(char)
+                return
+        if char == '{':
+            self._pending_start = True
+
+    def _start_value(self, char: str):
+        if char in _OPENING_QUOTES:
+            self._start_string(is_key=False, smart=char != '"')
+        elif char == '{':
+            self._stack.append("object")
+            self._state = _KEY_OR_END
+        elif char == '[':
+            self._stack.append("array")
+            self._state = _VALUE_OR_END
+        elif char == '-' or char.isdigit() or char in "tfn":
+            self._literal = char
+        else:
+            self._fail(f"Unexpected '{char}' where a value was expected")
+
+    def _start_string(self, is_key: bool, smart: bool = False):
+        self._in_string = True
+        self._string_is_key = is_key
+        self._smart_string = smart
+        self._escape = False
+        self._unicode_left = 0
+
+    def _string_char(self, char: str):
+        if self._unicode_left:
+            if char not in "0123456789abcdefABCDEF":
+                self._fail("Invalid \\u escape")
+            self._unicode_left -= 1
+        elif self._escape:
+            self._escape = False
+            if char == 'u':
+                self._unicode_left = 4
+            elif char not in '"\\/bfnrt':
+                self._fail(f"Invalid escape '\\{char}'")
+        elif char == '\\':
+            self._escape = True
+        elif char == '"' or (self._smart_string and char in _SMART_QUOTES):
+            self._in_string = False
+            self._state = _COLON if self._string_is_key else _COMMA_OR_END
+        elif char == '\n':
+            self._fail("Unescaped newline in string")
+
+    def _literal_prefix_ok(self) -> bool:
+        literal = self._literal
+        if literal[0] in "tfn":
+            return any(word.startswith(literal) for word in _LITERALS)
+        return all(c in _NUMBER_CHARS for c in literal)
+
+    def _finish_literal(self) -> bool:
+        literal, self._literal = self._literal, ""
+        if literal in _LITERALS or _NUMBER_RE.match(literal):
+            self._state = _COMMA_OR_END
+            return True
+        self._fail(f"Invalid literal '{literal}'")
+        return False
+
+    def _close(self, container: str):
+        if not self._stack or self._stack[-1] != container:
+            self._fail(f"Mismatched closing bracket for {container}")
+            return
+        self._stack.pop()
+        if self._stack:
+            self._state = _COMMA_OR_END
+        else:
+            self.complete = True
+
+
+# Locator states
+_SEEK = "seek"
+_THINK = "think"
+_PENDING = "pending"  # Saw "{", waiting for a key or "}"
+_OBJECT = "object"
+
+_SEEK_RE = re.compile(r'\{|<think>')
+_OBJECT_RE = re.compile(r'[{}"\u201c\u201d]')
+_STRING_END_RE = re.compile(r'["\\]')
+_SMART_STRING_END_RE = re.compile(r'["\\\u201c\u201d]')
+_WHITESPACE_RE = re.compile(r'\s*')
+_REPAIR_RE = re.compile(r'"(?:[^"\\]|\\.)*"'
+                        r'|[\u201c\u201d]((?:[^"\\\u201c\u201d]|\\.)*)[\u201c\u201d"]'
+                        r'|,(?=\s*[}\]])')
+
+
+def _repair_token(match: re.Match) -> str:
+    token = match.group(0)
+    if token[0] == '"':
+        return token
+    if token == ",":
+        return ""  # Trailing comma
+    return '"' + match.group(1) + '"'
+
+
+def repair_json(text: str) -> str:
+    """Fix the JSON slips models make: trailing commas and smart-quoted strings"""
+    return _REPAIR_RE.sub(_repair_token, text)
+
+
+def parse_json_object(text: str) -> Optional[Dict[str, Any]]:
+    """text as a JSON object, repaired if needed; None if it is no parseable object"""
+    for candidate in (text, repair_json(text)):
+        try:
+            value = json.loads(candidate)
+        except ValueError:
+            continue
+        return value if isinstance(value, dict) else None
+    return None
+
+
+class JSONObjectLocator:
+    """Finds the first parseable top-level JSON object in a text fed chunk by chunk"""
+
+    def __init__(self):
+        self.result: Optional[Dict[str, Any]] = None
+        self.span: Optional[Tuple[int, int]] = None  # Offsets of the object in the fed text
+        self.candidates = 0  # Balanced objects that were tried
+        self.offset = 0  # Characters fed so far
+        self._state = _SEEK
+        self._carry = ""  # Tail of the last chunk that may hold a split <think> tag
+        self._parts: List[str] = []  # Text of the current candidate from earlier chunks
+        self._start = 0
+        self._depth = 0
+        self._quote_re = None  # End pattern of the string being scanned, None outside strings
+        self._escape = False
+
+    @property
+    def found(self) -> bool:
+        return self.result is not None
+
+    def feed(self, text: str) -> bool:
+        """Consume the next chunk; returns True once the object has been found"""
+        if self.result is not None:
+            return True
+        data = self._carry + text
+        base = self.offset - len(self._carry)  # Offset of data[0] in the fed text
+        self.offset += len(text)
+        self._carry = ""
+        candidate_from = 0 if self._state in (_PENDING, _OBJECT) else None
+        pos = 0
+        end = len(data)
+
+        while pos < end:
+            state = self._state
+            if state == _SEEK:
+                match = _SEEK_RE.search(data, pos)
+                if match is None:
+                    self._carry = data[max(pos, end - len("<think")):]
+                    return False
+                if match.group(0) == "<think>":
+                    self._state = _THINK
+                    pos = match.end()
+                    continue
+                self._state = _PENDING
+                self._start = base + match.start()
+                self._parts = []
+                candidate_from = match.start()
+                pos = match.end()
+            elif state == _THINK:
+                close = data.find("</think>", pos)
+                if close == -1:
+                    self._carry = data[max(pos, end - len("</think")):]
+                    return False
+                self._state = _SEEK
+                pos = close + len("</think>")
+            elif state == _PENDING:
+                pos = _WHITESPACE_RE.match(data, pos).end()
+                if pos == end:
+                    break
+                if data[pos] in _OPENING_QUOTES or data[pos] == "}":
+                    self._state = _OBJECT
+                    self._depth = 1
+                    self._quote_re = None
+                    self._escape = False
+                else:
+                    self._state = _SEEK  # Braces in prose
+                    candidate_from = None
+            elif self._quote_re is not None:
+                if self._escape:
+                    self._escape = False
+                    pos += 1
+                    continue
+                match = self._quote_re.search(data, pos)
+                if match is None:
+                    break
+                pos = match.end()
+                if match.group(0) == "\\":
+                    self._escape = True
+                else:
+                    self._quote_re = None
+            else:
+                match = _OBJECT_RE.search(data, pos)
+                if match is None:
+                    break
+                char = match.group(0)
+                pos = match.end()
+                if char == '"':
+                    self._quote_re = _STRING_END_RE
+                elif char in _SMART_QUOTES:
+                    self._quote_re = _SMART_STRING_END_RE
+                elif char == "{":
+                    self._depth += 1
+                else:
+                    self._depth -= 1
+                    if self._depth == 0:
+                        self._try_candidate("".join(self._parts) + data[candidate_from:pos], base + pos)
+                        if self.result is not None:
+                            return True
+                        candidate_from = None
+
+        if candidate_from is not None and self._state in (_PENDING, _OBJECT):
+            self._parts.append(data[candidate_from:])
+        return False
+
+    def _try_candidate(self, text: str, end: int):
+        self.candidates += 1
+        self._parts = []
+        self._state = _SEEK
+        value = parse_json_object(text)
+        if value is not None:
+            self.result = value
+            self.span = (self._start, end)
+
+
+def extract_json_object(text: str) -> Optional[Dict[str, Any]]:
+    """The first parseable top-level JSON object in a model's reply, or None"""
+    locator = JSONObjectLocator()
+    locator.feed(text)
+    return locator.result
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+Persistent LLM Response Cache
+
+Content-addressed, on-disk cache of successful LLM responses so that
+re-running the scripts over unchanged taxation files does not resend the
+same prompts to Ollama/OpenAI.
+
+- Keys are sha256 digests over provider, model, system prompt, prompt hash,
+  temperature and the remaining generation settings of the LLMRequest
+- Entries live in a single SQLite file and are evicted least-recently-used
+  once the stored responses exceed the configured size
+- Hit/miss counters are kept per cache instance for end-of-run reporting
+- SingleFlightProvider coalesces identical requests that are in flight at
+  the same time (same content address), so concurrent workers building the
+  same prompt share one upstream call instead of each paying for it
+"""
+
+import asyncio
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from dataclasses import asdict, replace
+from typing import Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+
+from llm_providers import LLMProvider, LLMRequest, LLMResponse, ProviderWrapper
+
+DEFAULT_CACHE_DIR = ".llm_cache"
+DEFAULT_CACHE_FILE = "responses.sqlite3"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Request fields that do not change the generated text
+NON_KEY_FIELDS = ("prompt", "stream", "context_tokens", "store", "include", "keep_raw_response")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    provider TEXT NOT NULL,
+    model TEXT NOT NULL,
+    response TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses (last_access);
+"""
+
+
+def make_cache_key(provider_name: str, request: LLMRequest) -> str:
+    """Return the content address for a request sent to provider_name"""
+    fields = {k: v for k, v in asdict(request).items() if k not in NON_KEY_FIELDS}
+    fields["provider"] = provider_name
+    fields["prompt_sha256"] = hashlib.sha256(request.prompt.encode("utf-8")).hexdigest()
+    canonical = json.dumps(fields, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """SQLite-backed response store with size-bounded LRU eviction"""
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, DEFAULT_CACHE_FILE)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def get(self, provider_name: str, request: LLMRequest) -> Optional[LLMResponse]:
+        """Return the cached response for request, or None on a miss"""
+        key = make_cache_key(provider_name, request)
+        with self._lock:
+            row = self._conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            self.hits += 1
+
+        data = json.loads(row[0])
+        return LLMResponse(
+            content=data["content"],
+            success=True,
+            provider=data["provider"],
+            model=data["model"],
+            processing_time=0.0,
+            token_usage=data.get("token_usage"),
+            status_code=data.get("status_code"),
+            cached=True
+        )
+
+    def put(self, provider_name: str, request: LLMRequest, response: LLMResponse):
+        """Store a successful response; failed responses are never cached"""
+        if not response.success:
+            return
+
+        key = make_cache_key(provider_name, request)
+        stored = json.dumps({
+            "content": response.content,
+            "provider": response.provider,
+            "model": response.model,
+            "token_usage": response.token_usage,
+            "status_code": response.status_code,
+        })
+        size = len(stored.encode("utf-8"))
+        now = time.time()
+
+        with self._lock:
+            previous = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, provider, model, response, size, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, provider_name, request.model, stored, size, now, now)
+            )
+            self._total_bytes += size - (previous[0] if previous else 0)
+            self.writes += 1
+            self._evict()
+            self._conn.commit()
+
+    def discard(self, provider_name: str, request: LLMRequest):
+        """Drop the entry for request (e.g. its content failed validation)"""
+        key = make_cache_key(provider_name, request)
+        with self._lock:
+            row = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                self._total_bytes -= row[0]
+
+    def _evict(self):
+        """Delete least-recently-used entries until the store fits max_bytes (lock held)"""
+        while self._total_bytes > self.max_bytes:
+            row = self._conn.execute(
+                "SELECT key, size FROM responses ORDER BY last_access ASC LIMIT 1"
+            ).fetchone()
+            if row is None:
+                self._total_bytes = 0
+                break
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (row[0],))
+            self._total_bytes -= row[1]
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, float]:
+        """Counters for this process plus the current store size"""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups * 100) if lookups else 0.0,
+                "writes": self.writes,
+                "evictions": self.evictions,
+                "entries": entries,
+                "size_bytes": self._total_bytes,
+            }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class CachedProvider(ProviderWrapper):
+    """Provider wrapper that answers repeated requests from an LLMResponseCache"""
+
+    def __init__(self, inner: LLMProvider, cache: LLMResponseCache):
+        super().__init__(inner)
+        self.cache = cache
+
+    def generate(self, request: LLMRequest) -> LLMResponse:
+        cached = self.cache.get(self.provider_name, request)
+        if cached is not None:
+            return cached
+        response = self.inner.generate(request)
+        self.cache.put(self.provider_name, request, response)
+        return response
+
+    async def agenerate(self, request: LLMRequest) -> LLMResponse:
+        cached = self.cache.get(self.provider_name, request)
+        if cached is not None:
+            return cached
+        response = await self.inner.agenerate(request)
+        self.cache.put(self.provider_name, request, response)
+        return response
+
+    def generate_batch(self, requests: List[LLMRequest], **kwargs) -> List[LLMResponse]:
+        """Serve cached requests directly and batch only the misses"""
+        responses: List[Optional[LLMResponse]] = [self.cache.get(self.provider_name, r) for r in requests]
+        misses = [index for index, response in enumerate(responses) if response is None]
+
+        if misses:
+            fresh = self.inner.generate_batch([requests[index] for index in misses], **kwargs)
+            for index, response in zip(misses, fresh):
+                self.cache.put(self.provider_name, requests[index], response)
+                responses[index] = response
+
+        return responses
+
+    def generate_stream(self, request: LLMRequest) -> Iterator[str]:
+        """Replay a cached response as one chunk, or stream and cache a complete generation"""
+        cached = self.cache.get(self.provider_name, request)
+        if cached is not None:
+            yield cached.content
+            return
+
+        parts = []
+        for chunk in self.inner.generate_stream(request):
+            parts.append(chunk)
+            yield chunk
+
+        # Only reached when the consumer read the stream to the end (not cancelled)
+        self.cache.put(self.provider_name, request, LLMResponse(
+            content="".join(parts), success=True, provider=self.provider_name,
+            model=request.model, processing_time=0.0, status_code=200))
+
+
+class _Flight:
+    """One upstream call and the threads waiting for its result"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.response: Optional[LLMResponse] = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Table of in-flight requests by cache key, shared by all wrappers of one provider"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: Dict[str, _Flight] = {}
+        self._tasks: Dict[Tuple[int, str], "asyncio.Future"] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"calls": self.calls, "coalesced": self.coalesced}
+
+    def record(self, calls: int, coalesced: int):
+        with self._lock:
+            self.calls += calls
+            self.coalesced += coalesced
+
+    def do(self, key: str, call: Callable[[], LLMResponse]) -> LLMResponse:
+        """Run call() unless an identical call is in flight; either way return its response"""
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.calls += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return replace(flight.response)
+
+        try:
+            flight.response = call()
+            return flight.response
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    async def ado(self, key: str, call: Callable[[], Awaitable[LLMResponse]]) -> LLMResponse:
+        """Async do(): callers on the same event loop await one shared task"""
+        task_key = (id(asyncio.get_running_loop()), key)
+        with self._lock:
+            task = self._tasks.get(task_key)
+            leader = task is None
+            if leader:
+                task = self._tasks[task_key] = asyncio.ensure_future(call())
+                task.add_done_callback(lambda _: self._forget(task_key))
+                self.calls += 1
+            else:
+                self.coalesced += 1
+
+        # shield(): a cancelled caller must not cancel the call the others wait for
+        response = await asyncio.shield(task)
+        return response if leader else replace(response)
+
+    def _forget(self, task_key: Tuple[int, str]):
+        with self._lock:
+            self._tasks.pop(task_key, None)
+
+
+class SingleFlightProvider(ProviderWrapper):
+    """Provider wrapper that sends identical concurrent requests upstream only once"""
+
+    def __init__(self, inner: LLMProvider, flights: Optional[SingleFlight] = None):
+        super().__init__(inner)
+        self.flights = flights or SingleFlight()
+
+    def single_flight_stats(self) -> Dict[str, int]:
+        return self.flights.stats()
+
+    def generate(self, request: LLMRequest) -> LLMResponse:
+        key = make_cache_key(self.provider_name, request)
+        return self.flights.do(key, lambda: self.inner.generate(request))
+
+    async def agenerate(self, request: LLMRequest) -> LLMResponse:
+        key = make_cache_key(self.provider_name, request)
+        return await self.flights.ado(key, lambda: self.inner.agenerate(request))
+
+    def generate_batch(self, requests: List[LLMRequest], **kwargs) -> List[LLMResponse]:
+        """Submit each distinct request once and give duplicates a copy of its response"""
+        keys = [make_cache_key(self.provider_name, request) for request in requests]
+        first: Dict[str, int] = {}
+        for index, key in enumerate(keys):
+            first.setdefault(key, index)
+        self.flights.record(len(first), len(requests) - len(first))
+        if len(first) == len(requests):
+            return self.inner.generate_batch(requests, **kwargs)
+
+        responses = dict(zip(first, self.inner.generate_batch([requests[index] for index in first.values()], **kwargs)))
+        return [responses[key] if first[key] == index else replace(responses[key])
+                for index, key in enumerate(keys)]
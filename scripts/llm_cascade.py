@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Model Cascade for LLM Providers
+
+CascadeProvider sends every request to a small, fast model first and only
+escalates to the requested (larger) model when the small model's answer is
+not good enough:
+
+- accept(request, response) decides: it sees the request as sent to the
+  small model and its response, and returns False to escalate. Failed
+  responses are always escalated.
+- the small model can live on another provider (e.g. a local Ollama model
+  in front of an OpenAI model), wrapped with the same middlewares
+- batches are answered by the small model first; the rejected requests
+  are sent to the large model in a second batch
+- streams go straight to the large model, since an answer can only be
+  judged once it is complete
+
+Added outside the response cache, so each model's answer is cached under
+its own key (the model is part of the cache key) and a cached small-model
+answer is judged again on the next run.
+"""
+
+import threading
+from dataclasses import replace
+from typing import Callable, Iterator, List, Optional
+
+from llm_providers import LLMProvider, LLMRequest, LLMResponse, ProviderWrapper
+
+AcceptFn = Callable[[LLMRequest, LLMResponse], bool]
+
+
+class CascadeProvider(ProviderWrapper):
+    """Provider wrapper that tries a small model first and escalates rejected answers"""
+
+    def __init__(self, inner: LLMProvider, model: str, accept: AcceptFn,
+                 small: Optional[LLMProvider] = None):
+        super().__init__(inner)
+        self.cascade_model = model
+        self.accept = accept
+        self.small = small or inner
+        self._lock = threading.Lock()
+        self._accepted = 0
+        self._escalated = 0
+
+    def cascade_stats(self) -> dict:
+        with self._lock:
+            return {"accepted": self._accepted, "escalated": self._escalated}
+
+    def _small_request(self, request: LLMRequest) -> LLMRequest:
+        return replace(request, model=self.cascade_model)
+
+    def _judge(self, request: LLMRequest, response: LLMResponse) -> bool:
+        """True when the small model's response can be returned"""
+        try:
+            accepted = response.success and self.accept(request, response)
+        except Exception as e:
+            print(f"[CASCADE] Acceptance check failed ({e}), escalating")
+            accepted = False
+        with self._lock:
+            if accepted:
+                self._accepted += 1
+            else:
+                self._escalated += 1
+        if not accepted:
+            reason = "rejected" if response.success else f"failed: {response.error}"
+            print(f"[CASCADE] {self.cascade_model} answer {reason}, escalating to {request.model}")
+        return accepted
+
+    def generate(self, request: LLMRequest) -> LLMResponse:
+        if request.model == self.cascade_model:
+            return self.inner.generate(request)
+        small_request = self._small_request(request)
+        response = self.small.generate(small_request)
+        if self._judge(small_request, response):
+            return response
+        return self.inner.generate(request)
+
+    async def agenerate(self, request: LLMRequest) -> LLMResponse:
+        if request.model == self.cascade_model:
+            return await self.inner.agenerate(request)
+        small_request = self._small_request(request)
+        response = await self.small.agenerate(small_request)
+        if self._judge(small_request, response):
+            return response
+        return await self.inner.agenerate(request)
+
+    def generate_stream(self, request: LLMRequest) -> Iterator[str]:
+        return self.inner.generate_stream(request)
+
+    def generate_batch(self, requests: List[LLMRequest], **kwargs) -> List[LLMResponse]:
+        """One batch on the small model, then one on the large model for the rejected requests"""
+        small_requests = [self._small_request(request) for request in requests]
+        responses = self.small.generate_batch(small_requests, **kwargs)
+        rejected = [i for i, (small_request, response) in enumerate(zip(small_requests, responses))
+                    if requests[i].model != self.cascade_model and not self._judge(small_request, response)]
+        if rejected:
+            print(f"[CASCADE] Escalating {len(rejected)} of {len(requests)} batch requests to the large model")
+            for i, response in zip(rejected, self.inner.generate_batch([requests[i] for i in rejected], **kwargs)):
+                responses[i] = response
+        return responses
@@ -0,0 +1,474 @@
+#!/usr/bin/env python3
+"""
+Adaptive Concurrency Limits for LLM Providers
+
+AdaptiveConcurrencyLimiter finds how many requests a backend can take at
+once with an AIMD (additive increase, multiplicative decrease) loop:
+
+- While the limit is fully used and latency stays near its long-run
+  baseline, the limit grows by about one request per round-trip
+- 5xx/429 responses and connection failures cut the limit by backoff_ratio
+- Latency rising above latency_tolerance x baseline cuts it by latency_ratio
+
+Only one cut is made per "generation": failures of requests that started
+before the last cut do not cut again, so a burst of errors from one
+overload halves the limit once instead of collapsing it to min_limit.
+
+ConcurrencyLimitedProvider applies a limiter to a provider; callers beyond
+the limit wait for a free slot (threads block, coroutines await) instead
+of piling more load onto a saturated backend.
+
+RateLimiter meters requests and tokens per minute with two token buckets,
+for APIs with account quotas (OpenAI RPM/TPM). Each request reserves its
+estimated tokens up front; the reservation is corrected from
+LLMResponse.token_usage once the reply arrives. RateLimitedProvider queues
+callers until the buckets allow the request, and on a 429 pauses every
+caller for the server's Retry-After before retrying.
+"""
+
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+from typing import Iterator, List, Optional
+
+from llm_providers import LLMProvider, LLMRequest, LLMResponse, ProviderWrapper, retry_after_from_error
+from llm_tokens import CHARS_PER_TOKEN, estimate_tokens
+
+# HTTP status codes that mean "send less": rate limited or server overloaded
+OVERLOAD_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# Outcomes reported to AdaptiveConcurrencyLimiter.release()
+SUCCESS = "success"
+OVERLOAD = "overload"
+IGNORE = "ignore"
+
+# Completion tokens assumed for requests without max_tokens, until replies are measured
+DEFAULT_COMPLETION_TOKENS = 1000
+
+# Pause after a 429 without Retry-After, doubled per attempt
+DEFAULT_RETRY_AFTER = 1.0
+
+
+class _Slot:
+    """One acquired unit of concurrency"""
+
+    __slots__ = ("started", "generation", "saturated")
+
+    def __init__(self, started: float, generation: int, saturated: bool):
+        self.started = started
+        self.generation = generation
+        self.saturated = saturated
+
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD concurrency limit driven by errors and latency"""
+
+    def __init__(self, name: str = "llm", initial_limit: int = 4, min_limit: int = 1,
+                 max_limit: int = 64, backoff_ratio: float = 0.5, latency_ratio: float = 0.9,
+                 latency_tolerance: float = 2.0, verbose: bool = True):
+        self.name = name
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.backoff_ratio = backoff_ratio
+        self.latency_ratio = latency_ratio
+        self.latency_tolerance = latency_tolerance
+        self.verbose = verbose
+
+        self._limit = float(min(max(initial_limit, self.min_limit), self.max_limit))
+        self._in_flight = 0
+        self._generation = 0
+        self._short_latency: Optional[float] = None   # EWMA of recent latencies
+        self._baseline_latency: Optional[float] = None  # Slow EWMA, the "unloaded" latency
+        self._cond = threading.Condition()
+        self._async_waiters: deque = deque()
+
+        self.successes = 0
+        self.overloads = 0
+        self.decreases = 0
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "limit": self.limit,
+                "in_flight": self._in_flight,
+                "successes": self.successes,
+                "overloads": self.overloads,
+                "decreases": self.decreases,
+                "baseline_latency": self._baseline_latency,
+                "recent_latency": self._short_latency
+            }
+
+    def _take_slot_locked(self) -> _Slot:
+        self._in_flight += 1
+        return _Slot(time.monotonic(), self._generation, self._in_flight >= self.limit)
+
+    def acquire(self) -> _Slot:
+        """Block until a slot is free"""
+        with self._cond:
+            while self._in_flight >= self.limit or self._async_waiters:
+                self._cond.wait()
+            return self._take_slot_locked()
+
+    async def acquire_async(self) -> _Slot:
+        """Wait for a free slot without blocking the event loop"""
+        with self._cond:
+            if self._in_flight < self.limit and not self._async_waiters:
+                return self._take_slot_locked()
+            # [future, slot]; release() fills in the slot and resolves the future
+            waiter = [asyncio.get_running_loop().create_future(), None]
+            self._async_waiters.append(waiter)
+
+        try:
+            await waiter[0]
+        except asyncio.CancelledError:
+            with self._cond:
+                if waiter[1] is not None:
+                    self._in_flight -= 1
+                    self._wake_locked()
+                else:
+                    self._async_waiters.remove(waiter)
+            raise
+        return waiter[1]
+
+    def _wake_locked(self):
+        """Hand free slots to waiting coroutines first, then to waiting threads"""
+        while self._async_waiters and self._in_flight < self.limit:
+            waiter = self._async_waiters.popleft()
+            waiter[1] = self._take_slot_locked()
+            future = waiter[0]
+            future.get_loop().call_soon_threadsafe(
+                lambda f=future: f.done() or f.set_result(None))
+        if self._in_flight < self.limit:
+            self._cond.notify_all()
+
+    def release(self, slot: _Slot, outcome: str = SUCCESS):
+        """Return a slot and adjust the limit from the request's outcome"""
+        latency = time.monotonic() - slot.started
+
+        with self._cond:
+            self._in_flight -= 1
+            old_limit = self.limit
+
+            if outcome == OVERLOAD:
+                self.overloads += 1
+                self._decrease_locked(slot, self.backoff_ratio, "overload")
+            elif outcome == SUCCESS:
+                self.successes += 1
+                self._on_success_locked(slot, latency)
+
+            if self.verbose and self.limit != old_limit:
+                print(f"[LIMIT] {self.name} concurrency {old_limit} -> {self.limit} "
+                      f"(in flight: {self._in_flight})")
+            self._wake_locked()
+
+    def _on_success_locked(self, slot: _Slot, latency: float):
+        if self._baseline_latency is None:
+            self._short_latency = self._baseline_latency = latency
+        else:
+            self._short_latency += 0.3 * (latency - self._short_latency)
+            # The baseline follows improvements quickly and degradations slowly
+            alpha = 0.3 if latency < self._baseline_latency else 0.02
+            self._baseline_latency += alpha * (latency - self._baseline_latency)
+
+        if self._short_latency > self._baseline_latency * self.latency_tolerance:
+            self._decrease_locked(slot, self.latency_ratio, "latency")
+        elif slot.saturated:
+            # About +1 per round-trip of a fully used limit
+            self._limit = min(self.max_limit, self._limit + 1.0 / self._limit)
+
+    def _decrease_locked(self, slot: _Slot, ratio: float, reason: str):
+        if slot.generation != self._generation:
+            return  # Sent before the last cut; that cut already accounted for it
+        self._generation += 1
+        self.decreases += 1
+        self._limit = max(float(self.min_limit), self._limit * ratio)
+        if reason == "latency":
+            # Start measuring the new level afresh
+            self._short_latency = self._baseline_latency
+
+
+def response_outcome(response: LLMResponse) -> str:
+    """Classify a response for the limiter"""
+    if response.success:
+        return SUCCESS
+    if response.status_code is None or response.status_code in OVERLOAD_STATUS_CODES:
+        # No status: connection refused, reset or timed out
+        return OVERLOAD
+    return IGNORE
+
+
+class ConcurrencyLimitedProvider(ProviderWrapper):
+    """Provider wrapper that keeps at most limiter.limit requests in flight"""
+
+    def __init__(self, inner: LLMProvider, limiter: Optional[AdaptiveConcurrencyLimiter] = None):
+        super().__init__(inner)
+        self.limiter = limiter or AdaptiveConcurrencyLimiter(name=inner.provider_name)
+
+    def generate(self, request: LLMRequest) -> LLMResponse:
+        slot = self.limiter.acquire()
+        outcome = OVERLOAD
+        try:
+            response = self.inner.generate(request)
+            outcome = response_outcome(response)
+            return response
+        finally:
+            self.limiter.release(slot, outcome)
+
+    async def agenerate(self, request: LLMRequest) -> LLMResponse:
+        slot = await self.limiter.acquire_async()
+        outcome = OVERLOAD
+        try:
+            response = await self.inner.agenerate(request)
+            outcome = response_outcome(response)
+            return response
+        except asyncio.CancelledError:
+            outcome = IGNORE
+            raise
+        finally:
+            self.limiter.release(slot, outcome)
+
+    def generate_stream(self, request: LLMRequest) -> Iterator[str]:
+        slot = self.limiter.acquire()
+        outcome = IGNORE  # Consumer stopped reading (cancelled); says nothing about load
+        try:
+            yield from self.inner.generate_stream(request)
+            outcome = SUCCESS
+        except Exception as e:
+            # LLMStreamError and OpenAI API errors carry status_code; network errors do not
+            status_code = getattr(e, "status_code", None)
+            overloaded = status_code is None or status_code in OVERLOAD_STATUS_CODES
+            outcome = OVERLOAD if overloaded else IGNORE
+            raise
+        finally:
+            self.limiter.release(slot, outcome)
+
+    def generate_batch(self, requests: List[LLMRequest], **kwargs) -> List[LLMResponse]:
+        # One offline job; the batch service schedules it, not our in-flight count
+        return self.inner.generate_batch(requests, **kwargs)
+
+
+class TokenBucket:
+    """Continuously refilled budget of per_minute units.
+
+    The balance may go negative when a reservation is corrected upwards;
+    later callers then wait until the overdraft has been refilled.
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until amount can be taken (amounts above capacity need a full bucket)"""
+        missing = min(amount, self.capacity) - self.tokens
+        return max(0.0, missing / self.rate)
+
+    def take(self, amount: float):
+        self.tokens -= amount
+
+
+class _Reservation:
+    """Tokens reserved for one request"""
+
+    __slots__ = ("tokens", "prompt_tokens")
+
+    def __init__(self, tokens: int, prompt_tokens: int):
+        self.tokens = tokens
+        self.prompt_tokens = prompt_tokens
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute budget shared by all callers"""
+
+    def __init__(self, name: str = "llm", requests_per_minute: Optional[int] = None,
+                 tokens_per_minute: Optional[int] = None, verbose: bool = True):
+        self.name = name
+        self.verbose = verbose
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self._lock = threading.Lock()
+        self._paused_until = 0.0
+        self._completion_tokens: Optional[float] = None  # EWMA of measured completion tokens
+
+        self.waited = 0.0
+        self.rate_limited = 0
+
+    @property
+    def requests_per_minute(self) -> Optional[int]:
+        return int(self.requests.capacity) if self.requests else None
+
+    @property
+    def tokens_per_minute(self) -> Optional[int]:
+        return int(self.tokens.capacity) if self.tokens else None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "requests_per_minute": self.requests_per_minute,
+                "tokens_per_minute": self.tokens_per_minute,
+                "waited": self.waited,
+                "rate_limited": self.rate_limited,
+                "completion_tokens": self._completion_tokens
+            }
+
+    def estimate(self, request: LLMRequest) -> _Reservation:
+        """Estimate the tokens a request will use"""
+        prompt_tokens = (estimate_tokens(request.prompt, request.model)
+                         + estimate_tokens(request.system_prompt or "", request.model))
+        if request.max_tokens:
+            completion = request.max_tokens
+        elif self._completion_tokens is not None:
+            completion = math.ceil(self._completion_tokens)
+        else:
+            completion = DEFAULT_COMPLETION_TOKENS
+        return _Reservation(prompt_tokens + completion, prompt_tokens)
+
+    def _try_reserve_locked(self, reservation: _Reservation) -> float:
+        """Take the reservation, or return how long to wait before trying again"""
+        now = time.monotonic()
+        delay = self._paused_until - now
+        for bucket, amount in ((self.requests, 1), (self.tokens, reservation.tokens)):
+            if bucket:
+                bucket.refill(now)
+                delay = max(delay, bucket.wait_time(amount))
+        if delay > 0:
+            return delay
+        if self.requests:
+            self.requests.take(1)
+        if self.tokens:
+            self.tokens.take(reservation.tokens)
+        return 0.0
+
+    def acquire(self, request: LLMRequest) -> _Reservation:
+        """Block until the request fits in the per-minute budgets"""
+        reservation = self.estimate(request)
+        while True:
+            with self._lock:
+                delay = self._try_reserve_locked(reservation)
+                self.waited += delay
+            if delay <= 0:
+                return reservation
+            time.sleep(delay)
+
+    async def acquire_async(self, request: LLMRequest) -> _Reservation:
+        """Wait for budget without blocking the event loop"""
+        reservation = self.estimate(request)
+        while True:
+            with self._lock:
+                delay = self._try_reserve_locked(reservation)
+                self.waited += delay
+            if delay <= 0:
+                return reservation
+            await asyncio.sleep(delay)
+
+    def settle(self, reservation: _Reservation, used_tokens: Optional[int], completion_tokens: Optional[int] = None):
+        """Replace the estimate with the tokens actually used (None keeps the estimate)"""
+        with self._lock:
+            if self.tokens and used_tokens is not None:
+                self.tokens.take(used_tokens - reservation.tokens)
+            if completion_tokens is not None:
+                if self._completion_tokens is None:
+                    self._completion_tokens = float(completion_tokens)
+                else:
+                    self._completion_tokens += 0.2 * (completion_tokens - self._completion_tokens)
+
+    def settle_response(self, reservation: _Reservation, response: LLMResponse):
+        usage = response.token_usage or {}
+        if usage.get("total_tokens") is not None:
+            self.settle(reservation, usage["total_tokens"], usage.get("completion_tokens"))
+        elif not response.success:
+            # Rejected requests do not count against the token quota
+            self.settle(reservation, 0)
+        else:
+            self.settle(reservation, None)
+
+    def pause(self, seconds: float):
+        """Hold back every caller for seconds (after a 429)"""
+        with self._lock:
+            self.rate_limited += 1
+            until = time.monotonic() + seconds
+            if until > self._paused_until:
+                self._paused_until = until
+                if self.verbose:
+                    print(f"[RATE] {self.name} rate limited, pausing all requests for {seconds:.1f}s")
+
+
+class RateLimitedProvider(ProviderWrapper):
+    """Provider wrapper that queues requests to stay within a RateLimiter.
+
+    Responses with HTTP 429 pause the limiter for Retry-After seconds and
+    the request is sent again, up to max_retries times.
+    """
+
+    def __init__(self, inner: LLMProvider, rate_limiter: Optional[RateLimiter] = None, max_retries: int = 5):
+        super().__init__(inner)
+        self.rate_limiter = rate_limiter or RateLimiter(name=inner.provider_name)
+        self.max_retries = max_retries
+
+    def _should_retry(self, status_code: Optional[int], retry_after: Optional[float], attempt: int) -> bool:
+        if status_code != 429 or attempt >= self.max_retries:
+            return False
+        self.rate_limiter.pause(retry_after if retry_after is not None else DEFAULT_RETRY_AFTER * 2 ** attempt)
+        return True
+
+    def generate(self, request: LLMRequest) -> LLMResponse:
+        attempt = 0
+        while True:
+            reservation = self.rate_limiter.acquire(request)
+            response = self.inner.generate(request)
+            self.rate_limiter.settle_response(reservation, response)
+            if not self._should_retry(response.status_code, response.retry_after, attempt):
+                return response
+            attempt += 1
+
+    async def agenerate(self, request: LLMRequest) -> LLMResponse:
+        attempt = 0
+        while True:
+            reservation = await self.rate_limiter.acquire_async(request)
+            response = await self.inner.agenerate(request)
+            self.rate_limiter.settle_response(reservation, response)
+            if not self._should_retry(response.status_code, response.retry_after, attempt):
+                return response
+            attempt += 1
+
+    def generate_stream(self, request: LLMRequest) -> Iterator[str]:
+        attempt = 0
+        while True:
+            reservation = self.rate_limiter.acquire(request)
+            output_chars = 0
+            try:
+                for chunk in self.inner.generate_stream(request):
+                    output_chars += len(chunk)
+                    yield chunk
+            except Exception as e:
+                self.rate_limiter.settle(reservation, 0 if not output_chars else None)
+                # A 429 arrives before any output, so the stream can be started again
+                if output_chars or not self._should_retry(getattr(e, "status_code", None),
+                                                          retry_after_from_error(e), attempt):
+                    raise
+                attempt += 1
+                continue
+            # Streams report no usage; count the prompt and what was received
+            completion = math.ceil(output_chars / CHARS_PER_TOKEN)
+            self.rate_limiter.settle(reservation, reservation.prompt_tokens + completion, completion)
+            return
+
+    def generate_batch(self, requests: List[LLMRequest], **kwargs) -> List[LLMResponse]:
+        # The Batch API has its own queue and quota
+        return self.inner.generate_batch(requests, **kwargs)
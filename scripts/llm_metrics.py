@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+LLM Call Metrics
+
+MetricsProvider records every call that reaches a provider in a
+metrics.MetricsRegistry, labelled by provider, model and endpoint
+(generate, stream or batch):
+
+- llm_request_duration_seconds: latency histogram
+- llm_time_to_first_token_seconds: streaming only
+- llm_output_tokens_per_second: generated tokens over generation time
+  (reported usage, or the token estimate when the provider reports none)
+- llm_requests_total: calls by status code ("error" without a response)
+- llm_tokens_total: input/output tokens
+- llm_requests_in_flight: calls waiting for an answer, per provider
+
+Added as the innermost middleware it sees only upstream calls: cache hits,
+coalesced requests and time spent waiting for a concurrency slot or rate
+limit quota are not counted.
+"""
+
+import time
+from typing import Iterator, List, Optional
+
+from llm_providers import LLMProvider, LLMRequest, LLMResponse, ProviderWrapper
+from llm_tokens import estimate_tokens
+from metrics import REGISTRY, MetricsRegistry, TTFT_BUCKETS, THROUGHPUT_BUCKETS
+
+DURATION = "llm_request_duration_seconds"
+TTFT = "llm_time_to_first_token_seconds"
+THROUGHPUT = "llm_output_tokens_per_second"
+REQUESTS = "llm_requests_total"
+TOKENS = "llm_tokens_total"
+IN_FLIGHT = "llm_requests_in_flight"
+
+
+def response_status(response: LLMResponse) -> str:
+    """Status label of a response: HTTP code, or ok/error when there is none"""
+    if response.status_code:
+        return str(response.status_code)
+    return "ok" if response.success else "error"
+
+
+class MetricsProvider(ProviderWrapper):
+    """Provider wrapper that records latency, throughput and errors of every call"""
+
+    def __init__(self, inner: LLMProvider, registry: Optional[MetricsRegistry] = None):
+        super().__init__(inner)
+        self.registry = registry or REGISTRY
+
+    def _in_flight(self, delta: int):
+        self.registry.add(IN_FLIGHT, delta, "LLM calls waiting for an answer", provider=self.provider_name)
+
+    def _record(self, endpoint: str, model: str, latency: Optional[float], status: str,
+                output_tokens: Optional[int] = None, input_tokens: Optional[int] = None,
+                generation_time: Optional[float] = None):
+        labels = {"provider": self.provider_name, "model": model, "endpoint": endpoint}
+        if latency is not None:
+            self.registry.observe(DURATION, latency, help_text="LLM call latency", **labels)
+        self.registry.inc(REQUESTS, help_text="LLM calls by status", status=status, **labels)
+        if input_tokens:
+            self.registry.inc(TOKENS, input_tokens, "LLM tokens sent and generated",
+                              provider=self.provider_name, model=model, direction="input")
+        if output_tokens:
+            self.registry.inc(TOKENS, output_tokens, "LLM tokens sent and generated",
+                              provider=self.provider_name, model=model, direction="output")
+            if generation_time and generation_time > 0:
+                self.registry.observe(THROUGHPUT, output_tokens / generation_time, THROUGHPUT_BUCKETS,
+                                      "Generated tokens per second", **labels)
+
+    def _record_response(self, endpoint: str, request: LLMRequest, response: LLMResponse,
+                         latency: Optional[float]):
+        usage = response.token_usage or {}
+        output_tokens = usage.get("completion_tokens")
+        if output_tokens is None and response.success:
+            output_tokens = estimate_tokens(response.content, request.model)
+        self._record(endpoint, request.model, latency, response_status(response), output_tokens,
+                     usage.get("prompt_tokens"), latency)
+
+    def generate(self, request: LLMRequest) -> LLMResponse:
+        self._in_flight(1)
+        start = time.monotonic()
+        try:
+            response = self.inner.generate(request)
+        except Exception:
+            self._record("generate", request.model, time.monotonic() - start, "error")
+            raise
+        finally:
+            self._in_flight(-1)
+        self._record_response("generate", request, response, time.monotonic() - start)
+        return response
+
+    async def agenerate(self, request: LLMRequest) -> LLMResponse:
+        self._in_flight(1)
+        start = time.monotonic()
+        try:
+            response = await self.inner.agenerate(request)
+        except Exception:
+            self._record("generate", request.model, time.monotonic() - start, "error")
+            raise
+        finally:
+            self._in_flight(-1)
+        self._record_response("generate", request, response, time.monotonic() - start)
+        return response
+
+    def generate_stream(self, request: LLMRequest) -> Iterator[str]:
+        self._in_flight(1)
+        start = time.monotonic()
+        first_token = None
+        parts: List[str] = []
+        status = "cancelled"  # Consumer stopped reading before the end
+        try:
+            for chunk in self.inner.generate_stream(request):
+                if first_token is None and chunk:
+                    first_token = time.monotonic()
+                    self.registry.observe(TTFT, first_token - start, TTFT_BUCKETS,
+                                          "Time to the first streamed token", provider=self.provider_name,
+                                          model=request.model)
+                parts.append(chunk)
+                yield chunk
+            status = "200"
+        except Exception as e:
+            status = str(getattr(e, "status_code", None) or "error")
+            raise
+        finally:
+            self._in_flight(-1)
+            end = time.monotonic()
+            output_tokens = estimate_tokens("".join(parts), request.model) if parts else None
+            generation_time = end - first_token if first_token is not None else None
+            self._record("stream", request.model, end - start, status, output_tokens,
+                         generation_time=generation_time)
+
+    def generate_batch(self, requests: List[LLMRequest], **kwargs) -> List[LLMResponse]:
+        """Record the batch duration once and the status/tokens of each response"""
+        self._in_flight(len(requests))
+        start = time.monotonic()
+        try:
+            responses = self.inner.generate_batch(requests, **kwargs)
+        finally:
+            self._in_flight(-len(requests))
+        latency = time.monotonic() - start
+        self.registry.observe(DURATION, latency, help_text="LLM call latency", provider=self.provider_name,
+                              model=requests[0].model if requests else "", endpoint="batch")
+        for request, response in zip(requests, responses):
+            usage = response.token_usage or {}
+            self._record("batch", request.model, None, response_status(response),
+                         usage.get("completion_tokens"), usage.get("prompt_tokens"))
+        return responses
+
+
+def summary_lines(registry: Optional[MetricsRegistry] = None) -> List[str]:
+    """One line per provider/model/endpoint: calls, latency quantiles, throughput, errors"""
+    registry = registry or REGISTRY
+    throughput = {tuple(sorted(labels.items())): histogram for labels, histogram in registry.series(THROUGHPUT)}
+    ttft = {(labels["provider"], labels["model"]): histogram for labels, histogram in registry.series(TTFT)}
+    errors = {}
+    for labels, count in registry.series(REQUESTS):
+        if labels["status"] not in ("200", "ok"):
+            key = (labels["provider"], labels["model"], labels["endpoint"])
+            errors[key] = errors.get(key, 0) + count
+
+    lines = []
+    for labels, histogram in sorted(registry.series(DURATION), key=lambda item: sorted(item[0].items())):
+        provider, model, endpoint = labels["provider"], labels["model"], labels["endpoint"]
+        line = (f"{provider}/{model} {endpoint}: {histogram.count} calls, "
+                f"p50 {histogram.quantile(0.5):.2f}s, p95 {histogram.quantile(0.95):.2f}s")
+        rate = throughput.get(tuple(sorted(labels.items())))
+        if rate is not None:
+            line += f", {rate.sum / rate.count:.1f} tokens/s"
+        if endpoint == "stream" and (provider, model) in ttft:
+            line += f", TTFT p50 {ttft[(provider, model)].quantile(0.5):.2f}s"
+        line += f", {int(errors.get((provider, model, endpoint), 0))} errors"
+        lines.append(line)
+    return lines
@@ -11,19 +11,84 @@ Each provider implements the same interface for consistent usage across scripts.
 """
 
 import json
-import requests
+import asyncio
+import threading
 import time
 import os
+import concurrent.futures
+import importlib.util
+from email.utils import parsedate_to_datetime
 from abc import ABC, abstractmethod
-from typing import Dict, List, Any, Optional, Union
-from dataclasses import dataclass
+from typing import Dict, List, Any, Optional, Union, Awaitable, Callable, Tuple, Iterator
+from dataclasses import dataclass, replace
+from types import SimpleNamespace
 
-try:
-    from openai import OpenAI
-    OPENAI_AVAILABLE = True
-except ImportError:
-    OPENAI_AVAILABLE = False
-    print("[WARNING] OpenAI library not installed. Run: pip install openai")
+import http_client
+from json_stream import IncrementalJSONChecker
+from llm_tokens import CHARS_PER_TOKEN
+
+# openai and aiohttp are only located here; importing them (the openai SDK
+# alone takes most of a second) is left to the first code path that uses them
+OPENAI_AVAILABLE = importlib.util.find_spec("openai") is not None
+
+# Async Ollama calls fall back to a worker thread without aiohttp
+AIOHTTP_AVAILABLE = importlib.util.find_spec("aiohttp") is not None
+
+# Seconds an availability probe or model list stays valid
+DEFAULT_HEALTH_TTL = 30.0
+
+# How long Ollama keeps a model loaded after a request (Ollama duration; "-1" keeps it loaded).
+# Longer than the server's 5 minute default so the model survives pauses between bursts.
+DEFAULT_KEEP_ALIVE = "30m"
+
+# Responses API settings of reasoning models (gpt-5*) unless a request says otherwise
+REASONING_EFFORTS = ("minimal", "low", "medium", "high")
+DEFAULT_REASONING_EFFORT = "medium"
+DEFAULT_VERBOSITY = "medium"
+
+# Seconds a failing Ollama backend stays out of the load balancer's rotation
+UNHEALTHY_COOLDOWN = 30.0
+
+# OpenAI Batch API polling
+BATCH_POLL_INTERVAL = 10.0
+BATCH_TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+
+class LLMStreamError(Exception):
+    """Raised by generate_stream() when the provider rejects or drops a stream"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None,
+                 retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+def parse_retry_after(headers: Optional[Any]) -> Optional[float]:
+    """Seconds to wait from Retry-After / retry-after-ms headers, if present"""
+    if not headers:
+        return None
+    try:
+        value = headers.get("retry-after-ms")
+        if value:
+            return max(0.0, float(value) / 1000)
+        value = headers.get("retry-after")
+        if not value:
+            return None
+        if value.strip().isdigit():
+            return float(value)
+        # HTTP-date form
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_after_from_error(error: BaseException) -> Optional[float]:
+    """Retry-After of an LLMStreamError or an OpenAI APIStatusError"""
+    if getattr(error, "retry_after", None) is not None:
+        return error.retry_after
+    response = getattr(error, "response", None)
+    return parse_retry_after(getattr(response, "headers", None))
 
 
 @dataclass
@@ -37,6 +102,9 @@ class LLMResponse:
     token_usage: Optional[Dict[str, int]] = None
     error: Optional[str] = None
     raw_response: Optional[Dict] = None
+    status_code: Optional[int] = None  # HTTP status when the provider exposes one
+    cached: bool = False  # True when served from the response cache
+    retry_after: Optional[float] = None  # Seconds the server asked us to wait (Retry-After)
 
 
 @dataclass
@@ -48,6 +116,27 @@ class LLMRequest:
     max_tokens: Optional[int] = None
     stream: bool = False
     system_prompt: Optional[str] = None
+    # JSON Schema the reply must follow (structured output; see llm_schema.py)
+    response_schema: Optional[Dict[str, Any]] = None
+    # Context size to allocate for prompt and reply (Ollama num_ctx); None uses the server default
+    context_tokens: Optional[int] = None
+    # Reasoning models (OpenAI responses API): effort, answer length, server-side storage and
+    # extra output such as "reasoning.encrypted_content"
+    reasoning_effort: str = DEFAULT_REASONING_EFFORT
+    verbosity: str = DEFAULT_VERBOSITY
+    store: bool = False
+    include: Tuple[str, ...] = ()
+    # Attach the provider's full response to LLMResponse.raw_response (debugging; costs memory)
+    keep_raw_response: bool = False
+
+
+def _openai_schema_format(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """Strict json_schema response format; the schema title becomes its required name"""
+    return {
+        "name": schema.get("title") or "response",
+        "schema": {key: value for key, value in schema.items() if key != "title"},
+        "strict": True
+    }
 
 
 class LLMProvider(ABC):
@@ -61,6 +150,36 @@ class LLMProvider(ABC):
         """Generate response from LLM"""
         pass
 
+    async def agenerate(self, request: LLMRequest) -> LLMResponse:
+        """Generate response from LLM without blocking the event loop.
+
+        Providers with a native async client override this; the default
+        runs the blocking generate() in the loop's default executor.
+        """
+        return await asyncio.to_thread(self.generate, request)
+
+    def generate_batch(self, requests: List[LLMRequest], **kwargs) -> List[LLMResponse]:
+        """Generate responses for many requests at once.
+
+        Providers with a bulk submission API override this and take their
+        options as keyword arguments (OpenAIProvider: timeout); wrappers pass
+        them through. The default ignores them and calls generate() for each
+        request in order.
+        """
+        return [self.generate(request) for request in requests]
+
+    def generate_stream(self, request: LLMRequest) -> Iterator[str]:
+        """Yield the generated text incrementally.
+
+        Closing the generator early cancels the generation. Transport errors
+        are raised (see LLMStreamError); use collect_stream() to get an
+        LLMResponse. Providers without streaming yield the full text once.
+        """
+        response = self.generate(replace(request, stream=False))
+        if not response.success:
+            raise LLMStreamError(response.error or "Generation failed", response.status_code, response.retry_after)
+        yield response.content
+
     @abstractmethod
     def is_available(self) -> bool:
         """Check if provider is available"""
@@ -75,82 +194,233 @@ class LLMProvider(ABC):
 class OllamaProvider(LLMProvider):
     """Ollama local API provider"""
 
-    def __init__(self, base_url: str = "http://localhost:5001"):
+    def __init__(self, base_url: str = "http://localhost:5001", compress_requests: Optional[bool] = None,
+                 keep_alive: Optional[Union[str, int]] = None):
         super().__init__("ollama")
         self.base_url = base_url.rstrip('/')
         self.timeout = 300
+        # None follows the shared http_client setting
+        self.compress_requests = compress_requests
+        # None leaves model residency to the server default; Ollama wants bare seconds as a number
+        if isinstance(keep_alive, str) and keep_alive.lstrip("-").isdigit():
+            keep_alive = int(keep_alive)
+        self.keep_alive = keep_alive
+        self._async_session = None
+        self._async_session_loop = None
+
+    def _build_payload(self, request: LLMRequest) -> Dict[str, Any]:
+        """Build the /chat payload for a request"""
+        # Prepare messages
+        messages = []
+        if request.system_prompt:
+            messages.append({"role": "system", "content": request.system_prompt})
+        messages.append({"role": "user", "content": request.prompt})
+
+        # Prepare payload
+        payload = {
+            "model": request.model,
+            "messages": messages,
+            "stream": request.stream
+        }
+
+        # Add optional parameters
+        if request.temperature != 0.7:
+            payload["temperature"] = request.temperature
+        if request.max_tokens:
+            payload["max_tokens"] = request.max_tokens
+        if request.response_schema:
+            # Ollama constrains generation to the schema
+            payload["format"] = request.response_schema
+        if request.context_tokens:
+            payload["num_ctx"] = request.context_tokens
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive
+
+        return payload
+
+    def warm_up(self, model: str, system_prompt: Optional[str] = None,
+                context_tokens: Optional[int] = None) -> bool:
+        """Load model before the first real request; with system_prompt, also prefill it.
+
+        Ollama reuses the evaluated prompt prefix of the previous request, so
+        requests that start with the same system prompt skip its prefill.
+        Pass the context_tokens of the coming requests: a different size reloads the model.
+        """
+        request = LLMRequest(prompt="", model=model, max_tokens=1, system_prompt=system_prompt,
+                             context_tokens=context_tokens)
+        payload = self._build_payload(request)
+        if not system_prompt:
+            # Without messages Ollama only loads the model
+            del payload["messages"]
+        try:
+            response = http_client.post_json(f"{self.base_url}/chat", payload, timeout=self.timeout,
+                                             compress=self.compress_requests)
+            return response.status_code == 200
+        except Exception:
+            return False
+
+    def _success_response(self, request: LLMRequest, data: Dict, processing_time: float) -> LLMResponse:
+        """Build an LLMResponse from a decoded /chat reply"""
+        content = data.get('message', {}).get('content', '')
+
+        # Ollama reports prompt_eval_count/eval_count when the proxy passes them through
+        token_usage = None
+        if data.get('eval_count') is not None:
+            prompt_tokens = data.get('prompt_eval_count') or 0
+            token_usage = {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": data['eval_count'],
+                "total_tokens": prompt_tokens + data['eval_count']
+            }
+
+        return LLMResponse(
+            content=content,
+            success=True,
+            provider=self.provider_name,
+            model=request.model,
+            processing_time=processing_time,
+            token_usage=token_usage,
+            raw_response=data,
+            status_code=200
+        )
+
+    def _error_response(self, request: LLMRequest, error: str, processing_time: float,
+                        status_code: Optional[int] = None, retry_after: Optional[float] = None) -> LLMResponse:
+        """Build a failed LLMResponse"""
+        return LLMResponse(
+            content="",
+            success=False,
+            provider=self.provider_name,
+            model=request.model,
+            processing_time=processing_time,
+            error=error,
+            status_code=status_code,
+            retry_after=retry_after
+        )
 
     def generate(self, request: LLMRequest) -> LLMResponse:
         """Generate response using Ollama API"""
+        if request.stream:
+            return collect_stream(self, request)
+
         start_time = time.time()
 
         try:
-            # Prepare messages
-            messages = []
-            if request.system_prompt:
-                messages.append({"role": "system", "content": request.system_prompt})
-            messages.append({"role": "user", "content": request.prompt})
-
-            # Prepare payload
-            payload = {
-                "model": request.model,
-                "messages": messages,
-                "stream": request.stream
-            }
-
-            # Add optional parameters
-            if request.temperature != 0.7:
-                payload["temperature"] = request.temperature
-            if request.max_tokens:
-                payload["max_tokens"] = request.max_tokens
+            payload = self._build_payload(request)
 
-            # Make request
-            response = requests.post(
+            # Make request over the shared keep-alive session
+            response = http_client.post_json(
                 f"{self.base_url}/chat",
-                json=payload,
-                timeout=self.timeout
+                payload,
+                timeout=self.timeout,
+                compress=self.compress_requests
             )
 
             processing_time = time.time() - start_time
 
             if response.status_code == 200:
-                data = response.json()
-                content = data.get('message', {}).get('content', '')
-
-                return LLMResponse(
-                    content=content,
-                    success=True,
-                    provider=self.provider_name,
-                    model=request.model,
-                    processing_time=processing_time,
-                    raw_response=data
-                )
+                return self._success_response(request, response.json(), processing_time)
             else:
                 error_msg = f"HTTP {response.status_code}: {response.text}"
-                return LLMResponse(
-                    content="",
-                    success=False,
-                    provider=self.provider_name,
-                    model=request.model,
-                    processing_time=processing_time,
-                    error=error_msg
-                )
+                return self._error_response(request, error_msg, processing_time, response.status_code,
+                                            parse_retry_after(response.headers))
 
         except Exception as e:
             processing_time = time.time() - start_time
-            return LLMResponse(
-                content="",
-                success=False,
-                provider=self.provider_name,
-                model=request.model,
-                processing_time=processing_time,
-                error=str(e)
-            )
+            return self._error_response(request, str(e), processing_time)
+
+    def _get_async_session(self):
+        """Return an aiohttp session bound to the running event loop"""
+        import aiohttp
+
+        loop = asyncio.get_running_loop()
+        if self._async_session is None or self._async_session.closed or self._async_session_loop is not loop:
+            # The semaphore in the caller bounds in-flight requests, not the connector
+            connector = aiohttp.TCPConnector(limit=0)
+            self._async_session = aiohttp.ClientSession(connector=connector)
+            self._async_session_loop = loop
+        return self._async_session
+
+    async def agenerate(self, request: LLMRequest) -> LLMResponse:
+        """Generate response using Ollama API on the event loop"""
+        if not AIOHTTP_AVAILABLE or request.stream:
+            return await super().agenerate(request)
+
+        import aiohttp
+
+        start_time = time.time()
+
+        try:
+            payload = self._build_payload(request)
+            body, headers = http_client.encode_json_body(payload, self.compress_requests)
+            session = self._get_async_session()
+
+            async with session.post(
+                f"{self.base_url}/chat",
+                data=body,
+                headers=headers,
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            ) as response:
+                if response.status == 200:
+                    data = await response.json(content_type=None)
+                    processing_time = time.time() - start_time
+                    return self._success_response(request, data, processing_time)
+                else:
+                    text = await response.text()
+                    processing_time = time.time() - start_time
+                    error_msg = f"HTTP {response.status}: {text}"
+                    return self._error_response(request, error_msg, processing_time, response.status,
+                                                parse_retry_after(response.headers))
+
+        except Exception as e:
+            processing_time = time.time() - start_time
+            return self._error_response(request, str(e) or type(e).__name__, processing_time)
+
+    def generate_stream(self, request: LLMRequest) -> Iterator[str]:
+        """Stream message deltas from the proxy's NDJSON /chat response"""
+        payload = self._build_payload(request)
+        payload["stream"] = True
+
+        response = http_client.post_json(
+            f"{self.base_url}/chat",
+            payload,
+            timeout=self.timeout,
+            compress=self.compress_requests,
+            stream=True
+        )
+
+        # Closing the response (also on early exit) tells the proxy to stop generating
+        with response:
+            if response.status_code != 200:
+                raise LLMStreamError(f"HTTP {response.status_code}: {response.text}", response.status_code,
+                                     parse_retry_after(response.headers))
+
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.strip():
+                    continue
+                try:
+                    chunk_data = json.loads(line)
+                except json.JSONDecodeError:
+                    # Skip malformed lines
+                    continue
+
+                chunk_content = chunk_data.get('message', {}).get('content', '')
+                if chunk_content:
+                    yield chunk_content
+                if chunk_data.get('done'):
+                    break
+
+    async def aclose(self):
+        """Close the async HTTP session, if one was opened"""
+        if self._async_session is not None and not self._async_session.closed:
+            await self._async_session.close()
+        self._async_session = None
+        self._async_session_loop = None
 
     def is_available(self) -> bool:
         """Check if Ollama service is available"""
         try:
-            response = requests.get(f"{self.base_url}/health", timeout=5)
+            response = http_client.get(f"{self.base_url}/health", timeout=5)
             return response.status_code == 200
         except:
             return False
@@ -158,7 +428,7 @@ class OllamaProvider(LLMProvider):
     def list_models(self) -> List[str]:
         """List available Ollama models"""
         try:
-            response = requests.get(f"{self.base_url}/models", timeout=10)
+            response = http_client.get(f"{self.base_url}/models", timeout=10)
             if response.status_code == 200:
                 data = response.json()
                 models = data.get('models', [])
@@ -168,19 +438,193 @@ class OllamaProvider(LLMProvider):
             return []
 
 
+class OllamaLoadBalancer(LLMProvider):
+    """Spreads requests over several Ollama proxies.
+
+    Each request goes to the healthy backend with the fewest outstanding
+    requests. A backend that refuses connections (or answers 502/503/504)
+    leaves the rotation for unhealthy_cooldown seconds and the request is
+    retried on the next backend; a successful health probe brings it back.
+    """
+
+    # Status codes that indicate a node problem rather than a bad request
+    NODE_FAILURE_STATUSES = (502, 503, 504)
+
+    def __init__(self, base_urls: List[str], compress_requests: Optional[bool] = None,
+                 unhealthy_cooldown: float = UNHEALTHY_COOLDOWN, keep_alive: Optional[Union[str, int]] = None):
+        super().__init__("ollama")
+        if not base_urls:
+            raise ValueError("OllamaLoadBalancer needs at least one base URL")
+        self.backends = [OllamaProvider(base_url=url, compress_requests=compress_requests, keep_alive=keep_alive)
+                         for url in base_urls]
+        self.unhealthy_cooldown = unhealthy_cooldown
+        self._lock = threading.Lock()
+        self._outstanding = [0] * len(self.backends)
+        self._down_until = [0.0] * len(self.backends)
+        self._next = 0  # Rotating start index so ties are spread round-robin
+
+    @property
+    def base_url(self) -> str:
+        return ",".join(backend.base_url for backend in self.backends)
+
+    def _acquire(self, exclude: set) -> Optional[int]:
+        """Reserve the least-loaded healthy backend not in exclude"""
+        with self._lock:
+            now = time.monotonic()
+            candidates = [i for i in range(len(self.backends)) if i not in exclude]
+            healthy = [i for i in candidates if self._down_until[i] <= now]
+            if not healthy:
+                if exclude:
+                    return None
+                # Everything is marked down: keep trying rather than failing outright
+                healthy = candidates
+
+            start = self._next
+            self._next = (self._next + 1) % len(self.backends)
+            index = min(healthy, key=lambda i: (self._outstanding[i], (i - start) % len(self.backends)))
+            self._outstanding[index] += 1
+            return index
+
+    def _release(self, index: int, node_failed: bool):
+        with self._lock:
+            self._outstanding[index] -= 1
+            if node_failed:
+                self._down_until[index] = time.monotonic() + self.unhealthy_cooldown
+                print(f"[LB] Ollama backend {self.backends[index].base_url} taken out of rotation for {self.unhealthy_cooldown:.0f}s")
+            else:
+                self._down_until[index] = 0.0
+
+    def _is_node_failure(self, response: LLMResponse) -> bool:
+        return not response.success and (response.status_code is None
+                                         or response.status_code in self.NODE_FAILURE_STATUSES)
+
+    def outstanding(self) -> Dict[str, int]:
+        """Outstanding requests per backend URL"""
+        with self._lock:
+            return {backend.base_url: count for backend, count in zip(self.backends, self._outstanding)}
+
+    def healthy_backends(self) -> List[str]:
+        now = time.monotonic()
+        with self._lock:
+            return [b.base_url for b, until in zip(self.backends, self._down_until) if until <= now]
+
+    def generate(self, request: LLMRequest) -> LLMResponse:
+        tried = set()
+        response = None
+        while (index := self._acquire(tried)) is not None:
+            tried.add(index)
+            response = self.backends[index].generate(request)
+            node_failed = self._is_node_failure(response)
+            self._release(index, node_failed)
+            if not node_failed:
+                return response
+        return response
+
+    async def agenerate(self, request: LLMRequest) -> LLMResponse:
+        tried = set()
+        response = None
+        while (index := self._acquire(tried)) is not None:
+            tried.add(index)
+            try:
+                response = await self.backends[index].agenerate(request)
+            except BaseException:
+                self._release(index, node_failed=False)
+                raise
+            node_failed = self._is_node_failure(response)
+            self._release(index, node_failed)
+            if not node_failed:
+                return response
+        return response
+
+    def generate_stream(self, request: LLMRequest) -> Iterator[str]:
+        index = self._acquire(set())
+        node_failed = False
+        try:
+            yield from self.backends[index].generate_stream(request)
+        except LLMStreamError as e:
+            node_failed = e.status_code in self.NODE_FAILURE_STATUSES
+            raise
+        except Exception:
+            node_failed = True
+            raise
+        finally:
+            self._release(index, node_failed)
+
+    def is_available(self) -> bool:
+        """Probe all backends concurrently; healthy ones rejoin the rotation"""
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(self.backends)) as executor:
+            results = list(executor.map(lambda backend: backend.is_available(), self.backends))
+
+        with self._lock:
+            now = time.monotonic()
+            for index, available in enumerate(results):
+                self._down_until[index] = 0.0 if available else now + self.unhealthy_cooldown
+
+        return any(results)
+
+    def warm_up(self, model: str, system_prompt: Optional[str] = None,
+                context_tokens: Optional[int] = None) -> bool:
+        """Warm up all backends concurrently; True if any of them loaded the model"""
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(self.backends)) as executor:
+            results = list(executor.map(lambda backend: backend.warm_up(model, system_prompt, context_tokens),
+                                        self.backends))
+        return any(results)
+
+    def list_models(self) -> List[str]:
+        """Models served by any healthy backend"""
+        healthy = set(self.healthy_backends())
+        models: List[str] = []
+        for backend in self.backends:
+            if backend.base_url in healthy:
+                models.extend(m for m in backend.list_models() if m not in models)
+        return models
+
+    async def aclose(self):
+        for backend in self.backends:
+            await backend.aclose()
+
+
+def create_ollama_provider(base_url: str, compress_requests: Optional[bool] = None,
+                           keep_alive: Optional[Union[str, int]] = None) -> LLMProvider:
+    """OllamaProvider for one URL, OllamaLoadBalancer for a comma-separated list"""
+    urls = [url.strip() for url in base_url.split(",") if url.strip()]
+    if len(urls) > 1:
+        return OllamaLoadBalancer(urls, compress_requests=compress_requests, keep_alive=keep_alive)
+    return OllamaProvider(base_url=urls[0] if urls else base_url, compress_requests=compress_requests,
+                          keep_alive=keep_alive)
+
+
+def _to_namespace(value: Any) -> Any:
+    """Recursively turn decoded JSON into attribute-accessible objects"""
+    if isinstance(value, dict):
+        return SimpleNamespace(**{key: _to_namespace(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return [_to_namespace(item) for item in value]
+    return value
+
+
 class OpenAIProvider(LLMProvider):
     """OpenAI API provider"""
 
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None):
         super().__init__("openai")
         if not OPENAI_AVAILABLE:
             raise ImportError("OpenAI library not installed. Run: pip install openai")
+        from openai import OpenAI
 
         # Try to get API key from multiple sources
         final_api_key = self._get_api_key(api_key)
 
-        self.client = OpenAI(api_key=final_api_key) if final_api_key else OpenAI()
+        # base_url points the client at a compatible server (e.g. llm_stub_server.py)
+        client_kwargs = {"base_url": base_url} if base_url else {}
+        if final_api_key:
+            client_kwargs["api_key"] = final_api_key
+        self.client = OpenAI(**client_kwargs)
+        self._client_kwargs = client_kwargs
+        self._api_key = final_api_key
+        self._async_client = None
         self.timeout = 300
+        self.batch_poll_interval = BATCH_POLL_INTERVAL
 
     def _get_api_key(self, provided_key: Optional[str]) -> Optional[str]:
         """Get API key from multiple sources in order of priority"""
@@ -219,166 +663,379 @@ class OpenAIProvider(LLMProvider):
         print(f"[WARNING] No OpenAI API key found. Tried: --openai-api-key argument, open-api.key file, OPENAI_API_KEY environment variable")
         return None
 
+    @property
+    def async_client(self):
+        """AsyncOpenAI client, created on first async use"""
+        if self._async_client is None:
+            from openai import AsyncOpenAI
+            self._async_client = AsyncOpenAI(**self._client_kwargs)
+        return self._async_client
+
+    @staticmethod
+    def _is_reasoning_model(model: str) -> bool:
+        """Reasoning models (gpt-5-nano, etc.) use the responses API"""
+        return model.startswith("gpt-5")
+
+    def _build_responses_params(self, request: LLMRequest) -> Dict[str, Any]:
+        """Build responses.create() params for reasoning models"""
+        # Use responses.create() for reasoning models (exact format from OpenAI example)
+        # Build input array with the exact structure from the example
+        input_items = []
+
+        # Add system prompt as developer role if provided
+        if request.system_prompt:
+            input_items.append({
+                "role": "developer",
+                "content": [
+                    {
+                        "type": "input_text",
+                        "text": request.system_prompt
+                    }
+                ]
+            })
+
+        # Add user prompt
+        input_items.append({
+            "role": "user",
+            "content": [
+                {
+                    "type": "input_text",
+                    "text": request.prompt
+                }
+            ]
+        })
+
+        text_format = {"type": "text"}
+        if request.response_schema:
+            text_format = {"type": "json_schema", **_openai_schema_format(request.response_schema)}
+
+        params = {
+            "model": request.model,
+            "input": input_items,  # Use the structured input format
+            "text": {
+                "format": text_format,
+                "verbosity": request.verbosity
+            },
+            "reasoning": {"effort": request.reasoning_effort},
+            "store": request.store
+        }
+        if request.include:
+            params["include"] = list(request.include)
+        return params
+
+    def _responses_to_llm_response(self, request: LLMRequest, response: Any, processing_time: float) -> LLMResponse:
+        """Convert a responses.create() result into an LLMResponse"""
+        # Extract content from reasoning model response
+        content = ""
+
+        if hasattr(response, 'output') and response.output:
+            # Look for message type outputs
+            for output_item in response.output:
+                if hasattr(output_item, 'type') and output_item.type == 'message':
+                    if hasattr(output_item, 'content') and output_item.content:
+                        for content_item in output_item.content:
+                            if hasattr(content_item, 'type') and content_item.type == 'output_text':
+                                if hasattr(content_item, 'text'):
+                                    content = content_item.text
+                                    break
+                    if content:
+                        break
+
+        # Fallback to other possible locations
+        if not content:
+            if hasattr(response, 'text') and response.text:
+                content = response.text.content if hasattr(response.text, 'content') else str(response.text)
+            elif hasattr(response, 'content'):
+                content = response.content
+            elif hasattr(response, 'choices') and response.choices:
+                content = response.choices[0].message.content if hasattr(response.choices[0], 'message') else str(response.choices[0])
+            else:
+                content = str(response)
+
+        # The responses API reports input/output tokens
+        token_usage = None
+        usage = getattr(response, 'usage', None)
+        if usage and getattr(usage, 'input_tokens', None) is not None:
+            token_usage = {
+                "prompt_tokens": usage.input_tokens,
+                "completion_tokens": usage.output_tokens,
+                "total_tokens": usage.total_tokens
+            }
+
+        return LLMResponse(
+            content=content,
+            success=True,
+            provider=self.provider_name,
+            model=request.model,
+            processing_time=processing_time,
+            token_usage=token_usage,
+            raw_response=self._raw_response(request, response)
+        )
+
+    @staticmethod
+    def _raw_response(request: LLMRequest, response: Any) -> Optional[Dict]:
+        """Full response as a dict, only when the request asks to keep it"""
+        if not request.keep_raw_response:
+            return None
+        if hasattr(response, 'model_dump'):
+            return response.model_dump()
+        return response if isinstance(response, dict) else None
+
+    def _build_chat_params(self, request: LLMRequest) -> Dict[str, Any]:
+        """Build chat.completions.create() params for regular models"""
+        messages = []
+        if request.system_prompt:
+            messages.append({"role": "system", "content": request.system_prompt})
+        messages.append({"role": "user", "content": request.prompt})
+
+        params = {
+            "model": request.model,
+            "messages": messages,
+            "stream": request.stream
+        }
+
+        # Add temperature only if it's not the default for models that don't support it
+        if hasattr(request, 'temperature') and request.temperature is not None:
+            # Some models like gpt-4o-mini only support temperature=1
+            if request.model.startswith("gpt-4o") and request.temperature != 1.0:
+                print(f"[WARNING] Model {request.model} only supports temperature=1, skipping temperature parameter")
+            else:
+                params["temperature"] = request.temperature
+
+        # Add optional parameters
+        if request.max_tokens:
+            params["max_tokens"] = request.max_tokens
+        if request.response_schema:
+            params["response_format"] = {
+                "type": "json_schema",
+                "json_schema": _openai_schema_format(request.response_schema)
+            }
+
+        return params
+
+    def _chat_to_llm_response(self, request: LLMRequest, response: Any, processing_time: float) -> LLMResponse:
+        """Convert a chat.completions.create() result into an LLMResponse"""
+        if hasattr(response, 'choices') and response.choices:
+            content = response.choices[0].message.content or ""
+
+            # Extract token usage if available
+            token_usage = None
+            if hasattr(response, 'usage') and response.usage:
+                token_usage = {
+                    "prompt_tokens": response.usage.prompt_tokens,
+                    "completion_tokens": response.usage.completion_tokens,
+                    "total_tokens": response.usage.total_tokens
+                }
+
+            return LLMResponse(
+                content=content,
+                success=True,
+                provider=self.provider_name,
+                model=request.model,
+                processing_time=processing_time,
+                token_usage=token_usage,
+                raw_response=self._raw_response(request, response)
+            )
+        else:
+            return self._error_response(request, "No response content received", processing_time)
+
+    def _error_response(self, request: LLMRequest, error: str, processing_time: float,
+                        status_code: Optional[int] = None, retry_after: Optional[float] = None) -> LLMResponse:
+        """Build a failed LLMResponse"""
+        return LLMResponse(
+            content="",
+            success=False,
+            provider=self.provider_name,
+            model=request.model,
+            processing_time=processing_time,
+            error=error,
+            status_code=status_code,
+            retry_after=retry_after
+        )
+
     def generate(self, request: LLMRequest) -> LLMResponse:
         """Generate response using OpenAI API"""
+        if request.stream:
+            return collect_stream(self, request)
+
         start_time = time.time()
 
         try:
-            # Check if this is a reasoning model (gpt-5-nano, etc.)
-            is_reasoning_model = request.model.startswith("gpt-5")
-
-            if is_reasoning_model:
-                # Use responses.create() for reasoning models (exact format from OpenAI example)
-                # Build input array with the exact structure from the example
-                input_items = []
-
-                # Add system prompt as developer role if provided
-                if request.system_prompt:
-                    input_items.append({
-                        "role": "developer",
-                        "content": [
-                            {
-                                "type": "input_text",
-                                "text": request.system_prompt
-                            }
-                        ]
-                    })
-
-                # Add user prompt
-                input_items.append({
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "input_text",
-                            "text": request.prompt
-                        }
-                    ]
-                })
-
-                params = {
-                    "model": request.model,
-                    "input": input_items,  # Use the structured input format
-                    "text": {
-                        "format": {"type": "text"},
-                        "verbosity": "medium"
-                    },
-                    "reasoning": {"effort": "medium"},
-                    "tools": [],
-                    "store": True,
-                    "include": [
-                        "reasoning.encrypted_content",
-                        "web_search_call.action.sources"
-                    ]
-                }
-
-                response = self.client.responses.create(**params)
+            if self._is_reasoning_model(request.model):
+                response = self.client.responses.create(**self._build_responses_params(request))
                 processing_time = time.time() - start_time
-
-                # Extract content from reasoning model response
-                content = ""
-
-                if hasattr(response, 'output') and response.output:
-                    # Look for message type outputs
-                    for output_item in response.output:
-                        if hasattr(output_item, 'type') and output_item.type == 'message':
-                            if hasattr(output_item, 'content') and output_item.content:
-                                for content_item in output_item.content:
-                                    if hasattr(content_item, 'type') and content_item.type == 'output_text':
-                                        if hasattr(content_item, 'text'):
-                                            content = content_item.text
-                                            break
-                            if content:
-                                break
-
-                # Fallback to other possible locations
-                if not content:
-                    if hasattr(response, 'text') and response.text:
-                        content = response.text.content if hasattr(response.text, 'content') else str(response.text)
-                    elif hasattr(response, 'content'):
-                        content = response.content
-                    elif hasattr(response, 'choices') and response.choices:
-                        content = response.choices[0].message.content if hasattr(response.choices[0], 'message') else str(response.choices[0])
-                    else:
-                        content = str(response)
-
-                return LLMResponse(
-                    content=content,
-                    success=True,
-                    provider=self.provider_name,
-                    model=request.model,
-                    processing_time=processing_time,
-                    raw_response=response.model_dump() if hasattr(response, 'model_dump') else None
-                )
-
+                return self._responses_to_llm_response(request, response, processing_time)
             else:
                 # Use standard chat.completions.create() for regular models
-                messages = []
-                if request.system_prompt:
-                    messages.append({"role": "system", "content": request.system_prompt})
-                messages.append({"role": "user", "content": request.prompt})
-
-                params = {
-                    "model": request.model,
-                    "messages": messages,
-                    "stream": request.stream
-                }
+                response = self.client.chat.completions.create(**self._build_chat_params(request))
+                processing_time = time.time() - start_time
+                return self._chat_to_llm_response(request, response, processing_time)
 
-                # Add temperature only if it's not the default for models that don't support it
-                if hasattr(request, 'temperature') and request.temperature is not None:
-                    # Some models like gpt-4o-mini only support temperature=1
-                    if request.model.startswith("gpt-4o") and request.temperature != 1.0:
-                        print(f"[WARNING] Model {request.model} only supports temperature=1, skipping temperature parameter")
-                    else:
-                        params["temperature"] = request.temperature
+        except Exception as e:
+            processing_time = time.time() - start_time
+            # APIStatusError carries the HTTP status; connection errors and timeouts have none
+            return self._error_response(request, str(e), processing_time, getattr(e, "status_code", None),
+                                        retry_after_from_error(e))
 
-                # Add optional parameters
-                if request.max_tokens:
-                    params["max_tokens"] = request.max_tokens
+    async def agenerate(self, request: LLMRequest) -> LLMResponse:
+        """Generate response using the AsyncOpenAI client"""
+        if request.stream:
+            return await asyncio.to_thread(collect_stream, self, request)
 
-                response = self.client.chat.completions.create(**params)
-                processing_time = time.time() - start_time
+        start_time = time.time()
 
-                if hasattr(response, 'choices') and response.choices:
-                    content = response.choices[0].message.content or ""
-
-                    # Extract token usage if available
-                    token_usage = None
-                    if hasattr(response, 'usage') and response.usage:
-                        token_usage = {
-                            "prompt_tokens": response.usage.prompt_tokens,
-                            "completion_tokens": response.usage.completion_tokens,
-                            "total_tokens": response.usage.total_tokens
-                        }
-
-                    return LLMResponse(
-                        content=content,
-                        success=True,
-                        provider=self.provider_name,
-                        model=request.model,
-                        processing_time=processing_time,
-                        token_usage=token_usage,
-                        raw_response=response.model_dump() if hasattr(response, 'model_dump') else None
-                    )
-                else:
-                    return LLMResponse(
-                        content="",
-                        success=False,
-                        provider=self.provider_name,
-                        model=request.model,
-                        processing_time=processing_time,
-                        error="No response content received"
-                    )
+        try:
+            if self._is_reasoning_model(request.model):
+                response = await self.async_client.responses.create(**self._build_responses_params(request))
+                processing_time = time.time() - start_time
+                return self._responses_to_llm_response(request, response, processing_time)
+            else:
+                response = await self.async_client.chat.completions.create(**self._build_chat_params(request))
+                processing_time = time.time() - start_time
+                return self._chat_to_llm_response(request, response, processing_time)
 
         except Exception as e:
             processing_time = time.time() - start_time
-            return LLMResponse(
-                content="",
-                success=False,
-                provider=self.provider_name,
-                model=request.model,
-                processing_time=processing_time,
-                error=str(e)
-            )
+            return self._error_response(request, str(e), processing_time, getattr(e, "status_code", None),
+                                        retry_after_from_error(e))
+
+    def generate_stream(self, request: LLMRequest) -> Iterator[str]:
+        """Stream text deltas from chat completions or the responses API"""
+        if self._is_reasoning_model(request.model):
+            stream = self.client.responses.create(**self._build_responses_params(request), stream=True)
+            try:
+                for event in stream:
+                    if getattr(event, 'type', '') == 'response.output_text.delta' and event.delta:
+                        yield event.delta
+            finally:
+                stream.close()
+        else:
+            params = self._build_chat_params(request)
+            params["stream"] = True
+            stream = self.client.chat.completions.create(**params)
+            try:
+                for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+            finally:
+                stream.close()
+
+    def _batch_line(self, custom_id: str, request: LLMRequest) -> Tuple[str, Dict[str, Any]]:
+        """Return the endpoint and JSONL record for one request of a batch"""
+        if self._is_reasoning_model(request.model):
+            endpoint, body = "/v1/responses", self._build_responses_params(request)
+        else:
+            endpoint, body = "/v1/chat/completions", self._build_chat_params(request)
+            body.pop("stream", None)  # Batches never stream
+        return endpoint, {"custom_id": custom_id, "method": "POST", "url": endpoint, "body": body}
+
+    def _submit_batch(self, endpoint: str, lines: List[Dict[str, Any]]) -> Any:
+        """Upload a JSONL input file and create a batch job for it"""
+        payload = "\n".join(json.dumps(line) for line in lines).encode("utf-8")
+        input_file = self.client.files.create(file=("llm_batch.jsonl", payload), purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=endpoint,
+            completion_window="24h"
+        )
+        print(f"[OPENAI-BATCH] Submitted batch {batch.id} with {len(lines)} requests to {endpoint}")
+        return batch
+
+    def _wait_for_batch(self, batch: Any, timeout: Optional[float]) -> Any:
+        """Poll a batch until it reaches a terminal status"""
+        start_time = time.time()
+        last_status = None
+
+        while batch.status not in BATCH_TERMINAL_STATUSES:
+            if timeout is not None and time.time() - start_time > timeout:
+                self.client.batches.cancel(batch.id)
+                raise TimeoutError(f"Batch {batch.id} not finished after {timeout:.1f}s (cancelled)")
+            time.sleep(self.batch_poll_interval)
+            batch = self.client.batches.retrieve(batch.id)
+
+            counts = batch.request_counts
+            status = (batch.status, counts.completed if counts else 0)
+            if status != last_status:
+                done = f" ({counts.completed}/{counts.total} done)" if counts else ""
+                print(f"[OPENAI-BATCH] Batch {batch.id} {batch.status}{done}")
+                last_status = status
+
+        return batch
+
+    def _read_batch_results(self, batch: Any) -> Dict[str, Dict[str, Any]]:
+        """Download output and error files, keyed by custom_id"""
+        results = {}
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            for line in self.client.files.content(file_id).text.splitlines():
+                if line.strip():
+                    record = json.loads(line)
+                    results[record["custom_id"]] = record
+        return results
+
+    def _batch_record_to_llm_response(self, request: LLMRequest, record: Optional[Dict[str, Any]],
+                                      processing_time: float) -> LLMResponse:
+        """Map one output/error line of a batch back to an LLMResponse"""
+        if record is None:
+            return self._error_response(request, "No result returned for request in batch", processing_time)
+
+        response = record.get("response") or {}
+        if record.get("error") or response.get("status_code") != 200:
+            error = record.get("error") or (response.get("body") or {}).get("error") or {}
+            message = error.get("message", str(error)) if isinstance(error, dict) else str(error)
+            result = self._error_response(request, f"Batch request failed: {message}", processing_time)
+            result.status_code = response.get("status_code")
+            return result
+
+        body = response["body"]
+        if self._is_reasoning_model(request.model):
+            result = self._responses_to_llm_response(request, _to_namespace(body), processing_time)
+        else:
+            result = self._chat_to_llm_response(request, _to_namespace(body), processing_time)
+        result.raw_response = body if request.keep_raw_response else None
+        result.status_code = 200
+        return result
+
+    def generate_batch(self, requests: List[LLMRequest], timeout: Optional[float] = None) -> List[LLMResponse]:
+        """Send all requests through the Batch API and wait for the results.
+
+        Requests are grouped per endpoint (chat completions vs responses),
+        written to a JSONL file, submitted and polled until complete.
+        Responses come back in request order; a failed batch yields failed
+        LLMResponses rather than raising.
+        """
+        start_time = time.time()
+        groups: Dict[str, List[Tuple[int, Dict[str, Any]]]] = {}
+        for index, request in enumerate(requests):
+            endpoint, line = self._batch_line(f"request-{index}", request)
+            groups.setdefault(endpoint, []).append((index, line))
+
+        responses: List[Optional[LLMResponse]] = [None] * len(requests)
+        submitted = []
+        for endpoint, entries in groups.items():
+            try:
+                submitted.append((entries, self._submit_batch(endpoint, [line for _, line in entries])))
+            except Exception as e:
+                for index, _ in entries:
+                    responses[index] = self._error_response(requests[index], f"Batch submission failed: {e}",
+                                                            time.time() - start_time)
+
+        for entries, batch in submitted:
+            try:
+                batch = self._wait_for_batch(batch, timeout)
+                if batch.status != "completed":
+                    raise RuntimeError(f"Batch {batch.id} ended with status '{batch.status}'")
+                results = self._read_batch_results(batch)
+                processing_time = time.time() - start_time
+                for index, line in entries:
+                    responses[index] = self._batch_record_to_llm_response(
+                        requests[index], results.get(line["custom_id"]), processing_time)
+            except Exception as e:
+                for index, _ in entries:
+                    responses[index] = self._error_response(requests[index], str(e), time.time() - start_time)
+
+        return responses
 
     def is_available(self) -> bool:
         """Check if OpenAI API is available"""
@@ -399,42 +1056,370 @@ class OpenAIProvider(LLMProvider):
             return []
 
 
+def collect_stream(provider: LLMProvider, request: LLMRequest,
+                   on_chunk: Optional[Callable[[str], None]] = None,
+                   json_check: bool = False,
+                   token_budget: Optional[int] = None) -> LLMResponse:
+    """Consume provider.generate_stream() into an LLMResponse.
+
+    on_chunk sees every delta as it arrives. With json_check the output is
+    fed through an IncrementalJSONChecker and the generation is cancelled
+    once it can no longer be valid JSON; token_budget (default: the
+    request's max_tokens) cancels it once the estimated output exceeds the
+    budget. Cancelled generations come back as failed responses that keep
+    the partial content.
+    """
+    start_time = time.time()
+    checker = IncrementalJSONChecker() if json_check else None
+    budget = token_budget or request.max_tokens
+    parts: List[str] = []
+    length = 0
+    abort_reason = None
+    stream = provider.generate_stream(request)
+
+    def result(success: bool, error: Optional[str] = None, status_code: Optional[int] = None,
+               retry_after: Optional[float] = None) -> LLMResponse:
+        return LLMResponse(
+            content="".join(parts),
+            success=success,
+            provider=provider.provider_name,
+            model=request.model,
+            processing_time=time.time() - start_time,
+            error=error,
+            status_code=status_code,
+            retry_after=retry_after
+        )
+
+    try:
+        for chunk in stream:
+            parts.append(chunk)
+            length += len(chunk)
+            if on_chunk:
+                on_chunk(chunk)
+
+            if checker is not None and not checker.feed(chunk):
+                abort_reason = f"output can no longer be valid JSON ({checker.error})"
+                break
+            if budget and length / CHARS_PER_TOKEN > budget:
+                abort_reason = f"output exceeded the token budget of {budget}"
+                break
+    except Exception as e:
+        return result(False, str(e) or type(e).__name__, getattr(e, "status_code", None),
+                      retry_after_from_error(e))
+    finally:
+        # Cancels the generation upstream if we stopped early
+        stream.close()
+
+    if abort_reason:
+        return result(False, f"Stream aborted: {abort_reason}")
+    return result(True, status_code=200)
+
+
+class ProviderWrapper(LLMProvider):
+    """Base class for providers that add behaviour around another provider.
+
+    Calls are forwarded to the wrapped provider; attributes that the
+    wrapper does not define (base_url, client, ...) are read from it too.
+    """
+
+    def __init__(self, inner: LLMProvider):
+        super().__init__(inner.provider_name)
+        self.inner = inner
+
+    def generate(self, request: LLMRequest) -> LLMResponse:
+        return self.inner.generate(request)
+
+    async def agenerate(self, request: LLMRequest) -> LLMResponse:
+        return await self.inner.agenerate(request)
+
+    def is_available(self) -> bool:
+        return self.inner.is_available()
+
+    def list_models(self) -> List[str]:
+        return self.inner.list_models()
+
+    def generate_batch(self, requests: List[LLMRequest], **kwargs) -> List[LLMResponse]:
+        return self.inner.generate_batch(requests, **kwargs)
+
+    def generate_stream(self, request: LLMRequest) -> Iterator[str]:
+        return self.inner.generate_stream(request)
+
+    def __getattr__(self, name: str) -> Any:
+        if name == "inner":
+            raise AttributeError(name)
+        return getattr(self.inner, name)
+
+
+_probe_executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+_probe_executor_lock = threading.Lock()
+
+
+def _get_probe_executor() -> concurrent.futures.ThreadPoolExecutor:
+    """Shared thread pool that runs availability probes in the background"""
+    global _probe_executor
+
+    with _probe_executor_lock:
+        if _probe_executor is None:
+            _probe_executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=8, thread_name_prefix="llm-health-probe")
+        return _probe_executor
+
+
+class HealthCachedProvider(ProviderWrapper):
+    """Caches is_available() and list_models() results for ttl seconds.
+
+    Probes run on a background pool; concurrent callers share the probe
+    that is already in flight instead of starting their own round-trip.
+    """
+
+    def __init__(self, inner: LLMProvider, ttl: float = DEFAULT_HEALTH_TTL):
+        super().__init__(inner)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._available: Optional[bool] = None
+        self._checked_at = 0.0
+        self._probe: Optional[concurrent.futures.Future] = None
+        self._models: Optional[List[str]] = None
+        self._models_at = 0.0
+
+    def _is_fresh(self, timestamp: float) -> bool:
+        return time.monotonic() - timestamp < self.ttl
+
+    def probe(self, force: bool = False) -> concurrent.futures.Future:
+        """Start an availability probe, reusing a fresh result or one already running"""
+        with self._lock:
+            if not force and self._available is not None and self._is_fresh(self._checked_at):
+                done = concurrent.futures.Future()
+                done.set_result(self._available)
+                return done
+            if self._probe is None or self._probe.done():
+                self._probe = _get_probe_executor().submit(self._run_probe)
+            return self._probe
+
+    def _run_probe(self) -> bool:
+        available = self.inner.is_available()
+        self._set_available(available)
+        return available
+
+    def _set_available(self, available: bool):
+        with self._lock:
+            self._available = available
+            self._checked_at = time.monotonic()
+
+    def is_available(self) -> bool:
+        return self.probe().result()
+
+    def list_models(self) -> List[str]:
+        with self._lock:
+            if self._models is not None and self._is_fresh(self._models_at):
+                return list(self._models)
+
+        models = self.inner.list_models()
+        if models:
+            # Empty lists usually mean a failed call; ask again next time
+            with self._lock:
+                self._models = list(models)
+                self._models_at = time.monotonic()
+        return models
+
+    def generate(self, request: LLMRequest) -> LLMResponse:
+        response = self.inner.generate(request)
+        if response.success:
+            self._set_available(True)
+        return response
+
+    async def agenerate(self, request: LLMRequest) -> LLMResponse:
+        response = await self.inner.agenerate(request)
+        if response.success:
+            self._set_available(True)
+        return response
+
+
 class LLMProviderManager:
     """Manager class for handling multiple LLM providers"""
 
-    def __init__(self):
+    def __init__(self, health_ttl: float = DEFAULT_HEALTH_TTL):
         self.providers: Dict[str, LLMProvider] = {}
+        self.health_ttl = health_ttl
+        # Innermost wrapper of every provider; keeps availability/model lists for health_ttl
+        self._health: Dict[str, HealthCachedProvider] = {}
+        # Factories wrapping each provider, applied innermost first
+        self.middlewares: List[Callable[[LLMProvider], LLMProvider]] = []
+        self._wrapped: Dict[str, LLMProvider] = {}
+        self.cache = None
 
     def add_provider(self, provider: LLMProvider, name: Optional[str] = None):
         """Add an LLM provider"""
         provider_name = name or provider.provider_name
         self.providers[provider_name] = provider
+        self._health[provider_name] = HealthCachedProvider(provider, self.health_ttl)
+        self._wrapped.pop(provider_name, None)
+
+    def add_middleware(self, factory: Callable[[LLMProvider], LLMProvider]):
+        """Wrap every provider returned by get_provider() with factory(provider)"""
+        self.middlewares.append(factory)
+        self._wrapped.clear()
+
+    def enable_cache(self, cache) -> None:
+        """Serve repeated requests from a persistent LLMResponseCache"""
+        from llm_cache import CachedProvider
+
+        self.cache = cache
+        self.add_middleware(lambda provider: CachedProvider(provider, cache))
+
+    def enable_metrics(self, registry=None) -> None:
+        """Record latency, TTFT, tokens/sec and errors of every call (see llm_metrics.MetricsProvider).
+
+        Enable it before the other middlewares so that only upstream calls are measured.
+        """
+        from llm_metrics import MetricsProvider
+
+        self.add_middleware(lambda provider: MetricsProvider(provider, registry))
+
+    def enable_single_flight(self) -> None:
+        """Send identical concurrent requests upstream once (see llm_cache.SingleFlightProvider)"""
+        from llm_cache import SingleFlight, SingleFlightProvider
+
+        flights: Dict[str, SingleFlight] = {}
+
+        def wrap(provider: LLMProvider) -> LLMProvider:
+            if provider.provider_name not in flights:
+                flights[provider.provider_name] = SingleFlight()
+            return SingleFlightProvider(provider, flights[provider.provider_name])
+
+        self.add_middleware(wrap)
+
+    def enable_adaptive_concurrency(self, **limiter_options) -> None:
+        """Give every provider an AIMD concurrency limit (see llm_limits.AdaptiveConcurrencyLimiter)"""
+        from llm_limits import AdaptiveConcurrencyLimiter, ConcurrencyLimitedProvider
+
+        # One limiter per provider, shared by every chain that wraps it (e.g. hedge targets)
+        limiters: Dict[str, AdaptiveConcurrencyLimiter] = {}
+
+        def wrap(provider: LLMProvider) -> LLMProvider:
+            if provider.provider_name not in limiters:
+                limiters[provider.provider_name] = AdaptiveConcurrencyLimiter(
+                    name=provider.provider_name, **limiter_options)
+            return ConcurrencyLimitedProvider(provider, limiters[provider.provider_name])
+
+        self.add_middleware(wrap)
+
+    def enable_rate_limit(self, provider_names: Tuple[str, ...] = ("openai",), **limiter_options) -> None:
+        """Meter requests/tokens per minute for the named providers (see llm_limits.RateLimiter)"""
+        from llm_limits import RateLimiter, RateLimitedProvider
+
+        # One limiter per provider, kept when later middlewares rebuild the wrappers
+        limiters: Dict[str, RateLimiter] = {}
+
+        def wrap(provider: LLMProvider) -> LLMProvider:
+            if provider.provider_name not in provider_names:
+                return provider
+            if provider.provider_name not in limiters:
+                limiters[provider.provider_name] = RateLimiter(name=provider.provider_name, **limiter_options)
+            return RateLimitedProvider(provider, limiters[provider.provider_name])
+
+        self.add_middleware(wrap)
+
+    def enable_circuit_breaker(self, **breaker_options) -> None:
+        """Fail fast on providers that keep failing (see llm_resilience.CircuitBreaker)"""
+        from llm_resilience import CircuitBreaker, CircuitBreakerProvider
+
+        breakers: Dict[str, CircuitBreaker] = {}
+
+        def wrap(provider: LLMProvider) -> LLMProvider:
+            if provider.provider_name not in breakers:
+                breakers[provider.provider_name] = CircuitBreaker(name=provider.provider_name, **breaker_options)
+            return CircuitBreakerProvider(provider, breakers[provider.provider_name])
+
+        self.add_middleware(wrap)
+
+    def enable_hedging(self, fallback: Optional[str] = None, fallback_model: Optional[str] = None,
+                       **hedge_options) -> None:
+        """Duplicate requests slower than the observed p95 (see llm_resilience.HedgedProvider).
+
+        Duplicates go to the fallback provider (with fallback_model, if given),
+        wrapped with the middlewares enabled so far, or else to the same provider.
+        """
+        from llm_resilience import HedgedProvider
+
+        earlier = list(self.middlewares)
+
+        def wrap(provider: LLMProvider) -> LLMProvider:
+            hedge = None
+            if fallback and fallback in self.providers and provider.provider_name != fallback:
+                hedge = self._build(fallback, earlier)
+            return HedgedProvider(provider, hedge, fallback_model if hedge else None, **hedge_options)
+
+        self.add_middleware(wrap)
+
+    def enable_cascade(self, model: str, accept: Callable[[LLMRequest, LLMResponse], bool],
+                       provider: Optional[str] = None) -> None:
+        """Try a small model first and escalate rejected answers (see llm_cascade.CascadeProvider).
+
+        The small model runs on the named provider, wrapped with the middlewares
+        enabled so far, or else on the same provider.
+        """
+        from llm_cascade import CascadeProvider
+
+        earlier = list(self.middlewares)
+
+        def wrap(wrapped: LLMProvider) -> LLMProvider:
+            small = None
+            if provider and provider in self.providers and wrapped.provider_name != provider:
+                small = self._build(provider, earlier)
+            return CascadeProvider(wrapped, model, accept, small)
+
+        self.add_middleware(wrap)
+
+    def _build(self, name: str, middlewares: List[Callable[[LLMProvider], LLMProvider]]) -> LLMProvider:
+        provider = self._health[name]
+        for factory in middlewares:
+            provider = factory(provider)
+        return provider
 
     def get_provider(self, name: str) -> Optional[LLMProvider]:
-        """Get provider by name"""
-        return self.providers.get(name)
+        """Get provider by name, wrapped with the configured middlewares"""
+        if name not in self.providers:
+            return None
+        if name not in self._wrapped:
+            self._wrapped[name] = self._build(name, self.middlewares)
+        return self._wrapped[name]
 
     def list_providers(self) -> List[str]:
         """List available provider names"""
         return list(self.providers.keys())
 
+    def probe_providers(self, names: Optional[List[str]] = None, wait: bool = True,
+                        force: bool = False) -> Dict[str, bool]:
+        """Probe provider availability concurrently.
+
+        With wait=False the probes keep running in the background and an
+        empty dict is returned; later is_available() calls pick up the result.
+        """
+        futures = {name: self._health[name].probe(force=force)
+                   for name in (names or self.providers) if name in self._health}
+        if not wait:
+            return {}
+        return {name: future.result() for name, future in futures.items()}
+
     def get_available_providers(self) -> List[str]:
         """Get list of currently available providers"""
-        available = []
-        for name, provider in self.providers.items():
-            if provider.is_available():
-                available.append(name)
-        return available
+        health = self.probe_providers()
+        return [name for name in self.providers if health.get(name)]
 
     def auto_select_provider(self, preferred_providers: Optional[List[str]] = None) -> Optional[LLMProvider]:
         """Automatically select the best available provider"""
+        # Probe everything at once; the loops below only wait for results
+        self.probe_providers(wait=False)
+
         if preferred_providers:
             for pref in preferred_providers:
-                if pref in self.providers and self.providers[pref].is_available():
-                    return self.providers[pref]
+                if pref in self.providers and self.get_provider(pref).is_available():
+                    return self.get_provider(pref)
 
         # Fallback to any available provider
-        for provider in self.providers.values():
+        for name in self.providers:
+            provider = self.get_provider(name)
             if provider.is_available():
                 return provider
 
@@ -454,10 +1439,50 @@ def create_default_manager() -> LLMProviderManager:
             manager.add_provider(OpenAIProvider(), "openai")
         except Exception as e:
             print(f"[WARNING] Could not initialize OpenAI provider: {e}")
+    else:
+        print("[WARNING] OpenAI library not installed. Run: pip install openai")
 
     return manager
 
 
+class SharedEventLoop:
+    """A single asyncio event loop running in a daemon thread.
+
+    Synchronous callers submit coroutines with run(); async HTTP sessions
+    opened by providers stay bound to this one loop across calls.
+    """
+
+    _instance: Optional["SharedEventLoop"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run_loop, name="llm-event-loop", daemon=True)
+        self._thread.start()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    @classmethod
+    def get(cls) -> "SharedEventLoop":
+        """Return the process-wide shared loop, starting it on first use"""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def run(self, coro: Awaitable, timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the shared loop and wait for its result"""
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        return future.result(timeout)
+
+
+def run_coroutine(coro: Awaitable, timeout: Optional[float] = None) -> Any:
+    """Run a coroutine on the shared event loop from synchronous code"""
+    return SharedEventLoop.get().run(coro, timeout)
+
+
 # Convenience functions for backward compatibility
 def create_llm_request(prompt: str, model: str, **kwargs) -> LLMRequest:
     """Create a standardized LLM request"""
@@ -470,6 +1495,12 @@ def generate_with_provider(provider: LLMProvider, prompt: str, model: str, **kwa
     return provider.generate(request)
 
 
+async def agenerate_with_provider(provider: LLMProvider, prompt: str, model: str, **kwargs) -> LLMResponse:
+    """Generate response using a specific provider without blocking the event loop"""
+    request = create_llm_request(prompt, model, **kwargs)
+    return await provider.agenerate(request)
+
+
 if __name__ == "__main__":
     # Test the provider system
     print("Testing LLM Provider System")
@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Hedged Requests and Circuit Breakers for LLM Providers
+
+Keeps one slow or broken backend from setting the run time:
+
+- CircuitBreakerProvider stops sending requests to a provider after
+  failure_threshold consecutive failures (5xx/429 or no response) and
+  fails them immediately instead. After reset_timeout seconds one trial
+  request is let through; a success closes the circuit again.
+- HedgedProvider sends a duplicate request once the original has been
+  running longer than the observed latency percentile (p95 by default)
+  and returns whichever answer arrives first. Duplicates go to a hedge
+  provider, or to the same provider: an OllamaLoadBalancer routes them to
+  the least busy backend, which is not the one holding the slow request.
+  At most hedge_budget of all requests are duplicated, so a backend that
+  is slow across the board is not sent twice the load.
+"""
+
+import asyncio
+import concurrent.futures
+import threading
+import time
+from collections import deque
+from dataclasses import replace
+from typing import Iterator, List, Optional
+
+from llm_providers import LLMProvider, LLMRequest, LLMResponse, LLMStreamError, ProviderWrapper
+from llm_limits import OVERLOAD, OVERLOAD_STATUS_CODES, response_outcome
+
+# Circuit breaker defaults
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_TIMEOUT = 30.0
+
+# Hedging defaults
+DEFAULT_HEDGE_PERCENTILE = 0.95
+DEFAULT_HEDGE_BUDGET = 0.1
+HEDGE_MIN_SAMPLES = 20
+HEDGE_MIN_DELAY = 1.0
+LATENCY_WINDOW = 200
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with a single half-open trial"""
+
+    def __init__(self, name: str = "llm", failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+                 reset_timeout: float = DEFAULT_RESET_TIMEOUT, verbose: bool = True):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.verbose = verbose
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+        self.opened = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "state": self._state,
+                "consecutive_failures": self._failures,
+                "opened": self.opened,
+                "rejected": self.rejected
+            }
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now"""
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._state = HALF_OPEN
+            if self._state == HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record(self, failed: bool):
+        """Report the outcome of a request that allow() let through"""
+        with self._lock:
+            self._trial_in_flight = False
+            if not failed:
+                if self._state != CLOSED and self.verbose:
+                    print(f"[BREAKER] {self.name} recovered, circuit closed")
+                self._state = CLOSED
+                self._failures = 0
+                return
+
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    self.opened += 1
+                    if self.verbose:
+                        print(f"[BREAKER] {self.name} failed {self._failures} times in a row, "
+                              f"circuit open for {self.reset_timeout:.0f}s")
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+
+    def release_trial(self):
+        """Give back a half-open trial that ended without an outcome (cancelled)"""
+        with self._lock:
+            self._trial_in_flight = False
+
+
+class CircuitBreakerProvider(ProviderWrapper):
+    """Provider wrapper that fails fast while its circuit breaker is open"""
+
+    def __init__(self, inner: LLMProvider, breaker: Optional[CircuitBreaker] = None):
+        super().__init__(inner)
+        self.breaker = breaker or CircuitBreaker(name=inner.provider_name)
+
+    def _rejected_response(self, request: LLMRequest) -> LLMResponse:
+        return LLMResponse(
+            content="",
+            success=False,
+            provider=self.provider_name,
+            model=request.model,
+            processing_time=0.0,
+            error=f"Circuit open: {self.provider_name} failed repeatedly, retrying after {self.breaker.reset_timeout:.0f}s"
+        )
+
+    def generate(self, request: LLMRequest) -> LLMResponse:
+        if not self.breaker.allow():
+            return self._rejected_response(request)
+        response = self.inner.generate(request)
+        self.breaker.record(response_outcome(response) == OVERLOAD)
+        return response
+
+    async def agenerate(self, request: LLMRequest) -> LLMResponse:
+        if not self.breaker.allow():
+            return self._rejected_response(request)
+        try:
+            response = await self.inner.agenerate(request)
+        except asyncio.CancelledError:
+            self.breaker.release_trial()
+            raise
+        self.breaker.record(response_outcome(response) == OVERLOAD)
+        return response
+
+    def generate_stream(self, request: LLMRequest) -> Iterator[str]:
+        if not self.breaker.allow():
+            raise LLMStreamError(self._rejected_response(request).error)
+        failed = None
+        try:
+            yield from self.inner.generate_stream(request)
+            failed = False
+        except Exception as e:
+            status_code = getattr(e, "status_code", None)
+            failed = status_code is None or status_code in OVERLOAD_STATUS_CODES
+            raise
+        finally:
+            if failed is None:
+                self.breaker.release_trial()  # Consumer stopped reading
+            else:
+                self.breaker.record(failed)
+
+    def is_available(self) -> bool:
+        if self.breaker.state == OPEN:
+            return False
+        return self.inner.is_available()
+
+
+_hedge_executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+_hedge_executor_lock = threading.Lock()
+
+
+def _get_hedge_executor() -> concurrent.futures.ThreadPoolExecutor:
+    """Shared thread pool that runs hedged synchronous requests"""
+    global _hedge_executor
+
+    with _hedge_executor_lock:
+        if _hedge_executor is None:
+            _hedge_executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=64, thread_name_prefix="llm-hedge")
+        return _hedge_executor
+
+
+class LatencyTracker:
+    """Sliding window of successful request latencies"""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self._lock = threading.Lock()
+        self._samples: deque = deque(maxlen=window)
+
+    def record(self, latency: float):
+        with self._lock:
+            self._samples.append(latency)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        with self._lock:
+            if not self._samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class HedgedProvider(ProviderWrapper):
+    """Provider wrapper that duplicates slow requests and keeps the first answer"""
+
+    def __init__(self, inner: LLMProvider, hedge: Optional[LLMProvider] = None,
+                 hedge_model: Optional[str] = None, hedge_percentile: float = DEFAULT_HEDGE_PERCENTILE,
+                 hedge_budget: float = DEFAULT_HEDGE_BUDGET, min_samples: int = HEDGE_MIN_SAMPLES,
+                 min_delay: float = HEDGE_MIN_DELAY, verbose: bool = True):
+        super().__init__(inner)
+        self.hedge = hedge or inner
+        self.hedge_model = hedge_model
+        self.hedge_percentile = hedge_percentile
+        self.hedge_budget = hedge_budget
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.verbose = verbose
+        self.latencies = LatencyTracker()
+        self._lock = threading.Lock()
+
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    def hedge_stats(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "hedged": self.hedged,
+                "hedge_wins": self.hedge_wins,
+                "hedge_delay": self.hedge_delay()
+            }
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds after which a request is duplicated, or None while too few samples exist"""
+        if len(self.latencies) < self.min_samples:
+            return None
+        return max(self.min_delay, self.latencies.percentile(self.hedge_percentile))
+
+    def _start_request(self) -> Optional[float]:
+        with self._lock:
+            self.requests += 1
+        return self.hedge_delay()
+
+    def _take_hedge(self) -> bool:
+        """Reserve a duplicate within the hedge budget"""
+        with self._lock:
+            if self.hedged + 1 > self.hedge_budget * self.requests:
+                return False
+            self.hedged += 1
+            return True
+
+    def _hedge_request(self, request: LLMRequest) -> LLMRequest:
+        return replace(request, model=self.hedge_model) if self.hedge_model else request
+
+    def _finish(self, response: LLMResponse, started: float, from_hedge: bool) -> LLMResponse:
+        if response.success:
+            self.latencies.record(time.monotonic() - started)
+        if from_hedge and response.success:
+            with self._lock:
+                self.hedge_wins += 1
+            if self.verbose:
+                print(f"[HEDGE] {self.provider_name} duplicate answered first after {time.monotonic() - started:.1f}s")
+        return response
+
+    def generate(self, request: LLMRequest) -> LLMResponse:
+        started = time.monotonic()
+        delay = self._start_request()
+        if delay is None:
+            return self._finish(self.inner.generate(request), started, False)
+
+        executor = _get_hedge_executor()
+        primary = executor.submit(self.inner.generate, request)
+        try:
+            return self._finish(primary.result(timeout=delay), started, False)
+        except concurrent.futures.TimeoutError:
+            pass
+        if not self._take_hedge():
+            return self._finish(primary.result(), started, False)
+
+        hedge = executor.submit(self.hedge.generate, self._hedge_request(request))
+        pending = {primary, hedge}
+        response = None
+        while pending:
+            done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                response = self._finish(future.result(), started, future is hedge)
+                if response.success:
+                    # The other request finishes in the background and is discarded
+                    return response
+        return response
+
+    async def agenerate(self, request: LLMRequest) -> LLMResponse:
+        started = time.monotonic()
+        delay = self._start_request()
+        if delay is None:
+            return self._finish(await self.inner.agenerate(request), started, False)
+
+        primary = asyncio.ensure_future(self.inner.agenerate(request))
+        try:
+            return self._finish(await asyncio.wait_for(asyncio.shield(primary), delay), started, False)
+        except asyncio.TimeoutError:
+            pass
+        except asyncio.CancelledError:
+            primary.cancel()
+            raise
+        if not self._take_hedge():
+            return self._finish(await primary, started, False)
+
+        hedge = asyncio.ensure_future(self.hedge.agenerate(self._hedge_request(request)))
+        pending = {primary, hedge}
+        response = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    response = self._finish(task.result(), started, task is hedge)
+                    if response.success:
+                        return response
+            return response
+        finally:
+            # Cancel the slower request (or both, if we were cancelled)
+            for task in pending:
+                task.cancel()
+
+    def generate_batch(self, requests: List[LLMRequest], **kwargs) -> List[LLMResponse]:
+        return self.inner.generate_batch(requests, **kwargs)
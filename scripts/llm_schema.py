@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+JSON Schemas for Structured LLM Output
+
+Derives a JSON Schema from a dataclass so the model can be constrained to
+the expected structure (LLMRequest.response_schema, sent as Ollama's
+"format" and OpenAI's json_schema response format) instead of being told
+the format in the prompt and having JSON scraped from free text:
+
+- schema_from_dataclass() maps int/float/str/bool, List, Dict, Optional,
+  Literal (enum) and nested dataclasses
+- strict schemas list every property as required and allow null for the
+  optional ones, as OpenAI's strict mode demands; drop_null_optionals()
+  removes those nulls again so the result looks like a free-form answer
+- compile_validator() turns the same dataclass into a validator that
+  checks a parsed answer in one pass and returns every violation with
+  its path (e.g. brackets[2].rate), instead of stopping at the first
+"""
+
+import dataclasses
+from typing import Any, Callable, Dict, List, Literal, Optional, Union, get_args, get_origin, get_type_hints
+
+_PRIMITIVES = {int: "integer", float: "number", str: "string", bool: "boolean"}
+
+
+def _optional_inner(annotation: Any) -> Optional[Any]:
+    """X for Optional[X], else None"""
+    if get_origin(annotation) is Union:
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        if len(args) == 1 and len(get_args(annotation)) == 2:
+            return args[0]
+    return None
+
+
+def _nullable(schema: Dict[str, Any]) -> Dict[str, Any]:
+    if schema.get("type") in _PRIMITIVES.values():
+        return dict(schema, type=[schema["type"], "null"])
+    return {"anyOf": [schema, {"type": "null"}]}
+
+
+def _type_schema(annotation: Any, strict: bool) -> Dict[str, Any]:
+    inner = _optional_inner(annotation)
+    if inner is not None:
+        return _nullable(_type_schema(inner, strict))
+    if annotation in _PRIMITIVES:
+        return {"type": _PRIMITIVES[annotation]}
+    if dataclasses.is_dataclass(annotation):
+        return schema_from_dataclass(annotation, strict, title=False)
+
+    origin = get_origin(annotation)
+    if origin is Literal:
+        values = list(get_args(annotation))
+        return {"type": _PRIMITIVES[type(values[0])], "enum": values}
+    if origin in (list, List):
+        (item,) = get_args(annotation) or (Any,)
+        return {"type": "array", "items": _type_schema(item, strict) if item is not Any else {}}
+    if origin in (dict, Dict) or annotation in (dict, Dict):
+        if strict:
+            raise TypeError("Strict schemas need a dataclass instead of Dict for nested objects")
+        return {"type": "object"}
+    raise TypeError(f"No JSON Schema mapping for {annotation!r}")
+
+
+def schema_from_dataclass(cls: type, strict: bool = True, title: bool = True) -> Dict[str, Any]:
+    """JSON Schema of a dataclass; the top-level title names it in the OpenAI request"""
+    hints = get_type_hints(cls)
+    properties = {}
+    required = []
+    for field in dataclasses.fields(cls):
+        properties[field.name] = _type_schema(hints[field.name], strict)
+        has_default = field.default is not dataclasses.MISSING or field.default_factory is not dataclasses.MISSING
+        if strict or not has_default:
+            required.append(field.name)
+
+    schema = {"type": "object", "properties": properties, "required": required, "additionalProperties": False}
+    if title:
+        schema = {"title": cls.__name__, **schema}
+    return schema
+
+
+def drop_null_optionals(data: Any, cls: type) -> Any:
+    """Remove null values of fields that default to None, recursing into nested dataclasses"""
+    if not isinstance(data, dict) or not dataclasses.is_dataclass(cls):
+        return data
+    hints = get_type_hints(cls)
+    for field in dataclasses.fields(cls):
+        if field.name not in data:
+            continue
+        value = data[field.name]
+        if value is None and field.default is None:
+            del data[field.name]
+            continue
+        annotation = _optional_inner(hints[field.name]) or hints[field.name]
+        if dataclasses.is_dataclass(annotation):
+            drop_null_optionals(value, annotation)
+        elif get_origin(annotation) in (list, List) and isinstance(value, list):
+            (item,) = get_args(annotation) or (None,)
+            if dataclasses.is_dataclass(item):
+                for element in value:
+                    drop_null_optionals(element, item)
+    return data
+
+
+@dataclasses.dataclass(frozen=True)
+class SchemaViolation:
+    """One problem in a parsed answer: where it is and what is wrong"""
+    path: str  # e.g. "brackets[2].rate"; "" for the whole value
+    message: str
+
+    def __str__(self) -> str:
+        return f"{self.path or 'answer'}: {self.message}"
+
+
+# A compiled check appends the violations of value, found at path, to the list
+Check = Callable[[Any, str, List[SchemaViolation]], None]
+
+_JSON_TYPES = {int: "an integer", float: "a number", str: "a string", bool: "a boolean"}
+
+
+def _is_instance(value: Any, annotation: type) -> bool:
+    if annotation is bool:
+        return isinstance(value, bool)
+    if isinstance(value, bool):
+        return False  # JSON true/false are not numbers
+    if annotation is float:
+        return isinstance(value, (int, float))
+    if annotation is int:
+        return isinstance(value, int) or (isinstance(value, float) and value.is_integer())
+    return isinstance(value, annotation)
+
+
+def _compile(annotation: Any) -> Check:
+    inner = _optional_inner(annotation)
+    if inner is not None:
+        check_inner = _compile(inner)
+
+        def check_optional(value, path, errors):
+            if value is not None:
+                check_inner(value, path, errors)
+        return check_optional
+
+    if annotation in _PRIMITIVES:
+        expected = _JSON_TYPES[annotation]
+
+        def check_primitive(value, path, errors):
+            if not _is_instance(value, annotation):
+                errors.append(SchemaViolation(path, f"must be {expected}, got {value!r}"))
+        return check_primitive
+
+    if dataclasses.is_dataclass(annotation):
+        return _compile_dataclass(annotation)
+
+    origin = get_origin(annotation)
+    if origin is Literal:
+        allowed = get_args(annotation)
+
+        def check_enum(value, path, errors):
+            if value not in allowed:
+                errors.append(SchemaViolation(path, f"must be one of {list(allowed)}, got {value!r}"))
+        return check_enum
+
+    if origin in (list, List):
+        (item,) = get_args(annotation) or (Any,)
+        check_item = _compile(item) if item is not Any else None
+
+        def check_list(value, path, errors):
+            if not isinstance(value, list):
+                errors.append(SchemaViolation(path, f"must be an array, got {value!r}"))
+            elif check_item is not None:
+                for i, element in enumerate(value):
+                    check_item(element, f"{path}[{i}]", errors)
+        return check_list
+
+    if origin in (dict, Dict) or annotation in (dict, Dict):
+        def check_dict(value, path, errors):
+            if not isinstance(value, dict):
+                errors.append(SchemaViolation(path, f"must be an object, got {value!r}"))
+        return check_dict
+    raise TypeError(f"No validator for {annotation!r}")
+
+
+def _compile_dataclass(cls: type) -> Check:
+    hints = get_type_hints(cls)
+    fields = []
+    for field in dataclasses.fields(cls):
+        required = field.default is dataclasses.MISSING and field.default_factory is dataclasses.MISSING
+        fields.append((field.name, required, _compile(hints[field.name])))
+
+    def check_object(value, path, errors):
+        if not isinstance(value, dict):
+            errors.append(SchemaViolation(path, f"must be an object, got {value!r}"))
+            return
+        prefix = f"{path}." if path else ""
+        for name, required, check in fields:
+            if name in value:
+                check(value[name], prefix + name, errors)
+            elif required:
+                errors.append(SchemaViolation(prefix + name, "is required"))
+    return check_object
+
+
+def compile_validator(cls: type) -> Callable[[Any], List[SchemaViolation]]:
+    """Validator for free-form answers shaped like cls: fields with defaults may be missing,
+    Optional fields may be null and unknown keys are ignored"""
+    check = _compile_dataclass(cls)
+
+    def validate(value: Any) -> List[SchemaViolation]:
+        errors: List[SchemaViolation] = []
+        check(value, "", errors)
+        return errors
+    return validate
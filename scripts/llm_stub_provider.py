@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+In-process LLM Stand-ins
+
+Counterpart of llm_stub_server.py for code that needs a provider object
+but no HTTP round trip, mostly tests:
+
+- StaticProvider answers every request from a fixed text or a function
+  of the request, is always available and remembers what it was sent
+- offline_processor() builds a TaxDataProcessor on a StaticProvider,
+  with its cache, manifest, journal and trace logs under one directory
+  and no warm-up, so tests go through the real constructor
+"""
+
+import os
+from typing import Callable, List, Union
+
+from llm_providers import LLMProvider, LLMProviderManager, LLMRequest, LLMResponse
+
+Reply = Union[str, Callable[[LLMRequest], str]]
+
+
+class StaticProvider(LLMProvider):
+    """Provider that answers from reply without any I/O"""
+
+    def __init__(self, reply: Reply = "{}", provider_name: str = "ollama"):
+        super().__init__(provider_name)
+        self.reply = reply
+        self.requests: List[LLMRequest] = []
+
+    def generate(self, request: LLMRequest) -> LLMResponse:
+        self.requests.append(request)
+        content = self.reply(request) if callable(self.reply) else self.reply
+        return LLMResponse(content=content, success=True, provider=self.provider_name,
+                           model=request.model, processing_time=0.0)
+
+    def is_available(self) -> bool:
+        return True
+
+    def list_models(self) -> List[str]:
+        return []
+
+
+def offline_processor(work_dir: str, reply: Reply = "{}", **options):
+    """TaxDataProcessor answered by a StaticProvider; options are passed to the constructor"""
+    from tax_data_updater import TaxDataProcessor
+
+    provider_name = options.pop("provider", "ollama")
+    manager = LLMProviderManager()
+    manager.add_provider(StaticProvider(reply, provider_name), provider_name)
+    settings = {
+        "provider": provider_name,
+        "warm_up": False,
+        "enable_cache": False,
+        "metrics_dir": None,
+        "cache_dir": os.path.join(work_dir, "cache"),
+        "logs_dir": os.path.join(work_dir, "logs"),
+    }
+    settings.update(options)
+    return TaxDataProcessor(llm_manager=manager, **settings)
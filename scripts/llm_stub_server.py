@@ -0,0 +1,656 @@
+#!/usr/bin/env python3
+"""
+Local LLM Stand-in Server
+
+Small HTTP server that imitates the remote APIs the scripts talk to, so
+batch runs and whole pipelines can be exercised without an OpenAI account,
+a GPU or internet access:
+
+- OpenAI Models API:  GET /v1/models
+- OpenAI generation:  POST /v1/chat/completions, POST /v1/responses (not streamed)
+- OpenAI Files API:   POST /v1/files, GET /v1/files/{id}, GET /v1/files/{id}/content
+- OpenAI Batch API:   POST /v1/batches, GET /v1/batches/{id}, POST /v1/batches/{id}/cancel
+- Ollama proxy:       GET /health, GET /models, POST /chat (JSON or streamed NDJSON)
+- Web extractor:      GET /txt-files, GET /files/{name}, POST /extract, serving
+                      --jurisdictions synthetic taxation files
+- Stub statistics:    GET /stub/stats
+
+Batches move through validating -> in_progress -> completed after
+--batch-delay seconds. Every request is answered with a canned reply
+(--reply, --reply-file, or an echo of the prompt) in the format of the
+endpoint.
+
+/chat answers are shaped by a latency profile: each request waits for a
+sample of --latency (time to first token), then generates at
+--tokens-per-second; --capacity requests are served at once and the rest
+queue, like a GPU with a fixed number of slots. --error-rate and
+--rate-limit-rate inject 500 and 429 (with Retry-After) responses.
+With --load-time, a model that is not loaded costs that many seconds
+first; it stays loaded for the request's keep_alive (5 minutes by default,
+like Ollama), and a /chat without messages only loads it. A request with
+a different num_ctx than the loaded model reloads it; prompts longer than
+the context (--default-context without num_ctx, one token per word) are
+truncated to it and counted in the stats.
+
+Usage:
+    python scripts/llm_stub_server.py --port 5002
+    python scripts/tax_data_updater.py --provider openai --model gpt-4o-mini \\
+        --batch --openai-base-url http://localhost:5002/v1 --openai-api-key stub
+
+    # Stand-in for the web extractor (port 5000) and Ollama proxy (port 5001)
+    python scripts/llm_stub_server.py --port 5000 --jurisdictions 1000
+    python scripts/llm_stub_server.py --port 5001 --latency lognormal:2,0.5 \\
+        --tokens-per-second 40 --capacity 4 --error-rate 0.01 --rate-limit-rate 0.02
+"""
+
+import re
+import gzip
+import json
+import math
+import time
+import uuid
+import random
+import argparse
+import threading
+from email import message_from_bytes
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Seconds clients are told to wait after an injected 429
+DEFAULT_RETRY_AFTER = 1.0
+
+# Seconds Ollama keeps a model loaded when a request does not say
+DEFAULT_KEEP_ALIVE_SECONDS = 300.0
+
+# Ollama's context size when a request sets no num_ctx
+DEFAULT_CONTEXT = 2048
+
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def _new_id(prefix: str) -> str:
+    return f"{prefix}_{uuid.uuid4().hex[:24]}"
+
+
+def _last_user_text(endpoint: str, body: Dict[str, Any]) -> str:
+    """Extract the user prompt from a chat.completions or responses body"""
+    if endpoint == "/v1/responses":
+        for item in reversed(body.get("input", [])):
+            if item.get("role") == "user":
+                return "".join(part.get("text", "") for part in item.get("content", []))
+        return ""
+    for message in reversed(body.get("messages", [])):
+        if message.get("role") == "user":
+            return message.get("content", "")
+    return ""
+
+
+def echo_reply(endpoint: str, body: Dict[str, Any]) -> str:
+    """Default canned reply: echo the first 200 characters of the prompt"""
+    return f"echo: {_last_user_text(endpoint, body)[:200]}"
+
+
+def _chat_completion_body(model: str, text: str) -> Dict[str, Any]:
+    return {
+        "id": _new_id("chatcmpl"),
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": text},
+            "finish_reason": "stop"
+        }],
+        "usage": {"prompt_tokens": 0, "completion_tokens": len(text.split()), "total_tokens": len(text.split())}
+    }
+
+
+def _responses_body(model: str, text: str) -> Dict[str, Any]:
+    return {
+        "id": _new_id("resp"),
+        "object": "response",
+        "created_at": int(time.time()),
+        "model": model,
+        "status": "completed",
+        "output": [{
+            "id": _new_id("msg"),
+            "type": "message",
+            "role": "assistant",
+            "status": "completed",
+            "content": [{"type": "output_text", "text": text, "annotations": []}]
+        }]
+    }
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """Latency sampler from a spec: SECONDS, fixed:S, uniform:LOW,HIGH,
+    normal:MEAN,STDDEV, lognormal:MEDIAN,SIGMA or exp:MEAN"""
+    kind, _, params = spec.partition(":")
+    if not params:
+        kind, params = "fixed", kind
+    try:
+        values = [float(value) for value in params.split(",")]
+    except ValueError:
+        raise ValueError(f"Invalid latency spec: {spec}")
+
+    samplers = {
+        ("fixed", 1): lambda rng: values[0],
+        ("uniform", 2): lambda rng: rng.uniform(values[0], values[1]),
+        ("normal", 2): lambda rng: rng.gauss(values[0], values[1]),
+        ("lognormal", 2): lambda rng: rng.lognormvariate(math.log(values[0]), values[1]),
+        ("exp", 1): lambda rng: rng.expovariate(1 / values[0]) if values[0] > 0 else 0.0,
+    }
+    sampler = samplers.get((kind, len(values)))
+    if sampler is None:
+        raise ValueError(f"Invalid latency spec: {spec}")
+    return lambda rng: max(0.0, sampler(rng))
+
+
+def parse_keep_alive(value: Any) -> float:
+    """Seconds of an Ollama keep_alive (number or duration like "30m", "1h30m"); negative is forever"""
+    if value is None:
+        return DEFAULT_KEEP_ALIVE_SECONDS
+    if isinstance(value, (int, float)) or value.lstrip("-").isdigit():
+        seconds = float(value)
+    else:
+        parts = re.findall(r"(\d+(?:\.\d+)?)(ms|s|m|h)", value)
+        if not parts or "".join(number + unit for number, unit in parts) != value.lstrip("-"):
+            raise ValueError(f"Invalid keep_alive duration: {value!r}")
+        seconds = sum(float(number) * _DURATION_UNITS[unit] for number, unit in parts)
+        if value.startswith("-"):
+            seconds = -seconds
+    return math.inf if seconds < 0 else seconds
+
+
+def synthetic_taxation_text(index: int, paragraphs: int = 12) -> str:
+    """Plain-text taxation description of a made-up jurisdiction"""
+    name = f"Jurisdiction {index:04d}"
+    rng = random.Random(index)
+    lines = [f"Taxation in {name}", ""]
+    for paragraph in range(paragraphs):
+        rate = rng.choice([0, 5, 10, 12, 15, 18, 20, 21, 23, 25, 30, 35, 40, 45])
+        threshold = rng.randrange(5000, 200000, 500)
+        lines.append(
+            f"Section {paragraph + 1}. Income above {threshold} local currency units is taxed at {rate}% in {name}. "
+            f"The standard value-added tax rate is {rng.choice([5, 7, 10, 15, 19, 20, 21, 25])}% with reduced "
+            f"rates for food, medicine and books. Social security contributions are shared between employer "
+            f"and employee, and corporate income is taxed at a flat {rng.choice([9, 12.5, 15, 20, 25])}%.")
+        lines.append("")
+    return "\n".join(lines)
+
+
+class StubState:
+    """Files, batches and the simulated LLM backend of one server instance"""
+
+    def __init__(self, batch_delay: float = 1.0,
+                 reply: Callable[[str, Dict[str, Any]], str] = echo_reply,
+                 models: Tuple[str, ...] = ("gpt-4o-mini", "gpt-5-nano"),
+                 ollama_models: Tuple[str, ...] = ("gemma3:12b", "gemma3:1b"),
+                 latency: str = "0", tokens_per_second: float = 0.0, capacity: int = 0,
+                 error_rate: float = 0.0, rate_limit_rate: float = 0.0,
+                 retry_after: float = DEFAULT_RETRY_AFTER, jurisdictions: int = 0,
+                 seed: Optional[int] = None, load_time: float = 0.0,
+                 default_context: int = DEFAULT_CONTEXT):
+        self.batch_delay = batch_delay
+        self.models = models
+        self.ollama_models = ollama_models
+        self.reply = reply
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.batches: Dict[str, Dict[str, Any]] = {}
+        self.lock = threading.Lock()
+
+        # Simulated Ollama backend
+        self.sample_latency = parse_latency(latency)
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.slots = threading.BoundedSemaphore(capacity) if capacity > 0 else None
+        self.rng = random.Random(seed)
+        self.load_time = load_time
+        self.default_context = default_context
+        self.loaded_until: Dict[str, float] = {}
+        self.loaded_context: Dict[str, int] = {}
+        self.system_prompts: Dict[str, str] = {}  # Last system prompt evaluated per loaded model
+        self.stats = {"chat_requests": 0, "streamed": 0, "injected_500": 0, "injected_429": 0,
+                      "in_flight": 0, "max_in_flight": 0, "generated_tokens": 0,
+                      "model_loads": 0, "prefix_hits": 0, "truncated_prompts": 0}
+
+        # Synthetic web extractor files
+        self.txt_files = {f"taxation_jurisdiction_{index:04d}.txt": synthetic_taxation_text(index)
+                          for index in range(1, jurisdictions + 1)}
+
+    def draw(self) -> Tuple[Optional[int], float]:
+        """Injected status for the next /chat request (None for a normal answer) and its latency"""
+        with self.lock:
+            self.stats["chat_requests"] += 1
+            roll = self.rng.random()
+            latency = self.sample_latency(self.rng)
+            if roll < self.error_rate:
+                self.stats["injected_500"] += 1
+                return 500, latency
+            if roll < self.error_rate + self.rate_limit_rate:
+                self.stats["injected_429"] += 1
+                return 429, 0.0
+            return None, latency
+
+    def load_model(self, model: str, keep_alive: float, messages: List[Dict[str, Any]],
+                   context: int) -> float:
+        """Seconds to wait before model is loaded with context; counts loads and reused system prompts"""
+        with self.lock:
+            now = time.monotonic()
+            delay = 0.0
+            if self.loaded_until.get(model, 0.0) <= now or self.loaded_context.get(model) != context:
+                self.stats["model_loads"] += 1
+                self.loaded_context[model] = context
+                self.system_prompts.pop(model, None)
+                delay = self.load_time
+            self.loaded_until[model] = now + delay + keep_alive
+            if messages and messages[0].get("role") == "system":
+                if self.system_prompts.get(model) == messages[0].get("content"):
+                    self.stats["prefix_hits"] += 1
+                self.system_prompts[model] = messages[0].get("content")
+            return delay
+
+    def keep_loaded(self, model: str, keep_alive: float):
+        """Restart the keep_alive countdown when a request finishes"""
+        with self.lock:
+            self.loaded_until[model] = time.monotonic() + keep_alive
+
+    def track(self, delta: int, tokens: int = 0):
+        with self.lock:
+            self.stats["in_flight"] += delta
+            self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self.stats["in_flight"])
+            self.stats["generated_tokens"] += tokens
+
+    def token_delay(self, tokens: int) -> float:
+        """Seconds needed to generate tokens at tokens_per_second"""
+        return tokens / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+    def add_file(self, filename: str, purpose: str, content: bytes) -> Dict[str, Any]:
+        with self.lock:
+            return self._add_file_locked(filename, purpose, content)
+
+    def _add_file_locked(self, filename: str, purpose: str, content: bytes) -> Dict[str, Any]:
+        file_id = _new_id("file")
+        meta = {
+            "id": file_id,
+            "object": "file",
+            "bytes": len(content),
+            "created_at": int(time.time()),
+            "filename": filename,
+            "purpose": purpose,
+            "status": "processed"
+        }
+        self.files[file_id] = {"meta": meta, "content": content}
+        return meta
+
+    def create_batch(self, input_file_id: str, endpoint: str, completion_window: str) -> Dict[str, Any]:
+        batch = {
+            "id": _new_id("batch"),
+            "object": "batch",
+            "endpoint": endpoint,
+            "input_file_id": input_file_id,
+            "completion_window": completion_window,
+            "status": "validating",
+            "created_at": int(time.time()),
+            "output_file_id": None,
+            "error_file_id": None,
+            "errors": None,
+            "request_counts": {"total": 0, "completed": 0, "failed": 0}
+        }
+        with self.lock:
+            self.batches[batch["id"]] = batch
+        threading.Thread(target=self._run_batch, args=(batch["id"],), daemon=True).start()
+        return self.get_batch(batch["id"])
+
+    def get_batch(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        """Copy of a batch, safe to serialize while it is being processed"""
+        with self.lock:
+            batch = self.batches.get(batch_id)
+            return json.loads(json.dumps(batch)) if batch else None
+
+    def _run_batch(self, batch_id: str):
+        """Answer every line of the input file after batch_delay seconds"""
+        with self.lock:
+            batch = self.batches[batch_id]
+            lines = self.files[batch["input_file_id"]]["content"].decode("utf-8").splitlines()
+            batch["status"] = "in_progress"
+            batch["request_counts"]["total"] = len([line for line in lines if line.strip()])
+
+        time.sleep(self.batch_delay)
+
+        output = []
+        for line in lines:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            body = record.get("body", {})
+            text = self.reply(record.get("url", batch["endpoint"]), body)
+            if record.get("url") == "/v1/responses":
+                response_body = _responses_body(body.get("model", ""), text)
+            else:
+                response_body = _chat_completion_body(body.get("model", ""), text)
+            output.append(json.dumps({
+                "id": _new_id("batch_req"),
+                "custom_id": record["custom_id"],
+                "response": {"status_code": 200, "request_id": _new_id("req"), "body": response_body},
+                "error": None
+            }))
+
+        with self.lock:
+            if batch["status"] == "cancelled":
+                return
+            output_file = self._add_file_locked(f"{batch_id}_output.jsonl", "batch_output",
+                                               "\n".join(output).encode("utf-8"))
+            batch["output_file_id"] = output_file["id"]
+            batch["request_counts"]["completed"] = len(output)
+            batch["status"] = "completed"
+            batch["completed_at"] = int(time.time())
+
+
+def _reply_tokens(text: str) -> List[str]:
+    """Split a reply into stream pieces of one word (with its trailing space) each"""
+    pieces = []
+    start = 0
+    for index, char in enumerate(text):
+        if char.isspace() and index + 1 < len(text) and not text[index + 1].isspace():
+            pieces.append(text[start:index + 1])
+            start = index + 1
+    if start < len(text):
+        pieces.append(text[start:])
+    return pieces
+
+
+def _parse_multipart(content_type: str, body: bytes) -> Dict[str, Tuple[Optional[str], bytes]]:
+    """Return {field name: (filename, value)} for a multipart/form-data body"""
+    message = message_from_bytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode("latin-1") + body, policy=HTTP)
+    fields = {}
+    for part in message.iter_parts():
+        name = part.get_param("name", header="content-disposition")
+        fields[name] = (part.get_filename(), part.get_payload(decode=True) or b"")
+    return fields
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Routes requests to the StubState attached to the server"""
+
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def state(self) -> StubState:
+        return self.server.state
+
+    def _send_json(self, obj: Any, status: int = 200):
+        body = json.dumps(obj).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_bytes(self, data: bytes, content_type: str = "application/octet-stream"):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _not_found(self):
+        self._send_json({"error": {"message": f"Unknown path {self.path}", "type": "invalid_request_error"}}, 404)
+
+    def _read_body(self) -> bytes:
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        return body
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _chat(self, body: bytes):
+        """Ollama proxy /chat: canned reply after the sampled latency, paced at tokens_per_second"""
+        params = json.loads(body or b"{}")
+        state = self.state
+        model = params.get("model", "")
+        try:
+            keep_alive = parse_keep_alive(params.get("keep_alive"))
+        except ValueError as e:
+            return self._send_json({"error": str(e)}, 400)
+
+        context = params.get("num_ctx") or state.default_context
+
+        if not params.get("messages"):
+            # Load request: no generation, no injected errors
+            time.sleep(state.load_model(model, keep_alive, [], context))
+            return self._send_json({"model": model, "done": True, "done_reason": "load",
+                                    "message": {"role": "assistant", "content": ""}})
+
+        status, latency = state.draw()
+
+        if status == 429:
+            body = json.dumps({"error": "Too many requests (injected)"}).encode("utf-8")
+            self.send_response(429)
+            self.send_header("Retry-After", f"{state.retry_after:g}")
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        if state.slots:
+            state.slots.acquire()
+        state.track(1)
+        try:
+            time.sleep(state.load_model(model, keep_alive, params["messages"], context) + latency)
+            if status == 500:
+                return self._send_json({"error": "Internal server error (injected)"}, 500)
+
+            text = state.reply("/chat", params)
+            pieces = _reply_tokens(text)
+            prompt_tokens = sum(len(str(message.get("content", "")).split())
+                                for message in params.get("messages", []))
+            if prompt_tokens > context:
+                # Ollama keeps the end of the prompt and drops the rest without an error
+                with state.lock:
+                    state.stats["truncated_prompts"] += 1
+                prompt_tokens = context
+            final = {"model": params.get("model", ""), "done": True,
+                     "prompt_eval_count": prompt_tokens, "eval_count": len(pieces)}
+
+            if not params.get("stream"):
+                time.sleep(state.token_delay(len(pieces)))
+                state.track(0, len(pieces))
+                return self._send_json(dict(final, message={"role": "assistant", "content": text}))
+
+            with state.lock:
+                state.stats["streamed"] += 1
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for piece in pieces:
+                time.sleep(state.token_delay(1))
+                chunk = {"model": final["model"], "message": {"role": "assistant", "content": piece}, "done": False}
+                self._write_chunk((json.dumps(chunk) + "\n").encode("utf-8"))
+                state.track(0, 1)
+            self._write_chunk((json.dumps(dict(final, message={"role": "assistant", "content": ""})) + "\n").encode("utf-8"))
+            self._write_chunk(b"")
+        except (BrokenPipeError, ConnectionResetError):
+            # Client cancelled the stream
+            self.close_connection = True
+        finally:
+            state.keep_loaded(model, keep_alive)
+            state.track(-1)
+            if state.slots:
+                state.slots.release()
+
+    def do_GET(self):
+        parts = self.path.split("?")[0].strip("/").split("/")
+
+        if parts == ["health"]:
+            return self._send_json({"status": "ok"})
+
+        if parts == ["models"]:
+            return self._send_json({"models": [{"name": model} for model in self.state.ollama_models]})
+
+        if parts == ["txt-files"]:
+            files = self.state.txt_files
+            return self._send_json({
+                "success": True,
+                "txt_files": sorted(files),
+                "count": len(files),
+                "files_info": {name: {"file_size": len(text.encode("utf-8")), "created_by_app": True}
+                               for name, text in files.items()}
+            })
+
+        if parts[0] == "files" and len(parts) == 2:
+            text = self.state.txt_files.get(parts[1])
+            if text is None:
+                return self._not_found()
+            return self._send_bytes(text.encode("utf-8"), "text/plain; charset=utf-8")
+
+        if parts == ["stub", "stats"]:
+            with self.state.lock:
+                return self._send_json(dict(self.state.stats))
+
+        if parts == ["v1", "models"]:
+            return self._send_json({"object": "list", "data": [
+                {"id": model, "object": "model", "created": 0, "owned_by": "stub"} for model in self.state.models
+            ]})
+
+        if parts[:2] == ["v1", "files"] and len(parts) in (3, 4):
+            stored = self.state.files.get(parts[2])
+            if stored is None:
+                return self._not_found()
+            if len(parts) == 4 and parts[3] == "content":
+                return self._send_bytes(stored["content"])
+            return self._send_json(stored["meta"])
+
+        if parts[:2] == ["v1", "batches"] and len(parts) == 3:
+            batch = self.state.get_batch(parts[2])
+            return self._send_json(batch) if batch else self._not_found()
+
+        self._not_found()
+
+    def do_POST(self):
+        parts = self.path.split("?")[0].strip("/").split("/")
+        body = self._read_body()
+
+        if parts == ["chat"]:
+            return self._chat(body)
+
+        if parts == ["extract"]:
+            url = json.loads(body or b"{}").get("url", "")
+            index = sum(url.encode("utf-8")) % 10000
+            return self._send_json({"success": True, "url": url, "content": synthetic_taxation_text(index)})
+
+        if parts == ["v1", "files"]:
+            fields = _parse_multipart(self.headers.get("Content-Type", ""), body)
+            filename, content = fields.get("file", (None, b""))
+            purpose = fields.get("purpose", (None, b""))[1].decode("utf-8")
+            return self._send_json(self.state.add_file(filename or "upload.jsonl", purpose, content))
+
+        if parts == ["v1", "batches"]:
+            params = json.loads(body or b"{}")
+            if params.get("input_file_id") not in self.state.files:
+                return self._send_json({"error": {"message": "input_file_id not found"}}, 400)
+            return self._send_json(self.state.create_batch(
+                params["input_file_id"], params.get("endpoint", "/v1/chat/completions"),
+                params.get("completion_window", "24h")))
+
+        if parts[:2] == ["v1", "batches"] and len(parts) == 4 and parts[3] == "cancel":
+            with self.state.lock:
+                batch = self.state.batches.get(parts[2])
+                if batch and batch["status"] not in ("completed", "failed", "expired"):
+                    batch["status"] = "cancelled"
+            batch = self.state.get_batch(parts[2])
+            return self._send_json(batch) if batch else self._not_found()
+
+        if parts in (["v1", "chat", "completions"], ["v1", "responses"]):
+            endpoint = "/" + "/".join(parts)
+            params = json.loads(body or b"{}")
+            text = self.state.reply(endpoint, params)
+            model = params.get("model", "")
+            if endpoint == "/v1/responses":
+                return self._send_json(_responses_body(model, text))
+            return self._send_json(_chat_completion_body(model, text))
+
+        self._not_found()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(host: str = "127.0.0.1", port: int = 0, **state_options) -> Tuple[ThreadingHTTPServer, str]:
+    """Start the server on a daemon thread and return it with its base URL"""
+    server = ThreadingHTTPServer((host, port), StubHandler)
+    server.daemon_threads = True
+    server.state = StubState(**state_options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Local stand-in for the OpenAI Files/Batch APIs, the Ollama proxy and the web extractor")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to bind (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=5002, help="Port to listen on (default: 5002)")
+    parser.add_argument("--batch-delay", type=float, default=1.0,
+                        help="Seconds a batch stays in_progress before completing (default: 1.0)")
+    parser.add_argument("--reply", type=str, default=None,
+                        help="Canned reply for every request (default: echo the prompt)")
+    parser.add_argument("--reply-file", type=str, default=None,
+                        help="File whose content is the canned reply, e.g. a valid tax data JSON object")
+    parser.add_argument("--latency", default="0",
+                        help="Latency before the first /chat token: SECONDS, uniform:LOW,HIGH, normal:MEAN,STDDEV, "
+                             "lognormal:MEDIAN,SIGMA or exp:MEAN (default: 0)")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0,
+                        help="Generation speed of /chat replies, one token per word (default: instant)")
+    parser.add_argument("--capacity", type=int, default=0,
+                        help="/chat requests served at once; the rest queue (default: unlimited)")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="Fraction of /chat requests answered with HTTP 500 (default: 0)")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0,
+                        help="Fraction of /chat requests answered with HTTP 429 and Retry-After (default: 0)")
+    parser.add_argument("--retry-after", type=float, default=DEFAULT_RETRY_AFTER,
+                        help=f"Retry-After seconds of injected 429s (default: {DEFAULT_RETRY_AFTER:g})")
+    parser.add_argument("--jurisdictions", type=int, default=0,
+                        help="Number of synthetic taxation_*.txt files served to /txt-files and /files (default: 0)")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for latencies and injected errors")
+    parser.add_argument("--load-time", type=float, default=0.0,
+                        help="Seconds to load a /chat model that is not resident (default: 0)")
+    parser.add_argument("--default-context", type=int, default=DEFAULT_CONTEXT,
+                        help=f"Context size of /chat requests without num_ctx (default: {DEFAULT_CONTEXT})")
+    args = parser.parse_args()
+
+    if args.reply_file:
+        with open(args.reply_file, "r", encoding="utf-8") as f:
+            args.reply = f.read()
+    reply = (lambda endpoint, body: args.reply) if args.reply is not None else echo_reply
+    try:
+        parse_latency(args.latency)
+    except ValueError as e:
+        parser.error(str(e))
+
+    server = ThreadingHTTPServer((args.host, args.port), StubHandler)
+    server.daemon_threads = True
+    server.state = StubState(batch_delay=args.batch_delay, reply=reply, latency=args.latency,
+                             tokens_per_second=args.tokens_per_second, capacity=args.capacity,
+                             error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate,
+                             retry_after=args.retry_after, jurisdictions=args.jurisdictions, seed=args.seed,
+                             load_time=args.load_time, default_context=args.default_context)
+
+    print(f"[STUB] Listening on http://{args.host}:{args.port} (OpenAI base URL: http://{args.host}:{args.port}/v1)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n[STUB] Stopped")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
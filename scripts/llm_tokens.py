@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Token Estimation and Prompt Budgets
+
+Shared by every LLM call site so prompts are sized against the model's
+context window instead of hard-coded character counts:
+
+- estimate_tokens() counts tokens with tiktoken when it is installed (OpenAI
+  models) and otherwise with a word/punctuation heuristic that errs high
+- context_window() looks up a model's context size by name prefix
+- PromptBudget decides whether a prompt fits, rejects oversize prompts
+  before they are sent (servers silently truncate them), and splits
+  content into the largest chunks that still fit a prompt template
+- fitted_context() sizes the context a request asks the server to
+  allocate (Ollama num_ctx) to its prompt and reply
+"""
+
+import importlib.util
+import math
+import re
+from typing import Dict, List, Optional
+
+# The heuristic estimate is used for all models without tiktoken; tiktoken
+# itself is imported by the first OpenAI token count
+TIKTOKEN_AVAILABLE = importlib.util.find_spec("tiktoken") is not None
+
+# Average characters per token for English prose; also used for output sizes
+CHARS_PER_TOKEN = 4
+
+# Context sizes by model name prefix (longest matching prefix wins)
+MODEL_CONTEXT_WINDOWS: Dict[str, int] = {
+    "gpt-5": 400000,
+    "gpt-4.1": 1047576,
+    "gpt-4o": 128000,
+    "gpt-4-turbo": 128000,
+    "gpt-4": 8192,
+    "gpt-3.5-turbo": 16385,
+    "o1": 200000,
+    "o3": 200000,
+    "o4": 200000,
+    "gemma3:1b": 32768,
+    "gemma3": 131072,
+    "gemma2": 8192,
+    "llama3.1": 131072,
+    "llama3.2": 131072,
+    "llama3.3": 131072,
+    "llama3": 8192,
+    "deepseek-r1": 131072,
+    "qwen3": 40960,
+    "qwen2.5": 32768,
+    "mistral": 32768,
+    "phi4": 16384,
+}
+
+# Used for models missing from the table
+DEFAULT_CONTEXT_WINDOW = 8192
+
+# Tokens kept free for the reply when no max_tokens is given
+DEFAULT_OUTPUT_TOKENS = 2048
+
+# Fraction of the window left unused to absorb estimation error
+DEFAULT_SAFETY_MARGIN = 0.05
+
+# Smallest context requested per call; fitted sizes are powers of two from here up to the window
+MIN_CONTEXT_TOKENS = 2048
+
+# Placeholder marking where content goes in a prompt template
+CONTENT_PLACEHOLDER = "{content}"
+
+_PIECE_RE = re.compile(r"[^\W\d_]+|\d+|[^\w\s]|_+", re.UNICODE)
+_encodings: Dict[str, object] = {}
+
+
+class PromptTooLargeError(ValueError):
+    """Raised when a prompt does not fit the model's context window"""
+
+    def __init__(self, message: str, tokens: int, limit: int):
+        super().__init__(message)
+        self.tokens = tokens
+        self.limit = limit
+
+
+def _encoding_for(model: Optional[str]):
+    """tiktoken encoding for an OpenAI model, or None"""
+    if not TIKTOKEN_AVAILABLE or not model or not model.startswith(("gpt-", "o1", "o3", "o4")):
+        return None
+    if model not in _encodings:
+        import tiktoken
+        try:
+            _encodings[model] = tiktoken.encoding_for_model(model)
+        except KeyError:
+            _encodings[model] = tiktoken.get_encoding("o200k_base")
+    return _encodings[model]
+
+
+def _heuristic_tokens(text: str) -> int:
+    tokens = 0
+    for piece in _PIECE_RE.findall(text):
+        if piece[0].isdigit():
+            tokens += math.ceil(len(piece) / 3)  # Numbers split into groups of up to 3 digits
+        elif piece[0].isalpha():
+            # Non-ASCII words take about one token per 2 characters
+            per_token = CHARS_PER_TOKEN if piece.isascii() else 2
+            tokens += max(1, math.ceil(len(piece) / per_token))
+        else:
+            tokens += 1
+    return tokens
+
+
+def estimate_tokens(text: str, model: Optional[str] = None) -> int:
+    """Number of tokens text is expected to use"""
+    if not text:
+        return 0
+    encoding = _encoding_for(model)
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return _heuristic_tokens(text)
+
+
+def context_window(model: str) -> int:
+    """Context size of a model, by longest matching name prefix"""
+    name = model.lower()
+    matches = [prefix for prefix in MODEL_CONTEXT_WINDOWS if name.startswith(prefix)]
+    if not matches:
+        return DEFAULT_CONTEXT_WINDOW
+    return MODEL_CONTEXT_WINDOWS[max(matches, key=len)]
+
+
+def fitted_context(tokens: int, window: int, minimum: int = MIN_CONTEXT_TOKENS) -> int:
+    """Smallest power-of-two context of at least minimum that holds tokens, capped at window.
+
+    Ollama reloads the model whenever num_ctx changes, so sizes are rounded
+    up to a few steps rather than fitted exactly.
+    """
+    size = minimum
+    while size < tokens:
+        size *= 2
+    return min(size, window)
+
+
+class PromptBudget:
+    """Input-token budget of one model call: window minus reply and safety margin"""
+
+    def __init__(self, model: str, context_tokens: Optional[int] = None,
+                 output_tokens: int = DEFAULT_OUTPUT_TOKENS, safety_margin: float = DEFAULT_SAFETY_MARGIN):
+        self.model = model
+        self.context_tokens = context_tokens or context_window(model)
+        self.output_tokens = output_tokens
+        self.safety_margin = safety_margin
+
+    @property
+    def input_limit(self) -> int:
+        """Tokens available for system prompt and prompt"""
+        return int(self.context_tokens * (1 - self.safety_margin)) - self.output_tokens
+
+    def prompt_tokens(self, prompt: str, system_prompt: Optional[str] = None) -> int:
+        return estimate_tokens(prompt, self.model) + estimate_tokens(system_prompt or "", self.model)
+
+    def fits(self, prompt: str, system_prompt: Optional[str] = None) -> bool:
+        return self.prompt_tokens(prompt, system_prompt) <= self.input_limit
+
+    def check(self, prompt: str, system_prompt: Optional[str] = None) -> int:
+        """Return the prompt's token estimate, raising PromptTooLargeError if it does not fit"""
+        tokens = self.prompt_tokens(prompt, system_prompt)
+        if tokens > self.input_limit:
+            raise PromptTooLargeError(
+                f"Prompt needs ~{tokens} tokens but {self.model} has room for {self.input_limit} "
+                f"({self.context_tokens} context, {self.output_tokens} reserved for the reply)",
+                tokens, self.input_limit)
+        return tokens
+
+    def context_for(self, prompt_tokens: int, output_tokens: Optional[int] = None) -> int:
+        """Fitted context for a prompt of prompt_tokens plus its reply, with the safety margin"""
+        reply = self.output_tokens if output_tokens is None else output_tokens
+        return fitted_context(math.ceil((prompt_tokens + reply) / (1 - self.safety_margin)), self.context_tokens)
+
+    def room_for_content(self, template: str) -> int:
+        """Tokens left for the content that replaces CONTENT_PLACEHOLDER in template"""
+        overhead = estimate_tokens(template.replace(CONTENT_PLACEHOLDER, ""), self.model)
+        return self.input_limit - overhead
+
+    def split(self, content: str, template: str, max_chunk_tokens: Optional[int] = None) -> List[str]:
+        """Split content at paragraph/line boundaries into chunks that fit template.
+
+        Returns [content] when it fits in one prompt.
+        """
+        room = self.room_for_content(template)
+        if max_chunk_tokens:
+            room = min(room, max_chunk_tokens)
+        if room <= 0:
+            raise PromptTooLargeError(f"Prompt template alone exceeds the budget of {self.model}",
+                                      self.input_limit - room, self.input_limit)
+        if estimate_tokens(content, self.model) <= room:
+            return [content]
+        return [chunk for chunk in self._split(content, room, ("\n\n", "\n", " ")) if chunk.strip()]
+
+    def _split(self, text: str, room: int, separators: tuple) -> List[str]:
+        if estimate_tokens(text, self.model) <= room:
+            return [text]
+        if not separators:
+            # No separator left: cut by characters, sized from the estimate
+            step = max(1, len(text) * room // (estimate_tokens(text, self.model) + 1))
+            return [text[start:start + step] for start in range(0, len(text), step)]
+
+        separator, rest = separators[0], separators[1:]
+        chunks: List[str] = []
+        current: List[str] = []
+        current_tokens = 0
+        for part in text.split(separator):
+            part_tokens = estimate_tokens(part, self.model) + 1
+            if part_tokens > room:
+                if current:
+                    chunks.append(separator.join(current))
+                    current, current_tokens = [], 0
+                chunks.extend(self._split(part, room, rest))
+                continue
+            if current and current_tokens + part_tokens > room:
+                chunks.append(separator.join(current))
+                current, current_tokens = [], 0
+            current.append(part)
+            current_tokens += part_tokens
+        if current:
+            chunks.append(separator.join(current))
+        return chunks
+
+    def pack(self, items: List[str], template: str, separator: str = "\n\n") -> List[List[str]]:
+        """Group items into as few batches as possible, each fitting template when joined"""
+        room = self.room_for_content(template)
+        batches: List[List[str]] = []
+        current: List[str] = []
+        current_tokens = 0
+        for item in items:
+            item_tokens = estimate_tokens(item, self.model) + estimate_tokens(separator, self.model)
+            if current and current_tokens + item_tokens > room:
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(item)
+            current_tokens += item_tokens
+        if current:
+            batches.append(current)
+        return batches
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Metrics Registry for Outbound Calls
+
+Process-wide counters, gauges and histograms recorded by http_client.py (every
+Web Content Extractor and proxy call) and llm_metrics.py (every LLM call), so
+runs can be compared by latency distribution instead of single timings:
+
+- Histograms use fixed cumulative buckets like Prometheus; quantiles are
+  interpolated within the bucket
+- to_prometheus() renders the text exposition format, snapshot() a JSON-ready
+  dict; write() saves both at the end of a run
+
+Only the standard library is imported, so recording costs nothing at startup.
+"""
+
+import os
+import json
+import math
+import bisect
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Request latency in seconds (LLM calls run from milliseconds to minutes)
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0)
+
+# Time to first streamed token in seconds
+TTFT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0)
+
+# Generated tokens per second
+THROUGHPUT_BUCKETS = (1.0, 2.0, 5.0, 10.0, 20.0, 35.0, 50.0, 75.0, 100.0, 200.0, 500.0)
+
+COUNTER = "counter"
+GAUGE = "gauge"
+HISTOGRAM = "histogram"
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """Cumulative-bucket histogram of observed values"""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # Last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, fraction: float) -> Optional[float]:
+        """Estimated quantile, interpolated linearly inside its bucket"""
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                if i == len(self.buckets):
+                    return lower  # Beyond the last bound
+                return lower + (self.buckets[i] - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.buckets[-1]
+
+    def to_dict(self) -> dict:
+        cumulative = 0
+        buckets = {}
+        for bound, bucket_count in zip(self.buckets + (math.inf,), self.counts):
+            cumulative += bucket_count
+            buckets["+Inf" if bound == math.inf else _format_value(bound)] = cumulative
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "mean": round(self.sum / self.count, 6) if self.count else None,
+            "p50": _round(self.quantile(0.5)),
+            "p95": _round(self.quantile(0.95)),
+            "p99": _round(self.quantile(0.99)),
+            "buckets": buckets
+        }
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value, 6)
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _render_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+class MetricsRegistry:
+    """Thread-safe store of labelled counters, gauges and histograms"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._kinds: Dict[str, str] = {}
+        self._help: Dict[str, str] = {}
+        self._values: Dict[str, Dict[Labels, object]] = {}
+
+    def _series(self, kind: str, name: str, help_text: str, labels: Dict[str, object]):
+        """Return the per-label store of a metric (lock held)"""
+        known = self._kinds.setdefault(name, kind)
+        if known != kind:
+            raise ValueError(f"Metric {name} is a {known}, not a {kind}")
+        if help_text:
+            self._help.setdefault(name, help_text)
+        key = tuple(sorted((label, str(value)) for label, value in labels.items()))
+        return self._values.setdefault(name, {}), key
+
+    def inc(self, name: str, amount: float = 1, help_text: str = "", **labels):
+        """Add amount to a counter"""
+        with self._lock:
+            series, key = self._series(COUNTER, name, help_text, labels)
+            series[key] = series.get(key, 0) + amount
+
+    def add(self, name: str, delta: float, help_text: str = "", **labels):
+        """Move a gauge up or down (e.g. requests in flight)"""
+        with self._lock:
+            series, key = self._series(GAUGE, name, help_text, labels)
+            series[key] = series.get(key, 0) + delta
+
+    def observe(self, name: str, value: float, buckets: Sequence[float] = LATENCY_BUCKETS,
+                help_text: str = "", **labels):
+        """Record one value in a histogram"""
+        with self._lock:
+            series, key = self._series(HISTOGRAM, name, help_text, labels)
+            if key not in series:
+                series[key] = Histogram(buckets)
+            series[key].observe(value)
+
+    def series(self, name: str) -> List[Tuple[Dict[str, str], object]]:
+        """(labels, value) pairs of a metric; histogram values are Histogram objects"""
+        with self._lock:
+            return [(dict(key), value) for key, value in self._values.get(name, {}).items()]
+
+    def reset(self):
+        with self._lock:
+            self._kinds.clear()
+            self._help.clear()
+            self._values.clear()
+
+    def snapshot(self) -> dict:
+        """All metrics as a JSON-serializable dict"""
+        with self._lock:
+            metrics = {}
+            for name in sorted(self._values):
+                kind = self._kinds[name]
+                metrics[name] = {
+                    "type": kind,
+                    "help": self._help.get(name, ""),
+                    "series": [
+                        {"labels": dict(key),
+                         "value": value.to_dict() if kind == HISTOGRAM else value}
+                        for key, value in sorted(self._values[name].items())
+                    ]
+                }
+            return {"generated_at": datetime.now().isoformat(), "metrics": metrics}
+
+    def to_prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            for name in sorted(self._values):
+                kind = self._kinds[name]
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} {kind}")
+                for key, value in sorted(self._values[name].items()):
+                    if kind != HISTOGRAM:
+                        lines.append(f"{name}{_render_labels(key)} {_format_value(value)}")
+                        continue
+                    cumulative = 0
+                    for bound, bucket_count in zip(value.buckets + (math.inf,), value.counts):
+                        cumulative += bucket_count
+                        le = "+Inf" if bound == math.inf else _format_value(bound)
+                        lines.append(f"{name}_bucket{_render_labels(key, ('le', le))} {cumulative}")
+                    lines.append(f"{name}_sum{_render_labels(key)} {value.sum:.6f}")
+                    lines.append(f"{name}_count{_render_labels(key)} {value.count}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, directory: str = "logs", prefix: str = "metrics") -> Tuple[str, str]:
+        """Save the Prometheus text and JSON snapshot; returns both paths"""
+        os.makedirs(directory, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        prom_path = os.path.join(directory, f"{prefix}_{stamp}.prom")
+        json_path = os.path.join(directory, f"{prefix}_{stamp}.json")
+        with open(prom_path, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, indent=2)
+        return prom_path, json_path
+
+
+# Shared by every module of the process
+REGISTRY = MetricsRegistry()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Run Journal for Checkpoint/Resume
+
+Append-only JSON Lines file with one record per country whose LLM
+extraction completed, written (and fsynced) the moment the result comes
+in. A run that crashes, is interrupted or loses its provider part of the
+way through keeps every completed extraction; the next run started with
+resume=True reads them back and only processes the remaining countries.
+
+- Records carry the model and the input hash/prompt version, so a resumed
+  run with another --model re-extracts instead of mixing models
+- A truncated last line (the process died mid-write) is skipped, and cut
+  off before a resumed run appends to the journal
+- The journal is removed once the run has written its output
+"""
+
+import os
+import json
+import time
+import threading
+from typing import Any, Dict, Optional
+
+DEFAULT_JOURNAL_FILE = "journal.jsonl"
+
+
+class RunJournal:
+    """Append-only record of the countries completed by the current run"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+
+    def load(self, model: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """Completed records by country key (latest wins), optionally only those of model"""
+        records: Dict[str, Dict[str, Any]] = {}
+        if not os.path.exists(self.path):
+            return records
+        skipped = 0
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    skipped += 1
+                    continue
+                if model is None or record.get("model") == model:
+                    records[record["country"]] = record
+        if skipped:
+            print(f"[WARNING] Skipped {skipped} unreadable line(s) in {self.path}")
+        return records
+
+    def open(self, resume: bool = False):
+        """Start appending; without resume the journal of an earlier run is discarded"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            if resume:
+                self._drop_torn_line()
+            self._file = open(self.path, "a" if resume else "w", encoding="utf-8")
+
+    def _drop_torn_line(self):
+        """Cut a record left half-written by a crash, so the next append starts on its own line"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb+") as f:
+            size = f.seek(0, os.SEEK_END)
+            if size == 0:
+                return
+            f.seek(size - 1)
+            if f.read(1) == b"\n":
+                return
+            # Scan back to the end of the last complete record
+            end = size
+            while end > 0:
+                start = max(0, end - 4096)
+                f.seek(start)
+                newline = f.read(end - start).rfind(b"\n")
+                if newline != -1:
+                    end = start + newline + 1
+                    break
+                end = start
+            f.truncate(end)
+
+    def append(self, country_key: str, data: Dict, **fields: Any):
+        """Durably record a completed country"""
+        record = {"country": country_key, "at": time.strftime("%Y-%m-%dT%H:%M:%S"), **fields, "data": data}
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(line)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self, remove: bool = False):
+        """Stop appending; remove=True deletes the journal of a finished run"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            if remove and os.path.exists(self.path):
+                os.remove(self.path)
@@ -2,43 +2,32 @@
 
 import json
 import re
+from functools import lru_cache
 
-# Load the updates
-with open('tax_data_updates.json', 'r') as f:
-    updates = json.load(f)
+from js_literal import parse_export
 
-def find_and_update_country(content, country_key, updates_data):
-    """Find and update a specific country in the taxData.js content"""
+UPDATES_FILE = 'tax_data_updates.json'
 
-    # Look for the country key pattern
-    pattern = rf'"{country_key}"\s*:\s*{{'
-    match = re.search(pattern, content)
+def load_updates(path=UPDATES_FILE):
+    """Load the updates produced by update_tax_data.py"""
+    with open(path, 'r') as f:
+        return json.load(f)
 
-    if not match:
-        return content, False
-
-    print(f"Found {country_key}")
+@lru_cache(maxsize=1)
+def _parse(content):
+    """Parse taxData.js content; unchanged content between updates is parsed once"""
+    return parse_export(content)
 
-    # Find the complete country block
-    start_pos = match.start()
+def find_and_update_country(content, country_key, updates_data):
+    """Find and update a specific country in the taxData.js content"""
 
-    # Find the opening brace position
-    brace_start = content.find('{', start_pos)
-    if brace_start == -1:
+    # Locate the country block with the shared parser; its offsets cover key and value
+    country_span = _parse(content).spans.get((country_key,))
+    if not country_span:
         return content, False
 
-    # Count braces to find the end
-    brace_count = 0
-    end_pos = brace_start
-
-    for i, char in enumerate(content[brace_start:], brace_start):
-        if char == '{':
-            brace_count += 1
-        elif char == '}':
-            brace_count -= 1
-            if brace_count == 0:
-                end_pos = i + 1
-                break
+    print(f"Found {country_key}")
+    start_pos, end_pos = country_span.key_start, country_span.value_end
 
     # Extract the country block
     country_block = content[start_pos:end_pos]
@@ -213,6 +202,8 @@ def find_and_update_country(content, country_key, updates_data):
     return content, False
 
 def main():
+    updates = load_updates()
+
     # Read current taxData.js
     with open('js/taxData.js', 'r', encoding='utf-8') as f:
         content = f.read()
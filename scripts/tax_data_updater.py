@@ -16,9 +16,8 @@ Requirements:
 """
 
 import os
-import re
 import json
-import requests
+import asyncio
 import time
 import concurrent.futures
 import threading
@@ -26,8 +25,10 @@ import uuid
 import logging
 import argparse
 from datetime import datetime
-from typing import Dict, List, Any, Optional, Tuple
-from dataclasses import dataclass, asdict
+from typing import Callable, Dict, List, Any, Literal, Optional, Tuple
+from dataclasses import dataclass, asdict, replace
+
+import http_client
 
 # Import LLM provider system
 from llm_providers import (
@@ -36,14 +37,29 @@ from llm_providers import (
     LLMResponse,
     OllamaProvider,
     OpenAIProvider,
-    create_default_manager
+    create_default_manager,
+    create_ollama_provider,
+    DEFAULT_KEEP_ALIVE,
+    DEFAULT_REASONING_EFFORT,
+    REASONING_EFFORTS,
+    collect_stream,
+    run_coroutine
 )
+from llm_cache import LLMResponseCache, DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES
+from llm_metrics import summary_lines
+from metrics import REGISTRY
+from llm_tokens import PromptBudget, PromptTooLargeError, DEFAULT_OUTPUT_TOKENS, MIN_CONTEXT_TOKENS
+from llm_schema import schema_from_dataclass, drop_null_optionals, compile_validator, SchemaViolation
+from extraction_manifest import ExtractionManifest, DEFAULT_MANIFEST_FILE, content_hash
+from run_journal import RunJournal, DEFAULT_JOURNAL_FILE
+from js_literal import load_export, DEFAULT_TAX_DATA_FILE
+from json_stream import extract_json_object
 
 
 @dataclass
 class TaxBracket:
-    min: int
-    max: Optional[int]
+    min: float  # Amounts with cents in some countries (Brazil, Mexico)
+    max: Optional[float]
     rate: float
     description: Optional[str] = None
 
@@ -57,19 +73,207 @@ class VATInfo:
     notes: Optional[str] = None
 
 
+@dataclass
+class SpecialTax:
+    type: str  # social_security, military_levy, ...
+    target: str  # gross, ...
+    rate: float
+    description: str
+
+
 @dataclass
 class CountryTaxData:
     name: str
     currency: str
-    system: str  # progressive, flat, zero_personal
+    system: Literal["progressive", "flat", "zero_personal"]
     countryCode: str
     coordinates: List[float]
     brackets: List[TaxBracket]
     vat: Optional[VATInfo] = None
-    special_taxes: Optional[List[Dict]] = None
+    special_taxes: Optional[List[SpecialTax]] = None
     notes: Optional[str] = None
 
 
+# Response schema of the analysis request in structured-output mode
+COUNTRY_TAX_SCHEMA = schema_from_dataclass(CountryTaxData)
+
+# Structural check of parsed answers, compiled once from the same dataclasses
+_check_country_structure = compile_validator(CountryTaxData)
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def validate_country_data(data: Any, known_codes: Optional[set] = None) -> List[SchemaViolation]:
+    """Every structural and plausibility problem of an extracted country, in one pass.
+
+    Beyond the schema: rates between 0 and 100, coordinates in range, a
+    countryCode of taxData.js (when known_codes is given) and brackets that
+    ascend without overlaps and end with one open-ended bracket. Gaps
+    between brackets are allowed, published tables have them.
+    """
+    errors = _check_country_structure(data)
+    if not isinstance(data, dict):
+        return errors
+
+    def check_rate(value: Any, path: str):
+        if _is_number(value) and not 0 <= value <= 100:
+            errors.append(SchemaViolation(path, f"rate {value} is not between 0 and 100"))
+
+    code = data.get('countryCode')
+    if known_codes and isinstance(code, str) and code not in known_codes:
+        errors.append(SchemaViolation('countryCode', f"'{code}' is not a known country code"))
+
+    coordinates = data.get('coordinates')
+    if isinstance(coordinates, list):
+        if len(coordinates) != 2:
+            errors.append(SchemaViolation('coordinates', "must be [latitude, longitude]"))
+        elif all(_is_number(value) for value in coordinates):
+            lat, lng = coordinates
+            if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+                errors.append(SchemaViolation('coordinates', f"{coordinates} is out of range"))
+
+    brackets = data.get('brackets')
+    if isinstance(brackets, list):
+        if not brackets:
+            errors.append(SchemaViolation('brackets', "must contain at least one bracket"))
+        previous = None
+        for i, bracket in enumerate(brackets):
+            if not isinstance(bracket, dict):
+                previous = None
+                continue
+            path = f"brackets[{i}]"
+            low, high = bracket.get('min'), bracket.get('max')
+            check_rate(bracket.get('rate'), f"{path}.rate")
+            if _is_number(low):
+                if low < 0:
+                    errors.append(SchemaViolation(f"{path}.min", f"{low} is negative"))
+                if _is_number(high) and high < low:
+                    errors.append(SchemaViolation(path, f"max {high} is below min {low}"))
+                if previous is not None and _is_number(previous.get('max')) and low < previous['max']:
+                    errors.append(SchemaViolation(f"{path}.min", f"{low} overlaps brackets[{i - 1}], "
+                                                                 f"which ends at {previous['max']}"))
+            if 'max' in bracket and high is None and i < len(brackets) - 1:
+                errors.append(SchemaViolation(f"{path}.max", "only the last bracket may be open-ended (null)"))
+            if i == len(brackets) - 1 and high is not None:
+                errors.append(SchemaViolation(f"{path}.max", f"the last bracket must be open-ended (null), got {high!r}"))
+            previous = bracket
+
+    vat = data.get('vat')
+    if isinstance(vat, dict):
+        check_rate(vat.get('standard'), 'vat.standard')
+        if isinstance(vat.get('reduced'), list):
+            for i, rate in enumerate(vat['reduced']):
+                check_rate(rate, f"vat.reduced[{i}]")
+
+    special_taxes = data.get('special_taxes')
+    if isinstance(special_taxes, list):
+        for i, tax in enumerate(special_taxes):
+            if isinstance(tax, dict):
+                check_rate(tax.get('rate'), f"special_taxes[{i}].rate")
+    return errors
+
+
+# Bump when _build_analysis_prompt changes, so incremental runs re-extract every country.
+# Changes to the system prompts below are picked up from their hash.
+PROMPT_TEMPLATE_VERSION = 1
+
+# System prompts of the analysis requests. They are identical for every country and sent
+# before the country data, so servers can reuse the evaluated prefix across requests.
+ANALYSIS_INSTRUCTIONS = """You extract structured tax data for one country from taxation information.
+
+CRITICAL: You must follow the EXACT JSON structure format used in the original taxData.js file.
+
+REQUIRED JSON STRUCTURE - Follow this precisely:
+{
+    "name": "Country Name",
+    "currency": "CUR",
+    "system": "progressive|flat|zero_personal",
+    "countryCode": "XX",
+    "coordinates": [lat, lng],
+    "brackets": [
+        {"min": 0, "max": 50000, "rate": 10, "description": "optional description"},
+        {"min": 50001, "max": null, "rate": 25}
+    ],
+    "vat": {
+        "hasVAT": true,
+        "standard": 20.0,
+        "reduced": [5.0],
+        "description": "Standard 20.0%",
+        "notes": "optional notes"
+    },
+    "special_taxes": [
+        {"type": "social_security", "target": "gross", "rate": 5, "description": "Social security contribution"},
+        {"type": "military_levy", "target": "gross", "rate": 5, "description": "Additional 5% military levy"}
+    ],
+    "notes": "Any additional important information about tax calculation"
+}
+
+EXAMPLE - Ukraine structure to follow exactly:
+{
+    "name": "Ukraine",
+    "currency": "UAH",
+    "system": "flat",
+    "countryCode": "UA",
+    "coordinates": [50.4501, 30.5234],
+    "brackets": [{"min": 0, "max": null, "rate": 18}],
+    "special_taxes": [
+        {"type": "military_levy", "target": "gross", "rate": 5, "description": "Additional 5% military levy on all income"},
+        {"type": "united_social_tax", "target": "gross", "rate": 22, "description": "22% united social tax on gross income for employees"}
+    ],
+    "vat": {
+        "hasVAT": true,
+        "standard": 20.0,
+        "description": "Standard 20.0%"
+    }
+}
+
+STRICT FORMATTING REQUIREMENTS:
+1. Use EXACT field names: "name", "currency", "system", "countryCode", "coordinates", "brackets", "vat", "special_taxes", "notes"
+2. Field order must match: name, currency, system, countryCode, coordinates, brackets, [special_taxes if exists], vat, [notes if exists]
+3. "brackets" array: Each object must have "min", "max" (or null), "rate" (number), optional "description"
+4. "vat" object: Must have "hasVAT" (boolean), "standard" (number or null), optional "reduced" (array), "description", "notes"
+5. "special_taxes" array: Each object must have "type", "target", "rate" (number), "description"
+6. "coordinates" must be array of two numbers: [latitude, longitude]
+7. Use the exact coordinates and countryCode of the current data
+
+CRITICAL INSTRUCTIONS:
+1. Extract exact tax rates and brackets from the content
+2. Use "progressive" for multiple tax brackets, "flat" for single rate, "zero_personal" for no income tax
+3. Include VAT/GST information if available - always include hasVAT field
+4. Include any special taxes like social security, military levy, etc. in special_taxes array
+5. Return ONLY valid JSON, no other text or formatting
+6. If unsure about a value, use the current system value as fallback
+7. Maintain exact structure and field names from the example
+8. Numbers should be numeric values, not strings
+9. Booleans should be true/false, not strings
+"""
+
+# Structured output: the response schema defines the format, so only the rules remain
+STRUCTURED_ANALYSIS_INSTRUCTIONS = """You extract structured tax data for one country from taxation information.
+
+INSTRUCTIONS:
+1. Extract exact tax rates and brackets from the content; "max" is null for the top bracket
+2. Use "progressive" for multiple tax brackets, "flat" for single rate, "zero_personal" for no income tax
+3. Include VAT/GST information if available
+4. Include any special taxes like social security, military levy, etc. in special_taxes
+5. Use the exact coordinates and countryCode of the current data
+6. If unsure about a value, use the current system value as fallback; use null for unknown optional fields
+"""
+
+# Appended to the original prompt when an answer failed validation: all problems in one request
+REPAIR_PROMPT = """
+        Your previous answer was:
+        {answer}
+
+        It has these problems:
+        {problems}
+
+        Return the complete corrected JSON object, fixing every problem listed.
+        """
+
+
 class TraceLogger:
     """Handles trace-based logging for detailed request tracking"""
 
@@ -96,7 +300,7 @@ class TraceLogger:
 
         # Add content statistics without truncating
         if "messages" in payload_for_logging and len(payload_for_logging["messages"]) > 0:
-            content = payload_for_logging["messages"][0].get("content", "")
+            content = payload_for_logging["messages"][-1].get("content", "")
             content_length = len(content)
 
             # Add metadata about content size
@@ -237,26 +441,101 @@ class TaxDataProcessor:
                  max_workers: int = 4,
                  enable_parallel: bool = True,
                  enable_streaming: bool = False,
+                 max_stream_tokens: Optional[int] = 8192,
                  provider: str = "auto",
                  openai_api_key: Optional[str] = None,
-                 only_with_files: bool = False):
+                 only_with_files: bool = False,
+                 enable_async: bool = False,
+                 max_in_flight: int = 32,
+                 compress_requests: bool = False,
+                 enable_cache: bool = True,
+                 cache_dir: str = DEFAULT_CACHE_DIR,
+                 cache_max_bytes: int = DEFAULT_MAX_BYTES,
+                 enable_batch: bool = False,
+                 openai_base_url: Optional[str] = None,
+                 adaptive_concurrency: bool = True,
+                 openai_rpm: Optional[int] = None,
+                 openai_tpm: Optional[int] = None,
+                 circuit_breaker: bool = True,
+                 enable_hedging: bool = False,
+                 single_flight: bool = True,
+                 metrics_dir: Optional[str] = "logs",
+                 context_window: Optional[int] = None,
+                 structured_output: bool = False,
+                 keep_alive: Optional[str] = DEFAULT_KEEP_ALIVE,
+                 warm_up: bool = True,
+                 reasoning_effort: str = DEFAULT_REASONING_EFFORT,
+                 cascade_model: Optional[str] = None,
+                 cascade_provider: Optional[str] = None,
+                 incremental: bool = False,
+                 manifest_path: Optional[str] = None,
+                 resume: bool = False,
+                 journal_path: Optional[str] = None,
+                 progressive_output: bool = False,
+                 progressive_interval: float = 10.0,
+                 repair: bool = True,
+                 llm_manager: Optional[LLMProviderManager] = None,
+                 logs_dir: str = "logs"):
         self.web_extractor_url = web_extractor_url
         self.ollama_proxy_url = ollama_proxy_url
         self.model_name = model_name
         self.max_workers = max_workers if enable_parallel else 1
         self.enable_parallel = enable_parallel
         self.enable_streaming = enable_streaming
+        self.max_stream_tokens = max_stream_tokens
         self.provider_name = provider
         self.openai_api_key = openai_api_key
         self.only_with_files = only_with_files
+        self.enable_async = enable_async
+        self.max_in_flight = max(1, max_in_flight)
+        self.enable_cache = enable_cache
+        self.cache_dir = cache_dir
+        self.cache_max_bytes = cache_max_bytes
+        self.enable_batch = enable_batch
+        self.openai_base_url = openai_base_url
+        self.adaptive_concurrency = adaptive_concurrency
+        self.openai_rpm = openai_rpm
+        self.openai_tpm = openai_tpm
+        self.circuit_breaker = circuit_breaker
+        self.enable_hedging = enable_hedging
+        self.single_flight = single_flight
+        self.metrics_dir = metrics_dir
+        self.structured_output = structured_output
+        self.keep_alive = keep_alive
+        self.reasoning_effort = reasoning_effort
+        self.cascade_model = cascade_model
+        self.cascade_provider = cascade_provider
+        self.incremental = incremental
+        # Validated extractions by input hash; recorded on every run, reused with incremental
+        self.manifest = ExtractionManifest(manifest_path or os.path.join(cache_dir, DEFAULT_MANIFEST_FILE))
+        self._input_hashes: Dict[str, str] = {}
+        self.resume = resume
+        # Completed countries, appended as they finish so an interrupted run can be resumed
+        self.journal = RunJournal(journal_path or os.path.join(cache_dir, DEFAULT_JOURNAL_FILE))
+        self.progressive_output = progressive_output
+        self.progressive_interval = progressive_interval
+        self._last_progressive_write = 0.0
+        self._output_lock = threading.Lock()  # One writer of taxData2.js at a time
+        self.repair = repair
+        self.repair_stats = {'requested': 0, 'repaired': 0}
+        # Input budget of the analysis prompt; the JSON reply keeps DEFAULT_OUTPUT_TOKENS free
+        self.prompt_budget = PromptBudget(model_name, context_window, output_tokens=DEFAULT_OUTPUT_TOKENS)
+        self._context_tokens = MIN_CONTEXT_TOKENS  # Largest num_ctx requested so far
         self.original_data = {}
         self.updated_data = {}
         self.changes_log = {}
         self._lock = threading.Lock()  # For thread-safe operations
-        self.trace_logger = TraceLogger()  # Initialize trace logger
+        self.trace_logger = TraceLogger(logs_dir)  # Initialize trace logger
 
-        # Initialize LLM provider manager
-        self.llm_manager = self._initialize_llm_providers()
+        # One keep-alive connection per worker thread, shared by all HTTP calls
+        http_client.configure_http_pool(pool_size=self.max_workers, compress_requests=compress_requests)
+
+        # Initialize LLM provider manager and probe all providers concurrently;
+        # a manager passed in (embedding, tests) is used as it is
+        if llm_manager is None:
+            llm_manager = self._initialize_llm_providers()
+            llm_manager.probe_providers(wait=False)
+        self.llm_manager = llm_manager
         self.llm_provider = self._select_llm_provider()
 
         # Validate provider initialization
@@ -269,8 +548,16 @@ class TaxDataProcessor:
                 print(f"[ERROR] Check that Ollama is running at {self.ollama_proxy_url}")
             raise RuntimeError(f"Failed to initialize LLM provider: {self.provider_name}")
 
+        # Load the model while the first taxation files are fetched (Ollama only)
+        if warm_up and hasattr(self.llm_provider, "warm_up"):
+            self._start_warm_up()
+
         # Log configuration
-        if not enable_parallel:
+        if enable_batch:
+            print(f"[CONFIG] Batch mode ENABLED - All requests submitted as one offline batch job")
+        elif enable_async:
+            print(f"[CONFIG] Async mode ENABLED - Up to {self.max_in_flight} requests in flight on one event loop")
+        elif not enable_parallel:
             print(f"[CONFIG] Multi-threading DISABLED - Processing countries sequentially")
         else:
             print(f"[CONFIG] Multi-threading ENABLED - Using {self.max_workers} worker threads")
@@ -280,28 +567,142 @@ class TaxDataProcessor:
         else:
             print(f"[CONFIG] Streaming mode DISABLED - Standard request/response mode")
 
+        if self.llm_manager.cache:
+            print(f"[CONFIG] Response cache ENABLED - {self.llm_manager.cache.path} (max {self.cache_max_bytes // (1024 * 1024)} MB)")
+        else:
+            print(f"[CONFIG] Response cache DISABLED")
+
+        limiter = getattr(self.llm_provider, "limiter", None)
+        if limiter:
+            print(f"[CONFIG] Adaptive concurrency ENABLED - Starting at {limiter.limit}, up to {limiter.max_limit} requests in flight")
+        else:
+            print(f"[CONFIG] Adaptive concurrency DISABLED")
+
+        rate_limiter = getattr(self.llm_provider, "rate_limiter", None)
+        if rate_limiter:
+            rpm = rate_limiter.requests_per_minute or "unlimited"
+            tpm = rate_limiter.tokens_per_minute or "unlimited"
+            print(f"[CONFIG] Rate limit ENABLED - {rpm} requests/min, {tpm} tokens/min, 429s wait for Retry-After")
+
+        breaker = getattr(self.llm_provider, "breaker", None)
+        if breaker:
+            print(f"[CONFIG] Circuit breaker ENABLED - Fails fast for {breaker.reset_timeout:.0f}s after {breaker.failure_threshold} failures in a row")
+
+        if hasattr(self.llm_provider, "hedge_stats"):
+            print(f"[CONFIG] Hedged requests ENABLED - Duplicating requests slower than p{self.llm_provider.hedge_percentile * 100:.0f}")
+
+        if self.llm_provider.provider_name == "ollama":
+            print(f"[CONFIG] Ollama keep-alive: {keep_alive or 'server default'}"
+                  f"{', warming up ' + self.model_name if warm_up else ''}")
+
+        if hasattr(self.llm_provider, "cascade_stats"):
+            print(f"[CONFIG] Model cascade ENABLED - {self.cascade_model} first, {self.model_name} "
+                  f"for answers that fail validation or sanity checks")
+
+        if resume:
+            print(f"[CONFIG] Resume ENABLED - Skipping countries completed in {self.journal.path}")
+
+        if progressive_output:
+            print(f"[CONFIG] Progressive output ENABLED - js/taxData2.js rewritten at most every {progressive_interval:.0f}s")
+
+        if incremental:
+            print(f"[CONFIG] Incremental mode ENABLED - Reusing unchanged countries from {self.manifest.path} "
+                  f"({len(self.manifest)} entries)")
+
+        if structured_output:
+            print(f"[CONFIG] Structured output ENABLED - Replies constrained to the CountryTaxData JSON schema")
+
         print(f"[CONFIG] LLM Provider: {self.llm_provider.provider_name}")
         print(f"[CONFIG] Model: {self.model_name}")
+        print(f"[CONFIG] Context window: {self.prompt_budget.context_tokens} tokens, "
+              f"prompts up to ~{self.prompt_budget.input_limit} tokens")
 
     def _initialize_llm_providers(self) -> LLMProviderManager:
         """Initialize LLM provider manager with available providers"""
         manager = LLMProviderManager()
 
         # Always add Ollama provider
-        ollama_provider = OllamaProvider(base_url=self.ollama_proxy_url)
+        # A comma-separated --ollama-url list is load-balanced across the hosts
+        ollama_provider = create_ollama_provider(self.ollama_proxy_url, keep_alive=self.keep_alive)
         manager.add_provider(ollama_provider, "ollama")
 
         # Only add OpenAI provider if it might be needed
         if self._should_initialize_openai():
             try:
-                openai_provider = OpenAIProvider(api_key=self.openai_api_key)
+                openai_provider = OpenAIProvider(api_key=self.openai_api_key, base_url=self.openai_base_url)
                 manager.add_provider(openai_provider, "openai")
                 print(f"[PROVIDER] OpenAI provider initialized")
             except Exception as e:
                 print(f"[WARNING] Could not initialize OpenAI provider: {e}")
 
+        # Innermost, so latencies are those of the backend, not of queueing in the limiters below
+        manager.enable_metrics()
+
+        # Back off below --workers/--max-in-flight when a backend slows down or returns 5xx/429.
+        # Added before the cache so cache hits do not wait for a slot.
+        if self.adaptive_concurrency:
+            max_concurrency = self.max_in_flight if self.enable_async else self.max_workers
+            manager.enable_adaptive_concurrency(initial_limit=min(4, max_concurrency), max_limit=max_concurrency)
+
+        # Queue OpenAI requests within the account's RPM/TPM instead of failing with 429s.
+        # Outside the concurrency limit, so requests waiting for quota do not hold a slot.
+        if "openai" in manager.providers:
+            manager.enable_rate_limit(("openai",), requests_per_minute=self.openai_rpm,
+                                      tokens_per_minute=self.openai_tpm)
+
+        # Stop waiting on a backend that keeps failing instead of timing out every request
+        if self.circuit_breaker:
+            manager.enable_circuit_breaker()
+
+        # Duplicate requests slower than p95; a load-balanced --ollama-url sends them to another host
+        if self.enable_hedging:
+            manager.enable_hedging()
+
+        # Serve unchanged prompts from the on-disk response cache
+        if self.enable_cache:
+            manager.enable_cache(LLMResponseCache(self.cache_dir, self.cache_max_bytes))
+
+        # Identical prompts built by concurrent workers share one call (and one cache lookup)
+        if self.single_flight:
+            manager.enable_single_flight()
+
+        # Ask the small model first; outside the cache, so each model's answer is cached separately
+        if self.cascade_model and self.cascade_model != self.model_name:
+            manager.enable_cascade(self.cascade_model, self._accept_cascade_response,
+                                   provider=self._cascade_provider_name())
+
         return manager
 
+    def _start_warm_up(self):
+        """Load the model and prefill the shared system prompt on a background thread"""
+        instructions = self._analysis_instructions()
+        context_tokens = self._fitted_context(self.prompt_budget.prompt_tokens("", instructions))
+
+        # The cascade's small model answers first; load it too when it runs on the same server
+        models = [self.model_name]
+        if hasattr(self.llm_provider, "cascade_stats") and self.llm_provider.small is self.llm_provider.inner:
+            models.insert(0, self.cascade_model)
+
+        def warm_up():
+            for model in models:
+                start = time.time()
+                if self.llm_provider.warm_up(model, instructions, context_tokens):
+                    print(f"[WARMUP] {model} loaded with the analysis instructions in {time.time() - start:.1f}s")
+                else:
+                    print(f"[WARNING] Warm-up of {model} failed, the first request will load the model")
+
+        threading.Thread(target=warm_up, name="llm-warm-up", daemon=True).start()
+
+    def _fitted_context(self, prompt_tokens: int) -> int:
+        """Context size (Ollama num_ctx) for an analysis prompt and its reply.
+
+        Never smaller than one requested earlier in the run: Ollama reloads the
+        model when num_ctx changes, so sizes only grow, a power of two at a time.
+        """
+        with self._lock:
+            self._context_tokens = max(self._context_tokens, self.prompt_budget.context_for(prompt_tokens))
+            return self._context_tokens
+
     def _should_initialize_openai(self) -> bool:
         """Determine if OpenAI provider should be initialized"""
         # Initialize OpenAI if explicitly requested
@@ -312,9 +713,21 @@ class TaxDataProcessor:
         if self.provider_name == "auto" and self.model_name.startswith("gpt-"):
             return True
 
+        # Initialize OpenAI for the small model of a cascade
+        if self._cascade_provider_name() == "openai":
+            return True
+
         # Don't initialize otherwise
         return False
 
+    def _cascade_provider_name(self) -> Optional[str]:
+        """Provider of the cascade's small model: --cascade-provider, or guessed from the model name"""
+        if not self.cascade_model:
+            return None
+        if self.cascade_provider:
+            return self.cascade_provider
+        return "openai" if self.cascade_model.startswith("gpt-") else "ollama"
+
     def _select_llm_provider(self):
         """Select appropriate LLM provider based on configuration"""
         if self.provider_name == "auto":
@@ -371,7 +784,7 @@ class TaxDataProcessor:
         try:
             # Check web extractor
             print(f"[API-CHECK] Testing Web Content Extractor at {self.web_extractor_url}/health")
-            response = requests.get(f"{self.web_extractor_url}/health", timeout=5)
+            response = http_client.get(f"{self.web_extractor_url}/health", timeout=5)
             if response.status_code != 200:
                 print(f"[ERROR] Web extractor service not available at {self.web_extractor_url}")
                 return False
@@ -379,20 +792,17 @@ class TaxDataProcessor:
 
             # Only check Ollama if using Ollama provider
             if self.llm_provider and self.llm_provider.provider_name == "ollama":
-                # Check Ollama proxy
+                # Check Ollama proxy (reuses the provider's cached health probe)
                 print(f"[API-CHECK] Testing Ollama Proxy at {self.ollama_proxy_url}/health")
-                response = requests.get(f"{self.ollama_proxy_url}/health", timeout=5)
-                if response.status_code != 200:
+                if not self.llm_provider.is_available():
                     print(f"[ERROR] Ollama proxy service not available at {self.ollama_proxy_url}")
                     return False
                 print(f"[API-OK] Ollama Proxy is responding")
 
-                # Check model availability
+                # Check model availability (cached /models result)
                 print(f"[API-CALL] GET {self.ollama_proxy_url}/models - Fetching available models")
-                response = requests.get(f"{self.ollama_proxy_url}/models", timeout=10)
-                if response.status_code == 200:
-                    models = response.json().get('models', [])
-                    available_models = [model['name'] for model in models]
+                available_models = self.llm_provider.list_models()
+                if available_models:
                     print(f"[MODELS] Available: {available_models}")
 
                     if self.model_name not in available_models:
@@ -419,32 +829,14 @@ class TaxDataProcessor:
             print("[SUCCESS] All services are running and model is available")
             return True
 
-        except requests.exceptions.RequestException as e:
+        except http_client.RequestException as e:
             print(f"[ERROR] Service check failed: {e}")
             return False
 
-    def parse_taxdata_js(self, file_path: str = "js/taxData.js") -> Dict[str, Any]:
-        """Parse the existing taxData.js file"""
+    def parse_taxdata_js(self, file_path: str = DEFAULT_TAX_DATA_FILE) -> Dict[str, Any]:
+        """Parse the existing taxData.js file (see js_literal.load_export)"""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-
-            # Extract the taxData object using regex
-            # Find the export const taxData = { ... } block
-            pattern = r'export\s+const\s+taxData\s*=\s*(\{.*?\});'
-            match = re.search(pattern, content, re.DOTALL)
-
-            if not match:
-                raise ValueError("Could not find taxData export in file")
-
-            tax_data_str = match.group(1)
-
-            # Convert JavaScript object to Python dict
-            # This is a simplified conversion - may need refinement for complex cases
-            tax_data_str = self._js_to_python_dict(tax_data_str)
-
-            # Parse as JSON (after converting JS to valid JSON)
-            self.original_data = eval(tax_data_str)  # Note: eval is dangerous, consider using ast.literal_eval
+            self.original_data = load_export(file_path).value
 
             print(f"[INFO] Loaded {len(self.original_data)} countries from taxData.js")
             return self.original_data
@@ -453,20 +845,6 @@ class TaxDataProcessor:
             print(f"[ERROR] Error parsing taxData.js: {e}")
             return {}
 
-    def _js_to_python_dict(self, js_str: str) -> str:
-        """Convert JavaScript object notation to Python dict notation"""
-        # Replace null with None
-        js_str = re.sub(r'\bnull\b', 'None', js_str)
-
-        # Replace true/false with True/False
-        js_str = re.sub(r'\btrue\b', 'True', js_str)
-        js_str = re.sub(r'\bfalse\b', 'False', js_str)
-
-        # Handle unquoted object keys
-        js_str = re.sub(r'(\w+):', r'"\1":', js_str)
-
-        return js_str
-
     def get_country_key_mapping(self) -> Dict[str, str]:
         """Create mapping between country names and file names"""
         country_mapping = {}
@@ -561,550 +939,437 @@ class TaxDataProcessor:
             print(f"[ERROR] Error reading {filename}: {e}")
             return None
 
-    def validate_structure(self, data: Dict, country_key: str, thread_id: int = 0, trace_id: str = None) -> bool:
-        """Validate that extracted data follows the required structure"""
-        try:
-            # Required fields
-            required_fields = ['name', 'currency', 'system', 'countryCode', 'coordinates', 'brackets']
-            trace_prefix = f"{trace_id} " if trace_id else ""
-            for field in required_fields:
-                if field not in data:
-                    print(f"[VALIDATION-ERROR] {trace_prefix}Thread-{thread_id} Missing required field '{field}' for {country_key}")
-                    return False
-
-            # Validate system values
-            valid_systems = ['progressive', 'flat', 'zero_personal']
-            if data['system'] not in valid_systems:
-                print(f"[VALIDATION-ERROR] {trace_prefix}Thread-{thread_id} Invalid system '{data['system']}' for {country_key}. Must be one of: {valid_systems}")
-                return False
-
-            # Validate coordinates
-            if not isinstance(data['coordinates'], list) or len(data['coordinates']) != 2:
-                print(f"[VALIDATION-ERROR] {trace_prefix}Thread-{thread_id} Invalid coordinates format for {country_key}. Must be [lat, lng]")
-                return False
-
-            # Validate brackets
-            if not isinstance(data['brackets'], list) or len(data['brackets']) == 0:
-                print(f"[VALIDATION-ERROR] {trace_prefix}Thread-{thread_id} Invalid brackets format for {country_key}. Must be non-empty array")
-                return False
-
-            for i, bracket in enumerate(data['brackets']):
-                if not isinstance(bracket, dict):
-                    print(f"[VALIDATION-ERROR] {trace_prefix}Thread-{thread_id} Bracket {i} is not an object for {country_key}")
-                    return False
-
-                required_bracket_fields = ['min', 'max', 'rate']
-                for field in required_bracket_fields:
-                    if field not in bracket:
-                        print(f"[VALIDATION-ERROR] {trace_prefix}Thread-{thread_id} Bracket {i} missing '{field}' for {country_key}")
-                        return False
-
-                # Validate types
-                if not isinstance(bracket['min'], (int, float)):
-                    print(f"[VALIDATION-ERROR] {trace_prefix}Thread-{thread_id} Bracket {i} 'min' must be a number for {country_key}")
-                    return False
-
-                if bracket['max'] is not None and not isinstance(bracket['max'], (int, float)):
-                    print(f"[VALIDATION-ERROR] {trace_prefix}Thread-{thread_id} Bracket {i} 'max' must be a number or null for {country_key}")
-                    return False
-
-                if not isinstance(bracket['rate'], (int, float)):
-                    print(f"[VALIDATION-ERROR] {trace_prefix}Thread-{thread_id} Bracket {i} 'rate' must be a number for {country_key}")
-                    return False
-
-            # Validate VAT structure if present
-            if 'vat' in data and data['vat']:
-                vat = data['vat']
-                if not isinstance(vat, dict):
-                    print(f"[VALIDATION-ERROR] {trace_prefix}Thread-{thread_id} VAT must be an object for {country_key}")
-                    return False
-
-                if 'hasVAT' not in vat or not isinstance(vat['hasVAT'], bool):
-                    print(f"[VALIDATION-ERROR] {trace_prefix}Thread-{thread_id} VAT missing or invalid 'hasVAT' boolean for {country_key}")
-                    return False
-
-            # Validate special_taxes structure if present
-            if 'special_taxes' in data and data['special_taxes']:
-                if not isinstance(data['special_taxes'], list):
-                    print(f"[VALIDATION-ERROR] {trace_prefix}Thread-{thread_id} special_taxes must be an array for {country_key}")
-                    return False
-
-                for i, tax in enumerate(data['special_taxes']):
-                    if not isinstance(tax, dict):
-                        print(f"[VALIDATION-ERROR] {trace_prefix}Thread-{thread_id} Special tax {i} is not an object for {country_key}")
-                        return False
-
-                    required_tax_fields = ['type', 'target', 'rate', 'description']
-                    for field in required_tax_fields:
-                        if field not in tax:
-                            print(f"[VALIDATION-ERROR] {trace_prefix}Thread-{thread_id} Special tax {i} missing '{field}' for {country_key}")
-                            return False
-
+    def validate_extraction(self, data: Any, country_key: str, thread_id: int = 0,
+                            trace_id: str = None) -> List[SchemaViolation]:
+        """Validate extracted data against the schema and sanity rules; logs and returns every violation"""
+        trace_prefix = f"{trace_id} " if trace_id else ""
+        known_codes = {country.get('countryCode') for country in self.original_data.values()}
+        violations = validate_country_data(data, known_codes)
+        for violation in violations:
+            print(f"[VALIDATION-ERROR] {trace_prefix}Thread-{thread_id} {country_key}: {violation}")
+        if not violations:
             print(f"[VALIDATION-SUCCESS] {trace_prefix}Thread-{thread_id} Structure validation passed for {country_key}")
-            return True
-
-        except Exception as e:
-            print(f"[VALIDATION-ERROR] {trace_prefix}Thread-{thread_id} Validation failed for {country_key}: {e}")
-            return False
-
-    def _handle_streaming_response(self, trace_id: str, country_key: str, thread_id: int,
-                                  request_url: str, request_payload: Dict, start_time: float) -> Optional[str]:
-        """Handle streaming LLM response with real-time tracing"""
-        try:
-            response = requests.post(
-                request_url,
-                json=request_payload,
-                timeout=300,
-                stream=True  # Enable streaming
-            )
-
-            if response.status_code != 200:
-                error_msg = f"Streaming LLM request failed for {country_key}: {response.status_code}"
-                print(f"[ERROR] {trace_id} Thread-{thread_id} {error_msg}")
-                processing_time = time.time() - start_time
-
-                # Log error response
-                self.trace_logger.log_response(
-                    trace_id=trace_id,
-                    country_key=country_key,
-                    thread_id=thread_id,
-                    response_status=response.status_code,
-                    response_content=response.text,
-                    processing_time=processing_time,
-                    error=error_msg
-                )
-
-                # Log failure summary
-                self.trace_logger.log_summary(
-                    trace_id=trace_id,
-                    country_key=country_key,
-                    thread_id=thread_id,
-                    success=False,
-                    fallback_used=False
-                )
-                return None
-
-            print(f"[STREAM-START] {trace_id} Thread-{thread_id} Starting streaming response from {self.ollama_proxy_url}")
-
-            # Collect streaming response
-            complete_content = ""
-            chunk_number = 0
-
-            for line in response.iter_lines(decode_unicode=True):
-                if line and line.strip():
-                    try:
-                        # Parse each streaming response line
-                        chunk_data = json.loads(line)
-                        chunk_content = chunk_data.get('message', {}).get('content', '')
-
-                        if chunk_content:
-                            chunk_number += 1
-                            complete_content += chunk_content
-
-                            # Log streaming chunk in real-time
-                            self.trace_logger.log_streaming_chunk(
-                                trace_id=trace_id,
-                                country_key=country_key,
-                                thread_id=thread_id,
-                                chunk_number=chunk_number,
-                                chunk_content=chunk_content
-                            )
-
-                    except json.JSONDecodeError:
-                        # Skip malformed JSON lines
-                        continue
-
-            processing_time = time.time() - start_time
-
-            # Log streaming completion
-            self.trace_logger.log_streaming_complete(
-                trace_id=trace_id,
-                country_key=country_key,
-                thread_id=thread_id,
-                total_chunks=chunk_number,
-                total_content=complete_content,
-                processing_time=processing_time
-            )
-
-            print(f"[LLM-RESPONSE] {trace_id} Thread-{thread_id} HTTP {response.status_code} STREAMING from {self.ollama_proxy_url} (took {processing_time:.2f}s)")
-
-            return complete_content
-
-        except requests.exceptions.RequestException as e:
-            processing_time = time.time() - start_time
-            error_msg = f"Streaming request error for {country_key}: {e}"
-            print(f"[ERROR] {trace_id} Thread-{thread_id} {error_msg}")
-
-            # Log request error
-            self.trace_logger.log_response(
-                trace_id=trace_id,
-                country_key=country_key,
-                thread_id=thread_id,
-                response_status=0,
-                response_content="N/A",
-                processing_time=processing_time,
-                error=error_msg
-            )
-
-            # Log failure summary
-            self.trace_logger.log_summary(
-                trace_id=trace_id,
-                country_key=country_key,
-                thread_id=thread_id,
-                success=False,
-                fallback_used=False
-            )
-            return None
-
-        except Exception as e:
-            processing_time = time.time() - start_time
-            error_msg = f"Unexpected streaming error for {country_key}: {e}"
-            print(f"[ERROR] {trace_id} Thread-{thread_id} {error_msg}")
-
-            # Log unexpected error
-            self.trace_logger.log_response(
-                trace_id=trace_id,
-                country_key=country_key,
-                thread_id=thread_id,
-                response_status=0,
-                response_content="N/A",
-                processing_time=processing_time,
-                error=error_msg
-            )
+        return violations
+
+    def _repair_request(self, llm_request: LLMRequest, data: Any,
+                        violations: List[SchemaViolation]) -> LLMRequest:
+        """The original request with the rejected answer and all of its problems appended"""
+        problems = "\n        ".join(f"- {violation}" for violation in violations)
+        prompt = llm_request.prompt + REPAIR_PROMPT.format(answer=json.dumps(data, ensure_ascii=False),
+                                                           problems=problems)
+        return replace(llm_request, prompt=prompt, stream=False)
+
+    def _accept_cascade_response(self, llm_request: LLMRequest, llm_response: LLMResponse) -> bool:
+        """Cascade acceptance check: the small model's answer must parse, validate and look sane"""
+        label = f"{llm_request.model} answer"
+        data = None
+        if llm_request.response_schema:
+            try:
+                data = json.loads(llm_response.content)
+            except json.JSONDecodeError:
+                pass
+        if not isinstance(data, dict):
+            data = extract_json_object(llm_response.content)
+        if isinstance(data, dict):
+            data = drop_null_optionals(data, CountryTaxData)
+
+        accepted = isinstance(data, dict) and not self.validate_extraction(data, label)
+        if not accepted and self.llm_manager.cache:
+            # Do not keep serving the rejected answer to the next run
+            self.llm_manager.cache.discard(llm_response.provider, llm_request)
+        return accepted
+
+    def _generate_streaming(self, trace_id: str, country_key: str, thread_id: int,
+                            llm_request: LLMRequest) -> LLMResponse:
+        """Stream the provider's response with real-time tracing.
+
+        The output is checked incrementally; the generation is cancelled as
+        soon as it can no longer be valid JSON or exceeds the token budget.
+        """
+        print(f"[STREAM-START] {trace_id} Thread-{thread_id} Starting streaming response from {self.llm_provider.provider_name} provider")
+        chunk_number = 0
 
-            # Log failure summary
-            self.trace_logger.log_summary(
+        def log_chunk(chunk_content: str):
+            nonlocal chunk_number
+            chunk_number += 1
+            self.trace_logger.log_streaming_chunk(
                 trace_id=trace_id,
                 country_key=country_key,
                 thread_id=thread_id,
-                success=False,
-                fallback_used=False
+                chunk_number=chunk_number,
+                chunk_content=chunk_content
             )
-            return None
 
-    def analyze_with_llm(self, country_key: str, country_data: Dict, tax_content: str, thread_id: int = 0) -> Optional[Dict]:
-        """Analyze tax content with LLM and extract structured data"""
-
-        # Generate unique trace ID for this request
-        trace_id = self.trace_logger.generate_trace_id()
-        start_time = time.time()
-
-        print(f"[TRACE-START] {trace_id} Thread-{thread_id} Starting LLM analysis for {country_key}")
-
-        prompt = f"""
+        llm_response = collect_stream(
+            self.llm_provider,
+            llm_request,
+            on_chunk=log_chunk,
+            json_check=True,
+            token_budget=self.max_stream_tokens
+        )
+
+        # Log streaming completion
+        self.trace_logger.log_streaming_complete(
+            trace_id=trace_id,
+            country_key=country_key,
+            thread_id=thread_id,
+            total_chunks=chunk_number,
+            total_content=llm_response.content,
+            processing_time=llm_response.processing_time
+        )
+
+        if not llm_response.success and llm_response.error.startswith("Stream aborted"):
+            print(f"[STREAM-ABORT] {trace_id} Thread-{thread_id} {llm_response.error} after {chunk_number} chunks")
+
+        return llm_response
+
+    def _analysis_instructions(self) -> str:
+        """Static system prompt of every analysis request"""
+        return STRUCTURED_ANALYSIS_INSTRUCTIONS if self.structured_output else ANALYSIS_INSTRUCTIONS
+
+    def _build_analysis_prompt(self, country_data: Dict, tax_content: str) -> str:
+        """Build the country-specific part of the extraction prompt"""
+        return f"""
         Analyze the following taxation information for {country_data.get('name', 'Unknown')} and extract structured tax data.
 
         Current data in system:
         - Currency: {country_data.get('currency', 'Unknown')}
         - Tax System: {country_data.get('system', 'Unknown')}
+        - Country Code: "{country_data.get('countryCode', 'XX')}"
+        - Coordinates: {country_data.get('coordinates', [0, 0])}
         - Current Tax Brackets: {json.dumps(country_data.get('brackets', []), indent=2)}
         - Current VAT: {json.dumps(country_data.get('vat', {}), indent=2)}
 
         Tax Information Content:
         {tax_content}
-
-        CRITICAL: You must follow the EXACT JSON structure format used in the original taxData.js file.
-
-        REQUIRED JSON STRUCTURE - Follow this precisely:
-        {{
-            "name": "Country Name",
-            "currency": "CUR",
-            "system": "progressive|flat|zero_personal",
-            "countryCode": "XX",
-            "coordinates": [lat, lng],
-            "brackets": [
-                {{"min": 0, "max": 50000, "rate": 10, "description": "optional description"}},
-                {{"min": 50001, "max": null, "rate": 25}}
-            ],
-            "vat": {{
-                "hasVAT": true,
-                "standard": 20.0,
-                "reduced": [5.0],
-                "description": "Standard 20.0%",
-                "notes": "optional notes"
-            }},
-            "special_taxes": [
-                {{"type": "social_security", "target": "gross", "rate": 5, "description": "Social security contribution"}},
-                {{"type": "military_levy", "target": "gross", "rate": 5, "description": "Additional 5% military levy"}}
-            ],
-            "notes": "Any additional important information about tax calculation"
-        }}
-
-        EXAMPLE - Ukraine structure to follow exactly:
-        {{
-            "name": "Ukraine",
-            "currency": "UAH",
-            "system": "flat",
-            "countryCode": "UA",
-            "coordinates": [50.4501, 30.5234],
-            "brackets": [{{"min": 0, "max": null, "rate": 18}}],
-            "special_taxes": [
-                {{"type": "military_levy", "target": "gross", "rate": 5, "description": "Additional 5% military levy on all income"}},
-                {{"type": "united_social_tax", "target": "gross", "rate": 22, "description": "22% united social tax on gross income for employees"}}
-            ],
-            "vat": {{
-                "hasVAT": true,
-                "standard": 20.0,
-                "description": "Standard 20.0%"
-            }}
-        }}
-
-        STRICT FORMATTING REQUIREMENTS:
-        1. Use EXACT field names: "name", "currency", "system", "countryCode", "coordinates", "brackets", "vat", "special_taxes", "notes"
-        2. Field order must match: name, currency, system, countryCode, coordinates, brackets, [special_taxes if exists], vat, [notes if exists]
-        3. "brackets" array: Each object must have "min", "max" (or null), "rate" (number), optional "description"
-        4. "vat" object: Must have "hasVAT" (boolean), "standard" (number or null), optional "reduced" (array), "description", "notes"
-        5. "special_taxes" array: Each object must have "type", "target", "rate" (number), "description"
-        6. "coordinates" must be array of two numbers: [latitude, longitude]
-        7. Use exact current coordinates: {country_data.get('coordinates', [0, 0])}
-        8. Use exact current countryCode: "{country_data.get('countryCode', 'XX')}"
-
-        CRITICAL INSTRUCTIONS:
-        1. Extract exact tax rates and brackets from the content
-        2. Use "progressive" for multiple tax brackets, "flat" for single rate, "zero_personal" for no income tax
-        3. Include VAT/GST information if available - always include hasVAT field
-        4. Include any special taxes like social security, military levy, etc. in special_taxes array
-        5. Return ONLY valid JSON, no other text or formatting
-        6. If unsure about a value, use the current system value as fallback
-        7. Maintain exact structure and field names from the example
-        8. Numbers should be numeric values, not strings
-        9. Booleans should be true/false, not strings
         """
 
-        try:
-            if not self.llm_provider:
-                error_msg = f"No LLM provider available for {country_key}"
-                print(f"[ERROR] {trace_id} Thread-{thread_id} {error_msg}")
-                return None
-
-            # Log the LLM request details
-            print(f"[LLM-REQUEST] {trace_id} Thread-{thread_id} Using {self.llm_provider.provider_name} provider")
-            print(f"[LLM-MODEL] {trace_id} Thread-{thread_id} Using model: {self.model_name}")
-            print(f"[LLM-PROMPT] {trace_id} Thread-{thread_id} Analyzing {len(tax_content)} characters of taxation content for {country_key}")
-            print(f"[LLM-CONTENT-SIZE] {trace_id} Thread-{thread_id} Full content included in request (no truncation)")
-            print(f"[LLM-TIMEOUT] {trace_id} Thread-{thread_id} Request timeout: 300 seconds")
-            if self.enable_streaming:
-                print(f"[LLM-STREAMING] {trace_id} Thread-{thread_id} Streaming mode enabled - real-time response tracing")
+    def _prompt_version(self) -> str:
+        """Version of the analysis prompt recorded in the manifest: template version and system prompt hash"""
+        return f"{PROMPT_TEMPLATE_VERSION}-{content_hash(self._analysis_instructions())[:12]}"
 
-            # Prepare LLM request (skip temperature for models that don't support it)
-            request_params = {
-                "prompt": prompt,
-                "model": self.model_name,
-                "stream": self.enable_streaming
-            }
+    def _reuse_extraction(self, country_key: str, tax_content: str, thread_id: int = 0) -> Optional[Dict]:
+        """Remember the input hash of a country; in incremental mode return its unchanged extraction"""
+        input_hash = content_hash(tax_content)
+        with self._lock:
+            self._input_hashes[country_key] = input_hash
+        if not self.incremental:
+            return None
+        data = self.manifest.lookup(country_key, input_hash, self._prompt_version(), self.model_name)
+        if data is not None:
+            print(f"[REUSED] Thread-{thread_id} {country_key} unchanged since the last run, using its recorded extraction")
+        return data
+
+    def _record_extraction(self, country_key: str, data: Dict):
+        """Record a validated extraction in the manifest"""
+        with self._lock:
+            input_hash = self._input_hashes.get(country_key)
+        if input_hash is not None:
+            self.manifest.record(country_key, input_hash, self._prompt_version(), self.model_name, data)
+
+    def _prepare_analysis_request(self, trace_id: str, country_key: str, country_data: Dict,
+                                  tax_content: str, thread_id: int = 0) -> Optional[LLMRequest]:
+        """Build the LLM request for a country and log it to the trace file"""
+        prompt = self._build_analysis_prompt(country_data, tax_content)
+        system_prompt = self._analysis_instructions()
 
-            # Only add temperature for models that support it
-            if not (self.llm_provider.provider_name == "openai" and self.model_name.startswith("gpt-4o")):
-                request_params["temperature"] = 0.3  # Lower temperature for more consistent JSON output
+        if not self.llm_provider:
+            error_msg = f"No LLM provider available for {country_key}"
+            print(f"[ERROR] {trace_id} Thread-{thread_id} {error_msg}")
+            return None
 
-            llm_request = LLMRequest(**request_params)
+        # Reject prompts the model cannot take whole; the server would silently truncate them
+        try:
+            prompt_tokens = self.prompt_budget.check(prompt, system_prompt)
+        except PromptTooLargeError as e:
+            error_msg = f"Taxation content for {country_key} is too large: {e}"
+            print(f"[ERROR] {trace_id} Thread-{thread_id} {error_msg}")
+            self._log_failure(trace_id, country_key, thread_id, 0.0, error_msg)
+            return None
+        context_tokens = self._fitted_context(prompt_tokens)
+
+        # Log the LLM request details
+        print(f"[LLM-REQUEST] {trace_id} Thread-{thread_id} Using {self.llm_provider.provider_name} provider")
+        print(f"[LLM-MODEL] {trace_id} Thread-{thread_id} Using model: {self.model_name}")
+        print(f"[LLM-PROMPT] {trace_id} Thread-{thread_id} Analyzing {len(tax_content)} characters of taxation content for {country_key}")
+        print(f"[LLM-CONTENT-SIZE] {trace_id} Thread-{thread_id} Full content included in request "
+              f"(~{prompt_tokens} of {self.prompt_budget.input_limit} prompt tokens, {context_tokens} token context)")
+        print(f"[LLM-TIMEOUT] {trace_id} Thread-{thread_id} Request timeout: 300 seconds")
+        if self.enable_streaming:
+            print(f"[LLM-STREAMING] {trace_id} Thread-{thread_id} Streaming mode enabled - real-time response tracing")
+
+        # Prepare LLM request (skip temperature for models that don't support it)
+        request_params = {
+            "prompt": prompt,
+            "system_prompt": system_prompt,
+            "model": self.model_name,
+            "stream": self.enable_streaming,
+            "context_tokens": context_tokens,
+            "reasoning_effort": self.reasoning_effort
+        }
+        if self.structured_output:
+            request_params["response_schema"] = COUNTRY_TAX_SCHEMA
 
-            # Log request to trace file
-            self.trace_logger.log_request(
-                trace_id=trace_id,
-                country_key=country_key,
-                thread_id=thread_id,
-                request_payload={
-                    "model": self.model_name,
-                    "messages": [{"role": "user", "content": prompt}],
-                    "stream": self.enable_streaming,
-                    "provider": self.llm_provider.provider_name
-                },
-                request_url=f"{self.llm_provider.provider_name}://{self.model_name}",
-                model_name=self.model_name
-            )
+        # Only add temperature for models that support it
+        if not (self.llm_provider.provider_name == "openai" and self.model_name.startswith("gpt-4o")):
+            request_params["temperature"] = 0.3  # Lower temperature for more consistent JSON output
 
-            # Generate response using the provider
-            llm_response: LLMResponse = self.llm_provider.generate(llm_request)
-            processing_time = llm_response.processing_time
+        llm_request = LLMRequest(**request_params)
 
-            if not llm_response.success:
-                error_msg = f"LLM request failed for {country_key}: {llm_response.error}"
-                print(f"[ERROR] {trace_id} Thread-{thread_id} {error_msg}")
+        # Log request to trace file
+        self.trace_logger.log_request(
+            trace_id=trace_id,
+            country_key=country_key,
+            thread_id=thread_id,
+            request_payload={
+                "model": self.model_name,
+                "messages": [{"role": "system", "content": system_prompt}, {"role": "user", "content": prompt}],
+                "stream": self.enable_streaming,
+                "num_ctx": context_tokens,
+                "provider": self.llm_provider.provider_name
+            },
+            request_url=f"{self.llm_provider.provider_name}://{self.model_name}",
+            model_name=self.model_name
+        )
+
+        return llm_request
+
+    def _log_failure(self, trace_id: str, country_key: str, thread_id: int, processing_time: float,
+                     error_msg: str, response_status: int = 0, response_content: str = "N/A"):
+        """Log a failed response and its failure summary to the trace files"""
+        self.trace_logger.log_response(
+            trace_id=trace_id,
+            country_key=country_key,
+            thread_id=thread_id,
+            response_status=response_status,
+            response_content=response_content,
+            processing_time=processing_time,
+            error=error_msg
+        )
+
+        self.trace_logger.log_summary(
+            trace_id=trace_id,
+            country_key=country_key,
+            thread_id=thread_id,
+            success=False,
+            fallback_used=False
+        )
+
+    def _handle_llm_response(self, trace_id: str, country_key: str, thread_id: int,
+                             llm_request: LLMRequest, llm_response: LLMResponse,
+                             repair: Optional[Callable[[LLMRequest], LLMResponse]] = None) -> Optional[Dict]:
+        """Extract, validate and log the structured data from a provider response.
+
+        Returns None when there is no valid answer, so the caller falls back to the
+        original data without journaling or recording it. With repair, an answer that
+        fails validation is sent back once with all of its violations (see _repair_request)
+        before giving up.
+        """
+        processing_time = llm_response.processing_time
 
-                # Log error response
-                self.trace_logger.log_response(
-                    trace_id=trace_id,
-                    country_key=country_key,
-                    thread_id=thread_id,
-                    response_status=0,
-                    response_content=llm_response.error or "Unknown error",
-                    processing_time=processing_time,
-                    error=error_msg
-                )
-
-                # Log failure summary
-                self.trace_logger.log_summary(
-                    trace_id=trace_id,
-                    country_key=country_key,
-                    thread_id=thread_id,
-                    success=False,
-                    fallback_used=False
-                )
-                return None
+        if not llm_response.success:
+            error_msg = f"LLM request failed for {country_key}: {llm_response.error}"
+            print(f"[ERROR] {trace_id} Thread-{thread_id} {error_msg}")
+            self._log_failure(trace_id, country_key, thread_id, processing_time, error_msg,
+                              response_content=llm_response.error or "Unknown error")
+            return None
 
-            content = llm_response.content
+        content = llm_response.content
+        if llm_response.cached:
+            print(f"[LLM-CACHE-HIT] {trace_id} Thread-{thread_id} {self.llm_provider.provider_name} response served from cache")
+        else:
             print(f"[LLM-RESPONSE] {trace_id} Thread-{thread_id} {self.llm_provider.provider_name} provider responded (took {processing_time:.2f}s)")
-            print(f"[LLM-OUTPUT] {trace_id} Thread-{thread_id} Received {len(content)} characters from model {self.model_name}")
+        print(f"[LLM-OUTPUT] {trace_id} Thread-{thread_id} Received {len(content)} characters from model {llm_response.model}")
 
-            # Log token usage if available (OpenAI)
-            if llm_response.token_usage:
-                print(f"[LLM-TOKENS] {trace_id} Thread-{thread_id} Tokens: {llm_response.token_usage['total_tokens']} total ({llm_response.token_usage['prompt_tokens']} prompt + {llm_response.token_usage['completion_tokens']} completion)")
+        # Log token usage if available (OpenAI)
+        if llm_response.token_usage:
+            print(f"[LLM-TOKENS] {trace_id} Thread-{thread_id} Tokens: {llm_response.token_usage['total_tokens']} total ({llm_response.token_usage['prompt_tokens']} prompt + {llm_response.token_usage['completion_tokens']} completion)")
 
-            # Extract JSON from response
-            json_match = re.search(r'\{.*\}', content, re.DOTALL)
-            if not json_match:
-                error_msg = f"No JSON found in LLM response for {country_key}"
+        # Structured output is the JSON object itself; fall back to scraping when a server ignored the schema
+        extracted_data = None
+        if llm_request.response_schema:
+            try:
+                extracted_data = json.loads(content)
+            except json.JSONDecodeError:
+                print(f"[WARNING] {trace_id} Thread-{thread_id} Structured reply is not valid JSON, searching the text")
+        if not isinstance(extracted_data, dict):
+            # Locate the answer object, skipping prose, fences, <think> blocks and broken drafts
+            extracted_data = extract_json_object(content)
+            if extracted_data is None:
+                error_msg = f"No valid JSON object found in LLM response for {country_key}"
                 print(f"[ERROR] {trace_id} Thread-{thread_id} {error_msg}")
                 print(f"[DEBUG] {trace_id} Thread-{thread_id} LLM raw response: {content[:500]}...")
 
-                # Log JSON parsing error
-                self.trace_logger.log_response(
-                    trace_id=trace_id,
-                    country_key=country_key,
-                    thread_id=thread_id,
-                    response_status=200,  # Provider succeeded but JSON parsing failed
-                    response_content=content,
-                    processing_time=processing_time,
-                    error=error_msg
-                )
-
-                # Log failure summary
-                self.trace_logger.log_summary(
-                    trace_id=trace_id,
-                    country_key=country_key,
-                    thread_id=thread_id,
-                    success=False,
-                    fallback_used=False
-                )
+                # Provider succeeded but JSON parsing failed
+                self._discard_cached_response(llm_request)
+                self._log_failure(trace_id, country_key, thread_id, processing_time, error_msg,
+                                  response_status=200, response_content=content)
                 return None
+        extracted_data = drop_null_optionals(extracted_data, CountryTaxData)
+
+        # Validate the structure matches requirements
+        violations = self.validate_extraction(extracted_data, country_key, thread_id, trace_id)
+        validation_result = not violations
+
+        # Log successful response with validation result
+        self.trace_logger.log_response(
+            trace_id=trace_id,
+            country_key=country_key,
+            thread_id=thread_id,
+            response_status=200,  # Provider succeeded
+            response_content=content,
+            processing_time=processing_time,
+            validation_result=validation_result,
+            extracted_data=extracted_data if validation_result else None
+        )
+
+        if not validation_result and repair is not None:
+            print(f"[REPAIR] {trace_id} Thread-{thread_id} Sending {len(violations)} validation error(s) "
+                  f"back to {llm_request.model} for {country_key}")
+            self._discard_cached_response(llm_request)
+            with self._lock:
+                self.repair_stats['requested'] += 1
+            repair_request = self._repair_request(llm_request, extracted_data, violations)
+            repaired = self._handle_llm_response(trace_id, country_key, thread_id, repair_request,
+                                                 repair(repair_request))
+            if repaired is None:  # Failed or invalid again: not repaired a second time
+                return None
+            with self._lock:
+                self.repair_stats['repaired'] += 1
+            return repaired
 
-            json_str = json_match.group(0)
-            extracted_data = json.loads(json_str)
-
-            # Validate the structure matches requirements
-            validation_result = self.validate_structure(extracted_data, country_key, thread_id, trace_id)
-
-            # Log successful response with validation result
-            self.trace_logger.log_response(
-                trace_id=trace_id,
-                country_key=country_key,
-                thread_id=thread_id,
-                response_status=200,  # Provider succeeded
-                response_content=content,
-                processing_time=processing_time,
-                validation_result=validation_result,
-                extracted_data=extracted_data if validation_result else None
-            )
+        if not validation_result:
+            print(f"[WARNING] {trace_id} Thread-{thread_id} Structure validation failed for {country_key}, using original data")
+            self._discard_cached_response(llm_request)
 
-            if not validation_result:
-                print(f"[WARNING] {trace_id} Thread-{thread_id} Structure validation failed for {country_key}, using original data")
-                fallback_data = self.original_data.get(country_key)
-
-                # Log fallback summary
-                self.trace_logger.log_summary(
-                    trace_id=trace_id,
-                    country_key=country_key,
-                    thread_id=thread_id,
-                    success=True,
-                    final_data=fallback_data,
-                    fallback_used=True
-                )
-                return fallback_data
-
-            print(f"[SUCCESS] {trace_id} Thread-{thread_id} Successfully analyzed {country_key} with model {self.model_name}")
-            print(f"[DATA-EXTRACTED] {trace_id} Thread-{thread_id} Tax system: {extracted_data.get('system')}, "
-                  f"Brackets: {len(extracted_data.get('brackets', []))}, "
-                  f"VAT: {extracted_data.get('vat', {}).get('standard', 'N/A')}")
-
-            # Log success summary
+            # Log fallback summary
             self.trace_logger.log_summary(
                 trace_id=trace_id,
                 country_key=country_key,
                 thread_id=thread_id,
                 success=True,
-                final_data=extracted_data,
-                fallback_used=False
+                final_data=self.original_data.get(country_key),
+                fallback_used=True
             )
+            return None  # The caller uses the original data as an unprocessed result
+
+        print(f"[SUCCESS] {trace_id} Thread-{thread_id} Successfully analyzed {country_key} with model {llm_response.model}")
+        print(f"[DATA-EXTRACTED] {trace_id} Thread-{thread_id} Tax system: {extracted_data.get('system')}, "
+              f"Brackets: {len(extracted_data.get('brackets', []))}, "
+              f"VAT: {extracted_data.get('vat', {}).get('standard', 'N/A')}")
+
+        # Log success summary
+        self.trace_logger.log_summary(
+            trace_id=trace_id,
+            country_key=country_key,
+            thread_id=thread_id,
+            success=True,
+            final_data=extracted_data,
+            fallback_used=False
+        )
+
+        self._record_extraction(country_key, extracted_data)
+        return extracted_data
+
+    def _repair_generate(self) -> Optional[Callable[[LLMRequest], LLMResponse]]:
+        """Provider call for repair requests, None when repairs are disabled"""
+        return self.llm_provider.generate if self.repair else None
+
+    def _discard_cached_response(self, llm_request: Optional[LLMRequest]):
+        """Forget a cached response whose content could not be used, so the next run asks again"""
+        if self.llm_manager.cache and llm_request is not None:
+            self.llm_manager.cache.discard(self.llm_provider.provider_name, llm_request)
+
+    def _handle_analysis_exception(self, trace_id: str, country_key: str, thread_id: int,
+                                   start_time: float, exc: Exception) -> None:
+        """Log an exception raised while analyzing a country"""
+        processing_time = time.time() - start_time
+
+        if isinstance(exc, json.JSONDecodeError):
+            error_msg = f"Invalid JSON from LLM for {country_key}: {exc}"
+            print(f"[ERROR] {trace_id} Thread-{thread_id} {error_msg}")
+            print(f"[DEBUG] {trace_id} Thread-{thread_id} Raw JSON string: {exc.doc[:200]}...")
+            # Request succeeded but JSON failed
+            self._log_failure(trace_id, country_key, thread_id, processing_time, error_msg,
+                              response_status=200, response_content=exc.doc[:1000])
+        elif isinstance(exc, http_client.RequestException):
+            error_msg = f"Request error for {country_key}: {exc}"
+            print(f"[ERROR] {trace_id} Thread-{thread_id} {error_msg}")
+            self._log_failure(trace_id, country_key, thread_id, processing_time, error_msg)
+        else:
+            error_msg = f"Unexpected error for {country_key}: {exc}"
+            print(f"[ERROR] {trace_id} Thread-{thread_id} {error_msg}")
+            self._log_failure(trace_id, country_key, thread_id, processing_time, error_msg)
+        return None
 
-            return extracted_data
+    def analyze_with_llm(self, country_key: str, country_data: Dict, tax_content: str, thread_id: int = 0) -> Optional[Dict]:
+        """Analyze tax content with LLM and extract structured data"""
 
-        except json.JSONDecodeError as e:
-            processing_time = time.time() - start_time
-            error_msg = f"Invalid JSON from LLM for {country_key}: {e}"
-            print(f"[ERROR] {trace_id} Thread-{thread_id} {error_msg}")
-            print(f"[DEBUG] {trace_id} Thread-{thread_id} Raw JSON string: {json_str[:200]}...")
+        # Generate unique trace ID for this request
+        trace_id = self.trace_logger.generate_trace_id()
+        start_time = time.time()
 
-            # Log JSON decode error
-            self.trace_logger.log_response(
-                trace_id=trace_id,
-                country_key=country_key,
-                thread_id=thread_id,
-                response_status=200,  # Request succeeded but JSON failed
-                response_content=json_str[:1000] if 'json_str' in locals() else "N/A",
-                processing_time=processing_time,
-                error=error_msg
-            )
+        print(f"[TRACE-START] {trace_id} Thread-{thread_id} Starting LLM analysis for {country_key}")
 
-            # Log failure summary
-            self.trace_logger.log_summary(
-                trace_id=trace_id,
-                country_key=country_key,
-                thread_id=thread_id,
-                success=False,
-                fallback_used=False
-            )
-            return None
-        except requests.exceptions.RequestException as e:
-            processing_time = time.time() - start_time
-            error_msg = f"Request error for {country_key}: {e}"
-            print(f"[ERROR] {trace_id} Thread-{thread_id} {error_msg}")
+        llm_request = None
+        try:
+            llm_request = self._prepare_analysis_request(trace_id, country_key, country_data, tax_content, thread_id)
+            if llm_request is None:
+                return None
 
-            # Log request error
-            self.trace_logger.log_response(
-                trace_id=trace_id,
-                country_key=country_key,
-                thread_id=thread_id,
-                response_status=0,  # No response received
-                response_content="N/A",
-                processing_time=processing_time,
-                error=error_msg
-            )
+            # Generate response using the provider
+            if self.enable_streaming:
+                llm_response = self._generate_streaming(trace_id, country_key, thread_id, llm_request)
+            else:
+                llm_response: LLMResponse = self.llm_provider.generate(llm_request)
+            return self._handle_llm_response(trace_id, country_key, thread_id, llm_request, llm_response,
+                                             self._repair_generate())
 
-            # Log failure summary
-            self.trace_logger.log_summary(
-                trace_id=trace_id,
-                country_key=country_key,
-                thread_id=thread_id,
-                success=False,
-                fallback_used=False
-            )
-            return None
         except Exception as e:
-            processing_time = time.time() - start_time
-            error_msg = f"Unexpected error for {country_key}: {e}"
-            print(f"[ERROR] {trace_id} Thread-{thread_id} {error_msg}")
+            self._discard_cached_response(llm_request)
+            return self._handle_analysis_exception(trace_id, country_key, thread_id, start_time, e)
 
-            # Log unexpected error
-            self.trace_logger.log_response(
-                trace_id=trace_id,
-                country_key=country_key,
-                thread_id=thread_id,
-                response_status=0,  # No meaningful response
-                response_content="N/A",
-                processing_time=processing_time,
-                error=error_msg
-            )
+    async def aanalyze_with_llm(self, country_key: str, country_data: Dict, tax_content: str, thread_id: int = 0) -> Optional[Dict]:
+        """Async variant of analyze_with_llm that awaits the provider on the event loop"""
 
-            # Log failure summary
-            self.trace_logger.log_summary(
-                trace_id=trace_id,
-                country_key=country_key,
-                thread_id=thread_id,
-                success=False,
-                fallback_used=False
-            )
-            return None
+        trace_id = self.trace_logger.generate_trace_id()
+        start_time = time.time()
+
+        print(f"[TRACE-START] {trace_id} Thread-{thread_id} Starting LLM analysis for {country_key}")
+
+        llm_request = None
+        try:
+            llm_request = self._prepare_analysis_request(trace_id, country_key, country_data, tax_content, thread_id)
+            if llm_request is None:
+                return None
+
+            if self.enable_streaming:
+                llm_response = await asyncio.to_thread(
+                    self._generate_streaming, trace_id, country_key, thread_id, llm_request)
+            else:
+                llm_response: LLMResponse = await self.llm_provider.agenerate(llm_request)
+            # Off the event loop: a repair request is a blocking provider call
+            return await asyncio.to_thread(self._handle_llm_response, trace_id, country_key, thread_id,
+                                           llm_request, llm_response, self._repair_generate())
+
+        except Exception as e:
+            self._discard_cached_response(llm_request)
+            return self._handle_analysis_exception(trace_id, country_key, thread_id, start_time, e)
+
+    def _fallback_result(self, country_key: str, thread_id: int, llm_failed: bool) -> Tuple[str, Optional[Dict], bool]:
+        """Return the original data for a country that was not processed with the LLM"""
+        if country_key in self.original_data:
+            if llm_failed:
+                print(f"[WARNING] Thread-{thread_id} LLM analysis failed for {country_key}, using original data")
+            else:
+                print(f"[SKIP] Thread-{thread_id} Using original data for {country_key}")
+            return country_key, self.original_data[country_key], False  # False = not processed with LLM
+
+        if llm_failed:
+            print(f"[ERROR] Thread-{thread_id} LLM analysis failed and no original data for {country_key}")
+        else:
+            print(f"[SKIP] Thread-{thread_id} No original data found for {country_key}")
+        return country_key, None, False
 
     def process_single_country(self, country_key: str, filename: str, thread_id: int = 0) -> Tuple[str, Optional[Dict], bool]:
         """Process a single country and return results"""
@@ -1115,12 +1380,12 @@ class TaxDataProcessor:
 
         if tax_content is None:
             # Use original data if no file available
-            if country_key in self.original_data:
-                print(f"[SKIP] Thread-{thread_id} Using original data for {country_key}")
-                return country_key, self.original_data[country_key], False  # False = not processed with LLM
-            else:
-                print(f"[SKIP] Thread-{thread_id} No original data found for {country_key}")
-                return country_key, None, False
+            return self._fallback_result(country_key, thread_id, llm_failed=False)
+
+        # Skip the LLM for a file that has not changed since its last extraction
+        reused_data = self._reuse_extraction(country_key, tax_content, thread_id)
+        if reused_data is not None:
+            return country_key, reused_data, True
 
         # Analyze with LLM
         original_country_data = self.original_data.get(country_key, {})
@@ -1128,14 +1393,30 @@ class TaxDataProcessor:
 
         if updated_country_data:
             return country_key, updated_country_data, True  # True = processed with LLM
-        else:
-            # Fallback to original data
-            if country_key in self.original_data:
-                print(f"[WARNING] Thread-{thread_id} LLM analysis failed for {country_key}, using original data")
-                return country_key, self.original_data[country_key], False
-            else:
-                print(f"[ERROR] Thread-{thread_id} LLM analysis failed and no original data for {country_key}")
-                return country_key, None, False
+
+        # Fallback to original data
+        return self._fallback_result(country_key, thread_id, llm_failed=True)
+
+    async def aprocess_single_country(self, country_key: str, filename: str, task_id: int = 0) -> Tuple[str, Optional[Dict], bool]:
+        """Async variant of process_single_country"""
+        print(f"[PROCESSING] Thread-{task_id} {country_key} ({filename})...")
+
+        tax_content = self.read_taxation_file(filename)
+
+        if tax_content is None:
+            return self._fallback_result(country_key, task_id, llm_failed=False)
+
+        reused_data = self._reuse_extraction(country_key, tax_content, task_id)
+        if reused_data is not None:
+            return country_key, reused_data, True
+
+        original_country_data = self.original_data.get(country_key, {})
+        updated_country_data = await self.aanalyze_with_llm(country_key, original_country_data, tax_content, task_id)
+
+        if updated_country_data:
+            return country_key, updated_country_data, True
+
+        return self._fallback_result(country_key, task_id, llm_failed=True)
 
     def compare_data(self, original: Dict, updated: Dict) -> Dict[str, List[str]]:
         """Compare original and updated data, return changes"""
@@ -1184,8 +1465,8 @@ class TaxDataProcessor:
 
     def _log_detailed_changes(self, country_key: str, original: Dict, updated: Dict):
         """Log detailed changes for a country"""
-        if country_key not in self.changes_log:
-            self.changes_log[country_key] = []
+        # Rebuilt on every comparison; progressive output compares the same country repeatedly
+        self.changes_log[country_key] = []
 
         # Compare brackets
         orig_brackets = original.get('brackets', [])
@@ -1207,15 +1488,19 @@ class TaxDataProcessor:
         if original.get('system') != updated.get('system'):
             self.changes_log[country_key].append(f"Tax system changed: {original.get('system')} -> {updated.get('system')}")
 
-    def generate_updated_js(self, output_file: str = "js/taxData2.js"):
-        """Generate updated JavaScript file with comments"""
+    def generate_updated_js(self, output_file: str = "js/taxData2.js", data: Optional[Dict] = None,
+                            status: Optional[str] = None):
+        """Generate updated JavaScript file with comments (data defaults to updated_data)"""
+        if data is None:
+            data = self.updated_data
 
         # Get changes summary
-        changes = self.compare_data(self.original_data, self.updated_data)
+        changes = self.compare_data(self.original_data, data)
+        status_line = f"// STATUS: {status}\n" if status else ""
 
         js_content = f"""// Tax data for major countries - UPDATED VERSION
 // Generated by scripts/tax_data_updater.py on {time.strftime('%Y-%m-%d %H:%M:%S')}
-//
+{status_line}//
 // CHANGES SUMMARY:
 // - Added: {len(changes['added'])} countries ({', '.join(changes['added']) if changes['added'] else 'none'})
 // - Modified: {len(changes['modified'])} countries ({', '.join(changes['modified']) if changes['modified'] else 'none'})
@@ -1225,7 +1510,7 @@ class TaxDataProcessor:
 export const taxData = {{
 """
 
-        for country_key, country_data in self.updated_data.items():
+        for country_key, country_data in data.items():
             # Add comment indicating changes for this country
             if country_key in changes['added']:
                 js_content += f"\n  // [ADDED] New country data from taxation analysis\n"
@@ -1323,25 +1608,26 @@ export function formatVATInfo(vatInfo) {
 """
 
         try:
-            with open(output_file, 'w', encoding='utf-8') as f:
+            # Write to a temporary file first so readers never see a half-written file
+            tmp_file = f"{output_file}.tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
                 f.write(js_content)
+            os.replace(tmp_file, output_file)
             print(f"[SUCCESS] Generated updated tax data file: {output_file}")
             return True
         except Exception as e:
             print(f"[ERROR] Error writing output file: {e}")
             return False
 
-    def process_all_countries(self):
-        """Main processing function"""
-        print("[START] Starting Tax Data Update Process...")
-
+    def _prepare_country_items(self) -> Optional[List[Tuple[str, str]]]:
+        """Check services, load taxData.js and return the (country_key, filename) pairs to process"""
         # Check services
         if not self.check_services():
-            return False
+            return None
 
         # Parse existing data
         if not self.parse_taxdata_js():
-            return False
+            return None
 
         # Get country mapping
         country_mapping = self.get_country_key_mapping()
@@ -1349,11 +1635,6 @@ export function formatVATInfo(vatInfo) {
         # Check which taxation files exist before processing
         existing_files, missing_files = self.check_existing_taxation_files(country_mapping)
 
-        # Process each country
-        self.updated_data = {}
-        processed = 0
-        skipped = 0
-
         # Filter mapping to only include countries that exist in original data
         valid_countries = {k: v for k, v in country_mapping.items() if k in self.original_data}
 
@@ -1365,11 +1646,163 @@ export function formatVATInfo(vatInfo) {
         else:
             print(f"[INFO] Processing {len(valid_countries)} countries out of {len(country_mapping)} mapped countries")
 
+        return list(valid_countries.items())
+
+    def _start_journal(self, country_items: List[Tuple[str, str]], stats: Dict[str, int]) -> List[Tuple[str, str]]:
+        """Open the run journal; with resume, take over its countries and return the ones still to do"""
+        completed = self.journal.load(self.model_name) if self.resume else {}
+        self.journal.open(resume=self.resume)
+
+        remaining = []
+        for country_key, filename in country_items:
+            record = completed.get(country_key)
+            if record is None:
+                remaining.append((country_key, filename))
+                continue
+            self.updated_data[country_key] = record["data"]
+            stats['processed'] += 1
+            # The manifest of the interrupted run was never saved; keep its extractions for --incremental
+            if record.get("input_hash") and record.get("prompt_version") == self._prompt_version():
+                self.manifest.record(country_key, record["input_hash"], record["prompt_version"],
+                                     self.model_name, record["data"])
+
+        if self.resume:
+            print(f"[RESUME] {len(country_items) - len(remaining)} countries completed by the interrupted run, "
+                  f"{len(remaining)} to process")
+        return remaining
+
+    def _write_progressive_output(self, force: bool = False):
+        """Rewrite taxData2.js with the results so far, original data for the countries still to do"""
+        with self._lock:
+            now = time.monotonic()
+            if not force and now - self._last_progressive_write < self.progressive_interval:
+                return
+            self._last_progressive_write = now
+            snapshot = {key: self.updated_data.get(key, data) for key, data in self.original_data.items()}
+            snapshot.update({key: data for key, data in self.updated_data.items() if key not in snapshot})
+            done = len(self.updated_data)
+
+        with self._output_lock:
+            self.generate_updated_js(data=snapshot, status=f"IN PROGRESS - {done} of {len(snapshot)} countries done")
+
+    def _record_result(self, country_key: str, country_data: Optional[Dict], was_processed: bool, stats: Dict[str, int]):
+        """Store one country's result and update the run counters"""
+        with self._lock:
+            if country_data is not None:
+                self.updated_data[country_key] = country_data
+                if was_processed:
+                    stats['processed'] += 1
+                    print(f"[COMPLETED] {country_key} processed with LLM")
+                    self.journal.append(country_key, country_data, model=self.model_name,
+                                        input_hash=self._input_hashes.get(country_key),
+                                        prompt_version=self._prompt_version())
+                else:
+                    stats['skipped'] += 1
+                    print(f"[COMPLETED] {country_key} used original data")
+            else:
+                stats['skipped'] += 1
+                print(f"[COMPLETED] {country_key} failed to process")
+
+        if self.progressive_output:
+            self._write_progressive_output()
+
+    def _finish_run(self, stats: Dict[str, int]) -> bool:
+        """Print the run summary and write the output file"""
+        print(f"\n[SUMMARY] Processing Summary:")
+        print(f"   [SUCCESS] Successfully processed: {stats['processed']}")
+        print(f"   [SKIP] Skipped (no file/error): {stats['skipped']}")
+        print(f"   [TOTAL] Total countries: {len(self.updated_data)}")
+
+        if self.incremental:
+            print(f"   [MANIFEST] Reused {self.manifest.reused} unchanged countries, "
+                  f"{self.manifest.recorded} extracted anew")
+        if self.manifest.save():
+            print(f"   [MANIFEST] Recorded {self.manifest.recorded} extractions in {self.manifest.path}")
+
+        if self.llm_manager.cache:
+            cache_stats = self.llm_manager.cache.stats()
+            print(f"   [CACHE] Hits: {cache_stats['hits']}, Misses: {cache_stats['misses']} "
+                  f"({cache_stats['hit_rate']:.1f}% hit rate), {cache_stats['entries']} entries, "
+                  f"{cache_stats['size_bytes'] / 1024:.1f} KB on disk")
+
+        limiter = getattr(self.llm_provider, "limiter", None)
+        if limiter:
+            limit_stats = limiter.stats()
+            print(f"   [LIMIT] Final concurrency limit: {limit_stats['limit']}, "
+                  f"overload responses: {limit_stats['overloads']}, limit cuts: {limit_stats['decreases']}")
+
+        rate_limiter = getattr(self.llm_provider, "rate_limiter", None)
+        if rate_limiter:
+            rate_stats = rate_limiter.stats()
+            print(f"   [RATE] Waited {rate_stats['waited']:.1f}s for quota, "
+                  f"{rate_stats['rate_limited']} rate-limited (429) responses")
+
+        breaker = getattr(self.llm_provider, "breaker", None)
+        if breaker and breaker.opened:
+            breaker_stats = breaker.stats()
+            print(f"   [BREAKER] Circuit opened {breaker_stats['opened']} times, "
+                  f"{breaker_stats['rejected']} requests failed fast")
+
+        if hasattr(self.llm_provider, "hedge_stats"):
+            hedge_stats = self.llm_provider.hedge_stats()
+            print(f"   [HEDGE] {hedge_stats['hedged']} of {hedge_stats['requests']} requests duplicated, "
+                  f"{hedge_stats['hedge_wins']} answered first by the duplicate")
+
+        if hasattr(self.llm_provider, "cascade_stats"):
+            cascade_stats = self.llm_provider.cascade_stats()
+            print(f"   [CASCADE] {cascade_stats['accepted']} answers from {self.cascade_model}, "
+                  f"{cascade_stats['escalated']} escalated to {self.model_name}")
+
+        if self.repair_stats['requested']:
+            print(f"   [REPAIR] {self.repair_stats['repaired']} of {self.repair_stats['requested']} "
+                  f"invalid answers fixed by one repair request")
+
+        if hasattr(self.llm_provider, "single_flight_stats"):
+            flight_stats = self.llm_provider.single_flight_stats()
+            if flight_stats['coalesced']:
+                print(f"   [COALESCE] {flight_stats['coalesced']} duplicate requests shared "
+                      f"an in-flight call ({flight_stats['calls']} upstream calls)")
+
+        for line in summary_lines():
+            print(f"   [METRICS] {line}")
+        if self.metrics_dir:
+            prom_path, json_path = REGISTRY.write(self.metrics_dir)
+            print(f"   [METRICS] Saved {prom_path} and {json_path}")
+
+        # Generate output file
+        with self._output_lock:
+            success = self.generate_updated_js()
+
+        # Keep the journal when the output could not be written, so --resume still has the results
+        self.journal.close(remove=success)
+
+        if success:
+            print(f"\n[COMPLETE] Tax data update completed successfully!")
+            print(f"[FILE] Updated file: js/taxData2.js")
+
+        return success
+
+    def process_all_countries(self):
+        """Main processing function"""
+        if self.enable_batch:
+            return self.process_all_countries_batch()
+        if self.enable_async:
+            return run_coroutine(self.process_all_countries_async())
+
+        print("[START] Starting Tax Data Update Process...")
+
+        country_items = self._prepare_country_items()
+        if country_items is None:
+            return False
+
+        # Process each country
+        self.updated_data = {}
+        stats = {'processed': 0, 'skipped': 0}
+        country_items = self._start_journal(country_items, stats)
+
         print(f"[PARALLEL] Using {self.max_workers} worker threads for LLM processing")
 
         # Process countries in parallel
-        country_items = list(valid_countries.items())
-
         with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
             # Submit all tasks
             future_to_country = {}
@@ -1386,39 +1819,135 @@ export function formatVATInfo(vatInfo) {
                     result_country_key, country_data, was_processed = future.result()
 
                     # Thread-safe update of results
-                    with self._lock:
-                        if country_data is not None:
-                            self.updated_data[result_country_key] = country_data
-                            if was_processed:
-                                processed += 1
-                                print(f"[COMPLETED] {result_country_key} processed with LLM")
-                            else:
-                                skipped += 1
-                                print(f"[COMPLETED] {result_country_key} used original data")
-                        else:
-                            skipped += 1
-                            print(f"[COMPLETED] {result_country_key} failed to process")
+                    self._record_result(result_country_key, country_data, was_processed, stats)
 
                 except Exception as exc:
                     with self._lock:
-                        skipped += 1
+                        stats['skipped'] += 1
                     print(f"[ERROR] {country_key} generated an exception: {exc}")
 
         print(f"\n[PARALLEL] All {len(country_items)} tasks completed")
 
-        print(f"\n[SUMMARY] Processing Summary:")
-        print(f"   [SUCCESS] Successfully processed: {processed}")
-        print(f"   [SKIP] Skipped (no file/error): {skipped}")
-        print(f"   [TOTAL] Total countries: {len(self.updated_data)}")
+        return self._finish_run(stats)
 
-        # Generate output file
-        success = self.generate_updated_js()
+    async def process_all_countries_async(self):
+        """Asyncio driver for process_all_countries.
 
-        if success:
-            print(f"\n[COMPLETE] Tax data update completed successfully!")
-            print(f"[FILE] Updated file: js/taxData2.js")
+        Every country becomes a task on one event loop; a semaphore keeps at
+        most max_in_flight LLM requests outstanding instead of one thread each.
+        """
+        print("[START] Starting Tax Data Update Process (async)...")
 
-        return success
+        # Service checks and file reads are blocking, keep them off the loop
+        country_items = await asyncio.to_thread(self._prepare_country_items)
+        if country_items is None:
+            return False
+
+        self.updated_data = {}
+        stats = {'processed': 0, 'skipped': 0}
+        country_items = self._start_journal(country_items, stats)
+        semaphore = asyncio.Semaphore(self.max_in_flight)
+
+        print(f"[ASYNC] Keeping up to {self.max_in_flight} LLM requests in flight")
+
+        async def run_country(country_key: str, filename: str, task_id: int):
+            async with semaphore:
+                try:
+                    return await self.aprocess_single_country(country_key, filename, task_id), None
+                except Exception as exc:
+                    return (country_key, None, False), exc
+
+        tasks = [
+            asyncio.ensure_future(run_country(country_key, filename, i + 1))
+            for i, (country_key, filename) in enumerate(country_items)
+        ]
+
+        print(f"\n[ASYNC] Scheduled {len(tasks)} tasks on the event loop")
+
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                (result_country_key, country_data, was_processed), exc = await next_done
+                if exc is not None:
+                    stats['skipped'] += 1
+                    print(f"[ERROR] {result_country_key} generated an exception: {exc}")
+                    continue
+                self._record_result(result_country_key, country_data, was_processed, stats)
+        finally:
+            if hasattr(self.llm_provider, 'aclose'):
+                await self.llm_provider.aclose()
+
+        print(f"\n[ASYNC] All {len(country_items)} tasks completed")
+
+        return self._finish_run(stats)
+
+    def process_all_countries_batch(self):
+        """Batch driver for process_all_countries.
+
+        Builds the LLM request for every country first and hands them to the
+        provider in one generate_batch() call (the OpenAI Batch API for
+        OpenAIProvider), then validates the results country by country.
+        """
+        print("[START] Starting Tax Data Update Process (batch)...")
+
+        country_items = self._prepare_country_items()
+        if country_items is None:
+            return False
+
+        self.updated_data = {}
+        stats = {'processed': 0, 'skipped': 0}
+        country_items = self._start_journal(country_items, stats)
+        pending = []  # (task_id, country_key, trace_id, start_time, llm_request)
+
+        for task_id, (country_key, filename) in enumerate(country_items, 1):
+            print(f"[PROCESSING] Thread-{task_id} {country_key} ({filename})...")
+            tax_content = self.read_taxation_file(filename)
+            if tax_content is None:
+                self._record_result(*self._fallback_result(country_key, task_id, llm_failed=False), stats)
+                continue
+
+            reused_data = self._reuse_extraction(country_key, tax_content, task_id)
+            if reused_data is not None:
+                self._record_result(country_key, reused_data, True, stats)
+                continue
+
+            trace_id = self.trace_logger.generate_trace_id()
+            start_time = time.time()
+            print(f"[TRACE-START] {trace_id} Thread-{task_id} Starting LLM analysis for {country_key}")
+
+            original_country_data = self.original_data.get(country_key, {})
+            llm_request = self._prepare_analysis_request(trace_id, country_key, original_country_data, tax_content, task_id)
+            if llm_request is None:
+                self._record_result(*self._fallback_result(country_key, task_id, llm_failed=True), stats)
+                continue
+            pending.append((task_id, country_key, trace_id, start_time, llm_request))
+
+        if self.llm_provider.provider_name != "openai":
+            print(f"[WARNING] {self.llm_provider.provider_name} has no batch endpoint, requests will be sent one by one")
+
+        if not pending:
+            print(f"\n[BATCH] Nothing to submit, every country is unchanged or has no taxation file")
+            return self._finish_run(stats)
+
+        print(f"\n[BATCH] Submitting {len(pending)} requests in one batch job")
+        llm_responses = self.llm_provider.generate_batch([entry[4] for entry in pending])
+
+        for (task_id, country_key, trace_id, start_time, llm_request), llm_response in zip(pending, llm_responses):
+            try:
+                # Repairs are few and sent one by one rather than as a second batch job
+                updated_country_data = self._handle_llm_response(trace_id, country_key, task_id, llm_request,
+                                                                 llm_response, self._repair_generate())
+            except Exception as e:
+                self._discard_cached_response(llm_request)
+                updated_country_data = self._handle_analysis_exception(trace_id, country_key, task_id, start_time, e)
+
+            if updated_country_data:
+                self._record_result(country_key, updated_country_data, True, stats)
+            else:
+                self._record_result(*self._fallback_result(country_key, task_id, llm_failed=True), stats)
+
+        print(f"\n[BATCH] All {len(country_items)} countries completed")
+
+        return self._finish_run(stats)
 
 
 def main():
@@ -1454,6 +1983,39 @@ Examples:
 
   # Only process countries with taxation files
   python scripts/tax_data_updater.py --only-with-files
+
+  # Load-balance across several Ollama hosts (least outstanding requests)
+  python scripts/tax_data_updater.py --ollama-url "http://gpu1:5001,http://gpu2:5001" --workers 8
+
+  # Async mode: one event loop, up to 200 requests in flight
+  python scripts/tax_data_updater.py --async --max-in-flight 200
+
+  # Let adaptive concurrency find how many requests the proxy handles (up to 16 in flight)
+  python scripts/tax_data_updater.py --workers 16
+
+  # Duplicate slow requests to a second Ollama host to cut tail latency
+  python scripts/tax_data_updater.py --ollama-url "http://gpu1:5001,http://gpu2:5001" --hedge
+
+  # Stay within the OpenAI account's rate limits
+  python scripts/tax_data_updater.py --provider openai --model gpt-4o-mini --openai-rpm 500 --openai-tpm 200000
+
+  # Let a small model answer first and escalate to gemma3:12b when its answer fails validation
+  python scripts/tax_data_updater.py --model gemma3:12b --cascade-model gemma3:1b
+
+  # Continue a run that crashed or was interrupted, keeping js/taxData2.js current as countries finish
+  python scripts/tax_data_updater.py --resume --progressive-output
+
+  # Nightly run: only re-extract countries whose taxation file changed since the last run
+  python scripts/tax_data_updater.py --incremental
+
+  # Ignore cached LLM responses and query the model again
+  python scripts/tax_data_updater.py --no-cache
+
+  # Full refresh through the OpenAI Batch API (no interactive latency needed)
+  python scripts/tax_data_updater.py --provider openai --model gpt-4o-mini --batch
+
+  # Batch run against the local stand-in server (python scripts/llm_stub_server.py)
+  python scripts/tax_data_updater.py --provider openai --model gpt-4o-mini --batch --openai-base-url http://localhost:5002/v1 --openai-api-key stub
         """
     )
 
@@ -1469,6 +2031,13 @@ Examples:
         help="Enable real-time LLM response streaming and tracing"
     )
 
+    parser.add_argument(
+        "--max-stream-tokens",
+        type=int,
+        default=8192,
+        help="With --streaming, cancel a generation once its output exceeds this many estimated tokens (default: 8192)"
+    )
+
     parser.add_argument(
         "--workers",
         type=int,
@@ -1487,7 +2056,7 @@ Examples:
         "--ollama-url",
         type=str,
         default="http://localhost:5001",
-        help="Ollama proxy URL (default: http://localhost:5001)"
+        help="Ollama proxy URL, or a comma-separated list to load-balance across several hosts (default: http://localhost:5001)"
     )
 
     parser.add_argument(
@@ -1517,6 +2086,178 @@ Examples:
         help="Only process countries that have taxation files (skip countries without files)"
     )
 
+    parser.add_argument(
+        "--async",
+        dest="async_mode",
+        action="store_true",
+        help="Drive all countries from one asyncio event loop instead of a thread pool"
+    )
+
+    parser.add_argument(
+        "--max-in-flight",
+        type=int,
+        default=32,
+        help="Maximum concurrent LLM requests in --async mode (default: 32)"
+    )
+
+    parser.add_argument(
+        "--compress-requests",
+        action="store_true",
+        help="Gzip-compress large request bodies sent to the Ollama proxy (proxy must accept Content-Encoding: gzip)"
+    )
+
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Disable the on-disk LLM response cache"
+    )
+
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        default=DEFAULT_CACHE_DIR,
+        help=f"Directory of the LLM response cache (default: {DEFAULT_CACHE_DIR})"
+    )
+
+    parser.add_argument(
+        "--cache-max-mb",
+        type=int,
+        default=DEFAULT_MAX_BYTES // (1024 * 1024),
+        help=f"Evict least recently used cache entries above this size (default: {DEFAULT_MAX_BYTES // (1024 * 1024)})"
+    )
+
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Submit all requests as one offline batch job (OpenAI Batch API) and wait for the results"
+    )
+
+    parser.add_argument(
+        "--openai-base-url",
+        type=str,
+        help="Alternative OpenAI-compatible API base URL (e.g. the local stand-in server)"
+    )
+
+    parser.add_argument(
+        "--openai-rpm",
+        type=int,
+        help="OpenAI requests per minute allowed for the account; requests queue instead of exceeding it"
+    )
+
+    parser.add_argument(
+        "--openai-tpm",
+        type=int,
+        help="OpenAI tokens per minute allowed for the account (estimated up front, corrected from reported usage)"
+    )
+
+    parser.add_argument(
+        "--context-window",
+        type=int,
+        help="Context size of the model in tokens (default: looked up from the model name); "
+             "prompts that do not fit are rejected before sending"
+    )
+
+    parser.add_argument(
+        "--structured-output",
+        action="store_true",
+        help="Constrain replies to the tax data JSON schema (Ollama format / OpenAI json_schema) "
+             "and send the shorter prompt without format instructions"
+    )
+
+    parser.add_argument(
+        "--keep-alive",
+        default=DEFAULT_KEEP_ALIVE,
+        help=f"How long Ollama keeps the model loaded between requests, e.g. 10m, 1h or -1 for "
+             f"until the server stops (default: {DEFAULT_KEEP_ALIVE})"
+    )
+
+    parser.add_argument(
+        "--no-warm-up",
+        action="store_true",
+        help="Do not load the Ollama model and prefill the analysis instructions at startup"
+    )
+
+    parser.add_argument(
+        "--reasoning-effort",
+        choices=REASONING_EFFORTS,
+        default=DEFAULT_REASONING_EFFORT,
+        help=f"Reasoning effort of gpt-5 models; lower is faster and cheaper (default: {DEFAULT_REASONING_EFFORT})"
+    )
+
+    parser.add_argument(
+        "--cascade-model",
+        help="Ask this small, fast model first (e.g. gemma3:1b or gpt-5-nano) and send a country to --model "
+             "only when the answer fails validation or sanity checks"
+    )
+
+    parser.add_argument(
+        "--cascade-provider",
+        choices=["ollama", "openai"],
+        help="Provider of --cascade-model (default: openai for gpt-* models, else ollama)"
+    )
+
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Reuse the recorded extraction of countries whose taxation file, prompt and model are unchanged "
+             "since the last run instead of sending them to the LLM again"
+    )
+
+    parser.add_argument(
+        "--manifest",
+        default=None,
+        help=f"Manifest of validated extractions used by --incremental (default: <cache-dir>/{DEFAULT_MANIFEST_FILE})"
+    )
+
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue an interrupted run: countries it completed are taken from its journal instead of being processed again"
+    )
+
+    parser.add_argument(
+        "--progressive-output",
+        action="store_true",
+        help="Rewrite js/taxData2.js while the run progresses (at most every 10s), original data for countries still to do"
+    )
+
+    parser.add_argument(
+        "--no-repair",
+        action="store_true",
+        help="Fall back to the original data when an answer fails validation instead of sending "
+             "its validation errors back to the model in one repair request"
+    )
+
+    parser.add_argument(
+        "--hedge",
+        action="store_true",
+        help="Send a duplicate of requests slower than the observed p95 latency and use the first answer"
+    )
+
+    parser.add_argument(
+        "--metrics-dir",
+        default="logs",
+        help="Directory for the end-of-run metrics (Prometheus text and JSON snapshot; default: logs)"
+    )
+
+    parser.add_argument(
+        "--no-single-flight",
+        action="store_true",
+        help="Send every request upstream even when an identical request is already in flight"
+    )
+
+    parser.add_argument(
+        "--no-circuit-breaker",
+        action="store_true",
+        help="Keep sending requests to a provider that has failed repeatedly instead of failing fast"
+    )
+
+    parser.add_argument(
+        "--no-adaptive-concurrency",
+        action="store_true",
+        help="Keep --workers/--max-in-flight requests in flight instead of adapting to backend latency and 5xx/429 errors"
+    )
+
     args = parser.parse_args()
 
     print("Tax Data Updater v2.0 - Enhanced Edition")
@@ -1530,9 +2271,37 @@ Examples:
         max_workers=args.workers,
         enable_parallel=not args.no_parallel,
         enable_streaming=args.streaming,
+        max_stream_tokens=args.max_stream_tokens,
         provider=args.provider,
         openai_api_key=args.openai_api_key,
-        only_with_files=args.only_with_files
+        only_with_files=args.only_with_files,
+        enable_async=args.async_mode,
+        max_in_flight=args.max_in_flight,
+        compress_requests=args.compress_requests,
+        enable_cache=not args.no_cache,
+        cache_dir=args.cache_dir,
+        cache_max_bytes=args.cache_max_mb * 1024 * 1024,
+        enable_batch=args.batch,
+        openai_base_url=args.openai_base_url,
+        adaptive_concurrency=not args.no_adaptive_concurrency,
+        openai_rpm=args.openai_rpm,
+        openai_tpm=args.openai_tpm,
+        circuit_breaker=not args.no_circuit_breaker,
+        enable_hedging=args.hedge,
+        single_flight=not args.no_single_flight,
+        metrics_dir=args.metrics_dir,
+        context_window=args.context_window,
+        structured_output=args.structured_output,
+        keep_alive=args.keep_alive,
+        warm_up=not args.no_warm_up,
+        reasoning_effort=args.reasoning_effort,
+        cascade_model=args.cascade_model,
+        cascade_provider=args.cascade_provider,
+        incremental=args.incremental,
+        manifest_path=args.manifest,
+        resume=args.resume,
+        progressive_output=args.progressive_output,
+        repair=not args.no_repair
     )
 
     success = processor.process_all_countries()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Test script for the adaptive (AIMD) concurrency limiter
+"""
+
+import sys
+import os
+import json
+import time
+import threading
+import asyncio
+import concurrent.futures
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from llm_providers import LLMProviderManager, LLMRequest, OllamaProvider, run_coroutine
+from llm_limits import AdaptiveConcurrencyLimiter, ConcurrencyLimitedProvider, SUCCESS, OVERLOAD
+
+BACKEND_CAPACITY = 3
+
+
+def start_backend(capacity=BACKEND_CAPACITY, delay=0.05):
+    """Fake Ollama proxy that answers 503 when more than capacity requests are in flight"""
+    state = {"in_flight": 0, "peak": 0, "rejected": 0, "served": 0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            with lock:
+                state["in_flight"] += 1
+                state["peak"] = max(state["peak"], state["in_flight"])
+                overloaded = state["in_flight"] > capacity
+            try:
+                if overloaded:
+                    status, body = 503, b'{"error": "overloaded"}'
+                    with lock:
+                        state["rejected"] += 1
+                else:
+                    time.sleep(delay)
+                    status, body = 200, json.dumps({"message": {"content": "ok"}}).encode()
+                    with lock:
+                        state["served"] += 1
+            finally:
+                with lock:
+                    state["in_flight"] -= 1
+            self.send_response(status)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}", state
+
+
+def test_aimd_adjustments():
+    """Saturated successes raise the limit; a burst of overloads cuts it once"""
+
+    print("Testing AIMD limit adjustments...")
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=2, max_limit=10, verbose=False)
+
+    for _ in range(20):
+        slots = [limiter.acquire(), limiter.acquire()]
+        for slot in slots:
+            limiter.release(slot, SUCCESS)
+    print(f"Limit after saturated successes: {limiter.limit}")
+    assert limiter.limit > 2, "Limit should grow while fully used"
+
+    grown = limiter.limit
+    slots = [limiter.acquire() for _ in range(grown)]
+    for slot in slots:
+        limiter.release(slot, OVERLOAD)
+    print(f"Limit after {grown} concurrent overloads: {limiter.limit}")
+    assert limiter.limit == max(1, grown // 2), "One overload burst should halve the limit once"
+    assert limiter.in_flight == 0
+
+    print("[SUCCESS] AIMD adjustment test passed!")
+
+
+def test_threads_settle_at_backend_capacity():
+    """16 worker threads against a backend that takes 3 settle near 3 in flight"""
+
+    print("\nTesting convergence with worker threads...")
+    server, url, state = start_backend()
+    try:
+        manager = LLMProviderManager()
+        manager.add_provider(OllamaProvider(base_url=url), "ollama")
+        manager.enable_adaptive_concurrency(initial_limit=4, max_limit=16, verbose=False)
+        provider = manager.get_provider("ollama")
+
+        requests_ = [LLMRequest(prompt=f"country {i}", model="m") for i in range(150)]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=16) as executor:
+            responses = list(executor.map(provider.generate, requests_))
+
+        stats = provider.limiter.stats()
+        failed = sum(1 for r in responses if not r.success)
+        print(f"Final limit: {stats['limit']}, cuts: {stats['decreases']}, "
+              f"rejected by backend: {state['rejected']}, failed: {failed}")
+        assert 1 <= stats["limit"] <= BACKEND_CAPACITY + 2, stats
+        assert state["rejected"] < len(requests_) * 0.2, "Most requests should fit under the limit"
+        assert stats["in_flight"] == 0
+    finally:
+        server.shutdown()
+
+    print("[SUCCESS] Thread convergence test passed!")
+
+
+def test_async_waiters_respect_limit():
+    """Coroutines wait for slots without blocking the loop and never exceed the limit"""
+
+    print("\nTesting limiter with async requests...")
+    server, url, state = start_backend(capacity=100)
+    try:
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=3, max_limit=3, verbose=False)
+        provider = ConcurrencyLimitedProvider(OllamaProvider(base_url=url), limiter)
+
+        async def run_all():
+            try:
+                return await asyncio.gather(*[
+                    provider.agenerate(LLMRequest(prompt=f"country {i}", model="m")) for i in range(30)])
+            finally:
+                await provider.aclose()
+
+        responses = run_coroutine(run_all())
+        print(f"Peak backend concurrency: {state['peak']}")
+        assert all(r.success for r in responses)
+        assert state["peak"] <= 3, "Limiter should cap in-flight async requests"
+        assert limiter.in_flight == 0
+    finally:
+        server.shutdown()
+
+    print("[SUCCESS] Async limiter test passed!")
+
+
+if __name__ == "__main__":
+    test_aimd_adjustments()
+    test_threads_settle_at_backend_capacity()
+    test_async_waiters_respect_limit()
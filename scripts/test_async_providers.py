@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Test script for the async provider path (agenerate + shared event loop)
+"""
+
+import sys
+import os
+import json
+import time
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from llm_providers import OllamaProvider, LLMRequest, run_coroutine
+
+RESPONSE_DELAY = 0.3
+
+
+class SlowChatHandler(BaseHTTPRequestHandler):
+    """Minimal /chat endpoint that answers after a fixed delay"""
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        payload = json.loads(self.rfile.read(length) or b'{}')
+        time.sleep(RESPONSE_DELAY)
+
+        body = json.dumps({"message": {"content": f"echo: {payload['messages'][-1]['content']}"}}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), SlowChatHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def test_agenerate_runs_concurrently():
+    """Concurrent agenerate calls should overlap instead of queueing"""
+
+    print("Testing concurrent agenerate calls...")
+
+    server = start_server()
+    provider = OllamaProvider(base_url=f"http://127.0.0.1:{server.server_address[1]}")
+
+    async def run_batch(count):
+        requests_ = [LLMRequest(prompt=f"country {i}", model="test-model") for i in range(count)]
+        try:
+            return await asyncio.gather(*(provider.agenerate(r) for r in requests_))
+        finally:
+            await provider.aclose()
+
+    try:
+        start_time = time.time()
+        responses = run_coroutine(run_batch(20))
+        elapsed = time.time() - start_time
+
+        print(f"20 requests completed in {elapsed:.2f}s")
+        assert all(r.success for r in responses), [r.error for r in responses if not r.success]
+        assert responses[3].content == "echo: country 3", "Responses should keep request order"
+        assert elapsed < RESPONSE_DELAY * 20 / 2, "Requests should run concurrently"
+    finally:
+        server.shutdown()
+
+    print("[SUCCESS] Concurrent agenerate test passed!")
+
+
+def test_agenerate_reports_errors():
+    """Connection failures should come back as failed LLMResponses, not exceptions"""
+
+    print("\nTesting agenerate error handling...")
+
+    provider = OllamaProvider(base_url="http://127.0.0.1:1")
+    request = LLMRequest(prompt="hello", model="test-model")
+
+    async def run_one():
+        try:
+            return await provider.agenerate(request)
+        finally:
+            await provider.aclose()
+
+    response = run_coroutine(run_one())
+
+    assert not response.success, "Unreachable server should fail"
+    assert response.error, "Failure should carry an error message"
+    print(f"Error reported: {response.error[:80]}")
+    print("[SUCCESS] Error handling test passed!")
+
+
+if __name__ == "__main__":
+    test_agenerate_runs_concurrently()
+    test_agenerate_reports_errors()
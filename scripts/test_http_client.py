@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Test script for the shared keep-alive HTTP session layer
+"""
+
+import sys
+import os
+import gzip
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import http_client
+
+client_ports = set()
+received_bodies = []
+
+
+class EchoHandler(BaseHTTPRequestHandler):
+    """Keep-alive endpoint that records client ports and decoded bodies"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def _reply(self, obj):
+        client_ports.add(self.client_address[1])
+        body = json.dumps(obj).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._reply({"status": "ok"})
+
+    def do_POST(self):
+        raw = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if self.headers.get('Content-Encoding') == 'gzip':
+            raw = gzip.decompress(raw)
+        received_bodies.append((self.headers.get('Content-Encoding'), json.loads(raw)))
+        self._reply({"message": {"content": "ok"}})
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), EchoHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def test_connections_are_reused():
+    """Sequential calls should share one TCP connection"""
+
+    print("Testing keep-alive connection reuse...")
+    server, base_url = start_server()
+    client_ports.clear()
+
+    try:
+        http_client.configure_http_pool(pool_size=2, compress_requests=False)
+        for _ in range(10):
+            assert http_client.get(f"{base_url}/health", timeout=5).status_code == 200
+            assert http_client.post_json(f"{base_url}/chat", {"prompt": "hi"}, timeout=5).status_code == 200
+
+        print(f"20 requests used {len(client_ports)} connection(s)")
+        assert len(client_ports) == 1, "Requests should reuse the pooled connection"
+    finally:
+        server.shutdown()
+
+    print("[SUCCESS] Connection reuse test passed!")
+
+
+def test_gzip_request_bodies():
+    """Large bodies are gzip-encoded when compression is on, small ones are not"""
+
+    print("\nTesting gzip request compression...")
+    server, base_url = start_server()
+    received_bodies.clear()
+
+    try:
+        large_payload = {"messages": [{"role": "user", "content": "tax " * 2000}]}
+        small_payload = {"messages": [{"role": "user", "content": "tax"}]}
+
+        http_client.post_json(f"{base_url}/chat", large_payload, timeout=5, compress=True)
+        http_client.post_json(f"{base_url}/chat", small_payload, timeout=5, compress=True)
+        http_client.post_json(f"{base_url}/chat", large_payload, timeout=5, compress=False)
+
+        encodings = [encoding for encoding, _ in received_bodies]
+        print(f"Content-Encoding per request: {encodings}")
+        assert encodings == ['gzip', None, None], "Only large bodies should be compressed"
+        assert received_bodies[0][1] == large_payload, "Compressed body should round-trip"
+    finally:
+        server.shutdown()
+
+    print("[SUCCESS] Gzip compression test passed!")
+
+
+if __name__ == "__main__":
+    test_connections_are_reused()
+    test_gzip_request_bodies()
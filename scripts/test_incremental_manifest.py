@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Test script for incremental runs: the extraction manifest and how
+tax_data_updater reuses unchanged countries
+"""
+
+import sys
+import os
+import json
+import tempfile
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from extraction_manifest import ExtractionManifest, content_hash
+from llm_stub_provider import offline_processor
+
+UKRAINE = {"name": "Ukraine", "countryCode": "UA", "system": "flat", "brackets": [{"min": 0, "max": None, "rate": 18}]}
+
+
+def test_manifest_round_trip():
+    """Entries survive a save/load and match only on identical inputs"""
+
+    print("Testing manifest round trip...")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "manifest.json")
+        manifest = ExtractionManifest(path)
+        assert len(manifest) == 0 and not manifest.save()
+
+        manifest.record("ukraine", content_hash("flat 18%"), "1-abc", "gemma3:12b", UKRAINE)
+        assert manifest.save() and not manifest.save()
+
+        reloaded = ExtractionManifest(path)
+        assert reloaded.lookup("ukraine", content_hash("flat 18%"), "1-abc", "gemma3:12b") == UKRAINE
+        assert reloaded.lookup("ukraine", content_hash("flat 19%"), "1-abc", "gemma3:12b") is None
+        assert reloaded.lookup("ukraine", content_hash("flat 18%"), "2-abc", "gemma3:12b") is None
+        assert reloaded.lookup("ukraine", content_hash("flat 18%"), "1-abc", "gpt-4o-mini") is None
+        assert reloaded.lookup("poland", content_hash("flat 18%"), "1-abc", "gemma3:12b") is None
+        assert reloaded.reused == 1
+
+        # A corrupt file starts an empty manifest instead of failing the run
+        with open(path, "w") as f:
+            f.write("{not json")
+        assert len(ExtractionManifest(path)) == 0
+    print("[SUCCESS] Manifest round trip test passed!")
+
+
+def make_processor(manifest_path: str, incremental: bool, **options):
+    processor = offline_processor(os.path.dirname(manifest_path), incremental=incremental,
+                                  manifest_path=manifest_path, **options)
+    processor.original_data = {"ukraine": {"name": "Ukraine"}}
+    return processor
+
+
+def test_only_changed_countries_are_extracted():
+    """A second incremental run skips the LLM until the file or the prompt changes"""
+
+    print("\nTesting incremental runs...")
+    with tempfile.TemporaryDirectory() as tmp:
+        manifest_path = os.path.join(tmp, "manifest.json")
+        filename = os.path.join(tmp, "taxation_ukraine.txt")
+        with open(filename, "w", encoding="utf-8") as f:
+            f.write("Ukraine has a flat 18% personal income tax.")
+
+        calls = []
+
+        def run(incremental: bool):
+            processor = make_processor(manifest_path, incremental)
+
+            def analyze(country_key, country_data, tax_content, thread_id=0):
+                calls.append(country_key)
+                processor._record_extraction(country_key, UKRAINE)
+                return UKRAINE
+
+            processor.analyze_with_llm = analyze
+            result = processor.process_single_country("ukraine", filename, 1)
+            processor.manifest.save()
+            return processor, result
+
+        run(incremental=False)  # Full runs record the manifest too
+        assert calls == ["ukraine"]
+        with open(manifest_path) as f:
+            assert json.load(f)["countries"]["ukraine"]["model"] == "gemma3:12b"
+
+        processor, result = run(incremental=True)
+        assert calls == ["ukraine"] and result == ("ukraine", UKRAINE, True)
+        assert processor.manifest.reused == 1
+
+        run(incremental=False)  # Without --incremental every country is extracted
+        assert calls == ["ukraine"] * 2
+
+        with open(filename, "a", encoding="utf-8") as f:
+            f.write("\nA 5% military levy applies.")
+        run(incremental=True)
+        assert calls == ["ukraine"] * 3
+        run(incremental=True)
+        assert calls == ["ukraine"] * 3
+
+        # Another system prompt is another prompt version
+        processor = make_processor(manifest_path, incremental=True, structured_output=True)
+        with open(filename, encoding="utf-8") as f:
+            assert processor._reuse_extraction("ukraine", f.read().strip()) is None
+    print("[SUCCESS] Incremental run test passed!")
+
+
+if __name__ == "__main__":
+    test_manifest_round_trip()
+    test_only_changed_countries_are_extracted()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Test script for the shared taxData.js parser (js_literal.py) and the
+scripts that locate country blocks with it
+"""
+
+import sys
+import os
+import json
+import shutil
+import tempfile
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from js_literal import JSParseError, load_export, parse_export, parse_literal
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TAX_DATA = os.path.join(REPO_ROOT, "js", "taxData.js")
+
+SAMPLE = """// Tax data
+export const taxData = {
+  "ukraine": {
+    name: "Ukraine", // comment: with a colon
+    system: 'flat',
+    coordinates: [50.4501, -30.5],
+    brackets: [{min: 0, max: null, rate: 18},],
+    vat: {hasVAT: true, notes: "Rates: 20% {standard}, 7% \\"reduced\\"", reduced: [7, 14]},
+  },
+  /* block
+     comment */
+  "hong_kong": {name: "Hong Kong", rate: 1.5e1},
+};
+
+export function getTaxRateColor(taxRate) { return '#fff'; }
+"""
+
+
+def test_literal_values():
+    """Strings keep colons, braces and escapes; numbers, keywords and trailing commas parse"""
+
+    print("Testing literal values...")
+    parsed = parse_export(SAMPLE)
+    ukraine = parsed.value["ukraine"]
+    assert ukraine["name"] == "Ukraine" and ukraine["system"] == "flat"
+    assert ukraine["coordinates"] == [50.4501, -30.5]
+    assert ukraine["brackets"] == [{"min": 0, "max": None, "rate": 18}]
+    assert ukraine["vat"]["notes"] == 'Rates: 20% {standard}, 7% "reduced"'
+    assert parsed.value["hong_kong"]["rate"] == 15.0
+    assert parse_literal("[1, 'a\\u00e9', true]") == ([1, "aé", True], 20)
+    print("[SUCCESS] Literal value test passed!")
+
+
+def test_offsets_and_comments():
+    """Spans locate every object property; comments are kept with their offsets"""
+
+    print("\nTesting offsets and comments...")
+    parsed = parse_export(SAMPLE)
+    assert SAMPLE[parsed.start] == "{" and SAMPLE[parsed.end - 1] == "}" and SAMPLE[parsed.end] == ";"
+    assert parsed.block("ukraine").startswith('"ukraine": {') and parsed.block("ukraine").endswith("}")
+    assert parsed.block("ukraine", "vat").startswith("vat: {hasVAT")
+    span = parsed.spans[("ukraine", "system")]
+    assert SAMPLE[span.value_start:span.value_end] == "'flat'"
+    assert ("ukraine", "brackets", "min") not in parsed.spans  # Objects inside arrays have no spans
+    assert [text for _, text in parsed.comments] == ["// comment: with a colon", "/* block\n     comment */"]
+    offset, text = parsed.comments[0]
+    assert SAMPLE[offset:offset + len(text)] == text
+    print("[SUCCESS] Offset and comment test passed!")
+
+
+def test_errors():
+    """Syntax errors name the line and column"""
+
+    print("\nTesting syntax errors...")
+    for source, line in (("export const taxData = {\n  a: 1\n  b: 2\n};", 3),
+                         ("export const taxData = {\n  a: 'open\n};", 2),
+                         ("export const taxData = {\n  a: someVariable\n};", 2)):
+        try:
+            parse_export(source)
+        except JSParseError as e:
+            assert e.line == line, (str(e), line)
+        else:
+            raise AssertionError(f"No error for {source!r}")
+    try:
+        parse_export("const other = {};")
+    except ValueError as e:
+        assert "taxData" in str(e)
+    print("[SUCCESS] Syntax error test passed!")
+
+
+def test_real_file_and_cache():
+    """js/taxData.js parses completely; unchanged files are served from the cache"""
+
+    print("\nTesting js/taxData.js and the parse cache...")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "taxData.js")
+        shutil.copy(TAX_DATA, path)
+        parsed = load_export(path)
+        print(f"Parsed {len(parsed.value)} countries")
+        assert len(parsed.value) > 40
+        assert all(set(country) >= {"name", "currency", "system", "brackets"} for country in parsed.value.values())
+        assert load_export(path) is parsed
+
+        os.utime(path, ns=(0, 0))  # Touched, not changed
+        assert load_export(path) is parsed
+
+        with open(path, "a", encoding="utf-8") as f:
+            f.write("\n// appended\n")
+        assert load_export(path) is not parsed and load_export(path).value == parsed.value
+    print("[SUCCESS] Real file and cache test passed!")
+
+
+def test_apply_tax_updates():
+    """apply_tax_updates edits existing blocks and appends new countries by offset"""
+
+    print("\nTesting apply_tax_updates...")
+    import apply_tax_updates
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.makedirs(os.path.join(tmp, "js"))
+        shutil.copy(TAX_DATA, os.path.join(tmp, "js", "taxData.js"))
+        with open(os.path.join(tmp, "tax_data_updates.json"), "w") as f:
+            json.dump({"germany": {"vat_info": {"standard": 21.0}},
+                       "atlantis": {"country_name": "Atlantis", "headline_pit_rate": 5,
+                                    "vat_info": {"standard": 9.0}}}, f)
+        os.chdir(tmp)
+        try:
+            before = load_export("js/taxData.js").value
+            apply_tax_updates.update_tax_data()
+            after = load_export("js/taxData.js").value
+        finally:
+            os.chdir(cwd)
+
+    assert after["germany"]["vat"] == {"hasVAT": True, "standard": 21.0, "description": "Standard 21.0%"}
+    assert after["germany"]["brackets"] == before["germany"]["brackets"]
+    assert after["atlantis"]["brackets"] == [{"min": 0, "max": None, "rate": 5}]
+    assert set(after) == set(before) | {"atlantis"}
+    assert all(after[key] == before[key] for key in before if key != "germany")
+    print("[SUCCESS] apply_tax_updates test passed!")
+
+
+if __name__ == "__main__":
+    test_literal_values()
+    test_offsets_and_comments()
+    test_errors()
+    test_real_file_and_cache()
+    test_apply_tax_updates()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Test script for locating and repairing the JSON answer object in LLM
+replies, complete or streamed
+"""
+
+import sys
+import os
+import time
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from json_stream import JSONObjectLocator, extract_json_object, repair_json
+
+REASONING_REPLY = (
+    '<think>The user wants {country} data. Draft: {"name": "Ukrain", "rate": }</think>\n'
+    'Here is the result for {Ukraine}:\n'
+    '```json\n'
+    '{"name": "Ukraine", "notes": "brackets {min} and \\"max\\" }", "brackets": [{"min": 0, "max": null, "rate": 18}]}\n'
+    '```\n'
+    'Alternative: {"name": "Other"}'
+)
+UKRAINE = {"name": "Ukraine", "notes": 'brackets {min} and "max" }', "brackets": [{"min": 0, "max": None, "rate": 18}]}
+
+
+def test_extract_from_reply():
+    """The answer is found past reasoning, prose braces and fences; later objects are ignored"""
+
+    print("Testing JSON extraction...")
+    assert extract_json_object(REASONING_REPLY) == UKRAINE
+    assert extract_json_object('{"a": [1, 2} and then {"b": 1}') == {"b": 1}, "Broken objects are skipped"
+    assert extract_json_object("No JSON at all {") is None
+    assert extract_json_object('[{"a": 1}]') == {"a": 1}
+    assert extract_json_object('{"a": {"b": 1}') is None, "Truncated output has no object"
+    print("[SUCCESS] JSON extraction test passed!")
+
+
+def test_repair():
+    """Trailing commas and smart quotes are fixed, string contents are left alone"""
+
+    print("\nTesting JSON repair...")
+    assert repair_json('{"a": [1, 2, ], "b": {"c": 1,\n},}') == '{"a": [1, 2 ], "b": {"c": 1\n}}'
+    assert repair_json('{“name”: “Ukraine”}') == '{"name": "Ukraine"}'
+    untouched = '{"text": "commas ,] and “quotes” stay"}'
+    assert repair_json(untouched) == untouched
+    assert extract_json_object('Result: {“rate”: 18, "vat": [20, 7,],}') == {"rate": 18, "vat": [20, 7]}
+    print("[SUCCESS] JSON repair test passed!")
+
+
+def test_streamed_chunks():
+    """Chunk boundaries anywhere (inside strings, escapes, tags) give the same result and span"""
+
+    print("\nTesting streamed extraction...")
+    for size in (1, 2, 3, 5, 8, 64):
+        locator = JSONObjectLocator()
+        for i in range(0, len(REASONING_REPLY), size):
+            locator.feed(REASONING_REPLY[i:i + size])
+        assert locator.result == UKRAINE, size
+        start, end = locator.span
+        assert REASONING_REPLY[start:end].startswith('{"name": "Ukraine"') and REASONING_REPLY[end - 2:end] == "]}"
+
+    locator = JSONObjectLocator()
+    assert not locator.feed('{"a": "unfinished')
+    assert locator.feed(' string"} trailing text') and locator.result == {"a": "unfinished string"}
+    print("[SUCCESS] Streamed extraction test passed!")
+
+
+def test_linear_time():
+    """Long preambles full of braces are scanned in linear time"""
+
+    print("\nTesting extraction time...")
+    reply = "{x} " * 200000 + '{"a": 1}'
+    start = time.time()
+    assert extract_json_object(reply) == {"a": 1}
+    elapsed = time.time() - start
+    print(f"Scanned {len(reply)} characters in {elapsed * 1000:.0f}ms")
+    assert elapsed < 2.0
+    print("[SUCCESS] Extraction time test passed!")
+
+
+if __name__ == "__main__":
+    test_extract_from_reply()
+    test_repair()
+    test_streamed_chunks()
+    test_linear_time()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Test script for the persistent LLM response cache
+"""
+
+import sys
+import os
+import tempfile
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from llm_providers import LLMProvider, LLMProviderManager, LLMRequest, LLMResponse
+from llm_cache import LLMResponseCache, make_cache_key
+
+
+class CountingProvider(LLMProvider):
+    """Provider that echoes prompts and counts how often it is called"""
+
+    def __init__(self, fail: bool = False):
+        super().__init__("counting")
+        self.calls = 0
+        self.fail = fail
+
+    def generate(self, request: LLMRequest) -> LLMResponse:
+        self.calls += 1
+        return LLMResponse(
+            content="" if self.fail else f"answer to {request.prompt}",
+            success=not self.fail,
+            provider=self.provider_name,
+            model=request.model,
+            processing_time=0.5,
+            error="boom" if self.fail else None
+        )
+
+    def is_available(self) -> bool:
+        return True
+
+    def list_models(self):
+        return ["test-model"]
+
+
+def test_cache_key_fields():
+    """Keys change with prompt, model, system prompt and temperature, but not with streaming"""
+
+    print("Testing cache key derivation...")
+    base = LLMRequest(prompt="tax", model="m1", system_prompt="sys", temperature=0.3)
+    key = make_cache_key("ollama", base)
+
+    variants = [
+        LLMRequest(prompt="tax2", model="m1", system_prompt="sys", temperature=0.3),
+        LLMRequest(prompt="tax", model="m2", system_prompt="sys", temperature=0.3),
+        LLMRequest(prompt="tax", model="m1", system_prompt="other", temperature=0.3),
+        LLMRequest(prompt="tax", model="m1", system_prompt="sys", temperature=0.7),
+    ]
+    for variant in variants:
+        assert make_cache_key("ollama", variant) != key, f"Key should depend on {variant}"
+    assert make_cache_key("openai", base) != key, "Key should depend on the provider"
+
+    streamed = LLMRequest(prompt="tax", model="m1", system_prompt="sys", temperature=0.3, stream=True)
+    assert make_cache_key("ollama", streamed) == key, "Streaming should not change the key"
+    print("[SUCCESS] Cache key test passed!")
+
+
+def test_manager_serves_repeats_from_cache():
+    """A repeated request is answered from disk, also by a fresh cache instance"""
+
+    print("\nTesting cached provider through the manager...")
+    with tempfile.TemporaryDirectory() as cache_dir:
+        provider = CountingProvider()
+        manager = LLMProviderManager()
+        manager.add_provider(provider, "counting")
+        manager.enable_cache(LLMResponseCache(cache_dir))
+
+        request = LLMRequest(prompt="ukraine", model="test-model")
+        first = manager.get_provider("counting").generate(request)
+        second = manager.get_provider("counting").generate(request)
+
+        assert provider.calls == 1, "Second call should be a cache hit"
+        assert not first.cached and second.cached
+        assert second.content == "answer to ukraine"
+        stats = manager.cache.stats()
+        print(f"Cache stats: {stats}")
+        assert stats["hits"] == 1 and stats["misses"] == 1
+
+        # A new process reuses the same file
+        reopened = LLMResponseCache(cache_dir)
+        assert reopened.get("counting", request).content == "answer to ukraine"
+        reopened.discard("counting", request)
+        assert reopened.get("counting", request) is None, "Discarded entry should be gone"
+        reopened.close()
+        manager.cache.close()
+
+    print("[SUCCESS] Cached provider test passed!")
+
+
+def test_failures_are_not_cached():
+    """Failed responses must be retried next time"""
+
+    print("\nTesting that failures are not cached...")
+    with tempfile.TemporaryDirectory() as cache_dir:
+        provider = CountingProvider(fail=True)
+        manager = LLMProviderManager()
+        manager.add_provider(provider, "counting")
+        manager.enable_cache(LLMResponseCache(cache_dir))
+
+        request = LLMRequest(prompt="france", model="test-model")
+        manager.get_provider("counting").generate(request)
+        manager.get_provider("counting").generate(request)
+
+        assert provider.calls == 2, "Failed responses should not be served from cache"
+        manager.cache.close()
+
+    print("[SUCCESS] Failure handling test passed!")
+
+
+def test_lru_eviction_by_size():
+    """Least recently used entries are evicted once the store exceeds max_bytes"""
+
+    print("\nTesting size-bounded LRU eviction...")
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = LLMResponseCache(cache_dir, max_bytes=1000)
+        big_answer = "x" * 300
+
+        def store(prompt):
+            request = LLMRequest(prompt=prompt, model="test-model")
+            cache.put("counting", request, LLMResponse(
+                content=big_answer, success=True, provider="counting",
+                model="test-model", processing_time=0.1))
+            return request
+
+        first, second = store("a"), store("b")
+        cache.get("counting", first)  # "a" is now more recent than "b"
+        store("c")
+
+        stats = cache.stats()
+        print(f"Cache stats: {stats}")
+        assert stats["size_bytes"] <= 1000
+        assert stats["evictions"] == 1
+        assert cache.get("counting", second) is None, "Least recently used entry should be evicted"
+        assert cache.get("counting", first) is not None, "Recently used entry should survive"
+        cache.close()
+
+    print("[SUCCESS] LRU eviction test passed!")
+
+
+if __name__ == "__main__":
+    test_cache_key_fields()
+    test_manager_serves_repeats_from_cache()
+    test_failures_are_not_cached()
+    test_lru_eviction_by_size()
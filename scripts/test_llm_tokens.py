@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Test script for token estimation and prompt budgets
+"""
+
+import sys
+import os
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from llm_tokens import (PromptBudget, PromptTooLargeError, CONTENT_PLACEHOLDER, MIN_CONTEXT_TOKENS,
+                        context_window, estimate_tokens, fitted_context)
+
+
+def test_estimates_and_context_windows():
+    """Estimates grow with text size and model prefixes resolve to context sizes"""
+
+    print("Testing token estimates and context windows...")
+    short = estimate_tokens("VAT is 20%.")
+    long = estimate_tokens("VAT is 20%. " * 100)
+    print(f"Short: {short} tokens, long: {long} tokens")
+    assert 0 < short < 10
+    assert long >= short * 90
+    assert estimate_tokens("") == 0
+
+    assert context_window("gemma3:12b") == 131072
+    assert context_window("gemma3:1b") == 32768, "Longest prefix should win"
+    assert context_window("gpt-4o-mini") == 128000
+    assert context_window("unknown-model") == 8192
+    print("[SUCCESS] Estimate test passed!")
+
+
+def test_check_rejects_oversize_prompts():
+    """Prompts above the window minus the reply reserve are rejected"""
+
+    print("\nTesting oversize prompt rejection...")
+    budget = PromptBudget("gemma3:12b", context_tokens=1000, output_tokens=200)
+    assert budget.input_limit == 750
+
+    assert budget.check("short prompt") > 0
+    try:
+        budget.check("word " * 2000)
+        assert False, "Oversize prompt should be rejected"
+    except PromptTooLargeError as e:
+        print(f"Rejected: {e}")
+        assert e.limit == 750 and e.tokens > 750
+    print("[SUCCESS] Rejection test passed!")
+
+
+def test_split_and_pack_fit_template():
+    """Chunks and summary groups each fit the template; small content stays whole"""
+
+    print("\nTesting chunking against a prompt template...")
+    budget = PromptBudget("gemma3:12b", context_tokens=2000, output_tokens=500)
+    template = f"Summarize the taxation facts in:\n{CONTENT_PLACEHOLDER}\nBe concise."
+    room = budget.room_for_content(template)
+
+    assert budget.split("Income tax is flat at 10%.", template) == ["Income tax is flat at 10%."]
+
+    paragraph = "The personal income tax is progressive with rates from 10 to 45 percent. " * 10
+    content = "\n\n".join([paragraph] * 12) + "\n\n" + "x" * 20000
+    chunks = budget.split(content, template)
+    sizes = [estimate_tokens(chunk) for chunk in chunks]
+    print(f"{len(chunks)} chunks, largest {max(sizes)} tokens, room {room}")
+    assert len(chunks) > 1
+    assert max(sizes) <= room
+    assert chunks[0].startswith("The personal income tax"), "Splits should follow paragraph boundaries"
+
+    groups = budget.pack(["summary " * 200] * 10, template)
+    assert all(sum(estimate_tokens(item) for item in group) <= room for group in groups)
+    assert sum(len(group) for group in groups) == 10
+    print("[SUCCESS] Chunking test passed!")
+
+
+def test_fitted_context():
+    """Contexts are the smallest power-of-two step holding prompt and reply, capped at the window"""
+
+    print("\nTesting fitted contexts...")
+    assert fitted_context(100, 131072) == MIN_CONTEXT_TOKENS
+    assert fitted_context(MIN_CONTEXT_TOKENS + 1, 131072) == 2 * MIN_CONTEXT_TOKENS
+    assert fitted_context(100000, 32768) == 32768
+
+    budget = PromptBudget("gemma3:12b", output_tokens=2048)
+    assert budget.context_for(1500) == 4096  # 3548 tokens with the margin
+    assert budget.context_for(2000) == 8192  # 4051 tokens with the margin
+    assert budget.context_for(300, output_tokens=1024) == 2048
+    assert budget.context_for(budget.input_limit) == budget.context_tokens
+    print("[SUCCESS] Fitted context test passed!")
+
+
+if __name__ == "__main__":
+    test_estimates_and_context_windows()
+    test_check_rejects_oversize_prompts()
+    test_split_and_pack_fit_template()
+    test_fitted_context()
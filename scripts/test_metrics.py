@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Test script for the outbound-call metrics registry
+"""
+
+import sys
+import os
+import json
+import time
+import tempfile
+from unittest.mock import Mock, patch
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import http_client
+from llm_providers import LLMProvider, LLMProviderManager, LLMRequest, LLMResponse, LLMStreamError
+from llm_metrics import summary_lines
+from metrics import Histogram, MetricsRegistry
+
+
+class TimedProvider(LLMProvider):
+    """Provider with a fixed latency that reports token usage"""
+
+    def __init__(self, status_code: int = 200):
+        super().__init__("ollama")
+        self.status_code = status_code
+
+    def generate(self, request: LLMRequest) -> LLMResponse:
+        time.sleep(0.05)
+        success = self.status_code == 200
+        return LLMResponse(content="ok" if success else "", success=success, provider=self.provider_name,
+                           model=request.model, processing_time=0.05, status_code=self.status_code,
+                           token_usage={"prompt_tokens": 10, "completion_tokens": 20, "total_tokens": 30})
+
+    def generate_stream(self, request: LLMRequest):
+        time.sleep(0.05)
+        yield '{"a": '
+        time.sleep(0.05)
+        yield '1}'
+        if request.prompt == "fail":
+            raise LLMStreamError("HTTP 503: busy", 503)
+
+    def is_available(self) -> bool:
+        return True
+
+    def list_models(self):
+        return ["gemma3:12b"]
+
+
+def test_histogram_quantiles():
+    """Quantiles are interpolated inside the bucket holding the rank"""
+
+    print("Testing histogram quantiles...")
+    histogram = Histogram((1.0, 2.0, 4.0))
+    for value in [0.5, 1.5, 1.5, 3.0]:
+        histogram.observe(value)
+    assert histogram.counts == [1, 2, 1, 0]
+    assert histogram.quantile(0.5) == 1.5
+    assert histogram.quantile(1.0) == 4.0
+    print("[SUCCESS] Histogram test passed!")
+
+
+def test_provider_metrics_and_exports():
+    """Calls are recorded per provider/model/endpoint and exported as Prometheus text and JSON"""
+
+    print("\nTesting LLM call metrics...")
+    registry = MetricsRegistry()
+    manager = LLMProviderManager()
+    manager.add_provider(TimedProvider(), "ollama")
+    manager.enable_metrics(registry)
+    provider = manager.get_provider("ollama")
+
+    for _ in range(3):
+        provider.generate(LLMRequest(prompt="p", model="gemma3:12b"))
+    "".join(provider.generate_stream(LLMRequest(prompt="p", model="gemma3:12b")))
+    try:
+        "".join(provider.generate_stream(LLMRequest(prompt="fail", model="gemma3:12b")))
+    except LLMStreamError:
+        pass
+
+    lines = summary_lines(registry)
+    print("\n".join(lines))
+    assert any(line.startswith("ollama/gemma3:12b generate: 3 calls") for line in lines)
+    assert any("stream: 2 calls" in line and "TTFT" in line and "1 errors" in line for line in lines)
+
+    text = registry.to_prometheus()
+    assert "# TYPE llm_request_duration_seconds histogram" in text
+    assert 'llm_requests_total{endpoint="stream",model="gemma3:12b",provider="ollama",status="503"} 1' in text
+    assert 'llm_tokens_total{direction="input",model="gemma3:12b",provider="ollama"} 30' in text
+    assert 'llm_requests_in_flight{provider="ollama"} 0' in text
+
+    with tempfile.TemporaryDirectory() as directory:
+        prom_path, json_path = registry.write(directory)
+        with open(json_path) as f:
+            snapshot = json.load(f)
+    duration = snapshot["metrics"]["llm_request_duration_seconds"]["series"]
+    generate = next(s for s in duration if s["labels"]["endpoint"] == "generate")
+    assert generate["value"]["count"] == 3 and generate["value"]["p50"] is not None
+    print("[SUCCESS] LLM call metrics test passed!")
+
+
+def test_http_client_metrics():
+    """Web extractor calls are recorded by host and first path segment"""
+
+    print("\nTesting HTTP call metrics...")
+    response = Mock(status_code=404)
+    with patch('requests.Session.get', return_value=response):
+        http_client.get("http://localhost:5000/files/taxation_x.txt")
+
+    series = http_client.REGISTRY.series("http_requests_total")
+    labels = [labels for labels, _ in series]
+    print(labels)
+    assert {"host": "localhost:5000", "endpoint": "/files", "method": "GET", "status": "404"} in labels
+    print("[SUCCESS] HTTP call metrics test passed!")
+
+
+if __name__ == "__main__":
+    test_histogram_quantiles()
+    test_provider_metrics_and_exports()
+    test_http_client_metrics()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Test script for the model cascade: a small model answers first and the
+large model is asked only when the answer is rejected
+"""
+
+import sys
+import os
+import json
+import tempfile
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from llm_providers import OllamaProvider, LLMProviderManager, LLMRequest, LLMResponse
+from llm_cascade import CascadeProvider
+from llm_cache import LLMResponseCache
+from llm_stub_server import start_stub_server
+from llm_stub_provider import offline_processor
+
+UKRAINE = {
+    "name": "Ukraine",
+    "currency": "UAH",
+    "system": "flat",
+    "countryCode": "UA",
+    "coordinates": [50.4501, 30.5234],
+    "brackets": [{"min": 0, "max": None, "rate": 18}],
+    "vat": {"hasVAT": True, "standard": 20.0}
+}
+
+SMALL = "gemma3:1b"
+LARGE = "gemma3:12b"
+
+
+def is_json(request, response) -> bool:
+    try:
+        json.loads(response.content)
+        return True
+    except json.JSONDecodeError:
+        return False
+
+
+def start_server(small_reply: str):
+    """Stub server where the small model answers small_reply and the large one valid JSON"""
+    models = []
+
+    def reply(endpoint, body):
+        models.append(body["model"])
+        return small_reply if body["model"] == SMALL else json.dumps(UKRAINE)
+
+    server, base_url = start_stub_server(reply=reply)
+    return server, base_url, models
+
+
+def test_accepted_answer_stays_small():
+    """A good small-model answer is returned without asking the large model"""
+
+    print("Testing accepted answers...")
+    server, base_url, models = start_server(json.dumps(UKRAINE))
+    try:
+        provider = CascadeProvider(OllamaProvider(base_url), SMALL, is_json)
+        response = provider.generate(LLMRequest(prompt="analyze", model=LARGE))
+        assert response.success and response.model == SMALL
+        assert models == [SMALL]
+        assert provider.cascade_stats() == {"accepted": 1, "escalated": 0}
+    finally:
+        server.shutdown()
+    print("[SUCCESS] Accepted answer test passed!")
+
+
+def test_rejected_answer_escalates():
+    """A rejected answer is sent again to the requested model, also for batches"""
+
+    print("\nTesting escalation...")
+    server, base_url, models = start_server("I am not sure about Ukraine.")
+    try:
+        provider = CascadeProvider(OllamaProvider(base_url), SMALL, is_json)
+        response = provider.generate(LLMRequest(prompt="analyze", model=LARGE))
+        assert response.success and response.model == LARGE
+        assert json.loads(response.content)["countryCode"] == "UA"
+        assert models == [SMALL, LARGE]
+
+        models.clear()
+        responses = provider.generate_batch([LLMRequest(prompt=f"country {i}", model=LARGE) for i in range(3)])
+        assert [r.model for r in responses] == [LARGE] * 3
+        assert models == [SMALL] * 3 + [LARGE] * 3
+        assert provider.cascade_stats() == {"accepted": 0, "escalated": 4}
+    finally:
+        server.shutdown()
+    print("[SUCCESS] Escalation test passed!")
+
+
+def test_manager_cascade_outside_cache():
+    """Through the manager each model's answer is cached under its own key"""
+
+    print("\nTesting cascade with the response cache...")
+    server, base_url, models = start_server("not json")
+    try:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            manager = LLMProviderManager()
+            manager.add_provider(OllamaProvider(base_url), "ollama")
+            cache = LLMResponseCache(cache_dir)
+            manager.enable_cache(cache)
+            manager.enable_cascade(SMALL, is_json)
+            provider = manager.get_provider("ollama")
+
+            for _ in range(2):
+                response = provider.generate(LLMRequest(prompt="analyze", model=LARGE))
+                assert response.success and response.model == LARGE
+            # Second run: both answers come from the cache, the small one is judged again
+            assert models == [SMALL, LARGE]
+            assert provider.cascade_stats()["escalated"] == 2
+            cache.close()
+    finally:
+        server.shutdown()
+    print("[SUCCESS] Cache test passed!")
+
+
+def test_processor_acceptance():
+    """The processor accepts only structurally valid and plausible tax data"""
+
+    print("\nTesting processor acceptance checks...")
+    with tempfile.TemporaryDirectory() as tmp:
+        processor = offline_processor(tmp)
+        processor.original_data = {"ukraine": {"countryCode": "UA"}, "poland": {"countryCode": "PL"}}
+
+        def accepts(data, structured=False) -> bool:
+            request = LLMRequest(prompt="analyze", model=SMALL, response_schema={"type": "object"} if structured else None)
+            response_content = json.dumps(data) if structured else f"Here it is:\n{json.dumps(data)}\nDone."
+            response = LLMResponse(content=response_content, success=True, provider="ollama",
+                                   model=SMALL, processing_time=0.0)
+            return processor._accept_cascade_response(request, response)
+
+        assert accepts(UKRAINE) and accepts(UKRAINE, structured=True)
+
+        broken = [
+            {k: v for k, v in UKRAINE.items() if k != "brackets"},
+            dict(UKRAINE, countryCode="XX"),
+            dict(UKRAINE, coordinates=[150.0, 30.5]),
+            dict(UKRAINE, brackets=[{"min": 0, "max": None, "rate": 180}]),
+            dict(UKRAINE, brackets=[{"min": 1000, "max": 10, "rate": 18}]),
+            dict(UKRAINE, brackets=[{"min": 100, "max": None, "rate": 18}, {"min": 0, "max": 100, "rate": 10}]),
+            dict(UKRAINE, vat={"hasVAT": True, "standard": 2000}),
+        ]
+        for data in broken:
+            assert not accepts(data), data
+    print("[SUCCESS] Acceptance test passed!")
+
+
+if __name__ == "__main__":
+    test_accepted_answer_stays_small()
+    test_rejected_answer_escalates()
+    test_manager_cascade_outside_cache()
+    test_processor_acceptance()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Test script for Ollama keep_alive, model warm-up and the shared analysis
+system prompt, against the stand-in server of llm_stub_server.py
+"""
+
+import sys
+import os
+import math
+import time
+import tempfile
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from llm_providers import OllamaProvider, LLMRequest, create_ollama_provider
+from llm_stub_server import start_stub_server, parse_keep_alive
+from llm_stub_provider import offline_processor
+from tax_data_updater import ANALYSIS_INSTRUCTIONS
+
+LOAD_TIME = 0.3
+
+
+def stub_stats(server) -> dict:
+    return dict(server.state.stats)
+
+
+def test_keep_alive_payload():
+    """keep_alive is sent when configured; bare seconds become numbers"""
+
+    print("Testing keep_alive payloads...")
+    request = LLMRequest(prompt="analyze", model="gemma3:12b")
+    assert "keep_alive" not in OllamaProvider("http://localhost:1")._build_payload(request)
+    assert OllamaProvider("http://localhost:1", keep_alive="30m")._build_payload(request)["keep_alive"] == "30m"
+    assert OllamaProvider("http://localhost:1", keep_alive="-1")._build_payload(request)["keep_alive"] == -1
+
+    assert parse_keep_alive(None) == 300 and parse_keep_alive("1h30m") == 5400
+    assert parse_keep_alive(-1) == math.inf and parse_keep_alive("0") == 0
+    print("[SUCCESS] keep_alive payload test passed!")
+
+
+def test_warm_up_skips_model_load():
+    """After warm_up the first request neither loads the model nor re-evaluates the system prompt"""
+
+    print("\nTesting warm-up...")
+    server, base_url = start_stub_server(load_time=LOAD_TIME)
+    try:
+        provider = OllamaProvider(base_url, keep_alive="30m")
+        assert provider.warm_up("gemma3:12b", system_prompt="static instructions")
+        assert stub_stats(server)["model_loads"] == 1
+
+        start = time.monotonic()
+        response = provider.generate(LLMRequest(prompt="country A", model="gemma3:12b",
+                                                system_prompt="static instructions"))
+        elapsed = time.monotonic() - start
+        print(f"First request after warm-up: {elapsed:.3f}s")
+        assert response.success and elapsed < LOAD_TIME
+        stats = stub_stats(server)
+        assert stats["model_loads"] == 1 and stats["prefix_hits"] == 1
+
+        # A model that was not warmed up pays the load
+        start = time.monotonic()
+        provider.generate(LLMRequest(prompt="country B", model="gemma3:1b"))
+        assert time.monotonic() - start >= LOAD_TIME
+    finally:
+        server.shutdown()
+    print("[SUCCESS] Warm-up test passed!")
+
+
+def test_keep_alive_zero_unloads():
+    """keep_alive 0 unloads the model after every request"""
+
+    print("\nTesting keep_alive 0...")
+    server, base_url = start_stub_server()
+    try:
+        provider = OllamaProvider(base_url, keep_alive="0")
+        for _ in range(3):
+            assert provider.generate(LLMRequest(prompt="analyze", model="gemma3:12b")).success
+        assert stub_stats(server)["model_loads"] == 3
+    finally:
+        server.shutdown()
+    print("[SUCCESS] keep_alive 0 test passed!")
+
+
+def test_num_ctx_sizes_the_context():
+    """num_ctx is sent per request; without it long prompts are truncated, a new size reloads"""
+
+    print("\nTesting num_ctx...")
+    request = LLMRequest(prompt="analyze", model="gemma3:12b", context_tokens=8192)
+    assert OllamaProvider("http://localhost:1")._build_payload(request)["num_ctx"] == 8192
+
+    server, base_url = start_stub_server(default_context=2048)
+    try:
+        provider = OllamaProvider(base_url)
+        long_prompt = "tax " * 3000
+        response = provider.generate(LLMRequest(prompt=long_prompt, model="gemma3:12b"))
+        assert response.token_usage["prompt_tokens"] == 2048
+        assert stub_stats(server)["truncated_prompts"] == 1
+
+        response = provider.generate(LLMRequest(prompt=long_prompt, model="gemma3:12b", context_tokens=4096))
+        assert response.token_usage["prompt_tokens"] == 3000
+        stats = stub_stats(server)
+        assert stats["truncated_prompts"] == 1 and stats["model_loads"] == 2
+    finally:
+        server.shutdown()
+    print("[SUCCESS] num_ctx test passed!")
+
+
+def test_run_context_only_grows():
+    """The updater's num_ctx follows the largest prompt so far, so the model is not reloaded back and forth"""
+
+    print("\nTesting run-wide context size...")
+    with tempfile.TemporaryDirectory() as tmp:
+        processor = offline_processor(tmp, model_name="gemma3:12b")
+        assert processor._fitted_context(1500) == 4096
+        assert processor._fitted_context(2000) == 8192
+        assert processor._fitted_context(100) == 8192
+    print("[SUCCESS] Run-wide context test passed!")
+
+
+def test_load_balancer_warms_every_host():
+    """warm_up on a comma-separated --ollama-url loads the model on every host"""
+
+    print("\nTesting warm-up across hosts...")
+    servers = [start_stub_server() for _ in range(2)]
+    try:
+        provider = create_ollama_provider(",".join(url for _, url in servers), keep_alive="10m")
+        assert provider.warm_up("gemma3:12b")
+        assert [stub_stats(server)["model_loads"] for server, _ in servers] == [1, 1]
+    finally:
+        for server, _ in servers:
+            server.shutdown()
+    print("[SUCCESS] Load balancer warm-up test passed!")
+
+
+def test_analysis_prompt_prefix_is_shared():
+    """Countries share the system prompt; everything country-specific follows it"""
+
+    print("\nTesting analysis prompt prefix...")
+    with tempfile.TemporaryDirectory() as tmp:
+        processor = offline_processor(tmp)
+    germany = {"name": "Germany", "currency": "EUR", "countryCode": "DE", "coordinates": [52.52, 13.405]}
+    france = {"name": "France", "currency": "EUR", "countryCode": "FR", "coordinates": [48.8566, 2.3522]}
+
+    assert processor._analysis_instructions() == ANALYSIS_INSTRUCTIONS
+    for country in (germany, france):
+        prompt = processor._build_analysis_prompt(country, "content")
+        assert country["name"] in prompt and country["countryCode"] in prompt
+        assert country["name"] not in ANALYSIS_INSTRUCTIONS
+    print("[SUCCESS] Analysis prompt prefix test passed!")
+
+
+if __name__ == "__main__":
+    test_keep_alive_payload()
+    test_warm_up_skips_model_load()
+    test_keep_alive_zero_unloads()
+    test_num_ctx_sizes_the_context()
+    test_run_context_only_grows()
+    test_load_balancer_warms_every_host()
+    test_analysis_prompt_prefix_is_shared()
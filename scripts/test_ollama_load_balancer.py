@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Test script for the multi-backend Ollama load balancer
+"""
+
+import sys
+import os
+import json
+import time
+import threading
+import concurrent.futures
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from llm_providers import (LLMProviderManager, LLMRequest, OllamaLoadBalancer, OllamaProvider,
+                           create_ollama_provider)
+
+RESPONSE_DELAY = 0.1
+
+
+def start_backend(name):
+    """Single-threaded fake Ollama proxy: one request at a time, like one GPU"""
+    served = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = json.dumps({"status": "ok", "models": [{"name": f"model-{name}"}]}).encode()
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            time.sleep(RESPONSE_DELAY)
+            served.append(time.time())
+            body = json.dumps({"message": {"content": f"from {name}"}}).encode()
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = HTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}", served
+
+
+def run_parallel(provider, count, workers=12):
+    requests_ = [LLMRequest(prompt=f"country {i}", model="m") for i in range(count)]
+    start_time = time.time()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        responses = list(executor.map(provider.generate, requests_))
+    return responses, time.time() - start_time
+
+
+def test_throughput_scales_with_backends():
+    """Three single-request backends should finish about three times faster than one"""
+
+    print("Testing least-outstanding routing across backends...")
+    backends = [start_backend(name) for name in ("a", "b", "c")]
+    try:
+        _, single_time = run_parallel(OllamaProvider(base_url=backends[0][1]), 12)
+
+        balancer = create_ollama_provider(",".join(url for _, url, _ in backends))
+        assert isinstance(balancer, OllamaLoadBalancer) and balancer.provider_name == "ollama"
+        for _, _, served in backends:
+            served.clear()
+        responses, balanced_time = run_parallel(balancer, 12)
+
+        counts = [len(served) for _, _, served in backends]
+        print(f"1 backend: {single_time:.2f}s, 3 backends: {balanced_time:.2f}s, requests per backend: {counts}")
+        assert all(r.success for r in responses)
+        assert counts == [4, 4, 4], "Requests should be spread evenly"
+        assert balanced_time < single_time / 2, "Throughput should scale with backends"
+        assert all(v == 0 for v in balancer.outstanding().values())
+    finally:
+        for server, _, _ in backends:
+            server.shutdown()
+
+    print("[SUCCESS] Load balancing test passed!")
+
+
+def test_unhealthy_backend_leaves_rotation():
+    """Requests fail over from a dead node, which is then skipped"""
+
+    print("\nTesting failover and unhealthy node removal...")
+    server, url, served = start_backend("live")
+    try:
+        dead_url = "http://127.0.0.1:1"
+        balancer = OllamaLoadBalancer([dead_url, url], unhealthy_cooldown=60)
+
+        responses, _ = run_parallel(balancer, 6, workers=2)
+        assert all(r.success for r in responses), [r.error for r in responses if not r.success]
+        assert balancer.healthy_backends() == [url], "Dead node should be out of rotation"
+        assert len(served) == 6
+
+        # Registered under the usual name, model lists come from healthy nodes
+        manager = LLMProviderManager()
+        manager.add_provider(balancer, "ollama")
+        assert manager.get_provider("ollama").is_available()
+        assert manager.get_provider("ollama").list_models() == ["model-live"]
+    finally:
+        server.shutdown()
+
+    print("[SUCCESS] Unhealthy node test passed!")
+
+
+if __name__ == "__main__":
+    test_throughput_scales_with_backends()
+    test_unhealthy_backend_leaves_rotation()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Test script for OpenAI Batch API mode against the local stand-in server
+"""
+
+import sys
+import os
+import tempfile
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from llm_providers import OPENAI_AVAILABLE, LLMProvider, LLMProviderManager, LLMRequest, LLMResponse
+from llm_cache import LLMResponseCache, CachedProvider
+from llm_stub_server import start_stub_server
+
+
+def make_provider(base_url):
+    from llm_providers import OpenAIProvider
+
+    provider = OpenAIProvider(api_key="stub", base_url=f"{base_url}/v1")
+    provider.batch_poll_interval = 0.1
+    return provider
+
+
+def test_batch_round_trip():
+    """Requests for both endpoints come back in order as LLMResponses"""
+
+    print("Testing batch submission through the stand-in server...")
+    if not OPENAI_AVAILABLE:
+        print("[SKIP] openai package not installed")
+        return
+
+    server, base_url = start_stub_server(batch_delay=0.3)
+    try:
+        provider = make_provider(base_url)
+        requests_ = [LLMRequest(prompt=f"country {i}", model="gpt-4o-mini", temperature=1.0) for i in range(5)]
+        requests_.append(LLMRequest(prompt="reasoning", model="gpt-5-nano"))
+
+        responses = provider.generate_batch(requests_)
+
+        assert all(r.success for r in responses), [r.error for r in responses]
+        assert [r.content for r in responses[:5]] == [f"echo: country {i}" for i in range(5)]
+        assert responses[5].content == "echo: reasoning", "Responses API results should be mapped too"
+        assert responses[0].token_usage["total_tokens"] == 3
+        assert len(server.state.batches) == 2, "One batch per endpoint"
+    finally:
+        server.shutdown()
+
+    print("[SUCCESS] Batch round trip test passed!")
+
+
+def test_batch_timeout_fails_requests():
+    """A batch that does not finish in time is cancelled and reported as failures"""
+
+    print("\nTesting batch timeout handling...")
+    if not OPENAI_AVAILABLE:
+        print("[SKIP] openai package not installed")
+        return
+
+    server, base_url = start_stub_server(batch_delay=5)
+    try:
+        provider = make_provider(base_url)
+        responses = provider.generate_batch([LLMRequest(prompt="slow", model="gpt-4o-mini")], timeout=0.3)
+
+        assert not responses[0].success
+        print(f"Error reported: {responses[0].error}")
+        assert "cancelled" in responses[0].error
+        assert list(server.state.batches.values())[0]["status"] == "cancelled"
+    finally:
+        server.shutdown()
+
+    print("[SUCCESS] Batch timeout test passed!")
+
+
+class RecordingBatchProvider(LLMProvider):
+    """Provider that records which prompts reach generate_batch()"""
+
+    def __init__(self):
+        super().__init__("recording")
+        self.batched_prompts = []
+        self.batch_options = []
+
+    def generate(self, request: LLMRequest) -> LLMResponse:
+        raise AssertionError("generate() should not be called in batch mode")
+
+    def generate_batch(self, requests, **kwargs):
+        self.batched_prompts.append([r.prompt for r in requests])
+        self.batch_options.append(kwargs)
+        return [LLMResponse(content=f"answer {r.prompt}", success=True, provider=self.provider_name,
+                            model=r.model, processing_time=0.1) for r in requests]
+
+    def is_available(self) -> bool:
+        return True
+
+    def list_models(self):
+        return []
+
+
+def test_cached_batch_submits_only_misses():
+    """Cached answers are reused and only new prompts go into the batch"""
+
+    print("\nTesting cache-aware batching...")
+    with tempfile.TemporaryDirectory() as cache_dir:
+        inner = RecordingBatchProvider()
+        provider = CachedProvider(inner, LLMResponseCache(cache_dir))
+
+        provider.generate_batch([LLMRequest(prompt=p, model="m") for p in ("a", "b")])
+        responses = provider.generate_batch([LLMRequest(prompt=p, model="m") for p in ("a", "c", "b")])
+
+        assert inner.batched_prompts == [["a", "b"], ["c"]], inner.batched_prompts
+        assert [r.content for r in responses] == ["answer a", "answer c", "answer b"]
+        assert [r.cached for r in responses] == [True, False, True]
+        provider.cache.close()
+
+    print("[SUCCESS] Cache-aware batching test passed!")
+
+
+def test_batch_options_reach_provider():
+    """Options such as the batch timeout pass through every middleware"""
+
+    print("\nTesting batch options through the middlewares...")
+    with tempfile.TemporaryDirectory() as cache_dir:
+        inner = RecordingBatchProvider()
+        manager = LLMProviderManager()
+        manager.add_provider(inner, "recording")
+        manager.enable_metrics()
+        manager.enable_adaptive_concurrency()
+        manager.enable_rate_limit(provider_names=("recording",))
+        manager.enable_circuit_breaker()
+        manager.enable_hedging()
+        manager.enable_cache(LLMResponseCache(cache_dir))
+        manager.enable_single_flight()
+        manager.enable_cascade("small", lambda request, response: False)
+
+        manager.get_provider("recording").generate_batch([LLMRequest(prompt="a", model="m")], timeout=0.3)
+
+        assert inner.batch_options == [{"timeout": 0.3}, {"timeout": 0.3}], inner.batch_options
+        manager.cache.close()
+
+    print("[SUCCESS] Batch options test passed!")
+
+
+if __name__ == "__main__":
+    test_batch_round_trip()
+    test_batch_timeout_fails_requests()
+    test_cached_batch_submits_only_misses()
+    test_batch_options_reach_provider()
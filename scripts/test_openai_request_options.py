@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Test script for per-request OpenAI settings (reasoning effort, verbosity,
+storage, includes) and the trimmed response payload
+"""
+
+import sys
+import os
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from llm_providers import OPENAI_AVAILABLE, LLMRequest
+from llm_cache import make_cache_key
+from llm_stub_server import start_stub_server
+
+
+def make_provider(base_url):
+    from llm_providers import OpenAIProvider
+
+    return OpenAIProvider(api_key="stub", base_url=f"{base_url}/v1")
+
+
+def test_responses_params():
+    """Defaults store nothing and include nothing; every setting is per request"""
+
+    print("Testing responses.create() params...")
+    if not OPENAI_AVAILABLE:
+        print("[SKIP] openai package not installed")
+        return
+
+    provider = make_provider("http://localhost:1")
+    params = provider._build_responses_params(LLMRequest(prompt="summarize", model="gpt-5-nano"))
+    assert params["reasoning"] == {"effort": "medium"} and params["text"]["verbosity"] == "medium"
+    assert params["store"] is False and "include" not in params
+
+    request = LLMRequest(prompt="summarize", model="gpt-5-nano", reasoning_effort="low", verbosity="low",
+                         store=True, include=("reasoning.encrypted_content",))
+    params = provider._build_responses_params(request)
+    assert params["reasoning"] == {"effort": "low"} and params["text"]["verbosity"] == "low"
+    assert params["store"] is True and params["include"] == ["reasoning.encrypted_content"]
+    print("[SUCCESS] Responses params test passed!")
+
+
+def test_raw_response_only_on_request():
+    """raw_response stays empty unless keep_raw_response is set, for both endpoints and batches"""
+
+    print("\nTesting raw_response trimming...")
+    if not OPENAI_AVAILABLE:
+        print("[SKIP] openai package not installed")
+        return
+
+    server, base_url = start_stub_server(batch_delay=0.1)
+    try:
+        provider = make_provider(base_url)
+        provider.batch_poll_interval = 0.1
+        for model in ("gpt-5-nano", "gpt-4o-mini"):
+            response = provider.generate(LLMRequest(prompt="hello", model=model, temperature=1.0))
+            assert response.success and response.content == "echo: hello", response.error
+            assert response.raw_response is None
+
+            response = provider.generate(LLMRequest(prompt="hello", model=model, temperature=1.0,
+                                                    keep_raw_response=True))
+            assert response.raw_response["model"] == model
+
+        batch = provider.generate_batch([LLMRequest(prompt="hello", model="gpt-5-nano"),
+                                         LLMRequest(prompt="hello", model="gpt-5-nano", keep_raw_response=True)])
+        assert batch[0].raw_response is None and batch[1].raw_response["status"] == "completed"
+    finally:
+        server.shutdown()
+    print("[SUCCESS] raw_response test passed!")
+
+
+def test_cache_key_follows_output_settings():
+    """Effort and verbosity change the answer and the cache key; storage and includes do not"""
+
+    print("\nTesting cache keys...")
+    base = LLMRequest(prompt="summarize", model="gpt-5-nano")
+    key = make_cache_key("openai", base)
+    assert make_cache_key("openai", LLMRequest(prompt="summarize", model="gpt-5-nano", reasoning_effort="low")) != key
+    assert make_cache_key("openai", LLMRequest(prompt="summarize", model="gpt-5-nano", verbosity="high")) != key
+    assert make_cache_key("openai", LLMRequest(prompt="summarize", model="gpt-5-nano", store=True,
+                                               include=("reasoning.encrypted_content",),
+                                               keep_raw_response=True)) == key
+    print("[SUCCESS] Cache key test passed!")
+
+
+if __name__ == "__main__":
+    test_responses_params()
+    test_raw_response_only_on_request()
+    test_cache_key_follows_output_settings()
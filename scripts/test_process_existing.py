@@ -30,7 +30,7 @@ def test_fetch_txt_file_content():
     mock_response.text = "This is sample taxation content for Germany..."
 
     print("Test 1: Successful file fetch")
-    with patch('requests.get', return_value=mock_response):
+    with patch('requests.Session.get', return_value=mock_response):
         result = fetch_txt_file_content("taxation_germany.txt", "http://localhost:5000")
 
         assert result is not None, "Should return content"
@@ -43,7 +43,7 @@ def test_fetch_txt_file_content():
     mock_failed_response.text = "Not Found"
 
     print("\nTest 2: Failed file fetch (HTTP 404)")
-    with patch('requests.get', return_value=mock_failed_response):
+    with patch('requests.Session.get', return_value=mock_failed_response):
         result = fetch_txt_file_content("taxation_nonexistent.txt", "http://localhost:5000")
 
         assert result is None, "Should return None on failure"
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Test script for the TTL health cache and concurrent provider probing
+"""
+
+import sys
+import os
+import time
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from llm_providers import LLMProvider, LLMProviderManager, LLMRequest, LLMResponse
+
+PROBE_DELAY = 0.3
+
+
+class SlowProbeProvider(LLMProvider):
+    """Provider whose health check and model list take PROBE_DELAY seconds"""
+
+    def __init__(self, name: str, available: bool = True):
+        super().__init__(name)
+        self.available = available
+        self.probes = 0
+        self.model_calls = 0
+
+    def generate(self, request: LLMRequest) -> LLMResponse:
+        return LLMResponse(content="ok", success=True, provider=self.provider_name,
+                           model=request.model, processing_time=0.0)
+
+    def is_available(self) -> bool:
+        self.probes += 1
+        time.sleep(PROBE_DELAY)
+        return self.available
+
+    def list_models(self):
+        self.model_calls += 1
+        time.sleep(PROBE_DELAY)
+        return ["model-a", "model-b"]
+
+
+def test_probes_run_concurrently():
+    """Probing several providers should take about one probe, not the sum"""
+
+    print("Testing concurrent availability probes...")
+    manager = LLMProviderManager()
+    providers = [SlowProbeProvider(f"p{i}", available=(i != 2)) for i in range(4)]
+    for provider in providers:
+        manager.add_provider(provider)
+
+    start_time = time.time()
+    available = manager.get_available_providers()
+    elapsed = time.time() - start_time
+
+    print(f"Available: {available} in {elapsed:.2f}s")
+    assert available == ["p0", "p1", "p3"]
+    assert elapsed < PROBE_DELAY * 2, "Probes should overlap"
+    print("[SUCCESS] Concurrent probe test passed!")
+
+
+def test_results_cached_for_ttl():
+    """Repeated checks within the TTL reuse the last probe"""
+
+    print("\nTesting health TTL cache...")
+    manager = LLMProviderManager(health_ttl=0.5)
+    provider = SlowProbeProvider("ollama")
+    manager.add_provider(provider)
+    wrapped = manager.get_provider("ollama")
+
+    for _ in range(5):
+        assert wrapped.is_available()
+        assert manager.auto_select_provider(["ollama"]) is wrapped
+    assert provider.probes == 1, f"Expected one probe, got {provider.probes}"
+
+    for _ in range(3):
+        assert wrapped.list_models() == ["model-a", "model-b"]
+    assert provider.model_calls == 1, "Model list should be cached"
+
+    time.sleep(0.6)
+    wrapped.is_available()
+    assert provider.probes == 2, "Expired entry should be probed again"
+    print("[SUCCESS] Health TTL cache test passed!")
+
+
+def test_background_probe_does_not_block():
+    """wait=False returns at once; a later is_available() joins the running probe"""
+
+    print("\nTesting background probing...")
+    manager = LLMProviderManager()
+    provider = SlowProbeProvider("ollama")
+    manager.add_provider(provider)
+
+    start_time = time.time()
+    manager.probe_providers(wait=False)
+    assert time.time() - start_time < PROBE_DELAY / 2, "Background probe should not block"
+
+    assert manager.get_provider("ollama").is_available()
+    assert provider.probes == 1, "is_available() should reuse the in-flight probe"
+    print("[SUCCESS] Background probe test passed!")
+
+
+if __name__ == "__main__":
+    test_probes_run_concurrently()
+    test_results_cached_for_ttl()
+    test_background_probe_does_not_block()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Test script for OpenAI request/token rate limiting
+"""
+
+import sys
+import os
+import time
+import threading
+import concurrent.futures
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from llm_providers import LLMProvider, LLMProviderManager, LLMRequest, LLMResponse, parse_retry_after
+from llm_limits import RateLimiter, RateLimitedProvider
+
+
+class QuotaProvider(LLMProvider):
+    """Fake OpenAI that answers 429 with Retry-After for its first rejections"""
+
+    def __init__(self, reject_first: int = 0, retry_after: float = 0.2, total_tokens: int = 50):
+        super().__init__("openai")
+        self.reject_first = reject_first
+        self.retry_after = retry_after
+        self.total_tokens = total_tokens
+        self.call_times = []
+        self._lock = threading.Lock()
+
+    def generate(self, request: LLMRequest) -> LLMResponse:
+        with self._lock:
+            self.call_times.append(time.monotonic())
+            rejected = len(self.call_times) <= self.reject_first
+        if rejected:
+            return LLMResponse(content="", success=False, provider=self.provider_name, model=request.model,
+                               processing_time=0.0, error="Rate limit reached", status_code=429,
+                               retry_after=self.retry_after)
+        return LLMResponse(content="ok", success=True, provider=self.provider_name, model=request.model,
+                           processing_time=0.0, status_code=200,
+                           token_usage={"prompt_tokens": 10, "completion_tokens": self.total_tokens - 10,
+                                        "total_tokens": self.total_tokens})
+
+    def is_available(self) -> bool:
+        return True
+
+    def list_models(self):
+        return ["gpt-4o-mini"]
+
+
+def test_parse_retry_after():
+    """Retry-After seconds and retry-after-ms are both understood"""
+
+    print("Testing Retry-After parsing...")
+    assert parse_retry_after({"retry-after": "3"}) == 3.0
+    assert parse_retry_after({"retry-after-ms": "250"}) == 0.25
+    assert parse_retry_after({}) is None
+    assert parse_retry_after({"retry-after": "soon"}) is None
+    print("[SUCCESS] Retry-After parsing test passed!")
+
+
+def test_requests_per_minute_queue():
+    """Requests beyond the RPM budget wait instead of being sent"""
+
+    print("\nTesting requests-per-minute queueing...")
+    # 600 RPM = burst of 600, then one request per 0.1s; shrink the burst to test the refill
+    limiter = RateLimiter(requests_per_minute=600, verbose=False)
+    limiter.requests.tokens = 2
+    provider = RateLimitedProvider(QuotaProvider(), limiter)
+
+    start = time.monotonic()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+        responses = list(executor.map(provider.generate, [LLMRequest(prompt="p", model="m") for _ in range(5)]))
+    elapsed = time.monotonic() - start
+
+    print(f"5 requests with a burst of 2 took {elapsed:.2f}s")
+    assert all(r.success for r in responses)
+    assert elapsed >= 0.25, "Three requests should have waited for the bucket to refill"
+    print("[SUCCESS] RPM queueing test passed!")
+
+
+def test_token_estimate_corrected_from_usage():
+    """Reservations use max_tokens, then the bucket is corrected to the reported usage"""
+
+    print("\nTesting token estimate correction...")
+    limiter = RateLimiter(tokens_per_minute=10000, verbose=False)
+    provider = RateLimitedProvider(QuotaProvider(total_tokens=50), limiter)
+
+    request = LLMRequest(prompt="x" * 400, model="m", max_tokens=900)
+    assert limiter.estimate(request).tokens == 100 + 900
+
+    provider.generate(request)
+    print(f"Bucket after one request: {limiter.tokens.tokens:.0f}")
+    assert 9950 <= limiter.tokens.tokens < 9960, "Only the 50 reported tokens should be charged"
+
+    # Without max_tokens the estimate follows measured completions
+    assert limiter.estimate(LLMRequest(prompt="x" * 400, model="m")).tokens == 100 + 40
+    print("[SUCCESS] Token correction test passed!")
+
+
+def test_retry_after_pauses_and_retries():
+    """A 429 pauses for Retry-After and the request is sent again"""
+
+    print("\nTesting 429 handling...")
+    inner = QuotaProvider(reject_first=1, retry_after=0.3)
+    manager = LLMProviderManager()
+    manager.add_provider(inner, "openai")
+    manager.enable_rate_limit(("openai",), verbose=False)
+    provider = manager.get_provider("openai")
+
+    response = provider.generate(LLMRequest(prompt="p", model="m"))
+    gap = inner.call_times[1] - inner.call_times[0]
+    print(f"Retried after {gap:.2f}s")
+    assert response.success
+    assert gap >= 0.3, "The retry should wait for Retry-After"
+    assert provider.rate_limiter.stats()["rate_limited"] == 1
+    print("[SUCCESS] 429 handling test passed!")
+
+
+if __name__ == "__main__":
+    test_parse_retry_after()
+    test_requests_per_minute_queue()
+    test_token_estimate_corrected_from_usage()
+    test_retry_after_pauses_and_retries()
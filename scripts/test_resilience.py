@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Test script for hedged requests and the circuit breaker
+"""
+
+import sys
+import os
+import time
+import threading
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from llm_providers import LLMProvider, LLMProviderManager, LLMRequest, LLMResponse, run_coroutine
+from llm_resilience import CircuitBreaker, CircuitBreakerProvider, HedgedProvider, OPEN, CLOSED
+
+
+class ScriptedProvider(LLMProvider):
+    """Provider whose calls are slow or fail according to the prompt"""
+
+    def __init__(self, name: str = "ollama", status_code: int = 200, hang_once: bool = True):
+        super().__init__(name)
+        self.status_code = status_code
+        self.hang_once = hang_once
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def generate(self, request: LLMRequest) -> LLMResponse:
+        with self._lock:
+            self.calls += 1
+            call = self.calls
+            hang = request.prompt == "stuck" and self.hang_once
+            if hang:
+                self.hang_once = False
+        # The first "stuck" prompt hangs, like a request queued behind an overloaded GPU
+        if hang:
+            time.sleep(2.0)
+        else:
+            time.sleep(0.01)
+        success = self.status_code == 200
+        return LLMResponse(content=f"answer {call}" if success else "", success=success,
+                           provider=self.provider_name, model=request.model, processing_time=0.01,
+                           status_code=self.status_code, error=None if success else "HTTP 503")
+
+    def is_available(self) -> bool:
+        return True
+
+    def list_models(self):
+        return ["m"]
+
+
+def test_circuit_opens_and_recovers():
+    """Repeated failures open the circuit; a successful trial closes it"""
+
+    print("Testing circuit breaker...")
+    inner = ScriptedProvider(status_code=503)
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=0.2, verbose=False)
+    provider = CircuitBreakerProvider(inner, breaker)
+
+    for _ in range(5):
+        provider.generate(LLMRequest(prompt="p", model="m"))
+    print(f"Backend calls: {inner.calls}, state: {breaker.state}")
+    assert inner.calls == 3, "Requests after the threshold should fail fast"
+    assert breaker.state == OPEN
+    assert not provider.is_available()
+
+    time.sleep(0.25)
+    inner.status_code = 200
+    response = provider.generate(LLMRequest(prompt="p", model="m"))
+    assert response.success and breaker.state == CLOSED, "Successful trial should close the circuit"
+
+    print("[SUCCESS] Circuit breaker test passed!")
+
+
+def test_hedge_beats_stuck_request():
+    """A request past p95 is duplicated and the faster duplicate wins"""
+
+    print("\nTesting hedged requests...")
+    inner = ScriptedProvider()
+    provider = HedgedProvider(inner, min_samples=5, min_delay=0.05, hedge_budget=0.5, verbose=False)
+    for _ in range(10):
+        provider.generate(LLMRequest(prompt="warm-up", model="m"))
+
+    start = time.monotonic()
+    response = provider.generate(LLMRequest(prompt="stuck", model="m"))
+    elapsed = time.monotonic() - start
+
+    stats = provider.hedge_stats()
+    print(f"Stuck request answered in {elapsed:.2f}s, stats: {stats}")
+    assert response.success
+    assert elapsed < 1.0, "The duplicate should answer long before the stuck request"
+    assert stats["hedged"] == 1 and stats["hedge_wins"] == 1
+
+    print("[SUCCESS] Hedged request test passed!")
+
+
+def test_async_hedge_and_fallback_provider():
+    """Async hedges go to the fallback provider with its own model"""
+
+    print("\nTesting async hedging to a fallback provider...")
+    primary = ScriptedProvider("ollama")
+    fallback = ScriptedProvider("openai", hang_once=False)
+    manager = LLMProviderManager()
+    manager.add_provider(primary, "ollama")
+    manager.add_provider(fallback, "openai")
+    manager.enable_hedging(fallback="openai", fallback_model="gpt-4o-mini",
+                           min_samples=5, min_delay=0.05, hedge_budget=0.5, verbose=False)
+    provider = manager.get_provider("ollama")
+
+    async def run():
+        for _ in range(10):
+            await provider.agenerate(LLMRequest(prompt="warm-up", model="gemma3:12b"))
+        return await provider.agenerate(LLMRequest(prompt="stuck", model="gemma3:12b"))
+
+    start = time.monotonic()
+    response = run_coroutine(run())
+    elapsed = time.monotonic() - start
+
+    print(f"Answered by {response.provider}/{response.model} after {elapsed:.2f}s")
+    assert response.success and response.provider == "openai" and response.model == "gpt-4o-mini"
+    assert fallback.calls == 1
+
+    print("[SUCCESS] Async hedging test passed!")
+
+
+if __name__ == "__main__":
+    test_circuit_opens_and_recovers()
+    test_hedge_beats_stuck_request()
+    test_async_hedge_and_fallback_provider()
@@ -31,7 +31,7 @@ def test_retry_logic():
 
     # Test 1: All attempts fail with 500
     print("\nTest 1: All attempts fail with 500")
-    with patch('requests.post', return_value=mock_response_500):
+    with patch('requests.Session.post', return_value=mock_response_500):
         start_time = time.time()
         result = process_chunk_with_llm(
             country="test_country",
@@ -53,7 +53,7 @@ def test_retry_logic():
     # Test 2: Success after 2 retries
     print("\nTest 2: Success after 2 retries")
     responses = [mock_response_500, mock_response_500, mock_response_200]
-    with patch('requests.post', side_effect=responses):
+    with patch('requests.Session.post', side_effect=responses):
         start_time = time.time()
         result = process_chunk_with_llm(
             country="test_country",
@@ -74,7 +74,7 @@ def test_retry_logic():
 
     # Test 3: Immediate success (no retries)
     print("\nTest 3: Immediate success (no retries)")
-    with patch('requests.post', return_value=mock_response_200):
+    with patch('requests.Session.post', return_value=mock_response_200):
         start_time = time.time()
         result = process_chunk_with_llm(
             country="test_country",
@@ -95,7 +95,7 @@ def test_retry_logic():
 
     # Test 4: Test aggregate function retry logic
     print("\nTest 4: Testing aggregate function retry logic")
-    with patch('requests.post', side_effect=[mock_response_500, mock_response_200]):
+    with patch('requests.Session.post', side_effect=[mock_response_500, mock_response_200]):
         start_time = time.time()
         result = aggregate_chunks_with_llm(
             country="test_country",
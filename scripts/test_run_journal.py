@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Test script for checkpoint/resume: the run journal, resuming an
+interrupted run and progressive taxData2.js output
+"""
+
+import sys
+import os
+import json
+import tempfile
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from extraction_manifest import content_hash
+from llm_stub_provider import offline_processor
+from run_journal import RunJournal
+
+
+def country(name: str, code: str, rate: float) -> dict:
+    return {"name": name, "currency": "EUR", "system": "flat", "countryCode": code,
+            "coordinates": [50.0, 20.0], "brackets": [{"min": 0, "max": None, "rate": rate}]}
+
+
+ORIGINAL = {
+    "poland": country("Poland", "PL", 12),
+    "slovakia": country("Slovakia", "SK", 19),
+    "ukraine": country("Ukraine", "UA", 18),
+}
+ITEMS = [(key, f"scripts/data/taxation_{key}.txt") for key in ORIGINAL]
+
+
+def test_journal_round_trip():
+    """Records are read back by model; a torn last line is skipped; finished runs remove the file"""
+
+    print("Testing journal round trip...")
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = RunJournal(os.path.join(tmp, "journal.jsonl"))
+        assert journal.load() == {}
+
+        journal.open()
+        journal.append("poland", ORIGINAL["poland"], model="gemma3:12b")
+        journal.append("ukraine", ORIGINAL["ukraine"], model="gpt-4o-mini")
+        journal.close()
+        with open(journal.path, "a", encoding="utf-8") as f:
+            f.write('{"country": "slovakia", "da')  # Process died mid-write
+
+        assert set(journal.load()) == {"poland", "ukraine"}
+        assert set(journal.load("gemma3:12b")) == {"poland"}
+
+        # Resuming appends after the last complete record, not onto the torn line
+        journal.open(resume=True)
+        journal.append("slovakia", ORIGINAL["slovakia"], model="gemma3:12b")
+        journal.close()
+        assert set(journal.load()) == {"poland", "ukraine", "slovakia"}
+
+        journal.open(resume=False)  # A fresh run starts a new journal
+        assert journal.load() == {}
+        journal.close(remove=True)
+        assert not os.path.exists(journal.path)
+    print("[SUCCESS] Journal round trip test passed!")
+
+
+def make_processor(tmp: str, resume: bool = False, **options):
+    processor = offline_processor(tmp, resume=resume, journal_path=os.path.join(tmp, "journal.jsonl"),
+                                  manifest_path=os.path.join(tmp, "manifest.json"),
+                                  progressive_interval=0.0, **options)
+    processor.original_data = dict(ORIGINAL)
+    return processor
+
+
+def test_resume_skips_completed_countries():
+    """Countries completed before the interruption are not processed again"""
+
+    print("\nTesting resume...")
+    with tempfile.TemporaryDirectory() as tmp:
+        first = make_processor(tmp)
+        stats = {'processed': 0, 'skipped': 0}
+        assert first._start_journal(ITEMS, stats) == ITEMS
+        first._input_hashes["poland"] = content_hash("Poland: 12% and 32%")
+        first._record_result("poland", country("Poland", "PL", 32), True, stats)
+        first._record_result("slovakia", ORIGINAL["slovakia"], False, stats)  # Fallbacks are not journaled
+        first.journal.close()  # ...the run is interrupted here
+
+        resumed = make_processor(tmp, resume=True)
+        stats = {'processed': 0, 'skipped': 0}
+        remaining = resumed._start_journal(ITEMS, stats)
+        assert [key for key, _ in remaining] == ["slovakia", "ukraine"]
+        assert resumed.updated_data == {"poland": country("Poland", "PL", 32)} and stats['processed'] == 1
+        # The extraction also reaches the manifest the interrupted run never saved
+        assert resumed.manifest.lookup("poland", content_hash("Poland: 12% and 32%"),
+                                       resumed._prompt_version(), "gemma3:12b") is not None
+
+        # Another model does not reuse the journal
+        other = make_processor(tmp, resume=True, model_name="gpt-4o-mini")
+        assert other._start_journal(ITEMS, {'processed': 0, 'skipped': 0}) == ITEMS
+        resumed.journal.close()
+        other.journal.close()
+    print("[SUCCESS] Resume test passed!")
+
+
+def test_invalid_answer_is_not_recorded():
+    """An answer that fails validation falls back to the original data as an unprocessed result"""
+
+    print("\nTesting fallback on an invalid answer...")
+    with tempfile.TemporaryDirectory() as tmp:
+        invalid = country("Poland", "PL", 320)  # Rate out of range
+        processor = make_processor(tmp, reply=json.dumps(invalid), repair=False)
+        filename = os.path.join(tmp, "taxation_poland.txt")
+        with open(filename, "w", encoding="utf-8") as f:
+            f.write("Poland: 12% and 32%")
+
+        stats = {'processed': 0, 'skipped': 0}
+        processor._start_journal(ITEMS, stats)
+        result = processor.process_single_country("poland", filename)
+        assert result == ("poland", ORIGINAL["poland"], False)
+        processor._record_result(*result, stats)
+        processor.journal.close()
+
+        assert stats['processed'] == 0 and processor.journal.load() == {}
+        assert processor.manifest.lookup("poland", content_hash("Poland: 12% and 32%"),
+                                         processor._prompt_version(), "gemma3:12b") is None
+    print("[SUCCESS] Invalid answer fallback test passed!")
+
+
+def test_progressive_output():
+    """taxData2.js holds finished countries and original data for the rest while the run progresses"""
+
+    print("\nTesting progressive output...")
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            os.makedirs("js")
+            processor = make_processor(tmp, progressive_output=True)
+            stats = {'processed': 0, 'skipped': 0}
+            processor._start_journal(ITEMS, stats)
+
+            processor._record_result("ukraine", country("Ukraine", "UA", 23), True, stats)
+            with open("js/taxData2.js", encoding="utf-8") as f:
+                content = f.read()
+            assert "STATUS: IN PROGRESS - 1 of 3 countries done" in content
+            assert content.count("countryCode") == 3 and "rate: 23" in content and "rate: 19" in content
+            assert "Removed: 0 countries" in content
+
+            processor._record_result("poland", country("Poland", "PL", 32), True, stats)
+            with open("js/taxData2.js", encoding="utf-8") as f:
+                content = f.read()
+            assert "2 of 3 countries done" in content
+            # Change notes are rebuilt, not repeated, on every rewrite
+            assert content.count("Tax brackets updated") == 2
+            assert not os.path.exists("js/taxData2.js.tmp")
+        finally:
+            os.chdir(cwd)
+            processor.journal.close()
+    print("[SUCCESS] Progressive output test passed!")
+
+
+if __name__ == "__main__":
+    test_journal_round_trip()
+    test_resume_skips_completed_countries()
+    test_invalid_answer_is_not_recorded()
+    test_progressive_output()
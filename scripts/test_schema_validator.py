@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Test script for the compiled validator: one-pass validation of extracted
+country data and the repair request built from its violations
+"""
+
+import sys
+import os
+import json
+import tempfile
+from dataclasses import dataclass
+from typing import List, Literal, Optional
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from llm_providers import LLMRequest, LLMResponse
+from llm_schema import compile_validator, SchemaViolation
+from js_literal import load_export
+from llm_stub_provider import offline_processor
+from tax_data_updater import validate_country_data
+
+TAX_DATA_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "js", "taxData.js")
+
+UKRAINE = {
+    "name": "Ukraine",
+    "currency": "UAH",
+    "system": "flat",
+    "countryCode": "UA",
+    "coordinates": [50.4501, 30.5234],
+    "brackets": [{"min": 0, "max": None, "rate": 18}],
+    "vat": {"hasVAT": True, "standard": 20.0}
+}
+
+PROGRESSIVE = dict(UKRAINE, system="progressive", brackets=[
+    {"min": 0, "max": 10000, "rate": 10},
+    {"min": 10001, "max": 50000.5, "rate": 20},
+    {"min": 50000.5, "max": None, "rate": 30},
+])
+
+
+@dataclass
+class Item:
+    count: int
+    kind: Literal["a", "b"]
+    label: Optional[str] = None
+
+
+@dataclass
+class Order:
+    items: List[Item]
+    total: float
+    paid: bool
+
+
+def test_compiled_validator():
+    """Every violation is reported with its path; optional fields and unknown keys are fine"""
+
+    print("Testing compiled validator...")
+    validate = compile_validator(Order)
+    assert validate({"items": [{"count": 2, "kind": "a"}], "total": 3, "paid": False, "extra": 1}) == []
+    assert validate({"items": [{"count": 2.0, "kind": "b", "label": None}], "total": 1.5, "paid": True}) == []
+
+    errors = validate({"items": [{"count": 1.5, "kind": "c"}, "x"], "total": True})
+    assert [error.path for error in errors] == ["items[0].count", "items[0].kind", "items[1]", "total", "paid"]
+    assert str(errors[-1]) == "paid: is required"
+    assert validate([]) == [SchemaViolation("", "must be an object, got []")]
+    print("[SUCCESS] Compiled validator test passed!")
+
+
+def test_country_rules():
+    """Bracket order, overlaps and rate ranges are all found in one pass; gaps are allowed"""
+
+    print("\nTesting country validation rules...")
+    known = {"UA", "PL"}
+    assert validate_country_data(UKRAINE, known) == []
+    assert validate_country_data(PROGRESSIVE, known) == []
+
+    broken = dict(PROGRESSIVE, countryCode="XX", coordinates=[150.0, 30.5], brackets=[
+        {"min": 0, "max": 10000, "rate": 10},
+        {"min": 12000, "max": 9000, "rate": 120},  # Inverted range, bad rate
+        {"min": 5000, "max": None, "rate": 30},  # Overlap; open-ended before the end
+        {"min": 60000, "max": 70000, "rate": "40%"},  # Not a number; last bracket must be open
+    ], vat={"hasVAT": "yes", "standard": 200})
+    paths = [error.path for error in validate_country_data(broken, known)]
+    assert paths == [
+        "brackets[3].rate", "vat.hasVAT",  # Schema violations come first
+        "countryCode", "coordinates",
+        "brackets[1].rate", "brackets[1]",
+        "brackets[2].min", "brackets[2].max",
+        "brackets[3].max",
+        "vat.standard",
+    ], paths
+    assert [error.path for error in validate_country_data(dict(UKRAINE, brackets=[]))] == ["brackets"]
+    print("[SUCCESS] Country rules test passed!")
+
+
+def test_existing_data_is_valid():
+    """Every country of taxData.js passes, so a faithful extraction is never rejected"""
+
+    print("\nTesting existing taxData.js entries...")
+    countries = load_export(TAX_DATA_FILE).value
+    known = {country.get("countryCode") for country in countries.values()}
+    invalid = {key: [str(error) for error in validate_country_data(country, known)]
+               for key, country in countries.items()}
+    invalid = {key: errors for key, errors in invalid.items() if errors}
+    assert not invalid, invalid
+    print(f"[SUCCESS] All {len(countries)} existing entries are valid!")
+
+
+def test_repair_request():
+    """An invalid answer is sent back once with all of its problems"""
+
+    print("\nTesting repair requests...")
+    with tempfile.TemporaryDirectory() as tmp:
+        processor = offline_processor(tmp)
+        processor.original_data = {"ukraine": UKRAINE}
+
+        request = LLMRequest(prompt="Analyze Ukraine", model="gemma3:12b", stream=True)
+        invalid = dict(UKRAINE, brackets=[{"min": 0, "max": 100, "rate": 180}])
+        sent = []
+
+        def answer(data):
+            return LLMResponse(content=json.dumps(data), success=True, provider="ollama",
+                               model="gemma3:12b", processing_time=0.1)
+
+        def repair(repair_request):
+            sent.append(repair_request)
+            return answer(dict(UKRAINE, system="progressive"))
+
+        result = processor._handle_llm_response("t1", "ukraine", 0, request, answer(invalid), repair)
+        assert result["system"] == "progressive"
+        assert len(sent) == 1 and not sent[0].stream
+        assert sent[0].prompt.startswith("Analyze Ukraine")
+        assert "brackets[0].rate: rate 180 is not between 0 and 100" in sent[0].prompt
+        assert "brackets[0].max: the last bracket must be open-ended" in sent[0].prompt
+        assert processor.repair_stats == {'requested': 1, 'repaired': 1}
+
+        # A repair that is still invalid is not repaired again
+        sent.clear()
+        result = processor._handle_llm_response("t2", "ukraine", 0, request, answer(invalid),
+                                                lambda r: sent.append(r) or answer(invalid))
+        assert result is None and len(sent) == 1
+        assert processor.repair_stats == {'requested': 2, 'repaired': 1}
+    print("[SUCCESS] Repair request test passed!")
+
+
+if __name__ == "__main__":
+    test_compiled_validator()
+    test_country_rules()
+    test_existing_data_is_valid()
+    test_repair_request()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Test script for single-flight coalescing of identical in-flight requests
+"""
+
+import sys
+import os
+import time
+import asyncio
+import threading
+import concurrent.futures
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from llm_providers import LLMProvider, LLMProviderManager, LLMRequest, LLMResponse, run_coroutine
+from llm_cache import SingleFlightProvider
+
+
+class SlowProvider(LLMProvider):
+    """Provider that counts upstream calls and takes a while to answer"""
+
+    def __init__(self, delay: float = 0.2):
+        super().__init__("ollama")
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def generate(self, request: LLMRequest) -> LLMResponse:
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        return LLMResponse(content=f"answer to {request.prompt}", success=True, provider=self.provider_name,
+                           model=request.model, processing_time=self.delay, status_code=200)
+
+    def generate_batch(self, requests):
+        with self._lock:
+            self.calls += len(requests)
+        return [LLMResponse(content=f"answer to {r.prompt}", success=True, provider=self.provider_name,
+                            model=r.model, processing_time=0.0) for r in requests]
+
+    def is_available(self) -> bool:
+        return True
+
+    def list_models(self):
+        return ["m"]
+
+
+def test_concurrent_identical_requests_share_one_call():
+    """Eight threads with the same prompt cause one upstream call"""
+
+    print("Testing threaded coalescing...")
+    inner = SlowProvider()
+    manager = LLMProviderManager()
+    manager.add_provider(inner, "ollama")
+    manager.enable_single_flight()
+    provider = manager.get_provider("ollama")
+
+    requests = [LLMRequest(prompt="same", model="m") for _ in range(8)]
+    requests.append(LLMRequest(prompt="other", model="m"))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=9) as executor:
+        responses = list(executor.map(provider.generate, requests))
+
+    print(f"Upstream calls: {inner.calls}, stats: {provider.single_flight_stats()}")
+    assert inner.calls == 2, "Identical requests should share one call"
+    assert all(r.content == "answer to same" for r in responses[:8])
+    assert responses[8].content == "answer to other"
+    assert provider.single_flight_stats()["coalesced"] == 7
+
+    # Once the call has finished, the next identical request goes upstream again
+    provider.generate(LLMRequest(prompt="same", model="m"))
+    assert inner.calls == 3
+    print("[SUCCESS] Threaded coalescing test passed!")
+
+
+def test_leader_error_reaches_followers():
+    """An exception in the shared call is raised in every waiting thread"""
+
+    print("\nTesting error propagation...")
+
+    class FailingProvider(SlowProvider):
+        def generate(self, request):
+            super().generate(request)
+            raise ConnectionError("proxy down")
+
+    inner = FailingProvider()
+    provider = SingleFlightProvider(inner)
+
+    def call(_):
+        try:
+            provider.generate(LLMRequest(prompt="same", model="m"))
+        except ConnectionError as e:
+            return str(e)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+        errors = list(executor.map(call, range(4)))
+    assert errors == ["proxy down"] * 4 and inner.calls == 1
+    print("[SUCCESS] Error propagation test passed!")
+
+
+def test_async_and_batch_coalescing():
+    """Concurrent agenerate() calls and duplicates inside a batch are sent once"""
+
+    print("\nTesting async and batch coalescing...")
+
+    inner = SlowProvider(delay=0.1)
+    provider = SingleFlightProvider(inner)
+
+    async def run():
+        return await asyncio.gather(*[provider.agenerate(LLMRequest(prompt="same", model="m")) for _ in range(5)])
+
+    responses = run_coroutine(run())
+    assert inner.calls == 1 and all(r.content == "answer to same" for r in responses)
+
+    batch = [LLMRequest(prompt=p, model="m") for p in ["a", "b", "a", "a"]]
+    responses = provider.generate_batch(batch)
+    print(f"Batch of 4 with 2 distinct prompts sent {inner.calls - 1} requests")
+    assert inner.calls == 3
+    assert [r.content for r in responses] == ["answer to a", "answer to b", "answer to a", "answer to a"]
+    print("[SUCCESS] Async and batch coalescing test passed!")
+
+
+if __name__ == "__main__":
+    test_concurrent_identical_requests_share_one_call()
+    test_leader_error_reaches_followers()
+    test_async_and_batch_coalescing()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Startup-time benchmark for the command-line entry points
+
+Each entry point is started in a fresh interpreter, the way cron and CI run
+it: tools with an argparse interface run --help, the others are imported
+(their work only starts in main()). Run this file directly to print the
+timings table.
+"""
+
+import sys
+import os
+import time
+import statistics
+import subprocess
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Entry points with --help
+CLI_ENTRY_POINTS = ["tax_data_updater", "generate_enhanced_taxation_files", "llm_stub_server"]
+
+# Entry points without an argument parser: only their import is timed
+IMPORT_ENTRY_POINTS = [
+    "apply_tax_updates", "simple_tax_updater", "update_tax_data", "generate_taxation_files",
+    "generate_priority_countries", "move_taxation_files", "debug_gpt5_response", "debug_openai_provider",
+    "llm_providers"
+]
+
+# Dependencies that are loaded by the code path that needs them, never at startup
+DEFERRED_MODULES = ["openai", "pandas", "tiktoken", "aiohttp", "requests"]
+
+# Generous limit for one start; a regression (e.g. an eager openai import) costs most of a second
+MAX_STARTUP_SECONDS = 0.6
+RUNS = 3
+
+
+def time_command(args, runs: int = RUNS) -> float:
+    """Median wall time of running python with args in a fresh interpreter"""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + args, cwd=SCRIPTS_DIR, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def loaded_modules(module: str) -> list:
+    """Deferred dependencies present in sys.modules after importing module"""
+    code = (f"import sys; import {module}; "
+            f"print(','.join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))")
+    result = subprocess.run([sys.executable, "-c", code], cwd=SCRIPTS_DIR, check=True,
+                            capture_output=True, text=True)
+    output = result.stdout.strip().splitlines()
+    return output[-1].split(",") if output and output[-1] else []
+
+
+def benchmark() -> dict:
+    """Startup time of every entry point, in seconds"""
+    baseline = time_command(["-c", "pass"])
+    timings = {"(python)": baseline}
+    for module in CLI_ENTRY_POINTS:
+        timings[f"{module} --help"] = time_command([f"{module}.py", "--help"])
+    for module in IMPORT_ENTRY_POINTS:
+        timings[f"import {module}"] = time_command(["-c", f"import {module}"])
+    return timings
+
+
+def test_pipeline_imports_defer_heavy_dependencies():
+    """Importing the LLM pipeline loads none of openai, pandas, tiktoken, aiohttp or requests"""
+
+    print("Testing deferred imports...")
+    for module in ["llm_providers", "tax_data_updater", "generate_enhanced_taxation_files",
+                   "update_tax_data", "apply_tax_updates", "simple_tax_updater"]:
+        loaded = loaded_modules(module)
+        print(f"  import {module}: {loaded or 'nothing deferred was loaded'}")
+        assert not loaded, f"import {module} loaded {loaded}"
+    print("[SUCCESS] Deferred import test passed!")
+
+
+def test_help_starts_quickly():
+    """--help of the main tools returns well within MAX_STARTUP_SECONDS"""
+
+    print("\nTesting --help startup time...")
+    for module in CLI_ENTRY_POINTS:
+        elapsed = time_command([f"{module}.py", "--help"])
+        print(f"  {module} --help: {elapsed * 1000:.0f} ms")
+        assert elapsed < MAX_STARTUP_SECONDS, f"{module} --help took {elapsed:.2f}s"
+    print("[SUCCESS] Startup time test passed!")
+
+
+if __name__ == "__main__":
+    print(f"Startup times (median of {RUNS} runs):")
+    for name, elapsed in benchmark().items():
+        print(f"  {name:<45} {elapsed * 1000:7.0f} ms")
+    print()
+    test_pipeline_imports_defer_heavy_dependencies()
+    test_help_starts_quickly()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Test script for provider streaming (generate_stream) with early abort
+"""
+
+import sys
+import os
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from llm_providers import OllamaProvider, LLMRequest, collect_stream
+from json_stream import IncrementalJSONChecker
+
+VALID_OUTPUT = ['```json\n', '{"name": ', '"Ukraine", ', '"brackets": [', '{"min": 0, "max": null, "rate": 18}', ']}', '\n```']
+INVALID_OUTPUT = ['{"name": ', '"Ukraine", ', 'The rate is ', 'eighteen percent'] + ['padding '] * 50
+LONG_OUTPUT = ['{"notes": "'] + ['word ' * 20] * 50 + ['"}']
+
+# Prompt -> list of chunks the fake proxy streams back
+SCRIPTS = {"valid": VALID_OUTPUT, "invalid": INVALID_OUTPUT, "long": LONG_OUTPUT}
+chunks_sent = {}
+
+
+class StreamingChatHandler(BaseHTTPRequestHandler):
+    """Fake Ollama proxy that streams NDJSON chunks slowly"""
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+        prompt = payload['messages'][-1]['content']
+
+        if prompt == "error":
+            body = b"model crashed"
+            self.send_response(500)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        chunks_sent[prompt] = 0
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.end_headers()
+        try:
+            for chunk in SCRIPTS[prompt]:
+                line = json.dumps({"message": {"content": chunk}, "done": False}) + "\n"
+                self.wfile.write(line.encode())
+                self.wfile.flush()
+                chunks_sent[prompt] += 1
+                time.sleep(0.01)
+            self.wfile.write(json.dumps({"message": {"content": ""}, "done": True}).encode() + b"\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StreamingChatHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, OllamaProvider(base_url=f"http://127.0.0.1:{server.server_address[1]}")
+
+
+def test_incremental_json_checker():
+    """The checker accepts valid JSON in prose/fences and rejects broken structure early"""
+
+    print("Testing incremental JSON checker...")
+
+    checker = IncrementalJSONChecker()
+    assert checker.feed("Sure {see below}:\n") and not checker.started, "Braces in prose should be skipped"
+    for chunk in VALID_OUTPUT:
+        assert checker.feed(chunk), checker.error
+    assert checker.complete
+
+    checker = IncrementalJSONChecker()
+    assert checker.feed('{"rates": [1, 2,], ')  # Trailing commas are repaired later
+    assert not checker.feed('"vat" 20}'), "Missing colon should be detected"
+    print(f"Detected: {checker.error}")
+
+    checker = IncrementalJSONChecker()
+    assert checker.feed('{\u201cname\u201d: \u201cUkraine\u201d, "quote": "a \u201dcited\u201d word"}'), checker.error
+    assert checker.complete, "Smart quotes are repaired later"
+
+    for broken in ('{"a": [1, 2}', '{"a": tru,', '{"a": 1 "b": 2}', '{"a": "line\nbreak"}'):
+        assert not IncrementalJSONChecker().feed(broken), f"Should reject {broken!r}"
+
+    print("[SUCCESS] Incremental JSON checker test passed!")
+
+
+def test_stream_collects_valid_json():
+    """Streaming a valid answer returns the full content"""
+
+    print("\nTesting streamed generation...")
+    server, provider = start_server()
+    try:
+        seen = []
+        response = collect_stream(provider, LLMRequest(prompt="valid", model="m"),
+                                  on_chunk=seen.append, json_check=True)
+        assert response.success, response.error
+        assert response.content == "".join(VALID_OUTPUT)
+        assert seen == VALID_OUTPUT, "on_chunk should see every delta"
+
+        # generate() with stream=True goes through the same path
+        response = provider.generate(LLMRequest(prompt="valid", model="m", stream=True))
+        assert response.success and response.content == "".join(VALID_OUTPUT)
+    finally:
+        server.shutdown()
+
+    print("[SUCCESS] Streamed generation test passed!")
+
+
+def test_stream_aborts_invalid_json():
+    """Generation is cancelled once the output cannot be valid JSON"""
+
+    print("\nTesting early abort on invalid JSON...")
+    server, provider = start_server()
+    try:
+        response = collect_stream(provider, LLMRequest(prompt="invalid", model="m"), json_check=True)
+        print(f"Error: {response.error}")
+        assert not response.success
+        assert response.error.startswith("Stream aborted")
+        assert response.content.endswith("The rate is "), "Partial output should be kept"
+
+        time.sleep(0.3)
+        print(f"Server sent {chunks_sent['invalid']} of {len(INVALID_OUTPUT)} chunks")
+        assert chunks_sent["invalid"] < len(INVALID_OUTPUT), "Closing the stream should stop the server"
+    finally:
+        server.shutdown()
+
+    print("[SUCCESS] Invalid JSON abort test passed!")
+
+
+def test_stream_token_budget_and_errors():
+    """Token budget cancels long outputs; HTTP errors become failed responses"""
+
+    print("\nTesting token budget and HTTP errors...")
+    server, provider = start_server()
+    try:
+        response = collect_stream(provider, LLMRequest(prompt="long", model="m"), json_check=True, token_budget=100)
+        print(f"Error: {response.error}")
+        assert not response.success and "token budget" in response.error
+        assert len(response.content) < len("".join(LONG_OUTPUT))
+
+        response = collect_stream(provider, LLMRequest(prompt="error", model="m"))
+        assert not response.success and response.status_code == 500, response
+    finally:
+        server.shutdown()
+
+    print("[SUCCESS] Token budget and error test passed!")
+
+
+if __name__ == "__main__":
+    test_incremental_json_checker()
+    test_stream_collects_valid_json()
+    test_stream_aborts_invalid_json()
+    test_stream_token_budget_and_errors()
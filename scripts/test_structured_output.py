@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Test script for structured output: the CountryTaxData schema, how providers
+send it, and the shorter analysis prompt
+"""
+
+import sys
+import os
+import json
+import tempfile
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from llm_providers import OllamaProvider, OpenAIProvider, LLMRequest, OPENAI_AVAILABLE
+from llm_schema import schema_from_dataclass, drop_null_optionals
+from llm_stub_provider import offline_processor
+from llm_stub_server import start_stub_server
+from tax_data_updater import COUNTRY_TAX_SCHEMA, CountryTaxData
+
+UKRAINE = {
+    "name": "Ukraine",
+    "currency": "UAH",
+    "system": "flat",
+    "countryCode": "UA",
+    "coordinates": [50.4501, 30.5234],
+    "brackets": [{"min": 0, "max": None, "rate": 18, "description": None}],
+    "vat": {"hasVAT": True, "standard": 20.0, "reduced": None, "description": "Standard 20.0%", "notes": None},
+    "special_taxes": [
+        {"type": "military_levy", "target": "gross", "rate": 5, "description": "Additional 5% military levy"}
+    ],
+    "notes": None
+}
+
+
+def test_country_schema():
+    """The schema is strict: every property required, optionals nullable, systems enumerated"""
+
+    print("Testing CountryTaxData schema...")
+    properties = COUNTRY_TAX_SCHEMA["properties"]
+    assert COUNTRY_TAX_SCHEMA["title"] == "CountryTaxData"
+    assert COUNTRY_TAX_SCHEMA["required"] == list(properties)
+    assert COUNTRY_TAX_SCHEMA["additionalProperties"] is False
+    assert properties["system"]["enum"] == ["progressive", "flat", "zero_personal"]
+    assert properties["brackets"]["items"]["properties"]["max"]["type"] == ["number", "null"]
+    assert properties["vat"]["anyOf"][1] == {"type": "null"}
+    special_tax = properties["special_taxes"]["anyOf"][0]["items"]
+    assert special_tax["required"] == ["type", "target", "rate", "description"]
+
+    # Non-strict schemas only require fields without defaults
+    loose = schema_from_dataclass(CountryTaxData, strict=False)
+    assert "vat" not in loose["required"] and "brackets" in loose["required"]
+    print("[SUCCESS] Schema test passed!")
+
+
+def test_drop_null_optionals():
+    """Nulls of optional fields disappear; required nullables like bracket max stay"""
+
+    print("\nTesting null removal...")
+    data = drop_null_optionals(json.loads(json.dumps(UKRAINE)), CountryTaxData)
+    assert "notes" not in data
+    assert data["brackets"] == [{"min": 0, "max": None, "rate": 18}]
+    assert data["vat"] == {"hasVAT": True, "standard": 20.0, "description": "Standard 20.0%"}
+    print("[SUCCESS] Null removal test passed!")
+
+
+def test_provider_payloads():
+    """Ollama sends the schema as "format", OpenAI as a strict json_schema response format"""
+
+    print("\nTesting provider payloads...")
+    request = LLMRequest(prompt="analyze", model="gemma3:12b", response_schema=COUNTRY_TAX_SCHEMA)
+    payload = OllamaProvider("http://localhost:1")._build_payload(request)
+    assert payload["format"] == COUNTRY_TAX_SCHEMA
+    assert "format" not in OllamaProvider("http://localhost:1")._build_payload(
+        LLMRequest(prompt="analyze", model="gemma3:12b"))
+
+    if not OPENAI_AVAILABLE:
+        print("[SKIP] openai not installed")
+        return
+    provider = OpenAIProvider(api_key="sk-test", base_url="http://localhost:1/v1")
+    request = LLMRequest(prompt="analyze", model="gpt-4o-mini", response_schema=COUNTRY_TAX_SCHEMA)
+    chat_format = provider._build_chat_params(request)["response_format"]
+    assert chat_format["type"] == "json_schema"
+    assert chat_format["json_schema"]["name"] == "CountryTaxData"
+    assert chat_format["json_schema"]["strict"] is True
+    assert "title" not in chat_format["json_schema"]["schema"]
+
+    request = LLMRequest(prompt="analyze", model="gpt-5-nano", response_schema=COUNTRY_TAX_SCHEMA)
+    text_format = provider._build_responses_params(request)["text"]["format"]
+    assert text_format["type"] == "json_schema" and text_format["name"] == "CountryTaxData"
+    print("[SUCCESS] Provider payload test passed!")
+
+
+def test_structured_prompt_is_shorter():
+    """The structured instructions drop the format description; the country facts stay in the prompt"""
+
+    print("\nTesting structured prompt...")
+    country = {"name": "Ukraine", "currency": "UAH", "system": "flat", "countryCode": "UA",
+               "coordinates": [50.4501, 30.5234], "brackets": [{"min": 0, "max": None, "rate": 18}]}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        full = offline_processor(tmp)._analysis_instructions()
+        processor = offline_processor(tmp, structured_output=True)
+    short = processor._analysis_instructions()
+    print(f"Instructions: {len(full)} -> {len(short)} characters")
+    assert len(short) < len(full) / 2
+    assert "zero_personal" in short and "REQUIRED JSON STRUCTURE" not in short
+
+    prompt = processor._build_analysis_prompt(country, "Flat 18% income tax.")
+    for fact in ("Flat 18% income tax.", "[50.4501, 30.5234]", '"UA"'):
+        assert fact in prompt
+    print("[SUCCESS] Structured prompt test passed!")
+
+
+def test_ollama_round_trip():
+    """The schema reaches the server and the reply parses without scraping"""
+
+    print("\nTesting structured round trip against the stub server...")
+    seen = []
+
+    def reply(endpoint, body):
+        seen.append(body.get("format"))
+        return json.dumps(UKRAINE)
+
+    server, base_url = start_stub_server(reply=reply)
+    try:
+        provider = OllamaProvider(base_url)
+        response = provider.generate(LLMRequest(prompt="analyze", model="gemma3:12b",
+                                                response_schema=COUNTRY_TAX_SCHEMA))
+        assert response.success
+        assert seen == [COUNTRY_TAX_SCHEMA]
+        data = drop_null_optionals(json.loads(response.content), CountryTaxData)
+        assert data["special_taxes"][0]["type"] == "military_levy" and "notes" not in data
+    finally:
+        server.shutdown()
+    print("[SUCCESS] Round trip test passed!")
+
+
+if __name__ == "__main__":
+    test_country_schema()
+    test_drop_null_optionals()
+    test_provider_payloads()
+    test_structured_prompt_is_shorter()
+    test_ollama_round_trip()
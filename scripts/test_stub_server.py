@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Test script for the Ollama proxy and web extractor stand-ins of llm_stub_server.py
+"""
+
+import sys
+import os
+import json
+import time
+import random
+import concurrent.futures
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import http_client
+from llm_providers import OllamaProvider, LLMRequest
+from llm_stub_server import start_stub_server, parse_latency
+
+
+def test_latency_specs():
+    """Latency specs parse into samplers; bad specs are rejected"""
+
+    print("Testing latency specs...")
+    rng = random.Random(1)
+    assert parse_latency("0.5")(rng) == 0.5
+    assert 0.1 <= parse_latency("uniform:0.1,0.2")(rng) <= 0.2
+    assert parse_latency("lognormal:1,0.5")(rng) > 0
+    for bad in ("gamma:1", "uniform:1", "fast"):
+        try:
+            parse_latency(bad)
+            assert False, f"{bad} should be rejected"
+        except ValueError:
+            pass
+    print("[SUCCESS] Latency spec test passed!")
+
+
+def test_chat_and_stream():
+    """OllamaProvider gets canned replies, token counts and NDJSON streams from the stub"""
+
+    print("\nTesting /chat against OllamaProvider...")
+    reply = json.dumps({"country": "stub", "vat": 20})
+    server, base_url = start_stub_server(reply=lambda endpoint, body: reply, tokens_per_second=200)
+    try:
+        provider = OllamaProvider(base_url)
+        assert provider.is_available()
+        assert "gemma3:12b" in provider.list_models()
+
+        response = provider.generate(LLMRequest(prompt="analyze", model="gemma3:12b"))
+        print(f"Reply: {response.content!r}, usage: {response.token_usage}")
+        assert response.success and json.loads(response.content) == {"country": "stub", "vat": 20}
+        assert response.token_usage["completion_tokens"] == 4
+
+        chunks = list(provider.generate_stream(LLMRequest(prompt="analyze", model="gemma3:12b")))
+        assert len(chunks) == 4 and "".join(chunks) == reply
+    finally:
+        server.shutdown()
+    print("[SUCCESS] /chat test passed!")
+
+
+def test_capacity_and_injected_errors():
+    """Requests beyond --capacity queue; injected 429s carry Retry-After"""
+
+    print("\nTesting capacity and failure injection...")
+    server, base_url = start_stub_server(latency="0.1", capacity=2)
+    try:
+        provider = OllamaProvider(base_url)
+        start = time.monotonic()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=6) as executor:
+            responses = list(executor.map(provider.generate,
+                                          [LLMRequest(prompt=f"p{i}", model="m") for i in range(6)]))
+        elapsed = time.monotonic() - start
+        stats = http_client.get(f"{base_url}/stub/stats").json()
+        print(f"6 requests with capacity 2 took {elapsed:.2f}s, stats: {stats}")
+        assert all(r.success for r in responses)
+        assert stats["max_in_flight"] == 2 and elapsed >= 0.3
+    finally:
+        server.shutdown()
+
+    server, base_url = start_stub_server(rate_limit_rate=1.0, retry_after=2)
+    try:
+        response = OllamaProvider(base_url).generate(LLMRequest(prompt="p", model="m"))
+        assert response.status_code == 429 and response.retry_after == 2.0
+    finally:
+        server.shutdown()
+    print("[SUCCESS] Capacity and failure injection test passed!")
+
+
+def test_web_extractor_files():
+    """Synthetic jurisdictions are listed and served like the web extractor's txt files"""
+
+    print("\nTesting web extractor stand-in...")
+    server, base_url = start_stub_server(jurisdictions=1000)
+    try:
+        listing = http_client.get(f"{base_url}/txt-files").json()
+        assert listing["success"] and listing["count"] == 1000
+        name = listing["txt_files"][-1]
+        text = http_client.get(f"{base_url}/files/{name}").text
+        print(f"{name}: {len(text)} characters")
+        assert text.startswith("Taxation in Jurisdiction 1000")
+
+        extracted = http_client.post_json(f"{base_url}/extract", {"url": "https://example.org/x"}).json()
+        assert extracted["success"] and extracted["content"]
+    finally:
+        server.shutdown()
+    print("[SUCCESS] Web extractor stand-in test passed!")
+
+
+if __name__ == "__main__":
+    test_latency_specs()
+    test_chat_and_stream()
+    test_capacity_and_injected_errors()
+    test_web_extractor_files()
@@ -56,7 +56,7 @@ def test_txt_files_api():
     }
 
     print("Test 1: Successful response with mixed files")
-    with patch('requests.get', return_value=mock_response):
+    with patch('requests.Session.get', return_value=mock_response):
         result = list_txt_files("http://localhost:5000")
 
         assert result is not None, "Should return result"
@@ -72,7 +72,7 @@ def test_txt_files_api():
     mock_failed_response.text = "Internal Server Error"
 
     print("\nTest 2: Failed response (HTTP 500)")
-    with patch('requests.get', return_value=mock_failed_response):
+    with patch('requests.Session.get', return_value=mock_failed_response):
         result = list_txt_files("http://localhost:5000")
 
         assert result is None, "Should return None on failure"
@@ -80,7 +80,7 @@ def test_txt_files_api():
 
     # Mock connection error
     print("\nTest 3: Connection error")
-    with patch('requests.get', side_effect=Exception("Connection refused")):
+    with patch('requests.Session.get', side_effect=Exception("Connection refused")):
         result = list_txt_files("http://localhost:5000")
 
         assert result is None, "Should return None on connection error"
@@ -97,7 +97,7 @@ def test_txt_files_api():
     }
 
     print("\nTest 4: Empty file list")
-    with patch('requests.get', return_value=mock_empty_response):
+    with patch('requests.Session.get', return_value=mock_empty_response):
         result = list_txt_files("http://localhost:5000")
 
         assert result is not None, "Should return result"
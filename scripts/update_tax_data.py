@@ -1,9 +1,11 @@
 #!/usr/bin/env python3
 
-import pandas as pd
+import math
 import re
 import json
 
+from js_literal import load_export, DEFAULT_TAX_DATA_FILE
+
 # Country name mapping from Excel to taxData.js keys
 COUNTRY_MAPPINGS = {
     'United States': 'united_states',
@@ -176,9 +178,13 @@ DEFAULT_COORDINATES = {
     'zimbabwe': [-19.0154, 29.1549]
 }
 
+def is_missing(value):
+    """True for empty spreadsheet cells (None/NaN), like pd.isna for scalars"""
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
 def clean_tax_rate(rate_str):
     """Extract numeric tax rate from string"""
-    if pd.isna(rate_str) or rate_str == 'NaN' or rate_str == '':
+    if is_missing(rate_str) or rate_str == 'NaN' or rate_str == '':
         return None
 
     # Convert to string if not already
@@ -197,7 +203,7 @@ def clean_tax_rate(rate_str):
 
 def clean_vat_rate(vat_str):
     """Extract VAT rates from string"""
-    if pd.isna(vat_str) or vat_str == 'NaN' or vat_str == '':
+    if is_missing(vat_str) or vat_str == 'NaN' or vat_str == '':
         return None
 
     vat_str = str(vat_str)
@@ -238,36 +244,14 @@ def country_name_to_key(country_name):
     return key
 
 def read_current_tax_data():
-    """Read current taxData.js file and extract the data"""
-    with open('js/taxData.js', 'r', encoding='utf-8') as f:
-        content = f.read()
-
-    # Extract the data object
-    start = content.find('export const taxData = {')
-    if start == -1:
-        raise ValueError("Could not find taxData object in file")
-
-    start = content.find('{', start)
-
-    # Find the closing brace (this is simplified, assumes proper structure)
-    brace_count = 0
-    end = start
-    for i, char in enumerate(content[start:], start):
-        if char == '{':
-            brace_count += 1
-        elif char == '}':
-            brace_count -= 1
-            if brace_count == 0:
-                end = i + 1
-                break
-
-    data_str = content[start:end]
-
-    # This is a simplified approach - in practice, you'd need a proper JS parser
-    # For now, we'll work with the existing structure and only update specific fields
-    return content, start, end
+    """Read current taxData.js file; returns its content and the offsets of the taxData object"""
+    parsed = load_export(DEFAULT_TAX_DATA_FILE)
+    return parsed.source, parsed.start, parsed.end
 
 def main():
+    # pandas is only needed to read the spreadsheets
+    import pandas as pd
+
     print("Reading Excel files...")
 
     # Read PIT data